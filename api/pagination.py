@@ -0,0 +1,116 @@
+"""
+Paginación por cursor (keyset) para la API
+
+A diferencia de PageNumberPagination no ejecuta COUNT(*) ni OFFSET: cada
+página filtra por la última clave vista, así el costo por página es
+constante sin importar cuántas filas tenga la tabla.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+from core.keyset import filtro_despues_de, valor_campo
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor sobre una clave compuesta y única, por ejemplo
+    ``('fecha_asiento', 'id')``.
+
+    La vista define ``keyset_fields``; el queryset se ordena por esos campos
+    y el cursor codifica los valores de la última fila de la página.
+
+    La vista también puede devolver una lista de querysets ya en orden (por
+    ejemplo archivo y libro, cuyas claves no se cruzan): cada uno completa
+    lo que falte de la página con el mismo cursor.
+    """
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset_fields = tuple(getattr(view, 'keyset_fields', ('id',)))
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        consultas = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+
+        # Se pide una fila extra para saber si hay página siguiente
+        resultados = []
+        for consulta in consultas:
+            consulta = consulta.order_by(*self.keyset_fields)
+            if cursor is not None:
+                try:
+                    consulta = consulta.filter(filtro_despues_de(self.keyset_fields, cursor))
+                except (ValueError, DjangoValidationError):
+                    raise NotFound(self.invalid_cursor_message)
+            resultados += list(consulta[:self.page_size + 1 - len(resultados)])
+            if len(resultados) > self.page_size:
+                break
+        self.has_next = len(resultados) > self.page_size
+        self.page = resultados[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'page_size': self.page_size,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        ultimo = self.page[-1]
+        valores = [valor_campo(ultimo, campo) for campo in self.keyset_fields]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(valores))
+
+    def get_first_link(self):
+        return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+    # ===== CURSOR =====
+
+    @staticmethod
+    def encode_cursor(valores):
+        """Codifica los valores de la clave como texto opaco"""
+        data = json.dumps([str(v) for v in valores], separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padding = '=' * (-len(encoded) % 4)
+            valores = json.loads(base64.urlsafe_b64decode(encoded + padding).decode())
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(valores, list) or len(valores) != len(self.keyset_fields):
+            raise NotFound(self.invalid_cursor_message)
+        return valores
@@ -8,6 +8,7 @@ from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from accounts.models import PerfilUsuario
+from contabilidad.models import CuentaContable, Asiento, Partida
 
 
 class RegistroCompletoSerializer(serializers.ModelSerializer):
@@ -348,3 +349,92 @@ class ActivarCuentaSerializer(serializers.Serializer):
         if not value or len(value) < 10:
             raise serializers.ValidationError("Token inválido.")
         return value
+
+
+# ===== CONTABILIDAD (SOLO LECTURA) =====
+
+class CamposDinamicosMixin:
+    """
+    Permite seleccionar columnas con ``?fields=a,b,c``.
+    Los campos no solicitados se eliminan antes de serializar.
+    """
+
+    def __init__(self, *args, **kwargs):
+        campos = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if campos is None:
+            request = self.context.get('request')
+            campos = campos_solicitados(request)
+        if campos:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
+
+def campos_solicitados(request):
+    """Lista de campos del parámetro ``fields`` o None si no se envió"""
+    if request is None:
+        return None
+    valor = request.query_params.get('fields')
+    if not valor:
+        return None
+    return [campo.strip() for campo in valor.split(',') if campo.strip()]
+
+
+class CuentaContableSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """Cuenta del plan de cuentas de la empresa"""
+    cuenta_padre = serializers.CharField(source='cuenta_padre.codigo', default=None, read_only=True)
+    saldo_debito = serializers.DecimalField(
+        source='saldo_debito_total', max_digits=15, decimal_places=2, read_only=True
+    )
+    saldo_credito = serializers.DecimalField(
+        source='saldo_credito_total', max_digits=15, decimal_places=2, read_only=True
+    )
+
+    class Meta:
+        model = CuentaContable
+        fields = [
+            'id', 'codigo', 'nombre', 'naturaleza', 'tipo_cuenta', 'cuenta_padre',
+            'nivel', 'acepta_movimiento', 'saldo_inicial', 'saldo_debito',
+            'saldo_credito', 'activa',
+        ]
+
+
+class PartidaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """Línea de un asiento contable"""
+    cuenta_codigo = serializers.CharField(source='cuenta.codigo', read_only=True)
+    cuenta_nombre = serializers.CharField(source='cuenta.nombre', read_only=True)
+    numero_asiento = serializers.CharField(source='asiento.numero_asiento', read_only=True)
+    fecha_asiento = serializers.DateField(source='asiento.fecha_asiento', read_only=True)
+    tercero = serializers.CharField(source='tercero.numero_documento', default=None, read_only=True)
+
+    class Meta:
+        model = Partida
+        fields = [
+            'id', 'asiento', 'numero_asiento', 'fecha_asiento', 'cuenta',
+            'cuenta_codigo', 'cuenta_nombre', 'concepto', 'valor_debito',
+            'valor_credito', 'orden', 'tercero',
+        ]
+
+
+class PartidaAnidadaSerializer(serializers.ModelSerializer):
+    """Partida dentro del detalle de un asiento (sin repetir datos del asiento)"""
+    cuenta_codigo = serializers.CharField(source='cuenta.codigo', read_only=True)
+    cuenta_nombre = serializers.CharField(source='cuenta.nombre', read_only=True)
+
+    class Meta:
+        model = Partida
+        fields = ['id', 'cuenta', 'cuenta_codigo', 'cuenta_nombre', 'concepto',
+                  'valor_debito', 'valor_credito', 'orden']
+
+
+class AsientoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """Asiento contable con sus partidas anidadas (del libro o del archivo)"""
+    partidas = PartidaAnidadaSerializer(source='lineas', many=True, read_only=True)
+
+    class Meta:
+        model = Asiento
+        fields = [
+            'id', 'numero_asiento', 'fecha_asiento', 'tipo_asiento', 'concepto',
+            'observaciones', 'total_debito', 'total_credito', 'estado',
+            'documento_origen', 'fecha_confirmacion', 'partidas',
+        ]
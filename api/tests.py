@@ -1,3 +1,236 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from contabilidad.archivo import ServicioArchivo
+from contabilidad.cierre import ServicioCierre
+from contabilidad.models import Asiento, CuentaContable, Partida, PartidaArchivada
+from core.test_settings import TEST_USER_PASSWORD
+from empresas.models import Empresa, EmpresaActiva, PerfilEmpresa
+
+
+class LibroContableAPIBase(APITestCase):
+    """Dos empresas con asientos y un contador con perfil solo en la primera"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='contador',
+            email='contador@test.com',
+            password=TEST_USER_PASSWORD
+        )
+        self.otro_user = User.objects.create_user(
+            username='otro',
+            email='otro@test.com',
+            password=TEST_USER_PASSWORD
+        )
+        self.empresa = self._crear_empresa('123456789-0', self.user)
+        self.otra_empresa = self._crear_empresa('987654321-0', self.otro_user)
+        PerfilEmpresa.objects.create(
+            usuario=self.user, empresa=self.empresa, rol='contador', asignado_por=self.user
+        )
+        PerfilEmpresa.objects.create(
+            usuario=self.otro_user, empresa=self.otra_empresa, rol='admin', asignado_por=self.otro_user
+        )
+
+        self.caja = self._crear_cuenta(self.empresa, '1105', 'Caja', 'D', 'ACTIVO')
+        self.ingresos = self._crear_cuenta(self.empresa, '4135', 'Ingresos', 'C', 'INGRESO')
+        # Fechas repetidas para que el cursor desempate por id
+        self.asientos = [
+            self._crear_asiento(self.empresa, f'A{numero}', fecha, Decimal('100.00') * numero)
+            for numero, fecha in enumerate(
+                ['2024-01-10', '2024-01-10', '2024-01-15', '2024-02-01', '2024-02-01'], start=1
+            )
+        ]
+        otra_caja = self._crear_cuenta(self.otra_empresa, '1105', 'Caja', 'D', 'ACTIVO')
+        otros_ingresos = self._crear_cuenta(self.otra_empresa, '4135', 'Ingresos', 'C', 'INGRESO')
+        self.asiento_ajeno = self._crear_asiento(
+            self.otra_empresa, 'B1', '2024-01-10', Decimal('50.00'), otra_caja, otros_ingresos
+        )
+
+    def _crear_empresa(self, nit, propietario):
+        return Empresa.objects.create(
+            nit=nit,
+            razon_social=f'Empresa {nit}',
+            direccion='Calle 123',
+            ciudad='Bogotá',
+            telefono='3001234567',
+            email=f'{nit}@test.com',
+            propietario=propietario
+        )
+
+    def _crear_cuenta(self, empresa, codigo, nombre, naturaleza, tipo):
+        return CuentaContable.objects.create(
+            empresa=empresa, codigo=codigo, nombre=nombre, naturaleza=naturaleza, tipo_cuenta=tipo
+        )
+
+    def _crear_asiento(self, empresa, numero, fecha, valor, debito=None, credito=None):
+        asiento = Asiento.objects.create(
+            empresa=empresa,
+            numero_asiento=numero,
+            fecha_asiento=fecha,
+            concepto=f'Venta {numero}',
+            estado='confirmado',
+            creado_por=empresa.propietario
+        )
+        Partida.objects.create(asiento=asiento, cuenta=debito or self.caja, valor_debito=valor, orden=1)
+        Partida.objects.create(asiento=asiento, cuenta=credito or self.ingresos, valor_credito=valor, orden=2)
+        return asiento
+
+    def _autenticar(self, user, empresa=None):
+        token = RefreshToken.for_user(user).access_token
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        if empresa is not None:
+            headers['HTTP_X_EMPRESA_ID'] = str(empresa.pk)
+        self.client.credentials(**headers)
+
+    def _recorrer(self, url):
+        """Sigue los enlaces ``next`` y devuelve las páginas de resultados"""
+        paginas = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            paginas.append(response.data['results'])
+            url = response.data['next']
+        return paginas
+
+class LibroContableAPITest(LibroContableAPIBase):
+    """Tests para los endpoints de solo lectura del libro contable"""
+
+    def test_aislamiento_entre_empresas(self):
+        """Solo se ven los datos de las empresas donde el usuario tiene perfil"""
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/contabilidad/asientos/').status_code, 401)
+
+        # Sin encabezado ni empresa activa no hay empresa que consultar
+        self._autenticar(self.user)
+        self.assertEqual(self.client.get('/api/contabilidad/asientos/').status_code, 403)
+
+        EmpresaActiva.objects.create(usuario=self.user, empresa=self.empresa)
+        response = self.client.get('/api/contabilidad/asientos/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), len(self.asientos))
+
+        # Otra empresa por encabezado, inexistente o un registro ajeno
+        self._autenticar(self.user, self.otra_empresa)
+        self.assertEqual(self.client.get('/api/contabilidad/partidas/').status_code, 403)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}',
+            HTTP_X_EMPRESA_ID='abc',
+        )
+        self.assertEqual(self.client.get('/api/contabilidad/cuentas/').status_code, 403)
+        self._autenticar(self.user, self.empresa)
+        self.assertEqual(
+            self.client.get(f'/api/contabilidad/asientos/{self.asiento_ajeno.pk}/').status_code, 404
+        )
+        partidas = [p for pagina in self._recorrer('/api/contabilidad/partidas/') for p in pagina]
+        self.assertEqual(len(partidas), 2 * len(self.asientos))
+        self.assertNotIn(self.asiento_ajeno.pk, {p['asiento'] for p in partidas})
+
+    def test_cursor_ida_y_vuelta(self):
+        """El cursor recorre todas las filas una vez, con los campos pedidos"""
+        self._autenticar(self.user, self.empresa)
+
+        paginas = self._recorrer('/api/contabilidad/asientos/?page_size=2&fields=id,numero_asiento')
+        self.assertEqual([len(pagina) for pagina in paginas], [2, 2, 1])
+        self.assertEqual(
+            [asiento['numero_asiento'] for pagina in paginas for asiento in pagina],
+            ['A1', 'A2', 'A3', 'A4', 'A5']
+        )
+        self.assertEqual(set(paginas[0][0]), {'id', 'numero_asiento'})
+
+        # Filtros de fecha combinados con el cursor
+        paginas = self._recorrer(
+            '/api/contabilidad/partidas/?page_size=3&fecha_desde=2024-01-15&fields=id,valor_debito'
+        )
+        self.assertEqual([len(pagina) for pagina in paginas], [3, 3])
+        self.assertEqual(
+            sum(Decimal(p['valor_debito']) for pagina in paginas for p in pagina), Decimal('1200.00')
+        )
+
+        # Cuentas paginadas por código, con los saldos anotados
+        response = self.client.get('/api/contabilidad/cuentas/?page_size=1&fields=codigo,saldo_debito')
+        self.assertEqual(response.data['results'], [{'codigo': '1105', 'saldo_debito': '0.00'}])
+        self.assertIsNotNone(response.data['next'])
+
+        self.assertEqual(self.client.get('/api/contabilidad/asientos/?cursor=no-es-un-cursor').status_code, 404)
+        self.assertEqual(self.client.get('/api/contabilidad/asientos/?cursor=WyJ4Il0').status_code, 404)
+        self.assertEqual(self.client.get('/api/contabilidad/asientos/?fecha_desde=ayer').status_code, 400)
+
+    def test_periodo_archivado(self):
+        """Asientos y partidas de un período archivado se leen del archivo"""
+        self._crear_cuenta(self.empresa, '3605', 'Utilidad del ejercicio', 'C', 'PATRIMONIO')
+        ServicioCierre.cerrar_periodo(self.empresa, date(2024, 1, 31), self.user)
+        self.assertEqual(ServicioArchivo.archivar(self.empresa), 8)  # 3 asientos + el cierre
+        self._autenticar(self.user, self.empresa)
+
+        response = self.client.get(f'/api/contabilidad/asientos/{self.asientos[0].pk}/')
+        self.assertEqual(
+            [(p['cuenta_codigo'], p['valor_debito']) for p in response.data['partidas']],
+            [('1105', '100.00'), ('4135', '0.00')]
+        )
+
+        # Archivo y libro en una sola secuencia de páginas, sin repetir ni saltar
+        paginas = self._recorrer('/api/contabilidad/partidas/?page_size=3&fields=id,fecha_asiento')
+        self.assertEqual([len(pagina) for pagina in paginas], [3, 3, 3, 3])
+        partidas = [p for pagina in paginas for p in pagina]
+        self.assertEqual(
+            [p['id'] for p in partidas],
+            list(PartidaArchivada.objects.order_by('fecha', 'id').values_list('id', flat=True))
+            + list(Partida.objects.filter(empresa=self.empresa).order_by('fecha', 'id').values_list('id', flat=True))
+        )
+        paginas = self._recorrer('/api/contabilidad/partidas/?fecha_hasta=2024-01-15&fields=id')
+        self.assertEqual(len(paginas[0]), 6)
+
+
+class ImportarAsientosAPITest(LibroContableAPIBase):
+    """Tests para la carga masiva de asientos por la API"""
+
+    URL = '/api/contabilidad/asientos/importar/'
+
+    def _subir(self, contenido, nombre='asientos.jsonl', **datos):
+        archivo = SimpleUploadedFile(nombre, contenido)
+        return self.client.post(self.URL, {'archivo': archivo, **datos}, format='multipart')
+
+    def test_importar_y_rechazos(self):
+        """Importa un CSV y responde 400 (no 500) a archivos inválidos"""
+        self._autenticar(self.user, self.empresa)
+        csv_valido = (
+            'numero_asiento,fecha,concepto,cuenta,debito,credito\n'
+            'IMP-1,2024-03-01,Venta,1105,500.00,\n'
+            'IMP-1,2024-03-01,Venta,4135,,500.00\n'
+        )
+        response = self._subir(csv_valido.encode(), 'asientos.csv', confirmar='true')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['asientos'], response.data['partidas']), (1, 2))
+        self.assertEqual(Asiento.objects.get(numero_asiento='IMP-1', empresa=self.empresa).estado, 'confirmado')
+
+        response = self._subir('IMP-2,2024-03-01,Venta,1105,1,\n'.encode('latin-1') + b'\xf1\xff', 'asientos.csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.data['errores'][0])
+
+        partidas = '[{"cuenta": "1105", "debito": "%s"}, {"cuenta": "4135", "credito": "10"}]'
+        for linea in (
+            '[1]',
+            '{"numero_asiento": "J-1", "fecha": "2024-03-02", "partidas": "1105"}',
+            '{"numero_asiento": "J-2", "fecha": "2024-03-02", "partidas": %s}' % (partidas % 'NaN'),
+            '{"numero_asiento": "J-3", "fecha": "2024-03-02", "tipo_asiento": "cierre", "partidas": %s}'
+            % (partidas % '10'),
+        ):
+            response = self._subir(linea.encode())
+            self.assertEqual(response.status_code, 400, linea)
+            self.assertEqual(response.data['lote_rechazado'], 1)
+        self.assertFalse(Asiento.objects.filter(numero_asiento__startswith='J-').exists())
+
+        response = self.client.post(self.URL, {'formato': 'jsonl'}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+    def test_solo_roles_de_importacion(self):
+        """Un observador de la empresa no puede importar"""
+        PerfilEmpresa.objects.filter(usuario=self.user, empresa=self.empresa).update(rol='observador')
+        self._autenticar(self.user, self.empresa)
+        response = self._subir(b'{}')
+        self.assertEqual(response.status_code, 403)
@@ -5,6 +5,7 @@ Endpoints para móviles/SPA que conviven con vistas MVT
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
+from . import views_contabilidad
 
 app_name = 'api'
 
@@ -38,4 +39,19 @@ urlpatterns = [
     
     # POST /api/password/reset/confirm/ - Confirmar reset con token
     path('password/reset/confirm/', views.password_reset_confirm_view, name='password_reset_confirm'),
+    
+    # ===== CONTABILIDAD (JWT) =====
+    # GET /api/contabilidad/cuentas/ - Plan de cuentas de la empresa
+    path('contabilidad/cuentas/', views_contabilidad.CuentaContableListAPIView.as_view(), name='cuentas_lista'),
+    path('contabilidad/cuentas/<int:pk>/', views_contabilidad.CuentaContableDetailAPIView.as_view(), name='cuentas_detalle'),
+    
+    # GET /api/contabilidad/asientos/ - Asientos con partidas anidadas
+    path('contabilidad/asientos/', views_contabilidad.AsientoListAPIView.as_view(), name='asientos_lista'),
+    path('contabilidad/asientos/<int:pk>/', views_contabilidad.AsientoDetailAPIView.as_view(), name='asientos_detalle'),
+    
+    # POST /api/contabilidad/asientos/importar/ - Carga masiva CSV/JSONL
+    path('contabilidad/asientos/importar/', views_contabilidad.ImportarAsientosAPIView.as_view(), name='asientos_importar'),
+    
+    # GET /api/contabilidad/partidas/ - Líneas del libro por cursor
+    path('contabilidad/partidas/', views_contabilidad.PartidaListAPIView.as_view(), name='partidas_lista'),
 ]
@@ -0,0 +1,247 @@
+"""
+Endpoints del libro contable (JWT)
+
+Pensados para integraciones que descargan grandes volúmenes:
+- Filtrados siempre por la empresa del usuario (multi-tenant)
+- Paginación por cursor sobre (fecha, id), sin COUNT(*) ni OFFSET
+- Selección de columnas con ?fields=
+- Importación masiva de asientos por lotes
+"""
+import io
+from datetime import date
+
+from rest_framework import generics, status
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from contabilidad.archivo import ServicioArchivo
+from contabilidad.importacion import ErrorImportacion, ImportadorAsientos, leer_archivo
+from contabilidad.models import CuentaContable, Asiento
+from core import request_context
+from empresas.models import Empresa, EmpresaActiva, PerfilEmpresa
+
+from .pagination import KeysetPagination
+from .serializers import (
+    CuentaContableSerializer,
+    AsientoSerializer,
+    PartidaSerializer,
+    campos_solicitados,
+)
+
+# Encabezado opcional para elegir la empresa cuando el usuario tiene varias
+EMPRESA_HEADER = 'HTTP_X_EMPRESA_ID'
+
+# Roles que pueden cargar asientos masivamente
+ROLES_IMPORTACION = ('admin', 'contador')
+
+
+def obtener_empresa_api(request):
+    """
+    Resuelve la empresa de la petición API.
+
+    Prioridad:
+    1. Encabezado ``X-Empresa-Id`` o parámetro ``empresa``
+    2. Empresa activa guardada en BD para el usuario
+    El usuario debe tener un perfil activo en la empresa (salvo superusuarios).
+    """
+    empresa_id = request.META.get(EMPRESA_HEADER) or request.query_params.get('empresa')
+
+    if empresa_id:
+        try:
+            empresa = Empresa.objects.get(pk=int(empresa_id), activa=True)
+        except (ValueError, Empresa.DoesNotExist):
+            raise PermissionDenied('Empresa no encontrada.')
+    else:
+        activa = EmpresaActiva.objects.select_related('empresa').filter(usuario=request.user).first()
+        if activa is None:
+            raise PermissionDenied('Debes indicar la empresa con el encabezado X-Empresa-Id.')
+        empresa = activa.empresa
+
+    if not request.user.is_superuser and not PerfilEmpresa.objects.filter(
+        usuario=request.user, empresa=empresa, activo=True
+    ).exists():
+        raise PermissionDenied('No tienes acceso a esta empresa.')
+
+    return empresa
+
+
+class LibroContableAPIMixin:
+    """Configuración común: JWT, empresa del usuario y paginación por cursor"""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        request.empresa_activa = obtener_empresa_api(request)
+        # JWT autentica en la vista, después de los middleware
+        request_context.actualizar(usuario=request.user, empresa=request.empresa_activa)
+
+    def campo_solicitado(self, nombre):
+        campos = campos_solicitados(self.request)
+        return campos is None or nombre in campos
+
+    def fechas_solicitadas(self):
+        """(desde, hasta) de ?fecha_desde= y ?fecha_hasta= (AAAA-MM-DD); None si no vienen"""
+        params = self.request.query_params
+        try:
+            return tuple(
+                date.fromisoformat(params[nombre]) if params.get(nombre) else None
+                for nombre in ('fecha_desde', 'fecha_hasta')
+            )
+        except ValueError:
+            raise ValidationError('Formato de fecha inválido, use AAAA-MM-DD.')
+
+    def filtrar_fechas(self, queryset, campo):
+        """Aplica ?fecha_desde= y ?fecha_hasta= sobre ``campo``"""
+        desde, hasta = self.fechas_solicitadas()
+        if desde:
+            queryset = queryset.filter(**{f'{campo}__gte': desde})
+        if hasta:
+            queryset = queryset.filter(**{f'{campo}__lte': hasta})
+        return queryset
+
+
+class CuentaContableListAPIView(LibroContableAPIMixin, generics.ListAPIView):
+    """
+    GET /api/contabilidad/cuentas/
+    Plan de cuentas de la empresa ordenado por código
+    Filtros: ?activa=true|false, ?codigo= (prefijo)
+    """
+    serializer_class = CuentaContableSerializer
+    keyset_fields = ('codigo', 'id')
+
+    def get_queryset(self):
+        queryset = CuentaContable.objects.filter(empresa=self.request.empresa_activa)
+        if self.campo_solicitado('saldo_debito') or self.campo_solicitado('saldo_credito'):
+            queryset = CuentaContable.anotar_saldos_pendientes(queryset)
+        if self.campo_solicitado('cuenta_padre'):
+            queryset = queryset.select_related('cuenta_padre')
+
+        params = self.request.query_params
+        if params.get('activa') in ('true', 'false'):
+            queryset = queryset.filter(activa=params['activa'] == 'true')
+        if params.get('codigo'):
+            queryset = queryset.filter(codigo__startswith=params['codigo'])
+        return queryset
+
+
+class CuentaContableDetailAPIView(LibroContableAPIMixin, generics.RetrieveAPIView):
+    """GET /api/contabilidad/cuentas/<id>/"""
+    serializer_class = CuentaContableSerializer
+
+    def get_queryset(self):
+        return CuentaContable.objects.filter(
+            empresa=self.request.empresa_activa
+        ).select_related('cuenta_padre')
+
+
+class AsientoListAPIView(LibroContableAPIMixin, generics.ListAPIView):
+    """
+    GET /api/contabilidad/asientos/
+    Asientos con sus partidas anidadas (del libro o del archivo), paginados
+    por (fecha_asiento, id)
+    Filtros: ?estado=, ?tipo_asiento=, ?fecha_desde=, ?fecha_hasta=
+    """
+    serializer_class = AsientoSerializer
+    keyset_fields = ('fecha_asiento', 'id')
+
+    def get_queryset(self):
+        queryset = Asiento.objects.filter(empresa=self.request.empresa_activa)
+        if self.campo_solicitado('partidas'):
+            queryset = queryset.prefetch_related('partidas__cuenta', 'partidas_archivadas__cuenta')
+
+        params = self.request.query_params
+        if params.get('estado'):
+            queryset = queryset.filter(estado=params['estado'])
+        if params.get('tipo_asiento'):
+            queryset = queryset.filter(tipo_asiento=params['tipo_asiento'])
+        return self.filtrar_fechas(queryset, 'fecha_asiento')
+
+
+class AsientoDetailAPIView(LibroContableAPIMixin, generics.RetrieveAPIView):
+    """GET /api/contabilidad/asientos/<id>/"""
+    serializer_class = AsientoSerializer
+
+    def get_queryset(self):
+        return Asiento.objects.filter(
+            empresa=self.request.empresa_activa
+        ).prefetch_related('partidas__cuenta', 'partidas_archivadas__cuenta')
+
+
+class PartidaListAPIView(LibroContableAPIMixin, generics.ListAPIView):
+    """
+    GET /api/contabilidad/partidas/
+    Líneas del libro paginadas por (fecha del asiento, id)
+    Filtros: ?cuenta= (código), ?estado= (del asiento), ?fecha_desde=, ?fecha_hasta=
+    Si el rango llega a un período archivado se leen primero las partidas
+    del archivo y luego las del libro, con el mismo cursor.
+    """
+    serializer_class = PartidaSerializer
+    keyset_fields = ('fecha', 'id')
+
+    def get_queryset(self):
+        """Un queryset por cada modelo de partidas del rango, en orden cronológico"""
+        fuentes = ServicioArchivo.modelos_partidas(self.request.empresa_activa.pk, *self.fechas_solicitadas())
+        return [self._partidas(modelo) for modelo in fuentes]
+
+    def _partidas(self, modelo):
+        queryset = modelo.objects.filter(
+            empresa=self.request.empresa_activa
+        ).select_related('asiento', 'cuenta')
+        if self.campo_solicitado('tercero'):
+            queryset = queryset.select_related('tercero')
+
+        params = self.request.query_params
+        if params.get('cuenta'):
+            queryset = queryset.filter(cuenta__codigo=params['cuenta'])
+        if params.get('estado'):
+            queryset = queryset.filter(asiento__estado=params['estado'])
+        return self.filtrar_fechas(queryset, 'fecha')
+
+
+class ImportarAsientosAPIView(LibroContableAPIMixin, generics.GenericAPIView):
+    """
+    POST /api/contabilidad/asientos/importar/
+    Importación masiva de asientos (multipart)
+    Body: archivo=<csv|jsonl>, formato=csv|jsonl, confirmar=true|false
+    Cada lote se guarda en su propia transacción; si uno es inválido se
+    rechaza completo y se responde 400 con los errores y lo ya importado.
+    """
+    parser_classes = [MultiPartParser]
+    pagination_class = None
+
+    def post(self, request):
+        if not request.user.is_superuser and not PerfilEmpresa.objects.filter(
+            usuario=request.user,
+            empresa=request.empresa_activa,
+            activo=True,
+            rol__in=ROLES_IMPORTACION,
+        ).exists():
+            raise PermissionDenied('Solo administradores y contadores pueden importar asientos.')
+
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            raise ValidationError({'archivo': 'Debe adjuntar el archivo a importar.'})
+
+        formato = request.data.get('formato') or archivo.name.rsplit('.', 1)[-1].lower()
+        if formato not in ('csv', 'jsonl'):
+            raise ValidationError({'formato': 'Formato no soportado, use csv o jsonl.'})
+
+        importador = ImportadorAsientos(
+            request.empresa_activa,
+            request.user,
+            confirmar=str(request.data.get('confirmar', '')).lower() == 'true',
+        )
+        texto = io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline='')
+        try:
+            resultado = importador.importar(leer_archivo(texto, formato))
+        except ErrorImportacion as e:
+            data = e.resultado.como_dict() if e.resultado else {}
+            data.update({'success': False, 'lote_rechazado': e.lote, 'errores': e.errores})
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'success': True, **resultado.como_dict()}, status=status.HTTP_201_CREATED)
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogos', '0003_alter_tercero_telefono'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['empresa', 'nombre', 'id'], name='catalogos_p_empresa_09d7dc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tercero',
+            index=models.Index(fields=['empresa', 'razon_social', 'id'], name='catalogos_t_empresa_5f453e_idx'),
+        ),
+    ]
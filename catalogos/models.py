@@ -123,6 +123,10 @@ class Tercero(models.Model):
         verbose_name_plural = "Terceros"
         unique_together = ['empresa', 'numero_documento']
         ordering = ['razon_social']
+        indexes = [
+            # Paginación por cursor de los listados (PaginacionKeysetMixin)
+            models.Index(fields=['empresa', 'razon_social', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.razon_social} ({self.numero_documento})"
@@ -381,6 +385,10 @@ class Producto(models.Model):
         verbose_name_plural = "Productos"
         unique_together = ['empresa', 'codigo']
         ordering = ['nombre']
+        indexes = [
+            # Paginación por cursor de los listados (PaginacionKeysetMixin)
+            models.Index(fields=['empresa', 'nombre', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
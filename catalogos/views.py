@@ -14,7 +14,8 @@ IMPUESTOS_LISTA_URL = 'catalogos:impuestos_lista'
 from .models import Tercero, Impuesto, MetodoPago, Producto
 from core.base_views import (
     BaseListView, BaseDetailView, BaseCreateView, 
-    BaseUpdateView, BaseDeleteView, BaseIndexView
+    BaseUpdateView, BaseDeleteView, BaseIndexView,
+    PaginacionKeysetMixin
 )
 
 # Constantes para evitar duplicación de literales de URL
@@ -26,7 +27,7 @@ METODO_PAGO_LIST_URL = 'catalogos:metodos_pago_lista'
 class CatalogosIndexView(LoginRequiredMixin, TemplateView):
     template_name = 'catalogos/index.html'
 
-class TerceroListView(LoginRequiredMixin, EmpresaFilterMixin, ListView):
+class TerceroListView(PaginacionKeysetMixin, LoginRequiredMixin, EmpresaFilterMixin, ListView):
     model = Tercero
     template_name = 'catalogos/tercero_list.html'
     context_object_name = 'object_list'
@@ -164,11 +165,12 @@ class MetodoPagoDeleteView(LoginRequiredMixin, EmpresaFilterMixin, DeleteView):
     template_name = 'catalogos/metodos_pago_eliminar.html'
     success_url = reverse_lazy(METODO_PAGO_LIST_URL)
 
-class ProductoListView(LoginRequiredMixin, EmpresaFilterMixin, ListView):
+class ProductoListView(PaginacionKeysetMixin, LoginRequiredMixin, EmpresaFilterMixin, ListView):
     model = Producto
     template_name = 'catalogos/productos_lista.html'
     context_object_name = 'productos'
     paginate_by = 50
+    mostrar_total_aproximado = True
     
     def get_queryset(self):
         queryset = super().get_queryset()
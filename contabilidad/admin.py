@@ -1,3 +1,48 @@
 from django.contrib import admin
+from core.admin_mixins import ListadoRapidoMixin
+from core.admin_site import admin_site
+from .models import Asiento, Partida, PeriodoContable
 
-# Register your models here.
+class PartidaInline(admin.TabularInline):
+    model = Partida
+    extra = 0
+    fields = ['orden', 'cuenta', 'concepto', 'valor_debito', 'valor_credito', 'tercero']
+    raw_id_fields = ['cuenta', 'tercero']
+
+@admin.register(Asiento, site=admin_site)
+class AsientoAdmin(ListadoRapidoMixin, admin.ModelAdmin):
+    list_display = ['numero_asiento', 'empresa', 'fecha_asiento', 'tipo_asiento', 'concepto',
+                    'total_debito', 'total_credito', 'estado']
+    list_filter = ['estado', 'tipo_asiento']
+    search_fields = ['numero_asiento', 'concepto', 'documento_origen']
+    date_hierarchy = 'fecha_asiento'
+    ordering = ['-fecha_asiento', '-id']
+    readonly_fields = ['total_debito', 'total_credito', 'fecha_creacion', 'fecha_actualizacion']
+    raw_id_fields = ['creado_por', 'confirmado_por']
+    inlines = [PartidaInline]
+
+@admin.register(Partida, site=admin_site)
+class PartidaAdmin(ListadoRapidoMixin, admin.ModelAdmin):
+    list_display = ['asiento', 'empresa', 'fecha', 'cuenta', 'concepto', 'valor_debito', 'valor_credito']
+    list_filter = ['confirmado']
+    search_fields = ['asiento__numero_asiento', 'cuenta__codigo', 'concepto']
+    ordering = ['-id']
+    raw_id_fields = ['asiento', 'cuenta', 'tercero']
+
+@admin.register(PeriodoContable, site=admin_site)
+class PeriodoContableAdmin(admin.ModelAdmin):
+    """Solo consulta: los períodos se cierran con cerrar_periodo y se archivan con archivar_partidas"""
+    list_display = ['empresa', 'fecha_inicio', 'fecha_fin', 'asiento_cierre', 'cerrado_por', 'fecha_cierre', 'archivado']
+    list_filter = ['archivado']
+    search_fields = ['empresa__nit', 'empresa__razon_social']
+    date_hierarchy = 'fecha_fin'
+    raw_id_fields = ['empresa', 'asiento_cierre', 'cerrado_por']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
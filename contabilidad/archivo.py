@@ -0,0 +1,149 @@
+"""
+Archivo de las partidas de períodos cerrados.
+
+Las partidas de años ya cerrados casi no se consultan, pero agrandan los
+índices de Partida que usan a diario los libros y balances.
+``ServicioArchivo.archivar(empresa)`` mueve a PartidaArchivada las partidas
+de los períodos cerrados con un ``INSERT ... SELECT`` y un ``DELETE``
+(dos sentencias, sin pasar filas por Python) y marca los períodos como
+archivados. Lo que queda en Partida son los períodos abiertos; los saldos a
+la fecha de cada cierre siguen en SaldoCierre.
+
+Los reportes piden a ``modelos_partidas`` de qué tablas leer según el rango
+de fechas: un rango que no llega a lo archivado no toca el archivo.
+"""
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_date
+
+from empresas.models import Empresa
+from .models import Partida, PartidaArchivada, PeriodoContable
+
+
+def _como_fecha(valor):
+    """Fecha de un date o de un texto AAAA-MM-DD (None si no se puede leer)"""
+    if valor is None or isinstance(valor, date):
+        return valor
+    return parse_date(str(valor))
+
+
+def _mover(origen, destino, empresa_id, desde=None, hasta=None):
+    """
+    Copia con ``INSERT ... SELECT`` las filas de ``origen`` de la empresa
+    con fecha entre ``desde`` y ``hasta`` (inclusive) a ``destino`` y las
+    borra de ``origen``. Las dos tablas tienen las mismas columnas.
+
+    Returns:
+        int: Filas movidas
+    """
+    columnas = ', '.join(connection.ops.quote_name(campo.column) for campo in Partida._meta.concrete_fields)
+    condiciones = [f'{connection.ops.quote_name("empresa_id")} = %s']
+    parametros = [empresa_id]
+    if desde is not None:
+        condiciones.append(f'{connection.ops.quote_name("fecha")} >= %s')
+        parametros.append(desde)
+    if hasta is not None:
+        condiciones.append(f'{connection.ops.quote_name("fecha")} <= %s')
+        parametros.append(hasta)
+    where = ' AND '.join(condiciones)
+    tabla_origen = connection.ops.quote_name(origen._meta.db_table)
+    tabla_destino = connection.ops.quote_name(destino._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {tabla_destino} ({columnas}) SELECT {columnas} FROM {tabla_origen} WHERE {where}',
+            parametros,
+        )
+        movidas = cursor.rowcount
+        cursor.execute(f'DELETE FROM {tabla_origen} WHERE {where}', parametros)
+    return movidas
+
+
+class ServicioArchivo:
+    """
+    Archivo y restauración de las partidas de períodos cerrados.
+    """
+
+    @staticmethod
+    def modelos_partidas(empresa_id, desde=None, hasta=None):
+        """
+        Modelos con las partidas de la empresa (o de todas con ``None``)
+        entre ``desde`` y ``hasta`` (fechas o textos AAAA-MM-DD; ``None``
+        sin límite), en orden cronológico: primero el archivo, luego el libro.
+
+        Returns:
+            list: [PartidaArchivada, Partida], [PartidaArchivada] o [Partida]
+        """
+        if empresa_id is None:
+            hay_archivo = PeriodoContable.objects.filter(archivado=True).exists()
+            return [PartidaArchivada, Partida] if hay_archivo else [Partida]
+
+        limite = PeriodoContable.archivado_hasta(empresa_id)
+        if limite is None:
+            return [Partida]
+        desde, hasta = _como_fecha(desde), _como_fecha(hasta)
+        modelos = []
+        if desde is None or desde <= limite:
+            modelos.append(PartidaArchivada)
+        if hasta is None or hasta > limite:
+            modelos.append(Partida)
+        return modelos
+
+    @staticmethod
+    def cierre_y_fuentes(empresa_id, fecha_corte=None):
+        """
+        Último cierre de la empresa hasta ``fecha_corte`` (None sin empresa o
+        sin cierres) y los modelos con las partidas posteriores a ese cierre,
+        para ``CuentaContable.anotar_saldos_acumulados(cierre=, fuentes=)``.
+        """
+        cierre = PeriodoContable.ultimo_cierre(empresa_id, hasta=fecha_corte) if empresa_id else None
+        desde = cierre.fecha_fin + timedelta(days=1) if cierre else None
+        return cierre, ServicioArchivo.modelos_partidas(empresa_id, desde, fecha_corte)
+
+    @staticmethod
+    @transaction.atomic
+    def archivar(empresa, hasta=None):
+        """
+        Archiva las partidas de los períodos cerrados de la empresa hasta el
+        que termina en ``hasta`` (por defecto, el último cerrado).
+
+        Returns:
+            int: Partidas archivadas
+
+        Raises:
+            ValueError: Si no hay un período cerrado sin archivar hasta esa fecha
+        """
+        # Un cierre o archivo a la vez por empresa
+        Empresa.objects.select_for_update().filter(pk=empresa.pk).first()
+
+        periodo = PeriodoContable.ultimo_cierre(empresa.pk, hasta=hasta)
+        if periodo is None or periodo.archivado:
+            raise ValueError("No hay períodos cerrados sin archivar hasta esa fecha")
+
+        anterior = PeriodoContable.archivado_hasta(empresa.pk)
+        desde = anterior + timedelta(days=1) if anterior else None
+        archivadas = _mover(Partida, PartidaArchivada, empresa.pk, desde, periodo.fecha_fin)
+        PeriodoContable.objects.filter(
+            empresa=empresa, archivado=False, fecha_fin__lte=periodo.fecha_fin
+        ).update(archivado=True)
+        return archivadas
+
+    @staticmethod
+    @transaction.atomic
+    def restaurar(empresa, desde):
+        """
+        Devuelve al libro las partidas archivadas con fecha desde ``desde``
+        (todas con ``None``) y desmarca sus períodos (antes de reabrir un
+        período archivado).
+
+        Returns:
+            int: Partidas restauradas
+        """
+        Empresa.objects.select_for_update().filter(pk=empresa.pk).first()
+        restauradas = _mover(PartidaArchivada, Partida, empresa.pk, desde=desde)
+        periodos = PeriodoContable.objects.filter(empresa=empresa, archivado=True)
+        if desde is not None:
+            periodos = periodos.filter(fecha_fin__gte=desde)
+        periodos.update(archivado=False)
+        return restauradas
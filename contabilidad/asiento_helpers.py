@@ -4,7 +4,8 @@ desde movimientos de tesorería (ingresos y egresos).
 """
 from decimal import Decimal
 from django.db import transaction
-from contabilidad.models import Asiento, Partida, CuentaContable
+from contabilidad.models import Asiento, Partida, CuentaContable, DocumentoResumido
+from contabilidad.services import LineaAsiento, ServicioResumenDiario
 
 
 def generar_numero_asiento(empresa):
@@ -101,27 +102,75 @@ def obtener_cuenta_gastos(empresa):
         return cuenta
 
 
+def lineas_ingreso(pago):
+    """
+    Partidas de un ingreso (cobro).
+    
+    Débito: Banco/Caja (1110) - Aumenta el activo
+    Crédito: Ingresos (4105) - Aumenta los ingresos
+    """
+    cuenta_banco = obtener_cuenta_banco(pago.empresa, pago.cuenta_bancaria)
+    cuenta_ingresos = obtener_cuenta_ingresos(pago.empresa)
+    return [
+        LineaAsiento(cuenta_banco, pago.valor, Decimal('0.00'), f'Ingreso en {cuenta_banco.nombre}', pago.tercero),
+        LineaAsiento(cuenta_ingresos, Decimal('0.00'), pago.valor, f'Ingreso por {pago.tercero.razon_social}', pago.tercero),
+    ]
+
+
+def lineas_egreso(pago):
+    """
+    Partidas de un egreso (pago a proveedor).
+    
+    Débito: Gastos (5105) - Aumenta los gastos
+    Crédito: Banco/Caja (1110) - Disminuye el activo
+    """
+    cuenta_banco = obtener_cuenta_banco(pago.empresa, pago.cuenta_bancaria)
+    cuenta_gastos = obtener_cuenta_gastos(pago.empresa)
+    return [
+        LineaAsiento(cuenta_gastos, pago.valor, Decimal('0.00'), f'Gasto por {pago.tercero.razon_social}', pago.tercero),
+        LineaAsiento(cuenta_banco, Decimal('0.00'), pago.valor, f'Egreso desde {cuenta_banco.nombre}', pago.tercero),
+    ]
+
+
+def _crear_partidas(asiento, lineas):
+    """Crea las partidas del asiento en el orden de las líneas"""
+    for orden, linea in enumerate(lineas, start=1):
+        Partida.objects.create(
+            asiento=asiento,
+            cuenta=linea.cuenta,
+            concepto=linea.concepto,
+            valor_debito=linea.debito,
+            valor_credito=linea.credito,
+            orden=orden,
+            tercero=linea.tercero
+        )
+
+
 @transaction.atomic
 def crear_asiento_ingreso(pago, usuario):
     """
     Crea un asiento contable automático para un ingreso (cobro).
     
-    Débito: Banco/Caja (1110) - Aumenta el activo
-    Crédito: Ingresos (4105) - Aumenta los ingresos
+    Si la empresa contabiliza en resumen diario, el ingreso queda en cola
+    para el asiento consolidado del día y no se crea asiento.
     
     Args:
         pago: Instancia del modelo Pago con tipo_pago='cobro'
         usuario: Usuario que crea el asiento
     
     Returns:
-        Asiento creado
+        Asiento creado (None si quedó en cola)
     """
     empresa = pago.empresa
     valor = pago.valor
     
-    # Obtener cuentas contables
-    cuenta_banco = obtener_cuenta_banco(empresa, pago.cuenta_bancaria)
-    cuenta_ingresos = obtener_cuenta_ingresos(empresa)
+    if empresa.contabiliza_resumen_diario:
+        ServicioResumenDiario.encolar(
+            'ingreso', usuario, pago=pago, fecha=pago.fecha_pago, metodo_pago=pago.metodo_pago
+        )
+        return None
+    
+    lineas = lineas_ingreso(pago)
     
     # Crear asiento
     asiento = Asiento.objects.create(
@@ -139,25 +188,7 @@ def crear_asiento_ingreso(pago, usuario):
     )
     
     # Crear partidas
-    Partida.objects.create(
-        asiento=asiento,
-        cuenta=cuenta_banco,
-        concepto=f'Ingreso en {cuenta_banco.nombre}',
-        valor_debito=valor,
-        valor_credito=Decimal('0.00'),
-        orden=1,
-        tercero=pago.tercero
-    )
-    
-    Partida.objects.create(
-        asiento=asiento,
-        cuenta=cuenta_ingresos,
-        concepto=f'Ingreso por {pago.tercero.razon_social}',
-        valor_debito=Decimal('0.00'),
-        valor_credito=valor,
-        orden=2,
-        tercero=pago.tercero
-    )
+    _crear_partidas(asiento, lineas)
     
     # Vincular asiento al pago
     pago.asiento_contable = asiento
@@ -171,22 +202,26 @@ def crear_asiento_egreso(pago, usuario):
     """
     Crea un asiento contable automático para un egreso (pago a proveedor).
     
-    Débito: Gastos (5105) - Aumenta los gastos
-    Crédito: Banco/Caja (1110) - Disminuye el activo
+    Si la empresa contabiliza en resumen diario, el egreso queda en cola
+    para el asiento consolidado del día y no se crea asiento.
     
     Args:
         pago: Instancia del modelo Pago con tipo_pago='egreso'
         usuario: Usuario que crea el asiento
     
     Returns:
-        Asiento creado
+        Asiento creado (None si quedó en cola)
     """
     empresa = pago.empresa
     valor = pago.valor
     
-    # Obtener cuentas contables
-    cuenta_banco = obtener_cuenta_banco(empresa, pago.cuenta_bancaria)
-    cuenta_gastos = obtener_cuenta_gastos(empresa)
+    if empresa.contabiliza_resumen_diario:
+        ServicioResumenDiario.encolar(
+            'egreso', usuario, pago=pago, fecha=pago.fecha_pago, metodo_pago=pago.metodo_pago
+        )
+        return None
+    
+    lineas = lineas_egreso(pago)
     
     # Crear asiento
     asiento = Asiento.objects.create(
@@ -204,25 +239,7 @@ def crear_asiento_egreso(pago, usuario):
     )
     
     # Crear partidas
-    Partida.objects.create(
-        asiento=asiento,
-        cuenta=cuenta_gastos,
-        concepto=f'Gasto por {pago.tercero.razon_social}',
-        valor_debito=valor,
-        valor_credito=Decimal('0.00'),
-        orden=1,
-        tercero=pago.tercero
-    )
-    
-    Partida.objects.create(
-        asiento=asiento,
-        cuenta=cuenta_banco,
-        concepto=f'Egreso desde {cuenta_banco.nombre}',
-        valor_debito=Decimal('0.00'),
-        valor_credito=valor,
-        orden=2,
-        tercero=pago.tercero
-    )
+    _crear_partidas(asiento, lineas)
     
     # Vincular asiento al pago
     pago.asiento_contable = asiento
@@ -237,9 +254,20 @@ def anular_asiento_pago(pago):
     Anula el asiento contable asociado a un pago.
     Se usa cuando se elimina un ingreso o egreso.
     
+    Si el pago pertenece a un resumen diario no se anula el asiento
+    consolidado: se retira el pago de la cola o se reversan solo sus líneas.
+    
     Args:
         pago: Instancia del modelo Pago
+    
+    Returns:
+        bool: True si se anuló el asiento propio del pago
     """
+    documento = DocumentoResumido.objects.filter(pago=pago).select_related('asiento').first()
+    if documento is not None:
+        ServicioResumenDiario.retirar(documento, pago.creado_por)
+        return False
+    
     if pago.asiento_contable:
         asiento = pago.asiento_contable
         asiento.estado = 'anulado'
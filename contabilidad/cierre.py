@@ -0,0 +1,279 @@
+"""
+Cierre de períodos contables.
+
+``ServicioCierre.cerrar_periodo(empresa, fecha_fin, usuario)``:
+
+1. Suma con una consulta agrupada los movimientos de cada cuenta desde el
+   cierre anterior y los agrega a los saldos congelados de ese cierre (o a
+   los saldos iniciales en el primer cierre).
+2. Genera el asiento de cierre: salda cada cuenta de resultado (ingresos,
+   gastos y costos) contra la utilidad o pérdida del ejercicio, con sus
+   partidas en un solo bulk_create.
+3. Congela el saldo de todas las cuentas con movimiento en SaldoCierre.
+
+Desde entonces Asiento.save rechaza fechas dentro del período y los
+reportes (libro mayor, balances) parten del SaldoCierre más cercano en vez
+de recorrer todas las partidas desde el primer año.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.bulk import insertar_en_bloque
+from empresas.models import Empresa
+from .archivo import ServicioArchivo
+from .models import Asiento, CuentaContable, DocumentoResumido, Partida, PeriodoContable, SaldoCierre
+from .services import ServicioContabilidad, ServicioSaldos
+
+# Cuentas PUC donde se traslada el resultado del ejercicio
+CUENTA_UTILIDAD_EJERCICIO = '3605'
+CUENTA_PERDIDA_EJERCICIO = '3610'
+
+# Cuentas que se saldan en el cierre
+TIPOS_CUENTA_RESULTADO = ('INGRESO', 'GASTO', 'COSTO')
+
+# Saldos de cierre por sentencia
+TAMANO_LOTE_CIERRE = 2000
+
+CERO = Decimal('0.00')
+
+
+class ServicioCierre:
+    """
+    Cierre y reapertura de períodos contables.
+    """
+
+    @staticmethod
+    def saldos_acumulados(empresa, fecha_corte, cierre=None):
+        """
+        Débitos y créditos acumulados de cada cuenta a ``fecha_corte``,
+        partiendo del ``cierre`` indicado (o de los saldos iniciales): una
+        consulta agrupada sobre las partidas posteriores al cierre.
+
+        Returns:
+            dict: cuenta_id -> [debito, credito]
+        """
+        acumulados = defaultdict(lambda: [CERO, CERO])
+        if cierre is not None:
+            for cuenta_id, debito, credito in cierre.saldos.values_list('cuenta_id', 'debito', 'credito'):
+                acumulados[cuenta_id] = [debito, credito]
+        else:
+            iniciales = CuentaContable.objects.filter(empresa=empresa).exclude(saldo_inicial=0)
+            for cuenta_id, naturaleza, saldo_inicial in iniciales.values_list('pk', 'naturaleza', 'saldo_inicial'):
+                acumulados[cuenta_id][0 if naturaleza == 'D' else 1] += saldo_inicial
+
+        partidas = Partida.objects.filter(empresa=empresa, confirmado=True, fecha__lte=fecha_corte)
+        if cierre is not None:
+            partidas = partidas.filter(fecha__gt=cierre.fecha_fin)
+        movimientos = partidas.values('cuenta_id').annotate(
+            debito=Sum('valor_debito'), credito=Sum('valor_credito')
+        ).order_by()
+        for fila in movimientos:
+            acumulados[fila['cuenta_id']][0] += fila['debito']
+            acumulados[fila['cuenta_id']][1] += fila['credito']
+        return acumulados
+
+    @staticmethod
+    def lineas_cierre(empresa, acumulados):
+        """
+        Partidas que saldan las cuentas de resultado y trasladan la
+        diferencia a utilidad (crédito) o pérdida (débito) del ejercicio.
+
+        Raises:
+            ValueError: Si falta la cuenta de utilidad o pérdida del ejercicio
+
+        Returns:
+            list: (cuenta_id, debito, credito, concepto) en orden de código
+        """
+        resultado = CuentaContable.objects.filter(
+            empresa=empresa, tipo_cuenta__in=TIPOS_CUENTA_RESULTADO
+        ).order_by('codigo').values_list('pk', 'codigo', 'nombre')
+
+        lineas = []
+        utilidad = CERO
+        for cuenta_id, codigo, nombre in resultado:
+            debito, credito = acumulados.get(cuenta_id, (CERO, CERO))
+            saldo_deudor = debito - credito
+            if saldo_deudor:
+                # Ingresos (acreedores) se debitan y gastos/costos (deudores) se acreditan
+                lineas.append((
+                    cuenta_id,
+                    max(-saldo_deudor, CERO),
+                    max(saldo_deudor, CERO),
+                    f"Cierre {codigo} - {nombre}",
+                ))
+                utilidad -= saldo_deudor
+        if not utilidad:
+            return lineas
+
+        cuentas = dict(CuentaContable.objects.filter(
+            empresa=empresa,
+            codigo__in=[CUENTA_UTILIDAD_EJERCICIO, CUENTA_PERDIDA_EJERCICIO],
+            activa=True,
+        ).values_list('codigo', 'pk'))
+        if utilidad > 0:
+            codigo = CUENTA_UTILIDAD_EJERCICIO
+        else:
+            codigo = CUENTA_PERDIDA_EJERCICIO if CUENTA_PERDIDA_EJERCICIO in cuentas else CUENTA_UTILIDAD_EJERCICIO
+        if codigo not in cuentas:
+            raise ValueError(f"No se encontró la cuenta contable necesaria: {codigo}")
+
+        lineas.append((
+            cuentas[codigo],
+            max(-utilidad, CERO),
+            max(utilidad, CERO),
+            'Utilidad del ejercicio' if utilidad > 0 else 'Pérdida del ejercicio',
+        ))
+        return lineas
+
+    @staticmethod
+    @transaction.atomic
+    def cerrar_periodo(empresa, fecha_fin, usuario):
+        """
+        Cierra el período de la empresa que termina en ``fecha_fin`` (y
+        empieza el día siguiente al cierre anterior).
+
+        Args:
+            empresa: Instancia de Empresa
+            fecha_fin: Último día del período (date)
+            usuario: Usuario que cierra
+
+        Returns:
+            PeriodoContable: Período cerrado
+
+        Raises:
+            ValueError: Si el período ya está cerrado, tiene asientos en
+                borrador o documentos sin contabilizar, o falta la cuenta de
+                resultado del ejercicio
+        """
+        # Un cierre a la vez por empresa
+        Empresa.objects.select_for_update().filter(pk=empresa.pk).first()
+
+        anterior = PeriodoContable.ultimo_cierre(empresa.pk)
+        if anterior is not None and fecha_fin <= anterior.fecha_fin:
+            raise ValueError(f"El período hasta {anterior.fecha_fin} ya está cerrado")
+        fecha_inicio = anterior.fecha_fin + timedelta(days=1) if anterior else None
+
+        borradores = Asiento.objects.filter(empresa=empresa, estado='borrador', fecha_asiento__lte=fecha_fin)
+        pendientes = DocumentoResumido.objects.filter(empresa=empresa, asiento__isnull=True, fecha__lte=fecha_fin)
+        if fecha_inicio:
+            borradores = borradores.filter(fecha_asiento__gte=fecha_inicio)
+        if borradores.exists():
+            raise ValueError(
+                f"Hay {borradores.count()} asientos en borrador en el período; confírmelos o elimínelos antes de cerrar"
+            )
+        if pendientes.exists():
+            raise ValueError(
+                f"Hay {pendientes.count()} documentos sin contabilizar en el resumen diario del período"
+            )
+
+        acumulados = ServicioCierre.saldos_acumulados(empresa, fecha_fin, anterior)
+        lineas = ServicioCierre.lineas_cierre(empresa, acumulados)
+
+        asiento = None
+        if lineas:
+            asiento = ServicioCierre._crear_asiento_cierre(empresa, fecha_fin, usuario, lineas)
+            movimientos = defaultdict(lambda: [CERO, CERO])
+            for cuenta_id, debito, credito, _ in lineas:
+                movimientos[cuenta_id][0] += debito
+                movimientos[cuenta_id][1] += credito
+            ServicioSaldos.aplicar_movimientos(movimientos)
+            for cuenta_id, (debito, credito) in movimientos.items():
+                acumulados[cuenta_id][0] += debito
+                acumulados[cuenta_id][1] += credito
+
+        periodo = PeriodoContable.objects.create(
+            empresa=empresa,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            asiento_cierre=asiento,
+            cerrado_por=usuario,
+        )
+
+        naturalezas = dict(CuentaContable.objects.filter(empresa=empresa).values_list('pk', 'naturaleza'))
+        SaldoCierre.objects.bulk_create(
+            [
+                SaldoCierre(
+                    periodo=periodo,
+                    cuenta_id=cuenta_id,
+                    debito=debito,
+                    credito=credito,
+                    saldo=debito - credito if naturalezas[cuenta_id] == 'D' else credito - debito,
+                )
+                for cuenta_id, (debito, credito) in acumulados.items()
+                if debito or credito
+            ],
+            batch_size=TAMANO_LOTE_CIERRE,
+        )
+        return periodo
+
+    @staticmethod
+    def _crear_asiento_cierre(empresa, fecha_fin, usuario, lineas):
+        """Asiento de cierre confirmado con sus partidas en un bulk_create"""
+        total_debito = sum(linea[1] for linea in lineas)
+        total_credito = sum(linea[2] for linea in lineas)
+        asiento = Asiento.objects.create(
+            empresa=empresa,
+            numero_asiento=ServicioContabilidad.obtener_siguiente_numero_asiento(empresa),
+            fecha_asiento=fecha_fin,
+            tipo_asiento='cierre',
+            concepto=f"Cierre del período al {fecha_fin:%Y-%m-%d}",
+            documento_origen=f"CIERRE-{fecha_fin:%Y%m%d}",
+            total_debito=total_debito,
+            total_credito=total_credito,
+            estado='confirmado',
+            creado_por=usuario,
+            confirmado_por=usuario,
+            fecha_confirmacion=timezone.now(),
+        )
+        partidas = []
+        for orden, (cuenta_id, debito, credito, concepto) in enumerate(lineas, start=1):
+            partida = Partida(
+                asiento=asiento,
+                cuenta_id=cuenta_id,
+                concepto=concepto,
+                valor_debito=debito,
+                valor_credito=credito,
+                orden=orden,
+            )
+            partida.copiar_datos_asiento(asiento)
+            partidas.append(partida)
+        insertar_en_bloque(Partida, partidas)
+        return asiento
+
+    @staticmethod
+    @transaction.atomic
+    def reabrir_ultimo_periodo(empresa):
+        """
+        Reabre el último período cerrado: devuelve al libro sus partidas si
+        estaba archivado, borra sus saldos de cierre y su asiento de cierre y
+        descuenta ese asiento de los saldos de las cuentas.
+
+        Returns:
+            PeriodoContable: Período reabierto (ya eliminado)
+
+        Raises:
+            ValueError: Si la empresa no tiene períodos cerrados
+        """
+        Empresa.objects.select_for_update().filter(pk=empresa.pk).first()
+        periodo = PeriodoContable.ultimo_cierre(empresa.pk)
+        if periodo is None:
+            raise ValueError("La empresa no tiene períodos cerrados")
+
+        if periodo.archivado:
+            ServicioArchivo.restaurar(empresa, periodo.fecha_inicio)
+
+        asiento = periodo.asiento_cierre
+        periodo.delete()
+        if asiento is not None:
+            movimientos = defaultdict(lambda: [CERO, CERO])
+            for cuenta_id, debito, credito in asiento.partidas.values_list('cuenta_id', 'valor_debito', 'valor_credito'):
+                movimientos[cuenta_id][0] -= debito
+                movimientos[cuenta_id][1] -= credito
+            asiento.delete()
+            ServicioSaldos.aplicar_movimientos(movimientos)
+        return periodo
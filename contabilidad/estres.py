@@ -0,0 +1,288 @@
+"""
+Prueba de estrés de la contabilización concurrente.
+
+generar_asiento_venta, generar_asiento_cobro, la numeración de cobros y
+CuentaContable.actualizar_saldos leen un valor, lo modifican en Python y lo
+vuelven a escribir. Con un solo usuario no se nota, pero con varios hilos o
+procesos contabilizando a la vez aparecen números repetidos, huecos y saldos
+perdidos. Este módulo lanza esa carga contra una base PostgreSQL local,
+mide rendimiento y esperas por bloqueos y al final revisa los invariantes.
+"""
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from catalogos.models import MetodoPago, Tercero
+from contabilidad.models import Asiento, CuentaContable
+from contabilidad.services import ServicioContabilidad
+from empresas.models import Empresa
+from facturacion.models import Factura
+from tesoreria.models import Pago
+from tesoreria.services.services import ServicioTesoreria
+
+CERO = Value(Decimal('0.00'), output_field=DecimalField(max_digits=15, decimal_places=2))
+
+# Operaciones que puede ejecutar cada trabajador
+OPERACIONES = ('cobro', 'venta')
+
+# Segundos entre muestras de pg_stat_activity
+INTERVALO_MONITOR = 0.05
+
+# Ejemplos que se muestran por cada invariante violado
+MAX_EJEMPLOS = 5
+
+IVA = Decimal('0.19')
+
+
+@dataclass
+class ResultadoTrabajador:
+    """Lo que reporta cada hilo o proceso al terminar"""
+    exitosas: int = 0
+    errores: Counter = field(default_factory=Counter)
+    latencias: list = field(default_factory=list)
+
+
+def _contabilizar_cobro(empresa, usuario, tercero_id, metodo, valor):
+    """Mismo flujo que CobroCreateView + generar_asiento_cobro"""
+    with transaction.atomic():
+        pago = Pago.objects.create(
+            empresa=empresa,
+            numero_pago=ServicioTesoreria.siguiente_numero_cobro(empresa),
+            fecha_pago=date.today(),
+            tipo_pago='cobro',
+            tercero_id=tercero_id,
+            metodo_pago=metodo,
+            valor=valor,
+            estado='pendiente',
+            creado_por=usuario,
+        )
+        ServicioContabilidad.generar_asiento_cobro(pago)
+
+
+def _contabilizar_venta(empresa, usuario, tercero_id, metodo, valor, tipo_venta, numero_factura):
+    """Factura confirmada + generar_asiento_venta"""
+    impuestos = (valor * IVA).quantize(Decimal('0.01'))
+    with transaction.atomic():
+        factura = Factura.objects.create(
+            empresa=empresa,
+            numero_factura=numero_factura,
+            fecha_factura=date.today(),
+            fecha_vencimiento=date.today(),
+            cliente_id=tercero_id,
+            tipo_venta=tipo_venta,
+            metodo_pago=metodo,
+            subtotal=valor,
+            total_impuestos=impuestos,
+            total=valor + impuestos,
+            estado='confirmada',
+            creado_por=usuario,
+        )
+        ServicioContabilidad.generar_asiento_venta(factura)
+
+
+def ejecutar_trabajador(indice, empresa_id, usuario_id, operaciones, mezcla, semilla=None):
+    """
+    Ejecuta ``operaciones`` contabilizaciones seguidas.
+
+    Es una función de módulo para poder enviarla a otro proceso; recibe
+    solo IDs y abre (y cierra) su propia conexión.
+    """
+    aleatorio = random.Random(None if semilla is None else semilla + indice)
+    resultado = ResultadoTrabajador()
+    try:
+        empresa = Empresa.objects.get(pk=empresa_id)
+        usuario = User.objects.get(pk=usuario_id)
+        terceros = list(Tercero.objects.filter(empresa=empresa).values_list('pk', flat=True))
+        metodo = MetodoPago.objects.filter(empresa=empresa).first()
+
+        for numero in range(1, operaciones + 1):
+            operacion = aleatorio.choice(mezcla)
+            valor = Decimal(aleatorio.randint(1, 500) * 1000)
+            inicio = time.perf_counter()
+            try:
+                if operacion == 'cobro':
+                    _contabilizar_cobro(empresa, usuario, aleatorio.choice(terceros), metodo, valor)
+                else:
+                    _contabilizar_venta(
+                        empresa, usuario, aleatorio.choice(terceros), metodo, valor,
+                        tipo_venta=aleatorio.choice(['contado', 'credito']),
+                        numero_factura=f'EST-{indice:03d}-{numero:06d}',
+                    )
+                resultado.exitosas += 1
+            except Exception as e:
+                resultado.errores[f'{operacion}: {type(e).__name__}'] += 1
+            resultado.latencias.append(time.perf_counter() - inicio)
+    finally:
+        connection.close()
+    return resultado
+
+
+class MonitorBloqueos(threading.Thread):
+    """
+    Muestrea pg_stat_activity mientras dura la prueba y registra cuántas
+    sesiones de la base están esperando un bloqueo y por cuánto tiempo.
+    En motores distintos de PostgreSQL no hace nada.
+    """
+
+    def __init__(self, intervalo=INTERVALO_MONITOR):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.activo = connection.vendor == 'postgresql'
+        self.muestras = 0
+        self.esperando_max = 0
+        self.espera_max_segundos = 0.0
+        self.segundos_sesion_esperando = 0.0
+        self._detener = threading.Event()
+
+    def run(self):
+        if not self.activo:
+            return
+        try:
+            with connection.cursor() as cursor:
+                while not self._detener.is_set():
+                    cursor.execute(
+                        "SELECT count(*), coalesce(max(extract(epoch FROM now() - state_change)), 0) "
+                        "FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                    )
+                    esperando, espera = cursor.fetchone()
+                    self.muestras += 1
+                    self.esperando_max = max(self.esperando_max, esperando)
+                    self.espera_max_segundos = max(self.espera_max_segundos, float(espera))
+                    self.segundos_sesion_esperando += esperando * self.intervalo
+                    self._detener.wait(self.intervalo)
+        finally:
+            connection.close()
+
+    def detener(self):
+        self._detener.set()
+        self.join()
+
+
+def ejecutar_carga(empresa, usuario, trabajadores, operaciones, modo='hilos', mezcla=OPERACIONES, semilla=None):
+    """
+    Lanza ``trabajadores`` hilos o procesos con ``operaciones`` cada uno.
+
+    Returns:
+        tuple: (segundos, [ResultadoTrabajador], MonitorBloqueos)
+    """
+    argumentos = [
+        (indice, empresa.pk, usuario.pk, operaciones, tuple(mezcla), semilla)
+        for indice in range(1, trabajadores + 1)
+    ]
+    if modo == 'procesos':
+        # Los procesos hijos no deben heredar conexiones abiertas del padre
+        connections.close_all()
+        ejecutor = ProcessPoolExecutor(max_workers=trabajadores)
+    else:
+        ejecutor = ThreadPoolExecutor(max_workers=trabajadores)
+
+    monitor = MonitorBloqueos()
+    inicio = time.perf_counter()
+    with ejecutor:
+        pendientes = ejecutor.map(ejecutar_trabajador, *zip(*argumentos))
+        # El monitor abre su conexión después de crear los procesos
+        monitor.start()
+        resultados = list(pendientes)
+    segundos = time.perf_counter() - inicio
+    monitor.detener()
+    return segundos, resultados, monitor
+
+
+def _verificar_consecutivos(etiqueta, numeros, convertir):
+    """Números únicos y sin huecos de 1 a N"""
+    violaciones = []
+    enteros = []
+    no_numericos = []
+    for numero in numeros:
+        try:
+            enteros.append(convertir(numero))
+        except (TypeError, ValueError):
+            no_numericos.append(numero)
+
+    if no_numericos:
+        violaciones.append(f'{etiqueta}: {len(no_numericos)} números no numéricos (p. ej. {no_numericos[:MAX_EJEMPLOS]})')
+
+    repetidos = sorted(numero for numero, veces in Counter(enteros).items() if veces > 1)
+    if repetidos:
+        violaciones.append(f'{etiqueta}: {len(repetidos)} números repetidos (p. ej. {repetidos[:MAX_EJEMPLOS]})')
+
+    if enteros:
+        huecos = sorted(set(range(1, max(enteros) + 1)) - set(enteros))
+        if huecos:
+            violaciones.append(f'{etiqueta}: {len(huecos)} huecos en la numeración (p. ej. {huecos[:MAX_EJEMPLOS]})')
+    return violaciones
+
+
+def verificar_invariantes(empresa):
+    """
+    Revisa la consistencia de la empresa después de la carga.
+
+    - Números de asiento y de cobro únicos y consecutivos desde 1.
+    - Cada asiento cuadrado y con totales iguales a la suma de sus partidas.
+    - Saldos débito/crédito de cada cuenta (compactados más pendientes)
+      iguales a la suma de sus partidas confirmadas.
+
+    Returns:
+        list: Mensajes, uno por invariante violado (vacía si todo cuadra)
+    """
+    violaciones = []
+
+    violaciones += _verificar_consecutivos(
+        'Asientos',
+        Asiento.objects.filter(empresa=empresa).values_list('numero_asiento', flat=True),
+        int,
+    )
+    violaciones += _verificar_consecutivos(
+        'Cobros',
+        Pago.objects.filter(empresa=empresa, tipo_pago='cobro').values_list('numero_pago', flat=True),
+        lambda numero: int(numero.replace('COB-', '')),
+    )
+
+    descuadrados = list(
+        Asiento.objects.filter(empresa=empresa)
+        .annotate(
+            suma_debito=Coalesce(Sum('partidas__valor_debito'), CERO),
+            suma_credito=Coalesce(Sum('partidas__valor_credito'), CERO),
+        )
+        .filter(
+            ~Q(total_debito=F('total_credito'))
+            | ~Q(total_debito=F('suma_debito'))
+            | ~Q(total_credito=F('suma_credito'))
+        )
+        .values_list('numero_asiento', flat=True)
+    )
+    if descuadrados:
+        violaciones.append(
+            f'Asientos: {len(descuadrados)} descuadrados o con totales distintos a sus partidas '
+            f'(p. ej. {descuadrados[:MAX_EJEMPLOS]})'
+        )
+
+    confirmadas = Q(partida__confirmado=True)
+    cuentas = (
+        CuentaContable.anotar_saldos_pendientes(CuentaContable.objects.filter(empresa=empresa))
+        .annotate(
+            total_debito=F('saldo_debito') + F('pendiente_debito'),
+            total_credito=F('saldo_credito') + F('pendiente_credito'),
+            suma_debito=Coalesce(Sum('partida__valor_debito', filter=confirmadas), CERO),
+            suma_credito=Coalesce(Sum('partida__valor_credito', filter=confirmadas), CERO),
+        )
+        .filter(~Q(total_debito=F('suma_debito')) | ~Q(total_credito=F('suma_credito')))
+        .values_list('codigo', 'total_debito', 'suma_debito', 'total_credito', 'suma_credito')
+    )
+    for codigo, saldo_debito, suma_debito, saldo_credito, suma_credito in cuentas:
+        violaciones.append(
+            f'Cuenta {codigo}: saldo débito {saldo_debito} vs partidas {suma_debito}, '
+            f'saldo crédito {saldo_credito} vs partidas {suma_credito}'
+        )
+    return violaciones
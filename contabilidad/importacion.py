@@ -0,0 +1,416 @@
+"""
+Importación masiva de asientos contables desde CSV o JSONL.
+
+Pensado para migrar el histórico de un cliente: las cuentas se resuelven
+una sola vez por lote, el cuadre de cada asiento se valida en memoria y la
+inserción se hace con bulk_create (o COPY en PostgreSQL) en transacciones
+por lote. Si un asiento del lote es inválido se rechaza el lote completo.
+
+Formatos aceptados:
+
+- CSV con una fila por partida y las columnas
+  ``numero_asiento, fecha, concepto, cuenta, debito, credito`` y opcionales
+  ``tipo_asiento, concepto_partida, tercero, documento_origen``.
+  Las filas de un mismo asiento deben ser consecutivas; si se omite el
+  número se asigna el siguiente consecutivo de la empresa.
+- JSONL con un asiento por línea:
+  ``{"numero_asiento": "...", "fecha": "AAAA-MM-DD", "concepto": "...",
+  "partidas": [{"cuenta": "1105", "debito": "100", "credito": "0"}]}``
+
+El ``tipo_asiento`` puede ser ordinario (por defecto), apertura o ajuste;
+los asientos de cierre solo los genera el cierre de período.
+"""
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.bulk import insertar_en_bloque
+from .models import MSG_PERIODO_CERRADO, Asiento, Partida, CuentaContable, PeriodoContable
+from .services import ServicioContabilidad, ServicioSaldos
+
+# Asientos por transacción
+TAMANO_LOTE_IMPORTACION = 1000
+
+# Tipos que se pueden importar; los de cierre solo los genera ServicioCierre
+TIPOS_ASIENTO_IMPORTABLES = tuple(
+    tipo for tipo, _ in Asiento.TIPO_ASIENTO_CHOICES if tipo != 'cierre'
+)
+
+CERO = Decimal('0.00')
+
+
+class ErrorImportacion(Exception):
+    """Lote rechazado; ``errores`` contiene los mensajes por asiento"""
+
+    def __init__(self, errores, lote=None):
+        self.errores = errores
+        self.lote = lote
+        self.resultado = None
+        super().__init__(f'Lote {lote} rechazado con {len(errores)} errores' if lote else 'Importación rechazada')
+
+
+@dataclass
+class ResultadoImportacion:
+    """Resumen de una importación"""
+    asientos: int = 0
+    partidas: int = 0
+    lotes: int = 0
+    segundos: float = 0.0
+    errores: list = field(default_factory=list)
+
+    @property
+    def filas_por_segundo(self):
+        return self.partidas / self.segundos if self.segundos else 0.0
+
+    def como_dict(self):
+        return {
+            'asientos': self.asientos,
+            'partidas': self.partidas,
+            'lotes': self.lotes,
+            'segundos': round(self.segundos, 3),
+            'filas_por_segundo': round(self.filas_por_segundo, 1),
+            'errores': self.errores,
+        }
+
+
+# ===== LECTURA =====
+
+def leer_csv(archivo):
+    """Agrupa las filas consecutivas de un CSV en asientos (generador)"""
+    actual = None
+    for fila in csv.DictReader(archivo):
+        fila = {k.strip().lower(): (v or '').strip() for k, v in fila.items() if k}
+        numero = fila.get('numero_asiento', '')
+        # Sin número, las filas consecutivas con igual fecha y concepto forman un asiento
+        clave = (numero, fila.get('fecha', ''), '' if numero else fila.get('concepto', ''))
+        if actual is None or clave != actual['_clave']:
+            if actual is not None:
+                yield actual
+            actual = {
+                '_clave': clave,
+                'numero_asiento': numero,
+                'fecha': fila.get('fecha', ''),
+                'concepto': fila.get('concepto', ''),
+                'tipo_asiento': fila.get('tipo_asiento') or 'ordinario',
+                'documento_origen': fila.get('documento_origen', ''),
+                'partidas': [],
+            }
+        actual['partidas'].append({
+            'cuenta': fila.get('cuenta', ''),
+            'debito': fila.get('debito', ''),
+            'credito': fila.get('credito', ''),
+            'concepto': fila.get('concepto_partida') or fila.get('concepto', ''),
+            'tercero': fila.get('tercero', ''),
+        })
+    if actual is not None:
+        yield actual
+
+
+def leer_jsonl(archivo):
+    """Lee un asiento por línea (generador)"""
+    for numero_linea, linea in enumerate(archivo, start=1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        try:
+            datos = json.loads(linea)
+        except json.JSONDecodeError as e:
+            yield {'_error': f'Línea {numero_linea}: JSON inválido ({e.msg})'}
+            continue
+        partidas = datos.get('partidas') if isinstance(datos, dict) else None
+        if not isinstance(partidas, list) or not all(isinstance(p, dict) for p in partidas):
+            yield {'_error': f'Línea {numero_linea}: se esperaba un objeto con la lista de "partidas"'}
+            continue
+        yield datos
+
+
+def leer_archivo(archivo, formato):
+    """Devuelve el generador de asientos para el formato indicado"""
+    if isinstance(archivo, (bytes, bytearray)):
+        archivo = io.TextIOWrapper(io.BytesIO(archivo), encoding='utf-8-sig', newline='')
+    if formato == 'csv':
+        return leer_csv(archivo)
+    if formato == 'jsonl':
+        return leer_jsonl(archivo)
+    raise ValueError(f'Formato no soportado: {formato}')
+
+
+def _en_lotes(iterable, tamano):
+    lote = []
+    for item in iterable:
+        lote.append(item)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _decimal(valor):
+    """Valor monetario con dos decimales; NaN e infinito son inválidos"""
+    if valor in (None, ''):
+        return CERO
+    numero = Decimal(str(valor).replace(',', ''))
+    if not numero.is_finite():
+        raise InvalidOperation(valor)
+    return numero.quantize(Decimal('0.01'))
+
+
+# ===== IMPORTADOR =====
+
+class ImportadorAsientos:
+    """
+    Importa asientos para una empresa.
+
+    Uso:
+        importador = ImportadorAsientos(empresa, usuario, confirmar=True)
+        resultado = importador.importar(leer_archivo(archivo, 'csv'))
+    """
+
+    def __init__(self, empresa, usuario, confirmar=False, tamano_lote=TAMANO_LOTE_IMPORTACION,
+                 usar_copy=True, detener_en_error=True):
+        self.empresa = empresa
+        self.usuario = usuario
+        self.confirmar = confirmar
+        self.tamano_lote = tamano_lote
+        self.usar_copy = usar_copy
+        self.detener_en_error = detener_en_error
+        self._cuentas = None
+        self._siguiente_numero = None
+
+    def importar(self, asientos):
+        """
+        Procesa el iterable de asientos por lotes.
+
+        Con ``detener_en_error`` el primer lote inválido lanza ErrorImportacion
+        (los lotes anteriores ya quedaron guardados); si no, se registra el
+        error y se continúa con el siguiente lote. Un archivo que no está en
+        UTF-8 detiene la importación con ErrorImportacion en cualquier caso.
+        """
+        resultado = ResultadoImportacion()
+        inicio = time.monotonic()
+        numero_lote = 0
+
+        try:
+            for numero_lote, lote in enumerate(_en_lotes(asientos, self.tamano_lote), start=1):
+                try:
+                    asientos_lote, partidas_lote = self.importar_lote(lote, numero_lote)
+                except ErrorImportacion as e:
+                    if self.detener_en_error:
+                        raise
+                    resultado.errores.extend(e.errores)
+                    continue
+                resultado.lotes += 1
+                resultado.asientos += asientos_lote
+                resultado.partidas += partidas_lote
+        except UnicodeDecodeError:
+            # El archivo se decodifica mientras se lee: lo anterior ya quedó guardado
+            error = ErrorImportacion(['El archivo no está codificado en UTF-8'], numero_lote + 1)
+            resultado.segundos = time.monotonic() - inicio
+            error.resultado = resultado
+            raise error
+        except ErrorImportacion as e:
+            resultado.segundos = time.monotonic() - inicio
+            e.resultado = resultado
+            raise
+
+        resultado.segundos = time.monotonic() - inicio
+        return resultado
+
+    def importar_lote(self, lote, numero_lote=1):
+        """Valida e inserta un lote en una única transacción"""
+        asientos, partidas_por_asiento, errores = self._construir(lote, numero_lote)
+        if errores:
+            raise ErrorImportacion(errores, numero_lote)
+
+        with transaction.atomic():
+            Asiento.objects.bulk_create(asientos)
+            partidas = []
+            for asiento, partidas_asiento in zip(asientos, partidas_por_asiento):
+                for partida in partidas_asiento:
+                    partida.asiento_id = asiento.pk
+                    partida.copiar_datos_asiento(asiento)
+                    partidas.append(partida)
+            insertar_en_bloque(Partida, partidas, usar_copy=self.usar_copy)
+            if self.confirmar:
+                self._actualizar_saldos(partidas)
+
+        return len(asientos), len(partidas)
+
+    # ----- Validación en memoria -----
+
+    def _construir(self, lote, numero_lote):
+        """Convierte el lote en objetos sin guardar y acumula los errores"""
+        cuentas = self._obtener_cuentas()
+        terceros = self._obtener_terceros(lote)
+        existentes = self._numeros_existentes(lote)
+        cierre = PeriodoContable.ultimo_cierre(self.empresa.pk)
+        ahora = timezone.now()
+
+        asientos, partidas_por_asiento, errores = [], [], []
+        vistos = set()
+
+        for posicion, datos in enumerate(lote, start=1):
+            etiqueta = f'Lote {numero_lote}, asiento {datos.get("numero_asiento") or posicion}'
+            if '_error' in datos:
+                errores.append(datos['_error'])
+                continue
+
+            numero = str(datos.get('numero_asiento') or '').strip() or self._nuevo_numero()
+            if numero in existentes or numero in vistos:
+                errores.append(f'{etiqueta}: el número de asiento ya existe')
+                continue
+            vistos.add(numero)
+
+            try:
+                fecha = date.fromisoformat(str(datos.get('fecha', '')))
+            except ValueError:
+                errores.append(f'{etiqueta}: fecha inválida "{datos.get("fecha")}"')
+                continue
+            if cierre and fecha <= cierre.fecha_fin:
+                errores.append(f'{etiqueta}: {MSG_PERIODO_CERRADO.format(fecha=fecha)}')
+                continue
+
+            tipo_asiento = datos.get('tipo_asiento') or 'ordinario'
+            if tipo_asiento not in TIPOS_ASIENTO_IMPORTABLES:
+                errores.append(f'{etiqueta}: tipo de asiento "{tipo_asiento}" no permitido')
+                continue
+
+            partidas, total_debito, total_credito, errores_partidas = self._construir_partidas(
+                datos.get('partidas') or [], cuentas, terceros
+            )
+            errores.extend(f'{etiqueta}: {e}' for e in errores_partidas)
+            if errores_partidas:
+                continue
+            if len(partidas) < 2:
+                errores.append(f'{etiqueta}: debe tener al menos dos partidas')
+                continue
+            if total_debito != total_credito:
+                errores.append(
+                    f'{etiqueta}: no está cuadrado (débitos {total_debito}, créditos {total_credito})'
+                )
+                continue
+
+            asientos.append(Asiento(
+                empresa=self.empresa,
+                numero_asiento=numero,
+                fecha_asiento=fecha,
+                tipo_asiento=tipo_asiento,
+                concepto=(datos.get('concepto') or 'Asiento importado')[:300],
+                observaciones=datos.get('observaciones') or '',
+                documento_origen=(datos.get('documento_origen') or '')[:100],
+                total_debito=total_debito,
+                total_credito=total_credito,
+                estado='confirmado' if self.confirmar else 'borrador',
+                creado_por=self.usuario,
+                confirmado_por=self.usuario if self.confirmar else None,
+                fecha_confirmacion=ahora if self.confirmar else None,
+            ))
+            partidas_por_asiento.append(partidas)
+
+        return asientos, partidas_por_asiento, errores
+
+    def _construir_partidas(self, lineas, cuentas, terceros):
+        partidas, errores = [], []
+        total_debito = total_credito = CERO
+
+        for orden, linea in enumerate(lineas, start=1):
+            codigo = str(linea.get('cuenta', '')).strip()
+            cuenta = cuentas.get(codigo)
+            if cuenta is None:
+                errores.append(f'partida {orden}: la cuenta {codigo} no existe o está inactiva')
+                continue
+            if not cuenta[1]:
+                errores.append(f'partida {orden}: la cuenta {codigo} no acepta movimiento')
+                continue
+
+            try:
+                debito = _decimal(linea.get('debito'))
+                credito = _decimal(linea.get('credito'))
+            except InvalidOperation:
+                errores.append(f'partida {orden}: valor numérico inválido')
+                continue
+            if debito < 0 or credito < 0 or (debito > 0) == (credito > 0):
+                errores.append(f'partida {orden}: debe tener valor solo en débito o solo en crédito')
+                continue
+
+            tercero_id = None
+            documento = str(linea.get('tercero') or '').strip()
+            if documento:
+                tercero_id = terceros.get(documento)
+                if tercero_id is None:
+                    errores.append(f'partida {orden}: el tercero {documento} no existe')
+                    continue
+
+            total_debito += debito
+            total_credito += credito
+            partidas.append(Partida(
+                cuenta_id=cuenta[0],
+                concepto=(linea.get('concepto') or '')[:300],
+                valor_debito=debito,
+                valor_credito=credito,
+                orden=orden,
+                tercero_id=tercero_id,
+            ))
+
+        return partidas, total_debito, total_credito, errores
+
+    # ----- Consultas por lote -----
+
+    def _obtener_cuentas(self):
+        """Mapa código -> (id, acepta_movimiento), cargado una sola vez"""
+        if self._cuentas is None:
+            self._cuentas = {
+                codigo: (pk, acepta)
+                for pk, codigo, acepta in CuentaContable.objects.filter(
+                    empresa=self.empresa, activa=True
+                ).values_list('id', 'codigo', 'acepta_movimiento')
+            }
+        return self._cuentas
+
+    def _obtener_terceros(self, lote):
+        """Mapa documento -> id de los terceros usados en el lote"""
+        from catalogos.models import Tercero
+
+        documentos = {
+            str(p.get('tercero')).strip()
+            for a in lote for p in (a.get('partidas') or [])
+            if p.get('tercero')
+        }
+        if not documentos:
+            return {}
+        return dict(Tercero.objects.filter(
+            empresa=self.empresa, numero_documento__in=documentos
+        ).values_list('numero_documento', 'id'))
+
+    def _numeros_existentes(self, lote):
+        numeros = {str(a.get('numero_asiento')).strip() for a in lote if a.get('numero_asiento')}
+        if not numeros:
+            return set()
+        return set(Asiento.objects.filter(
+            empresa=self.empresa, numero_asiento__in=numeros
+        ).values_list('numero_asiento', flat=True))
+
+    def _nuevo_numero(self):
+        """Consecutivo en memoria para asientos sin número"""
+        if self._siguiente_numero is None:
+            self._siguiente_numero = int(ServicioContabilidad.obtener_siguiente_numero_asiento(self.empresa))
+        numero = str(self._siguiente_numero).zfill(6)
+        self._siguiente_numero += 1
+        return numero
+
+    def _actualizar_saldos(self, partidas):
+        """Suma a los saldos los movimientos del lote acumulados por cuenta"""
+        movimientos = defaultdict(lambda: [CERO, CERO])
+        for partida in partidas:
+            movimientos[partida.cuenta_id][0] += partida.valor_debito
+            movimientos[partida.cuenta_id][1] += partida.valor_credito
+        ServicioSaldos.aplicar_movimientos(movimientos)
@@ -0,0 +1,73 @@
+"""
+Comando para archivar (o restaurar) las partidas de los períodos cerrados
+"""
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contabilidad.archivo import ServicioArchivo
+from contabilidad.models import PeriodoContable
+from core.management.base import EmpresaCommandMixin
+from empresas.models import Empresa
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = (
+        'Mueve a PartidaArchivada las partidas de los períodos cerrados para que Partida solo '
+        'tenga los períodos abiertos'
+    )
+
+    def add_arguments(self, parser):
+        self.agregar_argumento_empresa(parser, required=False)
+        parser.add_argument('--hasta', help='Archivar los períodos cerrados hasta esta fecha (AAAA-MM-DD)')
+        parser.add_argument(
+            '--restaurar',
+            action='store_true',
+            help='Devolver al libro las partidas archivadas (desde --desde, o todas)',
+        )
+        parser.add_argument('--desde', help='Fecha desde la que se restaura (AAAA-MM-DD)')
+
+    def _fecha(self, valor):
+        if not valor:
+            return None
+        try:
+            return date.fromisoformat(valor)
+        except ValueError:
+            raise CommandError(f'Fecha inválida "{valor}", use AAAA-MM-DD')
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        inicio = time.monotonic()
+
+        if options['restaurar']:
+            if not options['empresa']:
+                raise CommandError('Debe indicar --empresa para restaurar')
+            empresa = self.obtener_empresa(options['empresa'])
+            restauradas = ServicioArchivo.restaurar(empresa, self._fecha(options['desde']))
+            self.stdout.write(self.style.SUCCESS(
+                f'📤 {restauradas} partidas restauradas en {time.monotonic() - inicio:.2f}s'
+            ))
+            return
+
+        hasta = self._fecha(options['hasta'])
+        if options['empresa']:
+            empresas = [self.obtener_empresa(options['empresa'])]
+        else:
+            pendientes = PeriodoContable.objects.filter(archivado=False)
+            if hasta:
+                pendientes = pendientes.filter(fecha_fin__lte=hasta)
+            empresas = Empresa.objects.filter(pk__in=pendientes.values('empresa_id')).order_by('pk')
+
+        total = 0
+        for empresa in empresas:
+            try:
+                archivadas = ServicioArchivo.archivar(empresa, hasta)
+            except ValueError as e:
+                self.stdout.write(self.style.WARNING(f'⚠️ {empresa.nit}: {e}'))
+                continue
+            total += archivadas
+            self.stdout.write(f'   - {empresa.nit}: {archivadas} partidas')
+        self.stdout.write(self.style.SUCCESS(
+            f'📦 {total} partidas archivadas en {time.monotonic() - inicio:.2f}s'
+        ))
@@ -0,0 +1,58 @@
+"""
+Comando para cerrar (o reabrir) el período contable de una empresa
+"""
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contabilidad.cierre import ServicioCierre
+from core.management.base import EmpresaCommandMixin
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = (
+        'Cierra el período contable de una empresa hasta una fecha: salda las cuentas de resultado '
+        'y congela el saldo de cada cuenta'
+    )
+
+    def add_arguments(self, parser):
+        self.agregar_argumento_empresa(parser)
+        parser.add_argument('--fecha', help='Último día del período (AAAA-MM-DD)')
+        parser.add_argument('--usuario', help='Usuario que cierra (por defecto, el propietario de la empresa)')
+        parser.add_argument('--reabrir', action='store_true', help='Reabrir el último período cerrado')
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresa = self.obtener_empresa(options['empresa'])
+        inicio = time.monotonic()
+
+        if options['reabrir']:
+            try:
+                periodo = ServicioCierre.reabrir_ultimo_periodo(empresa)
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f'🔓 Período hasta {periodo.fecha_fin} reabierto en {time.monotonic() - inicio:.2f}s'
+            ))
+            return
+
+        if not options['fecha']:
+            raise CommandError('Debe indicar --fecha (o --reabrir)')
+        try:
+            fecha_fin = date.fromisoformat(options['fecha'])
+        except ValueError:
+            raise CommandError(f'Fecha inválida "{options["fecha"]}", use AAAA-MM-DD')
+
+        usuario = self.obtener_usuario(options['usuario'], empresa)
+        try:
+            periodo = ServicioCierre.cerrar_periodo(empresa, fecha_fin, usuario)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        asiento = periodo.asiento_cierre
+        detalle = f'asiento {asiento.numero_asiento}' if asiento else 'sin asiento de cierre'
+        self.stdout.write(self.style.SUCCESS(
+            f'🔒 Período hasta {periodo.fecha_fin} cerrado ({detalle}, {periodo.saldos.count()} saldos congelados) '
+            f'en {time.monotonic() - inicio:.2f}s'
+        ))
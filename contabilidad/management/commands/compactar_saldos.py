@@ -0,0 +1,43 @@
+"""
+Comando para sumar los movimientos de saldo diferidos a las cuentas contables
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from contabilidad.models import MovimientoSaldo
+from contabilidad.services import ServicioSaldos, TAMANO_LOTE_COMPACTACION
+from core.management.base import EmpresaCommandMixin
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = 'Compacta los movimientos de saldo pendientes en saldo_debito/saldo_credito de cada cuenta'
+
+    def add_arguments(self, parser):
+        self.agregar_argumento_empresa(parser, required=False)
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_COMPACTACION, help='Movimientos por transacción')
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=0,
+            help='Repetir cada N segundos hasta interrumpir (0 = una sola vez)',
+        )
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresa = self.obtener_empresa(options['empresa']) if options['empresa'] else None
+
+        while True:
+            inicio = time.monotonic()
+            compactados = ServicioSaldos.compactar(empresa, options['lote'])
+            if compactados or not options['intervalo']:
+                pendientes = MovimientoSaldo.objects.all()
+                if empresa:
+                    pendientes = pendientes.filter(cuenta__empresa=empresa)
+                self.stdout.write(self.style.SUCCESS(
+                    f'✅ {compactados} movimientos compactados en {time.monotonic() - inicio:.2f}s '
+                    f'({pendientes.count()} pendientes)'
+                ))
+            if not options['intervalo']:
+                return
+            time.sleep(options['intervalo'])
@@ -0,0 +1,54 @@
+"""
+Comando para generar los asientos resumen de las empresas en modo resumen diario
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contabilidad.services import ServicioResumenDiario
+from core.management.base import EmpresaCommandMixin
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = 'Contabiliza las ventas y pagos pendientes en un asiento por día y método de pago'
+
+    def add_arguments(self, parser):
+        self.agregar_argumento_empresa(parser, required=False)
+        parser.add_argument(
+            '--hasta',
+            help='Última fecha a contabilizar, AAAA-MM-DD (por defecto ayer)',
+        )
+        parser.add_argument('--incluir-hoy', action='store_true', help='Contabilizar también los documentos de hoy')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo contar los documentos pendientes sin contabilizarlos',
+        )
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresa = self.obtener_empresa(options['empresa']) if options['empresa'] else None
+
+        if options['hasta']:
+            try:
+                hasta = date.fromisoformat(options['hasta'])
+            except ValueError:
+                raise CommandError('--hasta debe tener formato AAAA-MM-DD')
+        elif options['incluir_hoy']:
+            hasta = date.today()
+        else:
+            # El día en curso sigue recibiendo documentos
+            hasta = date.today() - timedelta(days=1)
+
+        pendientes = ServicioResumenDiario.pendientes(empresa, hasta).count()
+        self.stdout.write(f'🔍 {pendientes} documentos pendientes hasta {hasta}')
+        if options['dry_run'] or not pendientes:
+            return
+
+        asientos = ServicioResumenDiario.contabilizar(empresa, hasta)
+        for asiento in asientos:
+            self.stdout.write(
+                f'   📒 {asiento.numero_asiento} {asiento.fecha_asiento} {asiento.concepto} '
+                f'(${asiento.total_debito:,.2f})'
+            )
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(asientos)} asientos resumen generados'))
@@ -0,0 +1,98 @@
+"""
+Comando para estresar la contabilización concurrente y revisar invariantes
+"""
+import statistics
+import time
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from contabilidad.estres import OPERACIONES, ejecutar_carga, verificar_invariantes
+from core.datos_sinteticos import GeneradorDatosSinteticos
+
+
+class Command(BaseCommand):
+    help = (
+        'Contabiliza cobros y ventas desde varios hilos o procesos a la vez, mide rendimiento '
+        'y esperas por bloqueos y verifica numeración, cuadre y saldos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', required=True, help='Usuario dueño de la empresa de prueba')
+        parser.add_argument('--trabajadores', type=int, default=8, help='Hilos o procesos concurrentes')
+        parser.add_argument('--operaciones', type=int, default=25, help='Contabilizaciones por trabajador')
+        parser.add_argument('--modo', choices=['hilos', 'procesos'], default='hilos')
+        parser.add_argument(
+            '--mezcla',
+            default=','.join(OPERACIONES),
+            help='Operaciones a ejecutar separadas por coma (cobro, venta)',
+        )
+        parser.add_argument('--semilla', type=int, help='Semilla para repetir la misma carga')
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        try:
+            usuario = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuario "{options["usuario"]}" no encontrado')
+
+        mezcla = [operacion.strip() for operacion in options['mezcla'].split(',') if operacion.strip()]
+        desconocidas = set(mezcla) - set(OPERACIONES)
+        if not mezcla or desconocidas:
+            raise CommandError(f'--mezcla admite solo: {", ".join(OPERACIONES)}')
+
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ La base es {connection.vendor}: las escrituras se serializan y no se miden esperas '
+                'por bloqueos. Use PostgreSQL para resultados representativos.'
+            ))
+
+        # Empresa nueva en cada corrida: los invariantes parten de cero
+        generador = GeneradorDatosSinteticos(usuario, semilla=options['semilla'])
+        indice = int(time.time())
+        empresa = generador.crear_empresa(indice, nit=f'ESTRES-{indice}')
+        generador.crear_catalogos(empresa, terceros=50, productos=0)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'🏋️ {options["trabajadores"]} {options["modo"]} x {options["operaciones"]} operaciones '
+            f'({", ".join(mezcla)}) sobre {empresa.nit}'
+        ))
+
+        segundos, resultados, monitor = ejecutar_carga(
+            empresa,
+            usuario,
+            options['trabajadores'],
+            options['operaciones'],
+            modo=options['modo'],
+            mezcla=mezcla,
+            semilla=options['semilla'],
+        )
+
+        exitosas = sum(resultado.exitosas for resultado in resultados)
+        errores = sum((resultado.errores for resultado in resultados), Counter())
+        latencias = sorted(latencia for resultado in resultados for latencia in resultado.latencias)
+
+        self.stdout.write(f'   ⏱️ {segundos:.2f}s, {exitosas / segundos if segundos else 0:.1f} contabilizaciones/s')
+        if latencias:
+            p95 = latencias[min(int(len(latencias) * 0.95), len(latencias) - 1)]
+            self.stdout.write(
+                f'   📈 Latencia p50 {statistics.median(latencias) * 1000:.1f} ms, '
+                f'p95 {p95 * 1000:.1f} ms, máx {latencias[-1] * 1000:.1f} ms'
+            )
+        self.stdout.write(f'   ✅ {exitosas} exitosas, {sum(errores.values())} con error')
+        for tipo, cantidad in errores.most_common():
+            self.stdout.write(f'      - {tipo}: {cantidad}')
+        if monitor.activo:
+            self.stdout.write(
+                f'   🔒 Esperas por bloqueo: hasta {monitor.esperando_max} sesiones a la vez, '
+                f'espera más larga {monitor.espera_max_segundos:.2f}s, '
+                f'~{monitor.segundos_sesion_esperando:.2f}s-sesión en total ({monitor.muestras} muestras)'
+            )
+
+        violaciones = verificar_invariantes(empresa)
+        if violaciones:
+            for violacion in violaciones:
+                self.stderr.write(self.style.ERROR(f'   ❌ {violacion}'))
+            raise CommandError(f'{len(violaciones)} invariantes violados en {empresa.nit}')
+        self.stdout.write(self.style.SUCCESS('✅ Numeración, cuadre y saldos consistentes'))
@@ -0,0 +1,85 @@
+"""
+Comando para importar masivamente asientos contables desde CSV o JSONL
+"""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contabilidad.importacion import (
+    ErrorImportacion,
+    ImportadorAsientos,
+    TAMANO_LOTE_IMPORTACION,
+    leer_archivo,
+)
+from core.management.base import EmpresaCommandMixin
+
+# Máximo de errores que se muestran en consola
+MAX_ERRORES_MOSTRADOS = 50
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = 'Importa asientos contables desde un archivo CSV o JSONL en lotes transaccionales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .jsonl')
+        self.agregar_argumento_empresa(parser)
+        parser.add_argument('--usuario', help='Usuario creador (por defecto, el propietario de la empresa)')
+        parser.add_argument('--formato', choices=['csv', 'jsonl'], help='Formato del archivo (por defecto según extensión)')
+        parser.add_argument(
+            '--confirmar',
+            action='store_true',
+            help='Importar los asientos confirmados y actualizar saldos de las cuentas',
+        )
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_IMPORTACION, help='Asientos por transacción')
+        parser.add_argument('--sin-copy', action='store_true', help='Usar bulk_create aunque la base soporte COPY')
+        parser.add_argument(
+            '--continuar',
+            action='store_true',
+            help='Continuar con los siguientes lotes si uno es rechazado',
+        )
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresa = self.obtener_empresa(options['empresa'])
+        usuario = self.obtener_usuario(options['usuario'], empresa)
+        formato = self._obtener_formato(options)
+
+        importador = ImportadorAsientos(
+            empresa,
+            usuario,
+            confirmar=options['confirmar'],
+            tamano_lote=options['lote'],
+            usar_copy=not options['sin_copy'],
+            detener_en_error=not options['continuar'],
+        )
+
+        self.stdout.write(f'📥 Importando {options["archivo"]} para {empresa.razon_social}...')
+        with open(options['archivo'], encoding='utf-8-sig', newline='') as archivo:
+            try:
+                resultado = importador.importar(leer_archivo(archivo, formato))
+            except ErrorImportacion as e:
+                self._mostrar_errores(e.errores)
+                raise CommandError(f'{e}. Los lotes anteriores quedaron guardados.')
+
+        self._mostrar_errores(resultado.errores)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resultado.asientos} asientos y {resultado.partidas} partidas en '
+            f'{resultado.lotes} lotes ({resultado.segundos:.1f}s, '
+            f'{resultado.filas_por_segundo:,.0f} filas/s)'
+        ))
+
+    def _obtener_formato(self, options):
+        """Formato indicado o deducido de la extensión del archivo"""
+        if options['formato']:
+            return options['formato']
+        extension = os.path.splitext(options['archivo'])[1].lower().lstrip('.')
+        if extension in ('csv', 'jsonl'):
+            return extension
+        raise CommandError('No se pudo deducir el formato, use --formato csv|jsonl')
+
+    def _mostrar_errores(self, errores):
+        """Muestra los primeros errores de validación"""
+        for error in errores[:MAX_ERRORES_MOSTRADOS]:
+            self.stdout.write(self.style.ERROR(f'❌ {error}'))
+        if len(errores) > MAX_ERRORES_MOSTRADOS:
+            self.stdout.write(self.style.WARNING(f'... y {len(errores) - MAX_ERRORES_MOSTRADOS} errores más'))
@@ -0,0 +1,51 @@
+"""
+Comando para crear el plan de cuentas completo de una empresa en bloque
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contabilidad.plan_cuentas import (
+    ErrorPlanCuentas,
+    PLANTILLA_POR_DEFECTO,
+    PLANTILLAS_PUC,
+    copiar_plan_cuentas,
+    provisionar_plan_cuentas,
+)
+from core.management.base import EmpresaCommandMixin
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = 'Crea el plan de cuentas de una empresa desde una plantilla PUC o copiándolo de otra empresa'
+
+    def add_arguments(self, parser):
+        self.agregar_argumento_empresa(parser)
+        origen = parser.add_mutually_exclusive_group()
+        origen.add_argument(
+            '--plantilla',
+            default=PLANTILLA_POR_DEFECTO,
+            help=f'Plantilla incluida ({", ".join(PLANTILLAS_PUC)}) o ruta a un CSV codigo,nombre,naturaleza',
+        )
+        origen.add_argument('--copiar-de', help='NIT o ID de la empresa cuyo plan se copia')
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresa = self.obtener_empresa(options['empresa'])
+        inicio = time.monotonic()
+        try:
+            if options['copiar_de']:
+                origen = self.obtener_empresa(options['copiar_de'])
+                creadas = copiar_plan_cuentas(origen, empresa)
+                fuente = f'el plan de {origen.razon_social}'
+            else:
+                creadas = provisionar_plan_cuentas(empresa, options['plantilla'])
+                fuente = f'la plantilla {options["plantilla"]}'
+        except ErrorPlanCuentas as e:
+            for error in e.errores:
+                self.stderr.write(self.style.ERROR(f'   ❌ {error}'))
+            raise CommandError(f'No se creó el plan de cuentas de {empresa.nit}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {creadas} cuentas creadas para {empresa.razon_social} desde {fuente} '
+            f'en {time.monotonic() - inicio:.2f}s'
+        ))
@@ -0,0 +1,67 @@
+"""
+Comando para copiar empresa, fecha y estado del asiento a sus partidas
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from contabilidad.models import Asiento, Partida
+from core.management.base import EmpresaCommandMixin
+
+# Asientos por sentencia UPDATE
+TAMANO_LOTE_SINCRONIZACION = 5000
+
+# Partidas cuyo asiento cuenta en el libro (ver Asiento.en_libro)
+EN_LIBRO = Q(asiento__estado='confirmado') | Q(asiento__estado='anulado', asiento__asiento_reversion__isnull=False)
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = 'Recalcula empresa, fecha y confirmado de las partidas a partir de su asiento'
+
+    def add_arguments(self, parser):
+        self.agregar_argumento_empresa(parser, required=False)
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_SINCRONIZACION, help='Asientos por UPDATE')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo contar las partidas desincronizadas sin modificarlas',
+        )
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresa = self.obtener_empresa(options['empresa']) if options['empresa'] else None
+
+        desincronizadas = Partida.objects.filter(
+            Q(empresa__isnull=True)
+            | Q(fecha__isnull=True)
+            | ~Q(empresa_id=F('asiento__empresa_id'))
+            | ~Q(fecha=F('asiento__fecha_asiento'))
+            | (Q(confirmado=True) & ~EN_LIBRO)
+            | (Q(confirmado=False) & EN_LIBRO)
+        )
+        if empresa:
+            desincronizadas = desincronizadas.filter(asiento__empresa=empresa)
+
+        asiento_ids = sorted(set(desincronizadas.values_list('asiento_id', flat=True)))
+        self.stdout.write(f'🔍 {len(asiento_ids)} asientos con partidas desincronizadas')
+        if options['dry_run'] or not asiento_ids:
+            return
+
+        actualizadas = 0
+        for inicio in range(0, len(asiento_ids), options['lote']):
+            actualizadas += self._sincronizar(asiento_ids[inicio:inicio + options['lote']])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {actualizadas} partidas sincronizadas'))
+
+    @transaction.atomic
+    def _sincronizar(self, asiento_ids):
+        """Actualiza las partidas de los asientos dados con subconsultas"""
+        asiento = Asiento.objects.filter(pk=OuterRef('asiento_id'))
+        partidas = Partida.objects.filter(asiento_id__in=asiento_ids)
+        total = partidas.update(
+            empresa_id=Subquery(asiento.values('empresa_id')[:1]),
+            fecha=Subquery(asiento.values('fecha_asiento')[:1]),
+            confirmado=False,
+        )
+        partidas.filter(EN_LIBRO).update(confirmado=True)
+        return total
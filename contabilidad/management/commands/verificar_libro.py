@@ -0,0 +1,69 @@
+"""
+Comando para verificar (y reparar) saldos y totales denormalizados del libro
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from contabilidad.verificacion import TRABAJADORES_VERIFICACION, verificar_libro
+from core.management.base import EmpresaCommandMixin
+
+# Diferencias que se muestran por empresa
+MAX_DIFERENCIAS_MOSTRADAS = 10
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = (
+        'Recalcula saldos de cuentas, totales de asientos y totales de facturas contra sus '
+        'partidas y detalles, y reporta (o repara) las diferencias'
+    )
+
+    def add_arguments(self, parser):
+        self.agregar_argumento_empresa(parser, required=False)
+        parser.add_argument(
+            '--trabajadores',
+            type=int,
+            default=TRABAJADORES_VERIFICACION,
+            help='Procesos en paralelo, una empresa por proceso a la vez',
+        )
+        parser.add_argument('--reparar', action='store_true', help='Corregir las diferencias encontradas')
+        parser.add_argument(
+            '--mostrar',
+            type=int,
+            default=MAX_DIFERENCIAS_MOSTRADAS,
+            help='Diferencias que se listan por empresa',
+        )
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresas = [self.obtener_empresa(options['empresa'])] if options['empresa'] else None
+        inicio = time.monotonic()
+        revisadas = con_diferencias = diferencias = reparadas = 0
+
+        for resultado in verificar_libro(empresas, options['reparar'], options['trabajadores']):
+            revisadas += 1
+            if not resultado.diferencias:
+                continue
+            con_diferencias += 1
+            diferencias += len(resultado.diferencias)
+            reparadas += resultado.reparadas
+            resumen = ', '.join(f'{cantidad} {modelo.lower()}s' for modelo, cantidad in resultado.por_modelo().items())
+            self.stdout.write(self.style.WARNING(f'⚠️ {resultado.nit}: {resumen} ({resultado.segundos:.2f}s)'))
+            for diferencia in resultado.diferencias[:options['mostrar']]:
+                self.stdout.write(f'   - {diferencia}')
+            if len(resultado.diferencias) > options['mostrar']:
+                self.stdout.write(f'   ... y {len(resultado.diferencias) - options["mostrar"]} más')
+
+        segundos = time.monotonic() - inicio
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS(f'✅ {revisadas} empresas consistentes en {segundos:.2f}s'))
+            return
+        if options['reparar']:
+            self.stdout.write(self.style.SUCCESS(
+                f'🔧 {reparadas} registros reparados en {con_diferencias} de {revisadas} empresas ({segundos:.2f}s)'
+            ))
+            return
+        raise CommandError(
+            f'{diferencias} diferencias en {con_diferencias} de {revisadas} empresas ({segundos:.2f}s). '
+            'Use --reparar para corregirlas.'
+        )
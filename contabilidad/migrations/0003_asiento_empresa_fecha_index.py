@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0002_alter_asiento_tipo_asiento'),
+        ('empresas', '0005_remove_null_from_charfields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asiento',
+            index=models.Index(fields=['empresa', 'fecha_asiento', 'id'], name='contabilida_empresa_81b138_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copiar_datos_asiento(apps, schema_editor):
+    """Copia empresa, fecha y estado del asiento a las partidas existentes"""
+    Asiento = apps.get_model('contabilidad', 'Asiento')
+    Partida = apps.get_model('contabilidad', 'Partida')
+    asiento = Asiento.objects.filter(pk=OuterRef('asiento_id'))
+    Partida.objects.update(
+        empresa_id=Subquery(asiento.values('empresa_id')[:1]),
+        fecha=Subquery(asiento.values('fecha_asiento')[:1]),
+    )
+    Partida.objects.filter(asiento__estado='confirmado').update(confirmado=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogos', '0003_alter_tercero_telefono'),
+        ('contabilidad', '0003_asiento_empresa_fecha_index'),
+        ('empresas', '0005_remove_null_from_charfields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partida',
+            name='confirmado',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Asiento Confirmado'),
+        ),
+        migrations.AddField(
+            model_name='partida',
+            name='empresa',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='empresas.empresa', verbose_name='Empresa'),
+        ),
+        migrations.AddField(
+            model_name='partida',
+            name='fecha',
+            field=models.DateField(editable=False, null=True, verbose_name='Fecha del Asiento'),
+        ),
+        migrations.RunPython(copiar_datos_asiento, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='partida',
+            index=models.Index(condition=models.Q(('confirmado', True)), fields=['empresa', 'cuenta', 'fecha'], include=('valor_debito', 'valor_credito'), name='partida_empresa_cuenta_fecha'),
+        ),
+    ]
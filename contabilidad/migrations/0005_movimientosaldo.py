@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:02
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0004_partida_datos_asiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoSaldo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor_debito', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Valor Débito')),
+                ('valor_credito', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Valor Crédito')),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Registro')),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_saldo', to='contabilidad.cuentacontable', verbose_name='Cuenta Contable')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Saldo',
+                'verbose_name_plural': 'Movimientos de Saldo',
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogos', '0003_alter_tercero_telefono'),
+        ('contabilidad', '0005_movimientosaldo'),
+        ('empresas', '0006_empresa_modo_contabilizacion'),
+        ('facturacion', '0002_alter_factura_estado'),
+        ('tesoreria', '0008_cuentabancaria_saldo_inicial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoResumido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('venta', 'Venta'), ('cobro', 'Cobro'), ('ingreso', 'Ingreso'), ('egreso', 'Egreso')], max_length=10, verbose_name='Tipo de Documento')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Registro')),
+                ('asiento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documentos_resumidos', to='contabilidad.asiento', verbose_name='Asiento Resumen')),
+                ('creado_por', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='empresas.empresa', verbose_name='Empresa')),
+                ('factura', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='documento_resumido', to='facturacion.factura', verbose_name='Factura')),
+                ('metodo_pago', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='catalogos.metodopago', verbose_name='Método de Pago')),
+                ('pago', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='documento_resumido', to='tesoreria.pago', verbose_name='Pago')),
+            ],
+            options={
+                'verbose_name': 'Documento Resumido',
+                'verbose_name_plural': 'Documentos Resumidos',
+                'indexes': [models.Index(condition=models.Q(('asiento__isnull', True)), fields=['empresa', 'fecha', 'metodo_pago'], name='documento_resumido_pendiente')],
+            },
+        ),
+    ]
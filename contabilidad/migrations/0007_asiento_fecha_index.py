@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0006_documentoresumido'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asiento',
+            index=models.Index(fields=['fecha_asiento', 'id'], name='contabilida_fecha_a_b9a83a_idx'),
+        ),
+    ]
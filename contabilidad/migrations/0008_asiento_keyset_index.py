@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0007_asiento_fecha_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asiento',
+            index=models.Index(fields=['empresa', 'fecha_asiento', 'numero_asiento', 'id'], name='contabilida_empresa_fe8b77_idx'),
+        ),
+    ]
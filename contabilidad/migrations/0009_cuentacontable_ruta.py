@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:26
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Concat
+
+
+def calcular_rutas(apps, schema_editor):
+    """Rutas y profundidades de las cuentas existentes, un nivel por UPDATE"""
+    CuentaContable = apps.get_model('contabilidad', 'CuentaContable')
+    CuentaContable.objects.filter(cuenta_padre__isnull=True).update(ruta=Concat(F('codigo'), Value('/')), profundidad=1)
+    padre = CuentaContable.objects.filter(pk=OuterRef('cuenta_padre_id'))
+    while CuentaContable.objects.filter(ruta='').exclude(cuenta_padre__ruta='').update(
+        ruta=Concat(Subquery(padre.values('ruta')[:1]), F('codigo'), Value('/')),
+        profundidad=Subquery(padre.values('profundidad')[:1]) + 1,
+    ):
+        pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0008_asiento_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cuentacontable',
+            name='profundidad',
+            field=models.PositiveSmallIntegerField(default=1, editable=False, help_text='Cantidad de cuentas desde la raíz (1 = cuenta sin padre)', verbose_name='Profundidad'),
+        ),
+        migrations.AddField(
+            model_name='cuentacontable',
+            name='ruta',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Ruta en el Plan de Cuentas'),
+        ),
+        migrations.RunPython(calcular_rutas, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cuentacontable',
+            index=models.Index(fields=['empresa', 'ruta'], name='cuenta_empresa_ruta', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+    ]
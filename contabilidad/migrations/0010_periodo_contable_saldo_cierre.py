@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:41
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0009_cuentacontable_ruta'),
+        ('empresas', '0006_empresa_modo_contabilizacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodoContable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_inicio', models.DateField(blank=True, help_text='Día siguiente al cierre anterior (vacío en el primer cierre)', null=True, verbose_name='Fecha de Inicio')),
+                ('fecha_fin', models.DateField(verbose_name='Fecha de Cierre')),
+                ('fecha_cierre', models.DateTimeField(auto_now_add=True, verbose_name='Fecha del Cierre')),
+                ('asiento_cierre', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='periodo_cerrado', to='contabilidad.asiento', verbose_name='Asiento de Cierre')),
+                ('cerrado_por', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL, verbose_name='Cerrado por')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='periodos_contables', to='empresas.empresa', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Período Contable',
+                'verbose_name_plural': 'Períodos Contables',
+                'ordering': ['empresa', '-fecha_fin'],
+                'unique_together': {('empresa', 'fecha_fin')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoCierre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debito', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Débito Acumulado')),
+                ('credito', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Crédito Acumulado')),
+                ('saldo', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Según la naturaleza de la cuenta', max_digits=15, verbose_name='Saldo')),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_cierre', to='contabilidad.cuentacontable', verbose_name='Cuenta Contable')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='contabilidad.periodocontable', verbose_name='Período')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Cierre',
+                'verbose_name_plural': 'Saldos de Cierre',
+                'unique_together': {('periodo', 'cuenta')},
+            },
+        ),
+    ]
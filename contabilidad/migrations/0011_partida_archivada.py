@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:47
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogos', '0004_keyset_indexes'),
+        ('contabilidad', '0010_periodo_contable_saldo_cierre'),
+        ('empresas', '0006_empresa_modo_contabilizacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='periodocontable',
+            name='archivado',
+            field=models.BooleanField(default=False, help_text='Sus partidas se movieron a PartidaArchivada (ver contabilidad.archivo)', verbose_name='Archivado'),
+        ),
+        migrations.CreateModel(
+            name='PartidaArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('concepto', models.CharField(max_length=300, verbose_name='Concepto')),
+                ('valor_debito', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Valor Débito')),
+                ('valor_credito', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Valor Crédito')),
+                ('orden', models.PositiveIntegerField(default=1, verbose_name='Orden')),
+                ('fecha', models.DateField(null=True, verbose_name='Fecha del Asiento')),
+                ('confirmado', models.BooleanField(default=False, verbose_name='Asiento Confirmado')),
+                ('asiento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='partidas_archivadas', to='contabilidad.asiento', verbose_name='Asiento')),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='partidas_archivadas', to='contabilidad.cuentacontable', verbose_name='Cuenta Contable')),
+                ('empresa', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='empresas.empresa', verbose_name='Empresa')),
+                ('tercero', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='catalogos.tercero', verbose_name='Tercero')),
+            ],
+            options={
+                'verbose_name': 'Partida Archivada',
+                'verbose_name_plural': 'Partidas Archivadas',
+                'ordering': ['asiento', 'orden'],
+                'indexes': [models.Index(fields=['empresa', 'cuenta', 'fecha'], name='partida_arch_empresa_cuenta'), models.Index(fields=['empresa', 'fecha'], name='partida_arch_empresa_fecha')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def enlazar_reversiones(apps, schema_editor):
+    """
+    Enlaza los asientos anulados con la reversión que generó
+    ServicioContabilidad.reversar_asiento (documento_origen 'REV-<número>')
+    y devuelve sus partidas al libro: sus valores nunca salieron de los saldos.
+    """
+    Asiento = apps.get_model('contabilidad', 'Asiento')
+    Partida = apps.get_model('contabilidad', 'Partida')
+    PartidaArchivada = apps.get_model('contabilidad', 'PartidaArchivada')
+    reversiones = (
+        Asiento.objects.filter(documento_origen__startswith='REV-', estado='confirmado')
+        .exclude(documento_origen__startswith='REV-RESUMEN-')
+        .values_list('pk', 'empresa_id', 'documento_origen')
+    )
+    for reversion_id, empresa_id, documento_origen in reversiones.iterator():
+        original = Asiento.objects.filter(
+            empresa_id=empresa_id,
+            numero_asiento=documento_origen[len('REV-'):],
+            estado='anulado',
+            asiento_reversion__isnull=True,
+        ).first()
+        if original is None:
+            continue
+        Asiento.objects.filter(pk=original.pk).update(asiento_reversion_id=reversion_id)
+        for modelo in (Partida, PartidaArchivada):
+            modelo.objects.filter(asiento_id=original.pk).update(confirmado=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0011_partida_archivada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asiento',
+            name='asiento_reversion',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='asiento_reversado', to='contabilidad.asiento', verbose_name='Asiento de Reversión'),
+        ),
+        migrations.RunPython(enlazar_reversiones, migrations.RunPython.noop),
+    ]
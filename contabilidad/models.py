@@ -1,4 +1,7 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Case, DecimalField, Exists, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.core.validators import MinValueValidator, RegexValidator
 from decimal import Decimal
 from django.contrib.auth.models import User
@@ -8,6 +11,15 @@ from django.core.exceptions import ValidationError
 # Constante para evitar duplicación del literal 'empresas.Empresa'
 EMPRESA_MODEL = 'empresas.Empresa'
 
+# Separador de los códigos en CuentaContable.ruta (p. ej. '1/11/1105/')
+SEPARADOR_RUTA = '/'
+
+MSG_PADRE_CICLICO = 'La cuenta padre no puede ser la misma cuenta ni una de sus subcuentas.'
+
+MSG_PERIODO_CERRADO = 'La fecha {fecha} pertenece a un período contable cerrado.'
+
+MSG_SALDO_CIERRE_INMUTABLE = 'Los saldos de cierre no se modifican; reabra el período para recalcularlos.'
+
 
 class CuentaContable(models.Model):
     """
@@ -88,6 +100,23 @@ class CuentaContable(models.Model):
         help_text="Nivel jerárquico de la cuenta (1=Mayor, 2=Submyor, etc.)"
     )
     
+    # Índice de la jerarquía (camino materializado), mantenido en save():
+    # códigos desde la raíz hasta la cuenta, p. ej. '1/11/1105/'. Las
+    # subcuentas a cualquier profundidad son las de ruta__startswith=ruta.
+    ruta = models.CharField(
+        max_length=255,
+        default='',
+        editable=False,
+        verbose_name="Ruta en el Plan de Cuentas"
+    )
+    
+    profundidad = models.PositiveSmallIntegerField(
+        default=1,
+        editable=False,
+        verbose_name="Profundidad",
+        help_text="Cantidad de cuentas desde la raíz (1 = cuenta sin padre)"
+    )
+    
     # Control de movimientos
     acepta_movimiento = models.BooleanField(
         default=True,
@@ -133,10 +162,186 @@ class CuentaContable(models.Model):
         verbose_name_plural = "Cuentas Contables"
         unique_together = ['empresa', 'codigo']
         ordering = ['codigo']
+        indexes = [
+            # Subárboles por prefijo de ruta (LIKE 'x%' en PostgreSQL)
+            models.Index(
+                fields=['empresa', 'ruta'],
+                name='cuenta_empresa_ruta',
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+            ),
+        ]
     
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
     
+    def _es_subcuenta_de_si_misma(self, padre):
+        """True si ``padre`` es la propia cuenta o una de sus subcuentas (ruta leída de la base)"""
+        if not self.pk:
+            return False
+        if padre.pk == self.pk:
+            return True
+        return bool(self.ruta) and CuentaContable.objects.filter(pk=padre.pk, ruta__startswith=self.ruta).exists()
+    
+    def save(self, *args, **kwargs):
+        """Mantiene ruta y profundidad, también las de las subcuentas si la cuenta se mueve"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'codigo', 'cuenta_padre'} & set(update_fields):
+            return super().save(*args, **kwargs)
+        
+        ruta_anterior, profundidad_anterior = self.ruta, self.profundidad
+        padre = self.cuenta_padre
+        if padre is not None:
+            if self._es_subcuenta_de_si_misma(padre):
+                raise ValidationError({'cuenta_padre': MSG_PADRE_CICLICO})
+            self.ruta = f'{padre.ruta}{self.codigo}{SEPARADOR_RUTA}'
+            self.profundidad = padre.profundidad + 1
+        else:
+            self.ruta = f'{self.codigo}{SEPARADOR_RUTA}'
+            self.profundidad = 1
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'ruta', 'profundidad'}
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if ruta_anterior and ruta_anterior != self.ruta:
+                # Una sola UPDATE reescribe el prefijo de todo el subárbol
+                CuentaContable.objects.filter(
+                    empresa_id=self.empresa_id, ruta__startswith=ruta_anterior
+                ).exclude(pk=self.pk).update(
+                    ruta=Concat(Value(self.ruta), Substr('ruta', len(ruta_anterior) + 1)),
+                    profundidad=F('profundidad') + (self.profundidad - profundidad_anterior),
+                )
+    
+    def descendientes(self, incluir_propia=False):
+        """Subcuentas a cualquier profundidad, en una consulta por prefijo de ruta"""
+        queryset = CuentaContable.objects.filter(empresa_id=self.empresa_id, ruta__startswith=self.ruta)
+        return queryset if incluir_propia else queryset.exclude(pk=self.pk)
+    
+    def ancestros(self):
+        """Cuentas desde la raíz hasta la cuenta padre (sus códigos están en la ruta)"""
+        codigos = self.ruta.split(SEPARADOR_RUTA)[:-2]
+        return CuentaContable.objects.filter(empresa_id=self.empresa_id, codigo__in=codigos).order_by('profundidad')
+    
+    @staticmethod
+    def anotar_saldos_acumulados(queryset, fecha_inicio=None, fecha_corte=None, subarbol=True, cierre=None,
+                                 fuentes=None):
+        """
+        Agrega a cada cuenta los débitos y créditos confirmados de todo su
+        subárbol (o solo de la cuenta si ``subarbol=False``) como
+        ``acumulado_debito``/``acumulado_credito``, y el saldo según su
+        naturaleza como ``saldo_acumulado``.
+        
+        Sin ``fecha_inicio`` también suma los saldos iniciales, cada uno del
+        lado de la naturaleza de su cuenta. Son subconsultas de la misma
+        consulta: no hay recorrido de la jerarquía en Python.
+        
+        Con ``cierre`` (un PeriodoContable con fecha_fin <= ``fecha_corte``)
+        y sin ``fecha_inicio`` parte de sus SaldoCierre y solo suma las
+        partidas posteriores al cierre.
+        
+        ``fuentes`` son los modelos de partidas que se suman (por defecto solo
+        Partida; ver ServicioArchivo.modelos_partidas para incluir el archivo).
+        """
+        cuentas = CuentaContable.objects.filter(empresa_id=OuterRef('empresa_id'))
+        saldos_cierre = SaldoCierre.objects.filter(periodo=cierre) if cierre and not fecha_inicio else None
+        if subarbol:
+            cuentas = cuentas.filter(ruta__startswith=OuterRef('ruta'))
+            if saldos_cierre is not None:
+                saldos_cierre = saldos_cierre.filter(cuenta__ruta__startswith=OuterRef('ruta'))
+        else:
+            cuentas = cuentas.filter(pk=OuterRef('pk'))
+            if saldos_cierre is not None:
+                saldos_cierre = saldos_cierre.filter(cuenta=OuterRef('pk'))
+        
+        def movimientos(modelo):
+            partidas = modelo.objects.filter(empresa_id=OuterRef('empresa_id'), confirmado=True)
+            if subarbol:
+                partidas = partidas.filter(cuenta__ruta__startswith=OuterRef('ruta'))
+            else:
+                partidas = partidas.filter(cuenta=OuterRef('pk'))
+            if fecha_inicio:
+                partidas = partidas.filter(fecha__gte=fecha_inicio)
+            elif saldos_cierre is not None:
+                partidas = partidas.filter(fecha__gt=cierre.fecha_fin)
+            if fecha_corte:
+                partidas = partidas.filter(fecha__lte=fecha_corte)
+            return partidas
+        
+        cero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=15, decimal_places=2))
+        
+        def total(filas, campo, clave='empresa_id'):
+            return Coalesce(Subquery(
+                filas.order_by().values(clave).annotate(total=Sum(campo)).values('total')
+            ), cero)
+        
+        partidas = [movimientos(modelo) for modelo in fuentes or [Partida]]
+        debito = sum((total(filas, 'valor_debito') for filas in partidas), cero)
+        credito = sum((total(filas, 'valor_credito') for filas in partidas), cero)
+        if saldos_cierre is not None:
+            debito = debito + total(saldos_cierre, 'debito', 'periodo_id')
+            credito = credito + total(saldos_cierre, 'credito', 'periodo_id')
+        elif not fecha_inicio:
+            debito = debito + total(cuentas.filter(naturaleza='D'), 'saldo_inicial')
+            credito = credito + total(cuentas.filter(naturaleza='C'), 'saldo_inicial')
+        
+        return queryset.annotate(
+            acumulado_debito=debito,
+            acumulado_credito=credito,
+        ).annotate(
+            saldo_acumulado=Case(
+                When(naturaleza='D', then=F('acumulado_debito') - F('acumulado_credito')),
+                default=F('acumulado_credito') - F('acumulado_debito'),
+            )
+        )
+    
+    @staticmethod
+    def filtrar_hasta_profundidad(queryset, profundidad):
+        """
+        Cuentas que resumen el plan hasta ``profundidad``: las de esa
+        profundidad más las menos profundas que no tienen subcuentas.
+        Con ``anotar_saldos_acumulados`` sus saldos suman el plan completo
+        (mientras las cuentas con subcuentas no tengan partidas propias).
+        """
+        con_subcuentas = Exists(CuentaContable.objects.filter(cuenta_padre=OuterRef('pk')))
+        return queryset.filter(profundidad__lte=profundidad).exclude(
+            models.Q(con_subcuentas, profundidad__lt=profundidad)
+        )
+    
+    @staticmethod
+    def anotar_saldos_pendientes(queryset):
+        """
+        Agrega a cada cuenta la suma de sus movimientos aún sin compactar
+        (``pendiente_debito``/``pendiente_credito``), con una subconsulta
+        por columna para no multiplicar filas.
+        """
+        movimientos = MovimientoSaldo.objects.filter(cuenta=OuterRef('pk')).order_by().values('cuenta')
+        cero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=15, decimal_places=2))
+        return queryset.annotate(
+            pendiente_debito=Coalesce(Subquery(movimientos.annotate(total=Sum('valor_debito')).values('total')), cero),
+            pendiente_credito=Coalesce(Subquery(movimientos.annotate(total=Sum('valor_credito')).values('total')), cero),
+        )
+    
+    def _saldos_pendientes(self):
+        """(débito, crédito) aún no compactados en saldo_debito/saldo_credito"""
+        if hasattr(self, 'pendiente_debito'):
+            return self.pendiente_debito, self.pendiente_credito
+        if not settings.CONTABILIDAD_SALDOS_DIFERIDOS or self.pk is None:
+            return Decimal('0.00'), Decimal('0.00')
+        totales = self.movimientos_saldo.aggregate(debito=Sum('valor_debito'), credito=Sum('valor_credito'))
+        self.pendiente_debito = totales['debito'] or Decimal('0.00')
+        self.pendiente_credito = totales['credito'] or Decimal('0.00')
+        return self.pendiente_debito, self.pendiente_credito
+    
+    @property
+    def saldo_debito_total(self):
+        """Saldo débito compactado más los movimientos pendientes"""
+        return self.saldo_debito + self._saldos_pendientes()[0]
+    
+    @property
+    def saldo_credito_total(self):
+        """Saldo crédito compactado más los movimientos pendientes"""
+        return self.saldo_credito + self._saldos_pendientes()[1]
+    
     @property
     def saldo_actual(self):
         """
@@ -144,10 +349,10 @@ class CuentaContable(models.Model):
         """
         if self.naturaleza == 'D':
             # Cuentas de naturaleza débito: Saldo = Débitos - Créditos
-            return self.saldo_inicial + self.saldo_debito - self.saldo_credito
+            return self.saldo_inicial + self.saldo_debito_total - self.saldo_credito_total
         else:
             # Cuentas de naturaleza crédito: Saldo = Créditos - Débitos
-            return self.saldo_inicial + self.saldo_credito - self.saldo_debito
+            return self.saldo_inicial + self.saldo_credito_total - self.saldo_debito_total
     
     @property
     def saldo_deudor(self):
@@ -170,16 +375,33 @@ class CuentaContable(models.Model):
         """
         Actualiza los saldos de la cuenta.
         
+        Con CONTABILIDAD_SALDOS_DIFERIDOS solo inserta un MovimientoSaldo, así
+        las contabilizaciones concurrentes no esperan por la fila de cuentas
+        muy usadas (Caja, Clientes, IVA); `compactar_saldos` los acumula
+        después. Sin él, suma con un UPDATE atómico sobre la fila.
+        
         Args:
             debito: Valor a sumar al saldo débito
             credito: Valor a sumar al saldo crédito
         """
-        self.saldo_debito += debito
-        self.saldo_credito += credito
-        self.save(update_fields=['saldo_debito', 'saldo_credito'])
+        if settings.CONTABILIDAD_SALDOS_DIFERIDOS:
+            MovimientoSaldo.objects.create(cuenta=self, valor_debito=debito, valor_credito=credito)
+            if hasattr(self, 'pendiente_debito'):
+                self.pendiente_debito += debito
+                self.pendiente_credito += credito
+            return
+        
+        CuentaContable.objects.filter(pk=self.pk).update(
+            saldo_debito=F('saldo_debito') + debito,
+            saldo_credito=F('saldo_credito') + credito,
+        )
+        self.refresh_from_db(fields=['saldo_debito', 'saldo_credito'])
     
     def clean(self):
         """Validaciones personalizadas del modelo"""
+        if self.cuenta_padre and self._es_subcuenta_de_si_misma(self.cuenta_padre):
+            raise ValidationError({'cuenta_padre': MSG_PADRE_CICLICO})
+        
         # Validar que las cuentas padre no acepten movimiento
         if self.cuenta_padre and self.cuenta_padre.acepta_movimiento:
             if self.cuenta_padre.subcuentas.filter(acepta_movimiento=True).exists():
@@ -188,6 +410,47 @@ class CuentaContable(models.Model):
                 })
 
 
+class MovimientoSaldo(models.Model):
+    """
+    Movimiento pendiente de sumar a los saldos de una cuenta.
+    
+    Solo se insertan filas; `ServicioSaldos.compactar` las suma a
+    saldo_debito/saldo_credito de la cuenta y las borra.
+    """
+    cuenta = models.ForeignKey(
+        CuentaContable,
+        on_delete=models.CASCADE,
+        related_name='movimientos_saldo',
+        verbose_name="Cuenta Contable"
+    )
+    
+    valor_debito = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Valor Débito"
+    )
+    
+    valor_credito = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Valor Crédito"
+    )
+    
+    fecha_registro = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha de Registro"
+    )
+    
+    class Meta:
+        verbose_name = "Movimiento de Saldo"
+        verbose_name_plural = "Movimientos de Saldo"
+    
+    def __str__(self):
+        return f"{self.cuenta_id}: +{self.valor_debito} D / +{self.valor_credito} C"
+
+
 class Asiento(models.Model):
     """
     Modelo para gestionar asientos contables.
@@ -266,6 +529,18 @@ class Asiento(models.Model):
         verbose_name="Estado"
     )
     
+    # Asiento que lo reversa (ServicioContabilidad.reversar_asiento). El
+    # asiento queda anulado pero sus partidas siguen en el libro, compensadas
+    # por las de la reversión
+    asiento_reversion = models.OneToOneField(
+        'self',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='asiento_reversado',
+        verbose_name="Asiento de Reversión"
+    )
+    
     # Información del sistema
     fecha_creacion = models.DateTimeField(
         auto_now_add=True,
@@ -312,10 +587,73 @@ class Asiento(models.Model):
         verbose_name_plural = "Asientos Contables"
         unique_together = ['empresa', 'numero_asiento']
         ordering = ['-fecha_asiento', '-numero_asiento']
+        indexes = [
+            # Paginación por cursor de la API y reportes por período
+            models.Index(fields=['empresa', 'fecha_asiento', 'id']),
+            # Listado del admin de todas las empresas (ListadoRapidoMixin)
+            models.Index(fields=['fecha_asiento', 'id']),
+            # Paginación por cursor de los listados (PaginacionKeysetMixin)
+            models.Index(fields=['empresa', 'fecha_asiento', 'numero_asiento', 'id']),
+        ]
     
     def __str__(self):
         return f"Asiento {self.numero_asiento} - {self.concepto}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._datos_partidas = instance._datos_para_partidas()
+        return instance
+    
+    @property
+    def en_libro(self):
+        """Sus partidas cuentan en saldos y reportes: confirmado o anulado por reversión"""
+        return self.estado == 'confirmado' or (self.estado == 'anulado' and self.asiento_reversion_id is not None)
+    
+    def _datos_para_partidas(self):
+        """Valores que se copian a las partidas (ver Partida.copiar_datos_asiento)"""
+        return {
+            'empresa_id': self.empresa_id,
+            'fecha': self.fecha_asiento,
+            'confirmado': self.en_libro,
+        }
+    
+    def save(self, *args, **kwargs):
+        """
+        Guarda el asiento y, si cambió la empresa, la fecha o el estado,
+        actualiza esos datos en sus partidas con un solo UPDATE.
+        """
+        anteriores = getattr(self, '_datos_partidas', None)
+        actuales = self._datos_para_partidas()
+        # Partida.save guarda el asiento una vez por partida: si la empresa y la
+        # fecha no cambiaron desde el último guardado no se repite la consulta
+        validada = getattr(self, '_periodo_validado', None)
+        if validada == (self.empresa_id, self.fecha_asiento):
+            self._validar_periodo_abierto(anteriores, validadas={self.fecha_asiento})
+        else:
+            self._validar_periodo_abierto(anteriores)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if anteriores is not None and anteriores != actuales:
+                self.partidas.update(**actuales)
+        self._datos_partidas = actuales
+        self._periodo_validado = (self.empresa_id, self.fecha_asiento)
+    
+    def delete(self, *args, **kwargs):
+        """Los asientos de un período cerrado no se eliminan (hay que reabrirlo)"""
+        self._validar_periodo_abierto(getattr(self, '_datos_partidas', None))
+        return super().delete(*args, **kwargs)
+    
+    def _validar_periodo_abierto(self, anteriores=None, validadas=frozenset()):
+        """
+        No se crean ni modifican asientos con fecha (actual o anterior) en un
+        período cerrado. Las fechas de ``validadas`` ya se consultaron.
+        """
+        fechas = {self.fecha_asiento} | ({anteriores['fecha']} if anteriores else set())
+        for fecha in fechas - validadas:
+            if fecha and PeriodoContable.fecha_cerrada(self.empresa_id, fecha):
+                raise ValidationError({'fecha_asiento': MSG_PERIODO_CERRADO.format(fecha=fecha)})
+    
     def calcular_totales(self):
         """
         Calcula los totales del asiento basado en sus partidas.
@@ -328,6 +666,11 @@ class Asiento(models.Model):
         self.total_debito = total_debito
         self.total_credito = total_credito
     
+    @property
+    def lineas(self):
+        """Partidas del asiento: las del libro o, si su período se archivó, las del archivo"""
+        return self.partidas.all() or self.partidas_archivadas.all()
+    
     @property
     def esta_cuadrado(self):
         """Verifica si el asiento está cuadrado (débitos = créditos)"""
@@ -357,6 +700,7 @@ class Asiento(models.Model):
                 'No se puede confirmar un asiento que no esté cuadrado. '
                 f'Débitos: ${self.total_debito}, Créditos: ${self.total_credito}'
             )
+        self._validar_periodo_abierto(getattr(self, '_datos_partidas', None))
 
 
 class Partida(models.Model):
@@ -418,10 +762,45 @@ class Partida(models.Model):
         help_text="Tercero relacionado con la partida (opcional)"
     )
     
+    # Copia de datos del asiento para consultar los libros sin el JOIN.
+    # Se mantienen en Partida.save() y Asiento.save() (ver
+    # `manage.py sincronizar_partidas` para recalcularlos)
+    empresa = models.ForeignKey(
+        EMPRESA_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        editable=False,
+        db_index=False,
+        related_name='+',
+        verbose_name="Empresa"
+    )
+    
+    fecha = models.DateField(
+        null=True,
+        editable=False,
+        verbose_name="Fecha del Asiento"
+    )
+    
+    # Asiento.en_libro: confirmado o anulado por un asiento de reversión
+    confirmado = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name="Asiento Confirmado"
+    )
+    
     class Meta:
         verbose_name = "Partida Contable"
         verbose_name_plural = "Partidas Contables"
         ordering = ['asiento', 'orden']
+        indexes = [
+            # Mayor y balances por cuenta sin JOIN con asiento (index-only en PostgreSQL)
+            models.Index(
+                fields=['empresa', 'cuenta', 'fecha'],
+                include=['valor_debito', 'valor_credito'],
+                condition=models.Q(confirmado=True),
+                name='partida_empresa_cuenta_fecha',
+            ),
+        ]
     
     def __str__(self):
         if self.valor_debito > 0:
@@ -429,6 +808,13 @@ class Partida(models.Model):
         else:
             return f"{self.cuenta.codigo} - Crédito: ${self.valor_credito}"
     
+    def copiar_datos_asiento(self, asiento=None):
+        """Copia empresa, fecha y estado del asiento a la partida"""
+        asiento = asiento or self.asiento
+        self.empresa_id = asiento.empresa_id
+        self.fecha = asiento.fecha_asiento
+        self.confirmado = asiento.en_libro
+    
     @property
     def valor_movimiento(self):
         """Retorna el valor del movimiento (débito o crédito)"""
@@ -460,11 +846,362 @@ class Partida(models.Model):
     
     def save(self, *args, **kwargs):
         """
-        Sobrescribe el método save para actualizar totales del asiento.
+        Sobrescribe el método save para copiar los datos del asiento y
+        actualizar sus totales.
         """
+        self.copiar_datos_asiento()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'empresa', 'fecha', 'confirmado'}
         super().save(*args, **kwargs)
         
         # Recalcular totales del asiento
         if self.asiento:
             self.asiento.calcular_totales()
             self.asiento.save()
+
+
+class DocumentoResumido(models.Model):
+    """
+    Factura o pago de una empresa con contabilización en resumen diario.
+    
+    Queda pendiente (sin asiento) hasta que `contabilizar_resumen_diario`
+    genera el asiento consolidado del día y método de pago; después sirve
+    de traza entre ese asiento y los documentos que lo componen.
+    """
+    TIPO_CHOICES = [
+        ('venta', 'Venta'),
+        ('cobro', 'Cobro'),
+        ('ingreso', 'Ingreso'),
+        ('egreso', 'Egreso'),
+    ]
+    
+    empresa = models.ForeignKey(
+        EMPRESA_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name="Empresa"
+    )
+    
+    tipo = models.CharField(
+        max_length=10,
+        choices=TIPO_CHOICES,
+        verbose_name="Tipo de Documento"
+    )
+    
+    factura = models.OneToOneField(
+        'facturacion.Factura',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='documento_resumido',
+        verbose_name="Factura"
+    )
+    
+    pago = models.OneToOneField(
+        'tesoreria.Pago',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='documento_resumido',
+        verbose_name="Pago"
+    )
+    
+    fecha = models.DateField(verbose_name="Fecha")
+    
+    metodo_pago = models.ForeignKey(
+        'catalogos.MetodoPago',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        verbose_name="Método de Pago"
+    )
+    
+    asiento = models.ForeignKey(
+        Asiento,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='documentos_resumidos',
+        verbose_name="Asiento Resumen"
+    )
+    
+    creado_por = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        verbose_name="Creado por"
+    )
+    
+    fecha_registro = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha de Registro"
+    )
+    
+    class Meta:
+        verbose_name = "Documento Resumido"
+        verbose_name_plural = "Documentos Resumidos"
+        indexes = [
+            models.Index(
+                fields=['empresa', 'fecha', 'metodo_pago'],
+                name='documento_resumido_pendiente',
+                condition=models.Q(asiento__isnull=True),
+            ),
+        ]
+    
+    def __str__(self):
+        documento = self.factura or self.pago
+        return f"{self.get_tipo_display()} {documento} ({self.fecha})"
+    
+    @property
+    def documento(self):
+        """Factura o pago de origen"""
+        return self.factura if self.factura_id else self.pago
+
+
+class PeriodoContable(models.Model):
+    """
+    Período cerrado de una empresa (ver contabilidad.cierre).
+    
+    El cierre genera el asiento que salda las cuentas de resultado y congela
+    en SaldoCierre el saldo de cada cuenta a ``fecha_fin``. Desde entonces no
+    se aceptan asientos con fecha dentro del período y los reportes parten
+    del cierre más cercano en vez de recorrer todo el histórico.
+    """
+    empresa = models.ForeignKey(
+        EMPRESA_MODEL,
+        on_delete=models.CASCADE,
+        related_name='periodos_contables',
+        verbose_name="Empresa"
+    )
+    
+    fecha_inicio = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name="Fecha de Inicio",
+        help_text="Día siguiente al cierre anterior (vacío en el primer cierre)"
+    )
+    
+    fecha_fin = models.DateField(
+        verbose_name="Fecha de Cierre"
+    )
+    
+    asiento_cierre = models.OneToOneField(
+        Asiento,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='periodo_cerrado',
+        verbose_name="Asiento de Cierre"
+    )
+    
+    cerrado_por = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        verbose_name="Cerrado por"
+    )
+    
+    fecha_cierre = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha del Cierre"
+    )
+    
+    archivado = models.BooleanField(
+        default=False,
+        verbose_name="Archivado",
+        help_text="Sus partidas se movieron a PartidaArchivada (ver contabilidad.archivo)"
+    )
+    
+    class Meta:
+        verbose_name = "Período Contable"
+        verbose_name_plural = "Períodos Contables"
+        unique_together = ['empresa', 'fecha_fin']
+        ordering = ['empresa', '-fecha_fin']
+    
+    def __str__(self):
+        return f"{self.empresa} - cierre {self.fecha_fin}"
+    
+    @staticmethod
+    def ultimo_cierre(empresa_id, hasta=None, antes_de=None):
+        """
+        Último período cerrado de la empresa con fecha_fin <= ``hasta`` o
+        < ``antes_de`` (None si no hay)
+        """
+        periodos = PeriodoContable.objects.filter(empresa_id=empresa_id)
+        if hasta is not None:
+            periodos = periodos.filter(fecha_fin__lte=hasta)
+        if antes_de is not None:
+            periodos = periodos.filter(fecha_fin__lt=antes_de)
+        return periodos.order_by('-fecha_fin').first()
+    
+    @staticmethod
+    def fecha_cerrada(empresa_id, fecha):
+        """True si ``fecha`` cae en un período ya cerrado de la empresa"""
+        return PeriodoContable.objects.filter(empresa_id=empresa_id, fecha_fin__gte=fecha).exists()
+    
+    @staticmethod
+    def archivado_hasta(empresa_id):
+        """Fecha hasta la que las partidas de la empresa están archivadas (None si no hay archivo)"""
+        return PeriodoContable.objects.filter(
+            empresa_id=empresa_id, archivado=True
+        ).aggregate(hasta=models.Max('fecha_fin'))['hasta']
+
+
+class SaldoCierre(models.Model):
+    """
+    Saldo congelado de una cuenta al cierre de un período.
+    
+    ``debito``/``credito`` acumulan desde el primer movimiento, con el saldo
+    inicial de la cuenta del lado de su naturaleza (igual que
+    CuentaContable.anotar_saldos_acumulados sin fecha de inicio). Las cuentas
+    sin fila tienen saldo cero. No se modifican: reabrir el período las borra.
+    """
+    periodo = models.ForeignKey(
+        PeriodoContable,
+        on_delete=models.CASCADE,
+        related_name='saldos',
+        verbose_name="Período"
+    )
+    
+    cuenta = models.ForeignKey(
+        CuentaContable,
+        on_delete=models.CASCADE,
+        related_name='saldos_cierre',
+        verbose_name="Cuenta Contable"
+    )
+    
+    debito = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Débito Acumulado"
+    )
+    
+    credito = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Crédito Acumulado"
+    )
+    
+    saldo = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Saldo",
+        help_text="Según la naturaleza de la cuenta"
+    )
+    
+    class Meta:
+        verbose_name = "Saldo de Cierre"
+        verbose_name_plural = "Saldos de Cierre"
+        unique_together = ['periodo', 'cuenta']
+    
+    def __str__(self):
+        return f"{self.cuenta.codigo} al {self.periodo.fecha_fin}: {self.saldo}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError(MSG_SALDO_CIERRE_INMUTABLE)
+        super().save(*args, **kwargs)
+
+
+class PartidaArchivada(models.Model):
+    """
+    Partida de un período cerrado y archivado (ver contabilidad.archivo).
+    
+    Tiene las mismas columnas e IDs que Partida, así el archivo se llena y se
+    restaura con un ``INSERT ... SELECT``. Los asientos se quedan en su tabla
+    (facturas y pagos los referencian); los saldos de las cuentas al cierre
+    quedan en SaldoCierre. Los libros leen de aquí cuando el rango de fechas
+    llega a un período archivado.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    
+    asiento = models.ForeignKey(
+        Asiento,
+        on_delete=models.CASCADE,
+        related_name='partidas_archivadas',
+        verbose_name="Asiento"
+    )
+    
+    cuenta = models.ForeignKey(
+        CuentaContable,
+        on_delete=models.PROTECT,
+        related_name='partidas_archivadas',
+        verbose_name="Cuenta Contable"
+    )
+    
+    concepto = models.CharField(
+        max_length=300,
+        verbose_name="Concepto"
+    )
+    
+    valor_debito = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Valor Débito"
+    )
+    
+    valor_credito = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Valor Crédito"
+    )
+    
+    orden = models.PositiveIntegerField(
+        default=1,
+        verbose_name="Orden"
+    )
+    
+    tercero = models.ForeignKey(
+        'catalogos.Tercero',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Tercero"
+    )
+    
+    empresa = models.ForeignKey(
+        EMPRESA_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        db_index=False,
+        related_name='+',
+        verbose_name="Empresa"
+    )
+    
+    fecha = models.DateField(
+        null=True,
+        verbose_name="Fecha del Asiento"
+    )
+    
+    confirmado = models.BooleanField(
+        default=False,
+        verbose_name="Asiento Confirmado"
+    )
+    
+    class Meta:
+        verbose_name = "Partida Archivada"
+        verbose_name_plural = "Partidas Archivadas"
+        ordering = ['asiento', 'orden']
+        indexes = [
+            # Mayor histórico por cuenta y libro diario por fecha
+            models.Index(fields=['empresa', 'cuenta', 'fecha'], name='partida_arch_empresa_cuenta'),
+            models.Index(fields=['empresa', 'fecha'], name='partida_arch_empresa_fecha'),
+        ]
+    
+    def __str__(self):
+        if self.valor_debito > 0:
+            return f"{self.cuenta.codigo} - Débito: ${self.valor_debito}"
+        return f"{self.cuenta.codigo} - Crédito: ${self.valor_credito}"
+    
+    @property
+    def valor_movimiento(self):
+        """Retorna el valor del movimiento (débito o crédito)"""
+        return self.valor_debito if self.valor_debito > 0 else self.valor_credito
+    
+    @property
+    def tipo_movimiento(self):
+        """Retorna el tipo de movimiento (D o C)"""
+        return 'D' if self.valor_debito > 0 else 'C'
@@ -0,0 +1,232 @@
+"""
+Aprovisionamiento masivo del plan de cuentas.
+
+Carga un PUC completo desde una plantilla CSV con las columnas
+``codigo, nombre`` y opcional ``naturaleza`` (ver contabilidad/data) o copia
+el plan de otra empresa. Los padres se resuelven en memoria por prefijo del
+código (1 → 11 → 1105 → 110505) y las cuentas se insertan con bulk_create
+nivel por nivel de la jerarquía: una sentencia por nivel (y por cada
+TAMANO_LOTE_PLAN cuentas) para miles de cuentas, en vez de un create() por
+cuenta.
+
+Una cuenta acepta movimiento si no tiene subcuentas en la plantilla.
+"""
+import csv
+import os
+from decimal import Decimal
+from itertools import groupby
+from operator import attrgetter
+
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import CuentaContable, SEPARADOR_RUTA
+
+# Plantillas incluidas con la aplicación
+DIRECTORIO_PLANTILLAS = os.path.join(os.path.dirname(__file__), 'data')
+PLANTILLAS_PUC = {
+    'comerciantes': 'puc_comerciantes.csv',
+}
+PLANTILLA_POR_DEFECTO = 'comerciantes'
+
+# Cuentas por sentencia en bulk_create
+TAMANO_LOTE_PLAN = 1000
+
+# Tipo y naturaleza por defecto según la clase (primer dígito del código)
+TIPO_POR_CLASE = {
+    '1': 'ACTIVO',
+    '2': 'PASIVO',
+    '3': 'PATRIMONIO',
+    '4': 'INGRESO',
+    '5': 'GASTO',
+    '6': 'COSTO',
+    '7': 'COSTO',
+}
+NATURALEZA_POR_CLASE = {'1': 'D', '2': 'C', '3': 'C', '4': 'C', '5': 'D', '6': 'D', '7': 'D'}
+
+# Nivel PUC según la longitud del código: clase, grupo, cuenta, subcuenta, auxiliar
+NIVEL_POR_LONGITUD = {1: 1, 2: 2, 4: 3, 6: 4, 8: 5}
+
+CERO = Decimal('0.00')
+
+
+class ErrorPlanCuentas(ValueError):
+    """Plantilla inválida o empresa que ya tiene plan de cuentas"""
+
+    def __init__(self, errores):
+        self.errores = errores if isinstance(errores, list) else [errores]
+        super().__init__('; '.join(self.errores[:10]))
+
+
+def leer_plantilla(plantilla=PLANTILLA_POR_DEFECTO):
+    """
+    Filas de una plantilla incluida (por nombre) o de un archivo CSV (por ruta).
+
+    Returns:
+        list[dict]: ``codigo``, ``nombre`` y ``naturaleza`` ('' si no viene)
+    """
+    ruta = os.path.join(DIRECTORIO_PLANTILLAS, PLANTILLAS_PUC[plantilla]) if plantilla in PLANTILLAS_PUC else plantilla
+    if not os.path.isfile(ruta):
+        raise ErrorPlanCuentas(f'Plantilla no encontrada: {plantilla}')
+    with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+        return [
+            {
+                'codigo': (fila.get('codigo') or '').strip(),
+                'nombre': (fila.get('nombre') or '').strip(),
+                'naturaleza': (fila.get('naturaleza') or '').strip().upper(),
+            }
+            for fila in csv.DictReader(archivo)
+        ]
+
+
+def construir_plan(empresa, filas):
+    """
+    Cuentas sin guardar en orden de jerarquía (padres antes que hijas), con
+    ruta y profundidad ya calculadas, y el código del padre de cada una.
+
+    Raises:
+        ErrorPlanCuentas: Códigos repetidos o inválidos, clases sin tipo o
+            cuentas sin cuenta padre en la plantilla
+
+    Returns:
+        tuple: (list[CuentaContable], dict codigo -> codigo del padre)
+    """
+    errores = []
+    por_codigo = {}
+    for numero, fila in enumerate(filas, start=2):
+        codigo = fila['codigo']
+        if not codigo.isdigit():
+            errores.append(f'Fila {numero}: código inválido "{codigo}"')
+        elif codigo in por_codigo:
+            errores.append(f'Fila {numero}: código {codigo} repetido')
+        elif codigo[0] not in TIPO_POR_CLASE:
+            errores.append(f'Fila {numero}: clase {codigo[0]} sin tipo de cuenta')
+        elif fila['naturaleza'] not in ('', 'D', 'C'):
+            errores.append(f'Fila {numero}: naturaleza inválida "{fila["naturaleza"]}"')
+        else:
+            por_codigo[codigo] = fila
+
+    # El padre es el prefijo más largo del código que exista en la plantilla
+    padres = {}
+    for codigo in por_codigo:
+        prefijo = next((codigo[:n] for n in range(len(codigo) - 1, 0, -1) if codigo[:n] in por_codigo), None)
+        if prefijo:
+            padres[codigo] = prefijo
+        elif len(codigo) > 1:
+            errores.append(f'La cuenta {codigo} no tiene cuenta padre en la plantilla')
+    if errores:
+        raise ErrorPlanCuentas(errores)
+
+    con_subcuentas = set(padres.values())
+    rutas = {}
+    cuentas = []
+    # Por longitud del código: el padre siempre se procesa antes que sus hijas
+    for codigo in sorted(por_codigo, key=lambda c: (len(c), c)):
+        fila = por_codigo[codigo]
+        padre = padres.get(codigo)
+        ruta_padre, profundidad_padre = rutas[padre] if padre else ('', 0)
+        rutas[codigo] = (f'{ruta_padre}{codigo}{SEPARADOR_RUTA}', profundidad_padre + 1)
+        cuentas.append(CuentaContable(
+            empresa=empresa,
+            codigo=codigo,
+            nombre=fila['nombre'] or codigo,
+            naturaleza=fila['naturaleza'] or NATURALEZA_POR_CLASE[codigo[0]],
+            tipo_cuenta=TIPO_POR_CLASE[codigo[0]],
+            nivel=NIVEL_POR_LONGITUD.get(len(codigo), profundidad_padre + 1),
+            ruta=rutas[codigo][0],
+            profundidad=rutas[codigo][1],
+            acepta_movimiento=codigo not in con_subcuentas,
+        ))
+    # Orden de inserción: nivel por nivel, como lo recorre el plan
+    cuentas.sort(key=lambda c: (c.profundidad, c.codigo))
+    return cuentas, padres
+
+
+def _validar_destino_vacio(empresa):
+    if CuentaContable.objects.filter(empresa=empresa).exists():
+        raise ErrorPlanCuentas(f'La empresa {empresa} ya tiene plan de cuentas')
+
+
+def provisionar_plan_cuentas(empresa, plantilla=PLANTILLA_POR_DEFECTO):
+    """
+    Crea el plan de cuentas de ``empresa`` desde una plantilla (nombre de
+    PLANTILLAS_PUC o ruta a un CSV). Se inserta un nivel de la jerarquía por
+    bulk_create: los ids del nivel anterior ya se conocen, así que cada
+    subcuenta sale con su cuenta_padre_id sin un UPDATE posterior.
+
+    Returns:
+        int: Cuentas creadas
+    """
+    cuentas, padres = construir_plan(empresa, leer_plantilla(plantilla))
+    ids = {}
+    with transaction.atomic():
+        _validar_destino_vacio(empresa)
+        for _, nivel in groupby(cuentas, key=attrgetter('profundidad')):
+            nivel = list(nivel)
+            for cuenta in nivel:
+                if cuenta.codigo in padres:
+                    cuenta.cuenta_padre_id = ids[padres[cuenta.codigo]]
+            CuentaContable.objects.bulk_create(nivel, batch_size=TAMANO_LOTE_PLAN)
+            if connection.features.can_return_rows_from_bulk_insert:
+                ids.update((cuenta.codigo, cuenta.pk) for cuenta in nivel)
+            else:
+                ids.update(CuentaContable.objects.filter(
+                    empresa=empresa, codigo__in=[cuenta.codigo for cuenta in nivel]
+                ).values_list('codigo', 'pk'))
+    return len(cuentas)
+
+
+def copiar_plan_cuentas(origen, destino):
+    """
+    Copia el plan de cuentas de la empresa ``origen`` a ``destino`` con un
+    ``INSERT ... SELECT`` y enlaza los padres con un solo UPDATE. Los saldos
+    quedan en cero; ruta y profundidad se copian tal cual porque los códigos
+    son los mismos.
+
+    Returns:
+        int: Cuentas copiadas
+    """
+    reiniciados = {
+        'empresa': destino.pk,
+        'cuenta_padre': None,
+        'saldo_inicial': CERO,
+        'saldo_debito': CERO,
+        'saldo_credito': CERO,
+        'fecha_creacion': timezone.now(),
+    }
+    columnas, seleccion, parametros = [], [], []
+    for campo in CuentaContable._meta.concrete_fields:
+        if campo.primary_key:
+            continue
+        columna = connection.ops.quote_name(campo.column)
+        columnas.append(columna)
+        if campo.name in reiniciados:
+            seleccion.append('%s')
+            parametros.append(campo.get_db_prep_save(reiniciados[campo.name], connection))
+        else:
+            seleccion.append(columna)
+    tabla = connection.ops.quote_name(CuentaContable._meta.db_table)
+    sql = (
+        f'INSERT INTO {tabla} ({", ".join(columnas)}) '
+        f'SELECT {", ".join(seleccion)} FROM {tabla} '
+        f'WHERE {connection.ops.quote_name("empresa_id")} = %s ORDER BY {connection.ops.quote_name("ruta")}'
+    )
+
+    # Padre en destino: la cuenta con el código del padre de la misma cuenta en origen
+    codigo_padre_origen = CuentaContable.objects.filter(
+        empresa=origen, codigo=OuterRef(OuterRef('codigo'))
+    ).values('cuenta_padre__codigo')[:1]
+    padre_destino = CuentaContable.objects.filter(
+        empresa=destino, codigo=Subquery(codigo_padre_origen)
+    ).values('pk')[:1]
+
+    with transaction.atomic():
+        _validar_destino_vacio(destino)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*parametros, origen.pk])
+            copiadas = cursor.rowcount
+        CuentaContable.objects.filter(empresa=destino, profundidad__gt=1).update(
+            cuenta_padre=Subquery(padre_destino)
+        )
+    return copiadas
@@ -3,10 +3,33 @@ Servicios de dominio para la contabilidad.
 Contiene la lógica de negocio para generar asientos contables automáticos.
 """
 
+from collections import defaultdict
 from decimal import Decimal
+from typing import NamedTuple
+from django.conf import settings
 from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Concat
 from django.utils import timezone
-from .models import Asiento, Partida, CuentaContable
+from facturacion.models import Factura
+from tesoreria.models import Pago
+from . import plan_cuentas
+from .archivo import ServicioArchivo
+from .models import Asiento, Partida, CuentaContable, MovimientoSaldo, DocumentoResumido, SEPARADOR_RUTA
+
+# Movimientos de saldo que se compactan por transacción
+TAMANO_LOTE_COMPACTACION = 10000
+
+CERO = Decimal('0.00')
+
+
+class LineaAsiento(NamedTuple):
+    """Partida por crear: cuenta, débito, crédito, concepto y tercero"""
+    cuenta: CuentaContable
+    debito: Decimal
+    credito: Decimal
+    concepto: str
+    tercero: object = None
 
 
 class ServicioContabilidad:
@@ -56,49 +79,32 @@ class ServicioContabilidad:
         return CuentaContable.objects.get(empresa=empresa, codigo=codigo, activa=True)
     
     @staticmethod
-    @transaction.atomic
-    def generar_asiento_venta(factura):
+    def lineas_venta(factura):
         """
-        Genera el asiento contable para una factura de venta.
+        Partidas de una factura de venta.
         
         Lógica contable:
         - Venta contado: Débito Caja/Banco, Crédito Ingresos, Crédito IVA por pagar
         - Venta crédito: Débito Clientes, Crédito Ingresos, Crédito IVA por pagar
         
-        Args:
-            factura: Instancia de Factura
-            
         Returns:
-            Asiento: Asiento contable generado
+            list: LineaAsiento en orden
             
         Raises:
-            Exception: Si no se pueden encontrar las cuentas necesarias
+            ValueError: Si no se pueden encontrar las cuentas necesarias
         """
-        if factura.asiento_contable:
-            # Ya tiene asiento generado, no duplicar
-            return factura.asiento_contable
-        
         empresa = factura.empresa
-        
-        # Crear el asiento
-        asiento = Asiento.objects.create(
-            empresa=empresa,
-            numero_asiento=ServicioContabilidad.obtener_siguiente_numero_asiento(empresa),
-            fecha_asiento=factura.fecha_factura,
-            tipo_asiento='automatico',
-            concepto=f"Venta según factura {factura.numero_factura} - {factura.cliente.razon_social}",
-            documento_origen=f"FACTURA-{factura.numero_factura}",
-            creado_por=factura.creado_por
-        )
+        cliente = factura.cliente
         
         try:
-            # Obtener cuentas contables necesarias
             if factura.tipo_venta == 'contado':
                 # Cuenta de caja o banco (débito)
-                cuenta_caja = ServicioContabilidad.obtener_cuenta_por_codigo(empresa, '1105')  # Caja
+                cuenta_debito = ServicioContabilidad.obtener_cuenta_por_codigo(empresa, '1105')  # Caja
+                concepto_debito = f"Cobro factura {factura.numero_factura} - {cliente.razon_social}"
             else:
                 # Cuenta de clientes (débito)
-                cuenta_clientes = ServicioContabilidad.obtener_cuenta_por_codigo(empresa, '1305')  # Clientes
+                cuenta_debito = ServicioContabilidad.obtener_cuenta_por_codigo(empresa, '1305')  # Clientes
+                concepto_debito = f"Venta a crédito factura {factura.numero_factura} - {cliente.razon_social}"
             
             # Cuenta de ingresos (crédito)
             cuenta_ingresos = ServicioContabilidad.obtener_cuenta_por_codigo(empresa, '4135')  # Ingresos por ventas
@@ -111,73 +117,121 @@ class ServicioContabilidad:
         except CuentaContable.DoesNotExist as e:
             raise ValueError(f"No se encontró la cuenta contable necesaria: {str(e)}")
         
-        # Crear partidas del asiento
-        orden = 1
-        
-        # 1. Partida de débito (Caja/Banco o Clientes)
-        if factura.tipo_venta == 'contado':
-            Partida.objects.create(
-                asiento=asiento,
-                cuenta=cuenta_caja,
-                concepto=f"Cobro factura {factura.numero_factura} - {factura.cliente.razon_social}",
-                valor_debito=factura.total,
-                valor_credito=Decimal('0.00'),
-                orden=orden,
-                tercero=factura.cliente
-            )
-        else:
-            Partida.objects.create(
-                asiento=asiento,
-                cuenta=cuenta_clientes,
-                concepto=f"Venta a crédito factura {factura.numero_factura} - {factura.cliente.razon_social}",
-                valor_debito=factura.total,
-                valor_credito=Decimal('0.00'),
-                orden=orden,
-                tercero=factura.cliente
+        lineas = [
+            LineaAsiento(cuenta_debito, factura.total, CERO, concepto_debito, cliente),
+            LineaAsiento(cuenta_ingresos, CERO, factura.subtotal, f"Venta según factura {factura.numero_factura}", cliente),
+        ]
+        if cuenta_iva:
+            lineas.append(
+                LineaAsiento(cuenta_iva, CERO, factura.total_impuestos, f"IVA factura {factura.numero_factura}", cliente)
             )
-        orden += 1
-        
-        # 2. Partida de crédito (Ingresos)
-        Partida.objects.create(
-            asiento=asiento,
-            cuenta=cuenta_ingresos,
-            concepto=f"Venta según factura {factura.numero_factura}",
-            valor_debito=Decimal('0.00'),
-            valor_credito=factura.subtotal,
-            orden=orden,
-            tercero=factura.cliente
-        )
-        orden += 1
+        return lineas
+    
+    @staticmethod
+    def lineas_cobro(pago):
+        """
+        Partidas de un cobro a cliente: Débito Caja, Crédito Clientes.
+        
+        Raises:
+            ValueError: Si no se pueden encontrar las cuentas necesarias
+        """
+        empresa = pago.empresa
+        
+        try:
+            cuenta_caja = ServicioContabilidad.obtener_cuenta_por_codigo(empresa, '1105')  # Caja
+            cuenta_clientes = ServicioContabilidad.obtener_cuenta_por_codigo(empresa, '1305')  # Clientes
+        except CuentaContable.DoesNotExist as e:
+            raise ValueError(f"No se encontró la cuenta contable necesaria: {str(e)}")
+        
+        concepto_credito = f"Abono a cuenta de {pago.tercero.razon_social}"
+        if pago.factura:
+            concepto_credito += f" - Factura {pago.factura.numero_factura}"
         
-        # 3. Partida de crédito (IVA por pagar) - solo si hay impuestos
-        if factura.total_impuestos > 0 and cuenta_iva:
+        return [
+            LineaAsiento(
+                cuenta_caja, pago.valor, CERO,
+                f"Cobro de {pago.tercero.razon_social} - {pago.metodo_pago.nombre}", pago.tercero,
+            ),
+            LineaAsiento(cuenta_clientes, CERO, pago.valor, concepto_credito, pago.tercero),
+        ]
+    
+    @staticmethod
+    def contabilizar_lineas(asiento, lineas, usuario):
+        """
+        Crea las partidas del asiento, lo confirma y actualiza los saldos
+        de las cuentas.
+        
+        Args:
+            asiento: Asiento recién creado (en borrador)
+            lineas: Lista de LineaAsiento
+            usuario: Usuario que confirma el asiento
+        """
+        for orden, linea in enumerate(lineas, start=1):
             Partida.objects.create(
                 asiento=asiento,
-                cuenta=cuenta_iva,
-                concepto=f"IVA factura {factura.numero_factura}",
-                valor_debito=Decimal('0.00'),
-                valor_credito=factura.total_impuestos,
+                cuenta=linea.cuenta,
+                concepto=linea.concepto,
+                valor_debito=linea.debito,
+                valor_credito=linea.credito,
                 orden=orden,
-                tercero=factura.cliente
+                tercero=linea.tercero
             )
         
         # Calcular totales y confirmar asiento
         asiento.calcular_totales()
         asiento.estado = 'confirmado'
-        asiento.confirmado_por = factura.creado_por
+        asiento.confirmado_por = usuario
         asiento.fecha_confirmacion = timezone.now()
         asiento.save()
         
         # Actualizar saldos de las cuentas
-        if factura.tipo_venta == 'contado':
-            cuenta_caja.actualizar_saldos(debito=factura.total)
-        else:
-            cuenta_clientes.actualizar_saldos(debito=factura.total)
+        for linea in lineas:
+            linea.cuenta.actualizar_saldos(debito=linea.debito, credito=linea.credito)
+    
+    @staticmethod
+    @transaction.atomic
+    def generar_asiento_venta(factura):
+        """
+        Genera el asiento contable para una factura de venta.
         
-        cuenta_ingresos.actualizar_saldos(credito=factura.subtotal)
+        Si la empresa contabiliza en resumen diario, la factura queda en
+        cola para el asiento consolidado y no se genera asiento.
         
-        if factura.total_impuestos > 0 and cuenta_iva:
-            cuenta_iva.actualizar_saldos(credito=factura.total_impuestos)
+        Args:
+            factura: Instancia de Factura
+            
+        Returns:
+            Asiento: Asiento contable generado (None si quedó en cola)
+            
+        Raises:
+            Exception: Si no se pueden encontrar las cuentas necesarias
+        """
+        if factura.asiento_contable:
+            # Ya tiene asiento generado, no duplicar
+            return factura.asiento_contable
+        
+        empresa = factura.empresa
+        
+        if empresa.contabiliza_resumen_diario:
+            ServicioResumenDiario.encolar(
+                'venta', factura.creado_por, factura=factura,
+                fecha=factura.fecha_factura, metodo_pago=factura.metodo_pago,
+            )
+            return None
+        
+        lineas = ServicioContabilidad.lineas_venta(factura)
+        
+        # Crear el asiento
+        asiento = Asiento.objects.create(
+            empresa=empresa,
+            numero_asiento=ServicioContabilidad.obtener_siguiente_numero_asiento(empresa),
+            fecha_asiento=factura.fecha_factura,
+            tipo_asiento='automatico',
+            concepto=f"Venta según factura {factura.numero_factura} - {factura.cliente.razon_social}",
+            documento_origen=f"FACTURA-{factura.numero_factura}",
+            creado_por=factura.creado_por
+        )
+        ServicioContabilidad.contabilizar_lineas(asiento, lineas, factura.creado_por)
         
         # Asociar el asiento a la factura
         factura.asiento_contable = asiento
@@ -191,15 +245,14 @@ class ServicioContabilidad:
         """
         Genera el asiento contable para un cobro a cliente.
         
-        Lógica contable:
-        - Débito: Caja/Banco
-        - Crédito: Clientes
+        Si la empresa contabiliza en resumen diario, el cobro queda en cola
+        para el asiento consolidado y no se genera asiento.
         
         Args:
             pago: Instancia de Pago (tipo cobro)
             
         Returns:
-            Asiento: Asiento contable generado
+            Asiento: Asiento contable generado (None si quedó en cola)
             
         Raises:
             Exception: Si no se pueden encontrar las cuentas necesarias
@@ -213,6 +266,14 @@ class ServicioContabilidad:
         
         empresa = pago.empresa
         
+        if empresa.contabiliza_resumen_diario:
+            ServicioResumenDiario.encolar(
+                'cobro', pago.creado_por, pago=pago, fecha=pago.fecha_pago, metodo_pago=pago.metodo_pago,
+            )
+            return None
+        
+        lineas = ServicioContabilidad.lineas_cobro(pago)
+        
         # Crear el asiento
         asiento = Asiento.objects.create(
             empresa=empresa,
@@ -223,52 +284,7 @@ class ServicioContabilidad:
             documento_origen=f"COBRO-{pago.numero_pago}",
             creado_por=pago.creado_por
         )
-        
-        try:
-            # Obtener cuentas contables necesarias
-            cuenta_caja = ServicioContabilidad.obtener_cuenta_por_codigo(empresa, '1105')  # Caja
-            cuenta_clientes = ServicioContabilidad.obtener_cuenta_por_codigo(empresa, '1305')  # Clientes
-            
-        except CuentaContable.DoesNotExist as e:
-            raise ValueError(f"No se encontró la cuenta contable necesaria: {str(e)}")
-        
-        # Crear partidas del asiento
-        # 1. Partida de débito (Caja/Banco)
-        Partida.objects.create(
-            asiento=asiento,
-            cuenta=cuenta_caja,
-            concepto=f"Cobro de {pago.tercero.razon_social} - {pago.metodo_pago.nombre}",
-            valor_debito=pago.valor,
-            valor_credito=Decimal('0.00'),
-            orden=1,
-            tercero=pago.tercero
-        )
-        
-        # 2. Partida de crédito (Clientes)
-        concepto_credito = f"Abono a cuenta de {pago.tercero.razon_social}"
-        if pago.factura:
-            concepto_credito += f" - Factura {pago.factura.numero_factura}"
-        
-        Partida.objects.create(
-            asiento=asiento,
-            cuenta=cuenta_clientes,
-            concepto=concepto_credito,
-            valor_debito=Decimal('0.00'),
-            valor_credito=pago.valor,
-            orden=2,
-            tercero=pago.tercero
-        )
-        
-        # Calcular totales y confirmar asiento
-        asiento.calcular_totales()
-        asiento.estado = 'confirmado'
-        asiento.confirmado_por = pago.creado_por
-        asiento.fecha_confirmacion = timezone.now()
-        asiento.save()
-        
-        # Actualizar saldos de las cuentas
-        cuenta_caja.actualizar_saldos(debito=pago.valor)
-        cuenta_clientes.actualizar_saldos(credito=pago.valor)
+        ServicioContabilidad.contabilizar_lineas(asiento, lineas, pago.creado_por)
         
         # Asociar el asiento al pago
         pago.asiento_contable = asiento
@@ -308,7 +324,7 @@ class ServicioContabilidad:
         )
         
         # Crear partidas inversas
-        for partida_original in asiento_original.partidas.all():
+        for partida_original in asiento_original.lineas:
             Partida.objects.create(
                 asiento=asiento_reverso,
                 cuenta=partida_original.cuenta,
@@ -333,14 +349,289 @@ class ServicioContabilidad:
         asiento_reverso.fecha_confirmacion = timezone.now()
         asiento_reverso.save()
         
-        # Marcar el asiento original como anulado
+        # Marcar el asiento original como anulado; sus partidas siguen en el
+        # libro (y en los saldos) compensadas por las de la reversión
         asiento_original.estado = 'anulado'
+        asiento_original.asiento_reversion = asiento_reverso
         asiento_original.observaciones += f"\n\nAnulado por asiento de reversión {asiento_reverso.numero_asiento}"
         asiento_original.save()
         
         return asiento_reverso
 
 
+class ServicioSaldos:
+    """
+    Compactación de los movimientos de saldo diferidos
+    (CONTABILIDAD_SALDOS_DIFERIDOS) en CuentaContable.
+    """
+    
+    @staticmethod
+    @transaction.atomic
+    def compactar_lote(empresa=None, tamano_lote=TAMANO_LOTE_COMPACTACION):
+        """
+        Suma un lote de movimientos a sus cuentas y los borra.
+        
+        Los movimientos se bloquean con SKIP LOCKED: dos compactadores no
+        toman las mismas filas y las que todavía no confirmó otra
+        transacción no se ven, así que nada se suma dos veces ni se pierde.
+        
+        Args:
+            empresa: Limitar a las cuentas de esta empresa (opcional)
+            tamano_lote: Movimientos máximos por lote
+            
+        Returns:
+            int: Movimientos compactados
+        """
+        movimientos = MovimientoSaldo.objects.select_for_update(skip_locked=True, of=('self',)).order_by('id')
+        if empresa is not None:
+            movimientos = movimientos.filter(cuenta__empresa=empresa)
+        lote = list(movimientos.values_list('id', 'cuenta_id', 'valor_debito', 'valor_credito')[:tamano_lote])
+        if not lote:
+            return 0
+        
+        totales = defaultdict(lambda: [Decimal('0.00'), Decimal('0.00')])
+        for _, cuenta_id, debito, credito in lote:
+            totales[cuenta_id][0] += debito
+            totales[cuenta_id][1] += credito
+        
+        # Orden fijo de cuentas para no bloquearse con otro compactador
+        for cuenta_id in sorted(totales):
+            debito, credito = totales[cuenta_id]
+            CuentaContable.objects.filter(pk=cuenta_id).update(
+                saldo_debito=F('saldo_debito') + debito,
+                saldo_credito=F('saldo_credito') + credito,
+            )
+        MovimientoSaldo.objects.filter(id__in=[movimiento[0] for movimiento in lote]).delete()
+        return len(lote)
+    
+    @staticmethod
+    def aplicar_movimientos(movimientos):
+        """
+        Suma a los saldos de las cuentas movimientos ya acumulados por cuenta
+        (``{cuenta_id: (debito, credito)}``): un MovimientoSaldo por cuenta si
+        los saldos son diferidos, si no un UPDATE atómico por cuenta.
+        """
+        if settings.CONTABILIDAD_SALDOS_DIFERIDOS:
+            MovimientoSaldo.objects.bulk_create([
+                MovimientoSaldo(cuenta_id=cuenta_id, valor_debito=debito, valor_credito=credito)
+                for cuenta_id, (debito, credito) in movimientos.items()
+            ])
+            return
+        
+        # Orden fijo de cuentas para no bloquearse con otra transacción
+        for cuenta_id in sorted(movimientos):
+            debito, credito = movimientos[cuenta_id]
+            CuentaContable.objects.filter(pk=cuenta_id).update(
+                saldo_debito=F('saldo_debito') + debito,
+                saldo_credito=F('saldo_credito') + credito,
+            )
+    
+    @staticmethod
+    def compactar(empresa=None, tamano_lote=TAMANO_LOTE_COMPACTACION):
+        """
+        Compacta lote por lote hasta no dejar movimientos pendientes.
+        
+        Returns:
+            int: Total de movimientos compactados
+        """
+        total = 0
+        while True:
+            compactados = ServicioSaldos.compactar_lote(empresa, tamano_lote)
+            total += compactados
+            if compactados < tamano_lote:
+                return total
+
+
+class ServicioResumenDiario:
+    """
+    Contabilización en resumen diario.
+    
+    Las ventas y pagos de empresas con modo_contabilizacion='resumen_diario'
+    se acumulan en DocumentoResumido y se contabilizan en un solo asiento
+    por día y método de pago, con una partida por cuenta y naturaleza.
+    Cada documento queda enlazado al asiento consolidado (asiento_contable
+    y DocumentoResumido.asiento).
+    """
+    
+    @staticmethod
+    def encolar(tipo, usuario, factura=None, pago=None, fecha=None, metodo_pago=None):
+        """
+        Deja un documento pendiente para el resumen de su día.
+        
+        Returns:
+            DocumentoResumido: Registro pendiente (el existente si ya estaba)
+        """
+        documento = factura or pago
+        registro, _ = DocumentoResumido.objects.get_or_create(
+            factura=factura,
+            pago=pago,
+            defaults={
+                'empresa_id': documento.empresa_id,
+                'tipo': tipo,
+                'fecha': fecha,
+                'metodo_pago': metodo_pago,
+                'creado_por': usuario,
+            },
+        )
+        return registro
+    
+    @staticmethod
+    def lineas_documento(documento):
+        """Partidas que el documento tendría con un asiento propio"""
+        from .asiento_helpers import lineas_egreso, lineas_ingreso
+        
+        if documento.tipo == 'venta':
+            return ServicioContabilidad.lineas_venta(documento.factura)
+        if documento.tipo == 'cobro':
+            return ServicioContabilidad.lineas_cobro(documento.pago)
+        if documento.tipo == 'ingreso':
+            return lineas_ingreso(documento.pago)
+        return lineas_egreso(documento.pago)
+    
+    @staticmethod
+    def consolidar_lineas(lineas, concepto):
+        """
+        Agrupa las líneas por cuenta y naturaleza: primero los débitos y
+        luego los créditos, cada grupo por código de cuenta.
+        """
+        totales = {}
+        for linea in lineas:
+            for lado, valor in (('D', linea.debito), ('C', linea.credito)):
+                if valor:
+                    clave = (lado != 'D', linea.cuenta.codigo, linea.cuenta.pk)
+                    cuenta, acumulado = totales.get(clave, (linea.cuenta, CERO))
+                    totales[clave] = (cuenta, acumulado + valor)
+        
+        return [
+            LineaAsiento(
+                cuenta,
+                CERO if es_credito else valor,
+                valor if es_credito else CERO,
+                f"{concepto} - {cuenta.nombre}",
+            )
+            for (es_credito, _, _), (cuenta, valor) in sorted(totales.items(), key=lambda item: item[0])
+        ]
+    
+    @staticmethod
+    def pendientes(empresa=None, hasta=None):
+        """Documentos aún sin asiento resumen"""
+        pendientes = DocumentoResumido.objects.filter(asiento__isnull=True)
+        if empresa is not None:
+            pendientes = pendientes.filter(empresa=empresa)
+        if hasta is not None:
+            pendientes = pendientes.filter(fecha__lte=hasta)
+        return pendientes
+    
+    @staticmethod
+    def contabilizar(empresa=None, hasta=None):
+        """
+        Genera un asiento por cada (empresa, día, método de pago) pendiente.
+        
+        Args:
+            empresa: Limitar a una empresa (opcional)
+            hasta: Última fecha a contabilizar, inclusive (opcional)
+            
+        Returns:
+            list: Asientos generados
+        """
+        grupos = sorted(
+            set(ServicioResumenDiario.pendientes(empresa, hasta).values_list('empresa_id', 'fecha', 'metodo_pago_id')),
+            key=lambda grupo: (grupo[0], grupo[1], grupo[2] or 0),
+        )
+        asientos = []
+        for empresa_id, fecha, metodo_pago_id in grupos:
+            asiento = ServicioResumenDiario.contabilizar_grupo(empresa_id, fecha, metodo_pago_id)
+            if asiento is not None:
+                asientos.append(asiento)
+        return asientos
+    
+    @staticmethod
+    @transaction.atomic
+    def contabilizar_grupo(empresa_id, fecha, metodo_pago_id):
+        """
+        Asiento resumen de un día y método de pago.
+        
+        Returns:
+            Asiento: Asiento generado (None si otro proceso ya lo hizo)
+        """
+        documentos = list(
+            DocumentoResumido.objects.select_for_update(of=('self',))
+            .filter(empresa_id=empresa_id, fecha=fecha, metodo_pago_id=metodo_pago_id, asiento__isnull=True)
+            .select_related(
+                'empresa', 'metodo_pago', 'creado_por',
+                'factura__empresa', 'factura__cliente',
+                'pago__empresa', 'pago__tercero', 'pago__metodo_pago', 'pago__factura',
+                'pago__cuenta_bancaria__cuenta_contable',
+            )
+            .order_by('id')
+        )
+        if not documentos:
+            return None
+        
+        empresa = documentos[0].empresa
+        metodo = documentos[0].metodo_pago
+        usuario = documentos[0].creado_por
+        nombre_metodo = metodo.nombre if metodo else 'Sin método de pago'
+        concepto = f"Resumen diario {fecha:%Y-%m-%d} - {nombre_metodo}"
+        
+        lineas = []
+        for documento in documentos:
+            lineas += ServicioResumenDiario.lineas_documento(documento)
+        
+        asiento = Asiento.objects.create(
+            empresa=empresa,
+            numero_asiento=ServicioContabilidad.obtener_siguiente_numero_asiento(empresa),
+            fecha_asiento=fecha,
+            tipo_asiento='automatico',
+            concepto=f"{concepto} ({len(documentos)} documentos)",
+            documento_origen=f"RESUMEN-{fecha:%Y%m%d}-{metodo.codigo if metodo else 'NA'}",
+            creado_por=usuario
+        )
+        ServicioContabilidad.contabilizar_lineas(
+            asiento, ServicioResumenDiario.consolidar_lineas(lineas, concepto), usuario
+        )
+        
+        # Traza: cada documento apunta al asiento resumen
+        DocumentoResumido.objects.filter(pk__in=[documento.pk for documento in documentos]).update(asiento=asiento)
+        Factura.objects.filter(documento_resumido__asiento=asiento).update(asiento_contable=asiento)
+        Pago.objects.filter(documento_resumido__asiento=asiento).update(asiento_contable=asiento)
+        return asiento
+    
+    @staticmethod
+    @transaction.atomic
+    def retirar(documento, usuario):
+        """
+        Saca un documento del resumen cuando se anula o elimina.
+        
+        Si aún estaba pendiente solo se borra de la cola; si ya se
+        contabilizó, se genera un asiento que reversa únicamente sus líneas
+        (el resumen del día queda intacto para los demás documentos).
+        
+        Returns:
+            Asiento: Asiento de reversión (None si estaba pendiente)
+        """
+        if documento.asiento_id is None:
+            documento.delete()
+            return None
+        
+        empresa = documento.empresa
+        lineas = [
+            LineaAsiento(linea.cuenta, linea.credito, linea.debito, f"REVERSIÓN - {linea.concepto}", linea.tercero)
+            for linea in ServicioResumenDiario.lineas_documento(documento)
+        ]
+        asiento = Asiento.objects.create(
+            empresa=empresa,
+            numero_asiento=ServicioContabilidad.obtener_siguiente_numero_asiento(empresa),
+            fecha_asiento=timezone.now().date(),
+            tipo_asiento='ajuste',
+            concepto=f"Reversión de {documento} en {documento.asiento.numero_asiento}",
+            documento_origen=f"REV-RESUMEN-{documento.asiento.numero_asiento}",
+            creado_por=usuario
+        )
+        ServicioContabilidad.contabilizar_lineas(asiento, lineas, usuario)
+        return asiento
+
+
 class ServicioPlanCuentas:
     """
     Servicio para gestionar el plan de cuentas.
@@ -404,3 +695,73 @@ class ServicioPlanCuentas:
             cuentas_creadas[cuenta_data['codigo']] = cuenta
         
         return cuentas_creadas
+    
+    @staticmethod
+    def provisionar_plan_cuentas(empresa, plantilla=None):
+        """
+        Crea el PUC completo de una empresa nueva desde una plantilla, en
+        bloque (ver contabilidad.plan_cuentas).
+        
+        Args:
+            empresa: Instancia de Empresa sin cuentas
+            plantilla: Nombre de plantilla incluida o ruta a un CSV
+        
+        Returns:
+            int: Cuentas creadas
+        """
+        return plan_cuentas.provisionar_plan_cuentas(empresa, plantilla or plan_cuentas.PLANTILLA_POR_DEFECTO)
+    
+    @staticmethod
+    def copiar_plan_cuentas(origen, destino):
+        """
+        Copia el plan de cuentas de ``origen`` a la empresa ``destino`` (sin
+        saldos) con un INSERT ... SELECT.
+        
+        Returns:
+            int: Cuentas copiadas
+        """
+        return plan_cuentas.copiar_plan_cuentas(origen, destino)
+    
+    @staticmethod
+    def reconstruir_rutas(empresa):
+        """
+        Recalcula ruta y profundidad de todo el plan de la empresa, un nivel
+        de la jerarquía por UPDATE. Para cuentas cargadas sin pasar por
+        CuentaContable.save() (bulk_create, SQL directo).
+        
+        Returns:
+            int: Cuentas actualizadas
+        """
+        cuentas = CuentaContable.objects.filter(empresa=empresa)
+        padre = CuentaContable.objects.filter(pk=OuterRef('cuenta_padre_id'))
+        with transaction.atomic():
+            cuentas.update(ruta='')
+            actualizadas = cuentas.filter(cuenta_padre__isnull=True).update(
+                ruta=Concat(F('codigo'), Value(SEPARADOR_RUTA)), profundidad=1
+            )
+            while nivel := cuentas.filter(ruta='').exclude(cuenta_padre__ruta='').update(
+                ruta=Concat(Subquery(padre.values('ruta')[:1]), F('codigo'), Value(SEPARADOR_RUTA)),
+                profundidad=Subquery(padre.values('profundidad')[:1]) + 1,
+            ):
+                actualizadas += nivel
+        return actualizadas
+    
+    @staticmethod
+    def saldos_por_nivel(empresa, profundidad, fecha_inicio=None, fecha_corte=None):
+        """
+        Plan de cuentas resumido hasta ``profundidad`` (1 = clases, 2 =
+        grupos, ...) con los saldos de cada subárbol, en una sola consulta.
+        Sin ``fecha_inicio`` parte del último cierre hasta ``fecha_corte``;
+        las partidas se leen también del archivo si el rango llega a él.
+        Ver CuentaContable.anotar_saldos_acumulados.
+        """
+        cuentas = CuentaContable.filtrar_hasta_profundidad(
+            CuentaContable.objects.filter(empresa=empresa, activa=True), profundidad
+        )
+        if fecha_inicio:
+            cierre, fuentes = None, ServicioArchivo.modelos_partidas(empresa.pk, fecha_inicio, fecha_corte)
+        else:
+            cierre, fuentes = ServicioArchivo.cierre_y_fuentes(empresa.pk, fecha_corte)
+        return CuentaContable.anotar_saldos_acumulados(
+            cuentas, fecha_inicio=fecha_inicio, fecha_corte=fecha_corte, cierre=cierre, fuentes=fuentes
+        ).order_by('ruta')
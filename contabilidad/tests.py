@@ -1,12 +1,29 @@
-from django.test import TestCase
+import io
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from datetime import date
 from decimal import Decimal
-from .models import CuentaContable, Asiento, Partida
-from .services import ServicioContabilidad, ServicioPlanCuentas
-from empresas.models import Empresa
+from .models import CuentaContable, Asiento, Partida, PartidaArchivada, MovimientoSaldo, DocumentoResumido, PeriodoContable
+from .archivo import ServicioArchivo
+from .cierre import ServicioCierre
+from .services import ServicioContabilidad, ServicioPlanCuentas, ServicioSaldos, ServicioResumenDiario
+from .importacion import ImportadorAsientos, ErrorImportacion, leer_archivo
+from .plan_cuentas import ErrorPlanCuentas
+from .verificacion import verificar_empresa
+from empresas.models import Empresa, PerfilEmpresa
 from catalogos.models import Tercero, Impuesto, MetodoPago, Producto
 from facturacion.models import Factura, FacturaDetalle
 from tesoreria.models import Pago
+from core.admin_mixins import fechas_por_rangos
+from core.admin_site import admin_site
+from core.keyset import PaginadorKeyset
+from reportes.libros import LibroDiario, LibroMayorCuenta
 from core.test_settings import TEST_USER_PASSWORD
 
 
@@ -212,6 +229,256 @@ class ServicioContabilidadTest(TestCase):
         # Verificar que solo hay un asiento
         asientos_count = Asiento.objects.filter(empresa=self.empresa).count()
         self.assertEqual(asientos_count, 1)
+    
+    def test_resumen_diario_consolida_documentos(self):
+        """En modo resumen diario los documentos del día comparten un asiento"""
+        self.empresa.modo_contabilizacion = 'resumen_diario'
+        self.empresa.save()
+        
+        factura = Factura.objects.create(
+            empresa=self.empresa,
+            numero_factura='F004',
+            fecha_factura='2024-01-01',
+            cliente=self.cliente,
+            tipo_venta='contado',
+            metodo_pago=self.metodo_pago,
+            subtotal=Decimal('100000.00'),
+            total_impuestos=Decimal('19000.00'),
+            total=Decimal('119000.00'),
+            creado_por=self.user
+        )
+        pagos = [
+            Pago.objects.create(
+                empresa=self.empresa,
+                numero_pago=f'C00{i}',
+                fecha_pago='2024-01-01',
+                tipo_pago='cobro',
+                tercero=self.cliente,
+                metodo_pago=self.metodo_pago,
+                valor=Decimal('50000.00'),
+                creado_por=self.user
+            )
+            for i in (1, 2)
+        ]
+        
+        # Sin asiento propio: quedan en cola
+        self.assertIsNone(ServicioContabilidad.generar_asiento_venta(factura))
+        for pago in pagos:
+            self.assertIsNone(ServicioContabilidad.generar_asiento_cobro(pago))
+        self.assertFalse(Asiento.objects.filter(empresa=self.empresa).exists())
+        
+        asientos = ServicioResumenDiario.contabilizar(self.empresa)
+        self.assertEqual(len(asientos), 1)
+        
+        asiento = asientos[0]
+        self.assertTrue(asiento.esta_cuadrado)
+        self.assertEqual(asiento.total_debito, Decimal('219000.00'))
+        # Caja débito, Clientes crédito, Ingresos crédito, IVA crédito
+        self.assertEqual(asiento.partidas.count(), 4)
+        self.assertEqual(asiento.documentos_resumidos.count(), 3)
+        
+        factura.refresh_from_db()
+        self.assertEqual(factura.asiento_contable, asiento)
+        self.assertEqual(Pago.objects.filter(asiento_contable=asiento).count(), 2)
+        self.assertFalse(ServicioResumenDiario.pendientes(self.empresa).exists())
+        
+        caja = CuentaContable.objects.get(empresa=self.empresa, codigo='1105')
+        self.assertEqual(caja.saldo_debito, Decimal('219000.00'))
+    
+    def test_verificar_y_reparar_libro(self):
+        """El verificador detecta saldos y totales desviados y los repara"""
+        factura = Factura.objects.create(
+            empresa=self.empresa,
+            numero_factura='F005',
+            fecha_factura='2024-01-01',
+            cliente=self.cliente,
+            tipo_venta='contado',
+            metodo_pago=self.metodo_pago,
+            creado_por=self.user
+        )
+        FacturaDetalle.objects.create(
+            factura=factura,
+            producto=self.producto,
+            descripcion='Producto Test',
+            cantidad=Decimal('1'),
+            precio_unitario=Decimal('100000.00'),
+            impuesto=self.impuesto
+        )
+        factura.refresh_from_db()
+        asiento = ServicioContabilidad.generar_asiento_venta(factura)
+        self.assertEqual(verificar_empresa(self.empresa.pk).diferencias, [])
+        
+        # Desviar un valor denormalizado de cada tipo
+        CuentaContable.objects.filter(empresa=self.empresa, codigo='1105').update(saldo_debito=Decimal('1.00'))
+        Asiento.objects.filter(pk=asiento.pk).update(total_credito=Decimal('0.00'))
+        Factura.objects.filter(pk=factura.pk).update(total=Decimal('5.00'))
+        
+        resultado = verificar_empresa(self.empresa.pk)
+        self.assertEqual(resultado.por_modelo(), {'Cuenta': 1, 'Asiento': 1, 'Factura': 1})
+        self.assertEqual(resultado.reparadas, 0)
+        
+        resultado = verificar_empresa(self.empresa.pk, reparar=True)
+        self.assertEqual(resultado.reparadas, 3)
+        self.assertEqual(verificar_empresa(self.empresa.pk).diferencias, [])
+        caja = CuentaContable.objects.get(empresa=self.empresa, codigo='1105')
+        self.assertEqual(caja.saldo_debito, Decimal('119000.00'))
+        asiento.refresh_from_db()
+        self.assertEqual(asiento.total_credito, Decimal('119000.00'))
+    
+    def test_reversar_y_verificar(self):
+        """El asiento reversado sigue en el libro: saldos compensados y sin diferencias"""
+        asiento = self._contabilizar_venta('F009', '2024-05-01')
+        reverso = ServicioContabilidad.reversar_asiento(asiento, self.user)
+        asiento.refresh_from_db()
+        self.assertEqual((asiento.estado, asiento.asiento_reversion), ('anulado', reverso))
+        self.assertTrue(all(p.confirmado for p in asiento.partidas.all()))
+        
+        resultado = verificar_empresa(self.empresa.pk, reparar=True)
+        self.assertEqual((resultado.diferencias, resultado.reparadas), ([], 0))
+        caja = CuentaContable.objects.get(empresa=self.empresa, codigo='1105')
+        self.assertEqual((caja.saldo_debito, caja.saldo_credito), (Decimal('119000.00'), Decimal('119000.00')))
+        
+        # Mayor y diario muestran el original y su reversión
+        mayor = LibroMayorCuenta(caja).pagina()
+        self.assertEqual([p.asiento_id for p in mayor.filas], [asiento.pk, reverso.pk])
+        self.assertEqual(mayor.saldo_final, Decimal('0.00'))
+        self.assertEqual(LibroDiario(self.empresa).totales_periodo()['total_asientos'], 2)
+        
+        salida = io.StringIO()
+        call_command('sincronizar_partidas', '--dry-run', stdout=salida)
+        self.assertIn('0 asientos', salida.getvalue())
+        with self.assertRaises(ValueError):
+            ServicioContabilidad.reversar_asiento(asiento, self.user)
+    
+    def _crear_cuenta_utilidad(self):
+        """36 - 3605, que el plan básico no trae"""
+        patrimonio = CuentaContable.objects.get(empresa=self.empresa, codigo='3')
+        resultados = CuentaContable.objects.create(
+            empresa=self.empresa, codigo='36', nombre='RESULTADOS DEL EJERCICIO', naturaleza='C',
+            tipo_cuenta='PATRIMONIO', nivel=2, cuenta_padre=patrimonio, acepta_movimiento=False
+        )
+        CuentaContable.objects.create(
+            empresa=self.empresa, codigo='3605', nombre='UTILIDAD DEL EJERCICIO', naturaleza='C',
+            tipo_cuenta='PATRIMONIO', nivel=3, cuenta_padre=resultados
+        )
+    
+    def _contabilizar_venta(self, numero, fecha):
+        """Asiento de una venta de contado por 119.000 (100.000 + IVA)"""
+        factura = Factura.objects.create(
+            empresa=self.empresa,
+            numero_factura=numero,
+            fecha_factura=fecha,
+            cliente=self.cliente,
+            tipo_venta='contado',
+            metodo_pago=self.metodo_pago,
+            subtotal=Decimal('100000.00'),
+            total_impuestos=Decimal('19000.00'),
+            total=Decimal('119000.00'),
+            creado_por=self.user
+        )
+        return ServicioContabilidad.generar_asiento_venta(factura)
+    
+    def test_cerrar_y_reabrir_periodo(self):
+        """El cierre salda ingresos contra 3605, congela saldos y bloquea el período"""
+        self._crear_cuenta_utilidad()
+        self._contabilizar_venta('F006', '2024-03-01')
+        
+        periodo = ServicioCierre.cerrar_periodo(self.empresa, date(2024, 12, 31), self.user)
+        movimientos = {
+            p.cuenta.codigo: (p.valor_debito, p.valor_credito)
+            for p in periodo.asiento_cierre.partidas.select_related('cuenta')
+        }
+        self.assertEqual(movimientos, {
+            '4135': (Decimal('100000.00'), Decimal('0.00')),
+            '3605': (Decimal('0.00'), Decimal('100000.00')),
+        })
+        saldos = dict(periodo.saldos.values_list('cuenta__codigo', 'saldo'))
+        self.assertEqual(saldos['1105'], Decimal('119000.00'))
+        self.assertEqual(saldos['3605'], Decimal('100000.00'))
+        self.assertEqual(saldos['4135'], Decimal('0.00'))
+        self.assertEqual(verificar_empresa(self.empresa.pk).diferencias, [])
+        
+        # Desde el cierre los reportes dan lo mismo que recorriendo todas las partidas
+        cuentas = CuentaContable.objects.filter(empresa=self.empresa).order_by('codigo')
+        con_cierre = CuentaContable.anotar_saldos_acumulados(cuentas, fecha_corte='2025-06-30', cierre=periodo)
+        sin_cierre = CuentaContable.anotar_saldos_acumulados(cuentas, fecha_corte='2025-06-30')
+        self.assertEqual(
+            [(c.codigo, c.saldo_acumulado) for c in con_cierre],
+            [(c.codigo, c.saldo_acumulado) for c in sin_cierre]
+        )
+        caja = CuentaContable.objects.get(empresa=self.empresa, codigo='1105')
+        self.assertEqual(LibroMayorCuenta(caja, '2025-01-01').saldo_apertura(), Decimal('119000.00'))
+        
+        # El período cerrado no acepta asientos
+        with self.assertRaises(ValidationError):
+            Asiento.objects.create(
+                empresa=self.empresa,
+                numero_asiento='000099',
+                fecha_asiento='2024-06-01',
+                concepto='Asiento en período cerrado',
+                creado_por=self.user
+            )
+        with self.assertRaises(ValueError):
+            ServicioCierre.cerrar_periodo(self.empresa, date(2024, 6, 30), self.user)
+        
+        ServicioCierre.reabrir_ultimo_periodo(self.empresa)
+        self.assertFalse(PeriodoContable.objects.filter(empresa=self.empresa).exists())
+        ingresos = CuentaContable.objects.get(empresa=self.empresa, codigo='4135')
+        self.assertEqual((ingresos.saldo_debito, ingresos.saldo_credito), (Decimal('0.00'), Decimal('100000.00')))
+        self.assertEqual(verificar_empresa(self.empresa.pk).diferencias, [])
+    
+    def test_anular_asiento_en_periodo_cerrado(self):
+        """La vista rechaza anular en un período cerrado sin tocar los saldos"""
+        self._crear_cuenta_utilidad()
+        asiento = self._contabilizar_venta('F010', '2024-03-01')
+        ServicioCierre.cerrar_periodo(self.empresa, date(2024, 12, 31), self.user)
+        PerfilEmpresa.objects.create(
+            usuario=self.user, empresa=self.empresa, rol='contador', asignado_por=self.user
+        )
+        self.client.login(username='testuser', password=TEST_USER_PASSWORD)
+        
+        response = self.client.post(reverse('contabilidad:asientos_anular', args=[asiento.pk]))
+        self.assertRedirects(response, reverse('contabilidad:asientos_detalle', args=[asiento.pk]), fetch_redirect_response=False)
+        asiento.refresh_from_db()
+        self.assertEqual(asiento.estado, 'confirmado')
+        self.assertEqual(verificar_empresa(self.empresa.pk).diferencias, [])
+    
+    def test_archivar_periodo_cerrado(self):
+        """Las partidas archivadas salen de Partida y los libros las siguen leyendo"""
+        self._crear_cuenta_utilidad()
+        asiento_2024 = self._contabilizar_venta('F007', '2024-03-01')
+        ServicioCierre.cerrar_periodo(self.empresa, date(2024, 12, 31), self.user)
+        self._contabilizar_venta('F008', '2025-02-01')
+        caja = CuentaContable.objects.get(empresa=self.empresa, codigo='1105')
+        
+        self.assertEqual(ServicioArchivo.archivar(self.empresa), 5)  # 3 de la venta + 2 del cierre
+        self.assertFalse(Partida.objects.filter(empresa=self.empresa, fecha__lte='2024-12-31').exists())
+        self.assertEqual(Partida.objects.filter(empresa=self.empresa).count(), 3)
+        self.assertEqual(ServicioArchivo.modelos_partidas(self.empresa.pk, '2025-01-01'), [Partida])
+        self.assertEqual(verificar_empresa(self.empresa.pk).diferencias, [])
+        
+        # El mayor recorre archivo y libro con un mismo cursor y saldo corrido
+        libro = LibroMayorCuenta(caja, '2024-01-01', '2025-12-31', tamano_pagina=1)
+        primera = libro.pagina()
+        segunda = libro.pagina(primera.siguiente_cursor)
+        self.assertEqual([p.fecha for p in primera.filas + segunda.filas], [date(2024, 3, 1), date(2025, 2, 1)])
+        self.assertEqual(segunda.saldo_final, Decimal('238000.00'))
+        self.assertEqual(libro.totales_periodo()['total_debito'], Decimal('238000.00'))
+        self.assertEqual(LibroMayorCuenta(caja, '2024-06-01').saldo_apertura(), Decimal('119000.00'))
+        
+        diario = LibroDiario(self.empresa, '2024-01-01', '2024-12-31').pagina()
+        self.assertEqual(len(asiento_2024.lineas), 3)
+        self.assertEqual(diario.total_debito, Decimal('219000.00'))
+        
+        # Saldos a una fecha dentro del período archivado
+        balance = {c.codigo: c.saldo_acumulado for c in ServicioPlanCuentas.saldos_por_nivel(self.empresa, 1, fecha_corte='2024-06-30')}
+        self.assertEqual(balance['1'], Decimal('119000.00'))
+        
+        # Reabrir devuelve las partidas al libro
+        ServicioCierre.reabrir_ultimo_periodo(self.empresa)
+        self.assertFalse(PartidaArchivada.objects.filter(empresa=self.empresa).exists())
+        self.assertEqual(Partida.objects.filter(empresa=self.empresa).count(), 6)
+        self.assertEqual(verificar_empresa(self.empresa.pk).diferencias, [])
 
 
 class ServicioPlanCuentasTest(TestCase):
@@ -269,6 +536,140 @@ class ServicioPlanCuentasTest(TestCase):
         self.assertFalse(cuenta_activo.acepta_movimiento)
         self.assertTrue(cuenta_caja.acepta_movimiento)
 
+    def test_jerarquia_por_ruta(self):
+        """Rutas mantenidas al mover cuentas y saldos acumulados por subárbol"""
+        cuentas = ServicioPlanCuentas.crear_plan_cuentas_basico(self.empresa, self.user)
+        caja, bancos = cuentas['1105'], cuentas['1110']
+        self.assertEqual((caja.ruta, caja.profundidad), ('1/11/1105/', 3))
+        self.assertEqual([c.codigo for c in caja.ancestros()], ['1', '11'])
+        self.assertEqual(
+            sorted(cuentas['1'].descendientes().values_list('codigo', flat=True)),
+            ['11', '1105', '1110', '1305']
+        )
+
+        # Mover el grupo 11 debajo del pasivo reescribe las rutas de sus subcuentas
+        grupo = cuentas['11']
+        grupo.cuenta_padre = cuentas['2']
+        grupo.save()
+        caja.refresh_from_db()
+        self.assertEqual((caja.ruta, caja.profundidad), ('2/11/1105/', 3))
+        grupo.cuenta_padre = cuentas['1']
+        grupo.save()
+
+        grupo.cuenta_padre = caja
+        with self.assertRaises(ValidationError):
+            grupo.save()
+
+        asiento = Asiento.objects.create(
+            empresa=self.empresa,
+            numero_asiento='000001',
+            fecha_asiento='2024-01-10',
+            concepto='Traslado',
+            estado='confirmado',
+            creado_por=self.user
+        )
+        Partida.objects.create(asiento=asiento, cuenta=caja, valor_debito=Decimal('300.00'), orden=1)
+        Partida.objects.create(asiento=asiento, cuenta=bancos, valor_debito=Decimal('200.00'), orden=2)
+        Partida.objects.create(asiento=asiento, cuenta=cuentas['4135'], valor_credito=Decimal('500.00'), orden=3)
+
+        saldos = {
+            cuenta.codigo: cuenta.saldo_acumulado
+            for cuenta in ServicioPlanCuentas.saldos_por_nivel(self.empresa, 2, fecha_corte='2024-01-31')
+        }
+        self.assertEqual(saldos['11'], Decimal('500.00'))
+        self.assertEqual(saldos['41'], Decimal('500.00'))
+        # 31 no tiene subcuentas: se muestra aunque esté en el nivel 2
+        self.assertEqual(saldos['31'], Decimal('0.00'))
+        self.assertNotIn('1105', saldos)
+
+        CuentaContable.objects.filter(empresa=self.empresa).update(ruta='', profundidad=1)
+        self.assertEqual(ServicioPlanCuentas.reconstruir_rutas(self.empresa), len(cuentas))
+        caja.refresh_from_db()
+        self.assertEqual((caja.ruta, caja.profundidad), ('1/11/1105/', 3))
+    
+    def test_provisionar_y_copiar_plan_puc(self):
+        """PUC completo desde la plantilla y copia del plan a otra empresa"""
+        creadas = ServicioPlanCuentas.provisionar_plan_cuentas(self.empresa)
+        self.assertEqual(CuentaContable.objects.filter(empresa=self.empresa).count(), creadas)
+        
+        caja = CuentaContable.objects.select_related('cuenta_padre').get(empresa=self.empresa, codigo='1105')
+        self.assertEqual(caja.cuenta_padre.codigo, '11')
+        self.assertEqual((caja.ruta, caja.profundidad, caja.nivel), ('1/11/1105/', 3, 3))
+        self.assertTrue(caja.acepta_movimiento)
+        self.assertFalse(caja.cuenta_padre.acepta_movimiento)
+        depreciacion = CuentaContable.objects.get(empresa=self.empresa, codigo='1592')
+        self.assertEqual((depreciacion.naturaleza, depreciacion.tipo_cuenta), ('C', 'ACTIVO'))
+        
+        with self.assertRaises(ErrorPlanCuentas):
+            ServicioPlanCuentas.provisionar_plan_cuentas(self.empresa)
+        
+        destino = Empresa.objects.create(
+            nit='987654321-0',
+            razon_social='Filial SAS',
+            direccion='Calle 456',
+            ciudad='Medellín',
+            telefono='3007654321',
+            email='filial@test.com',
+            propietario=self.user
+        )
+        self.assertEqual(ServicioPlanCuentas.copiar_plan_cuentas(self.empresa, destino), creadas)
+        copia = CuentaContable.objects.select_related('cuenta_padre').get(empresa=destino, codigo='1105')
+        self.assertEqual(copia.cuenta_padre.empresa_id, destino.pk)
+        self.assertEqual(copia.cuenta_padre.codigo, '11')
+        self.assertEqual(copia.ruta, caja.ruta)
+        self.assertFalse(
+            CuentaContable.objects.filter(empresa=destino, profundidad__gt=1, cuenta_padre__isnull=True).exists()
+        )
+
+
+@override_settings(CONTABILIDAD_SALDOS_DIFERIDOS=True)
+class ServicioSaldosTest(TestCase):
+    """Tests para los saldos diferidos y su compactación"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password=TEST_USER_PASSWORD
+        )
+        
+        self.empresa = Empresa.objects.create(
+            nit='123456789-0',
+            razon_social='Test Company SAS',
+            direccion='Calle 123',
+            ciudad='Bogotá',
+            telefono='3001234567',
+            email='empresa@test.com',
+            propietario=self.user
+        )
+        
+        ServicioPlanCuentas.crear_plan_cuentas_basico(self.empresa, self.user)
+        self.caja = CuentaContable.objects.get(empresa=self.empresa, codigo='1105')
+    
+    def test_actualizar_saldos_solo_inserta_movimientos(self):
+        """Los saldos se leen como compactado + pendiente y se compactan después"""
+        self.caja.actualizar_saldos(debito=Decimal('1000.00'))
+        self.caja.actualizar_saldos(credito=Decimal('300.00'))
+        
+        caja = CuentaContable.objects.get(pk=self.caja.pk)
+        self.assertEqual(caja.saldo_debito, Decimal('0.00'))
+        self.assertEqual(caja.saldo_debito_total, Decimal('1000.00'))
+        self.assertEqual(caja.saldo_actual, Decimal('700.00'))
+        self.assertEqual(MovimientoSaldo.objects.filter(cuenta=caja).count(), 2)
+        
+        self.assertEqual(ServicioSaldos.compactar(self.empresa), 2)
+        
+        caja = CuentaContable.objects.get(pk=self.caja.pk)
+        self.assertEqual(caja.saldo_debito, Decimal('1000.00'))
+        self.assertEqual(caja.saldo_credito, Decimal('300.00'))
+        self.assertEqual(caja.saldo_actual, Decimal('700.00'))
+        self.assertFalse(MovimientoSaldo.objects.exists())
+        
+        anotada = CuentaContable.anotar_saldos_pendientes(
+            CuentaContable.objects.filter(pk=self.caja.pk)
+        ).get()
+        self.assertEqual(anotada.pendiente_debito, Decimal('0.00'))
+
 
 class AsientoModelTest(TestCase):
     """Tests para el modelo Asiento"""
@@ -343,7 +744,65 @@ class AsientoModelTest(TestCase):
         self.assertEqual(asiento.total_debito, Decimal('100000.00'))
         self.assertEqual(asiento.total_credito, Decimal('100000.00'))
         self.assertTrue(asiento.puede_confirmarse)
-    
+
+    def test_fechas_por_rangos_del_admin(self):
+        """La navegación por fechas del admin encuentra los mismos períodos que dates()"""
+        for numero, fecha in enumerate(['2023-12-31', '2024-01-15', '2024-01-20', '2024-03-01'], start=1):
+            Asiento.objects.create(
+                empresa=self.empresa,
+                numero_asiento=f'A{numero:03d}',
+                fecha_asiento=fecha,
+                concepto='Asiento de prueba',
+                creado_por=self.user
+            )
+
+        asientos = Asiento.objects.all()
+        for nivel in ('year', 'month', 'day'):
+            self.assertEqual(
+                fechas_por_rangos(asientos, 'fecha_asiento', nivel),
+                list(asientos.dates('fecha_asiento', nivel))
+            )
+        self.assertEqual(fechas_por_rangos(asientos.none(), 'fecha_asiento', 'year'), [])
+
+        admin_asientos = admin_site._registry[Asiento]
+        self.assertEqual(
+            admin_asientos.get_list_select_related(None),
+            ['empresa']
+        )
+
+    def test_paginador_keyset(self):
+        """El cursor recorre todas las filas sin repetir, hacia adelante y hacia atrás"""
+        for numero in range(1, 8):
+            Asiento.objects.create(
+                empresa=self.empresa,
+                numero_asiento=f'A{numero:03d}',
+                # Fechas repetidas para que el desempate sea por número e id
+                fecha_asiento=f'2024-01-0{numero % 3 + 1}',
+                concepto='Asiento de prueba',
+                creado_por=self.user
+            )
+        asientos = Asiento.objects.filter(empresa=self.empresa).order_by('-fecha_asiento', 'numero_asiento')
+        esperado = list(asientos.order_by('-fecha_asiento', 'numero_asiento', 'pk'))
+
+        paginador = PaginadorKeyset(asientos, 3)
+        self.assertEqual(paginador.orden, ('-fecha_asiento', 'numero_asiento', 'pk'))
+
+        paginas = [paginador.pagina()]
+        while paginas[-1].has_next():
+            paginas.append(paginador.pagina(paginas[-1].siguiente_cursor))
+        self.assertEqual([len(pagina) for pagina in paginas], [3, 3, 1])
+        self.assertEqual([asiento for pagina in paginas for asiento in pagina], esperado)
+        self.assertFalse(paginas[0].has_previous())
+
+        anterior = paginador.pagina(paginas[-1].anterior_cursor)
+        self.assertEqual(list(anterior), esperado[3:6])
+        self.assertTrue(anterior.has_next() and anterior.has_previous())
+        self.assertFalse(paginador.pagina(anterior.anterior_cursor).has_previous())
+        self.assertEqual(paginador.count, 7)
+
+        # Un cursor alterado vuelve a la primera página
+        self.assertEqual(list(paginador.pagina('alterado')), esperado[:3])
+
     def test_asiento_descuadrado(self):
         """Test para asiento descuadrado"""
         asiento = Asiento.objects.create(
@@ -378,3 +837,161 @@ class AsientoModelTest(TestCase):
         # Verificar que NO está cuadrado
         self.assertFalse(asiento.esta_cuadrado)
         self.assertFalse(asiento.puede_confirmarse)
+
+    def test_partidas_copian_datos_del_asiento(self):
+        """Test para empresa, fecha y confirmado copiados en las partidas"""
+        asiento = Asiento.objects.create(
+            empresa=self.empresa,
+            numero_asiento='A003',
+            fecha_asiento='2024-01-01',
+            concepto='Asiento de prueba',
+            creado_por=self.user
+        )
+        Partida.objects.create(
+            asiento=asiento,
+            cuenta=self.cuenta_caja,
+            concepto='Débito',
+            valor_debito=Decimal('100.00'),
+            orden=1
+        )
+
+        partida = Partida.objects.get(asiento=asiento)
+        self.assertEqual(partida.empresa_id, self.empresa.pk)
+        self.assertEqual(str(partida.fecha), '2024-01-01')
+        self.assertFalse(partida.confirmado)
+
+        # Confirmar y cambiar la fecha desde una instancia leída de la base
+        asiento = Asiento.objects.get(pk=asiento.pk)
+        asiento.estado = 'confirmado'
+        asiento.fecha_asiento = '2024-02-01'
+        asiento.save()
+
+        partida.refresh_from_db()
+        self.assertTrue(partida.confirmado)
+        self.assertEqual(str(partida.fecha), '2024-02-01')
+
+    def test_periodo_se_valida_una_vez_por_fecha(self):
+        """Guardar las partidas no repite la consulta del período si la fecha no cambia"""
+        asiento = Asiento(
+            empresa=self.empresa,
+            numero_asiento='A004',
+            fecha_asiento=date(2024, 3, 1),
+            concepto='Asiento de prueba',
+            creado_por=self.user
+        )
+        with CaptureQueriesContext(connection) as consultas:
+            asiento.save()
+            for orden in range(1, 4):
+                Partida.objects.create(
+                    asiento=asiento, cuenta=self.cuenta_caja, valor_debito=Decimal('10.00'), orden=orden
+                )
+        periodos = [q for q in consultas.captured_queries if PeriodoContable._meta.db_table in q['sql']]
+        self.assertEqual(len(periodos), 1)
+
+        # Cambiar la fecha a un período cerrado se sigue rechazando
+        PeriodoContable.objects.create(empresa=self.empresa, fecha_fin=date(2024, 1, 31), cerrado_por=self.user)
+        asiento.fecha_asiento = date(2024, 1, 15)
+        with self.assertRaises(ValidationError):
+            asiento.save()
+
+
+class ImportadorAsientosTest(TestCase):
+    """Tests para la importación masiva de asientos"""
+    
+    CSV_VALIDO = (
+        "numero_asiento,fecha,concepto,cuenta,debito,credito\n"
+        "IMP-1,2024-01-05,Venta contado,1105,1000.00,\n"
+        "IMP-1,2024-01-05,Venta contado,4135,,1000.00\n"
+        "IMP-2,2024-01-06,Pago proveedor,5105,250.50,\n"
+        "IMP-2,2024-01-06,Pago proveedor,1105,,250.50\n"
+    )
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password=TEST_USER_PASSWORD
+        )
+        
+        self.empresa = Empresa.objects.create(
+            nit='123456789-0',
+            razon_social='Test Company SAS',
+            direccion='Calle 123',
+            ciudad='Bogotá',
+            telefono='3001234567',
+            email='empresa@test.com',
+            propietario=self.user
+        )
+        
+        ServicioPlanCuentas.crear_plan_cuentas_basico(self.empresa, self.user)
+    
+    def test_importar_csv_confirmado(self):
+        """Importa asientos cuadrados y actualiza los saldos de las cuentas"""
+        importador = ImportadorAsientos(self.empresa, self.user, confirmar=True)
+        resultado = importador.importar(leer_archivo(self.CSV_VALIDO.encode(), 'csv'))
+        
+        self.assertEqual(resultado.asientos, 2)
+        self.assertEqual(resultado.partidas, 4)
+        
+        asiento = Asiento.objects.get(empresa=self.empresa, numero_asiento='IMP-1')
+        self.assertEqual(asiento.estado, 'confirmado')
+        self.assertEqual(asiento.total_debito, Decimal('1000.00'))
+        self.assertEqual(asiento.partidas.count(), 2)
+        
+        caja = CuentaContable.objects.get(empresa=self.empresa, codigo='1105')
+        self.assertEqual(caja.saldo_debito, Decimal('1000.00'))
+        self.assertEqual(caja.saldo_credito, Decimal('250.50'))
+    
+    def test_lote_descuadrado_se_rechaza_completo(self):
+        """Un asiento descuadrado rechaza todo su lote"""
+        contenido = self.CSV_VALIDO.replace('250.50,\n', '250.00,\n', 1)
+        importador = ImportadorAsientos(self.empresa, self.user)
+        
+        with self.assertRaises(ErrorImportacion) as ctx:
+            importador.importar(leer_archivo(contenido.encode(), 'csv'))
+        
+        self.assertIn('no está cuadrado', ctx.exception.errores[0])
+        self.assertFalse(Asiento.objects.filter(empresa=self.empresa).exists())
+    
+    def test_importar_jsonl_cuenta_inexistente(self):
+        """Las cuentas se validan contra el plan de la empresa"""
+        contenido = (
+            '{"numero_asiento": "J-1", "fecha": "2024-02-01", "concepto": "Ajuste", '
+            '"partidas": [{"cuenta": "9999", "debito": "10"}, {"cuenta": "1105", "credito": "10"}]}\n'
+        )
+        importador = ImportadorAsientos(self.empresa, self.user, detener_en_error=False)
+        resultado = importador.importar(leer_archivo(contenido.encode(), 'jsonl'))
+        
+        self.assertEqual(resultado.asientos, 0)
+        self.assertIn('9999', resultado.errores[0])
+
+    def test_jsonl_mal_formado_se_reporta(self):
+        """Líneas que no son asientos, valores no finitos y tipos reservados son errores"""
+        partidas = '[{"cuenta": "1105", "debito": "%s"}, {"cuenta": "4135", "credito": "10"}]'
+        contenido = '\n'.join([
+            '[1]',
+            '"texto"',
+            '{"numero_asiento": "J-1", "fecha": "2024-02-01", "partidas": {"cuenta": "1105"}}',
+            '{"numero_asiento": "J-2", "fecha": "2024-02-01", "partidas": [1, 2]}',
+            '{"numero_asiento": "J-3", "fecha": "2024-02-01", "partidas": %s}' % (partidas % 'NaN'),
+            '{"numero_asiento": "J-4", "fecha": "2024-02-01", "partidas": %s}' % (partidas % 'Infinity'),
+            '{"numero_asiento": "J-5", "fecha": "2024-02-01", "tipo_asiento": "cierre", "partidas": %s}'
+            % (partidas % '10'),
+            '{"numero_asiento": "J-6", "fecha": "2024-02-01", "tipo_asiento": "ajuste", "partidas": %s}'
+            % (partidas % '10'),
+        ])
+        importador = ImportadorAsientos(self.empresa, self.user, tamano_lote=1, detener_en_error=False)
+        resultado = importador.importar(leer_archivo(contenido.encode(), 'jsonl'))
+
+        self.assertEqual(resultado.asientos, 1)
+        self.assertEqual(len(resultado.errores), 7)
+        self.assertTrue(all('"partidas"' in e for e in resultado.errores[:4]))
+        self.assertIn('valor numérico inválido', resultado.errores[4])
+        self.assertIn('valor numérico inválido', resultado.errores[5])
+        self.assertIn('"cierre" no permitido', resultado.errores[6])
+        self.assertEqual(Asiento.objects.get(empresa=self.empresa).tipo_asiento, 'ajuste')
+
+        # Un archivo que no está en UTF-8 detiene la importación
+        with self.assertRaises(ErrorImportacion) as ctx:
+            importador.importar(leer_archivo(self.CSV_VALIDO.encode('utf-16'), 'csv'))
+        self.assertIn('UTF-8', ctx.exception.errores[0])
@@ -0,0 +1,290 @@
+"""
+Verificación y reparación de los valores denormalizados del libro.
+
+Recalcula contra sus filas de origen:
+
+- ``CuentaContable.saldo_debito/saldo_credito``: suma de las partidas
+  confirmadas (del libro y del archivo, incluidas las de asientos anulados
+  por reversión) menos los movimientos de saldo aún sin compactar.
+- ``Asiento.total_debito/total_credito``: suma de sus partidas (las
+  archivadas para los asientos de períodos archivados).
+- ``Factura.subtotal/total_impuestos/total``: suma de sus detalles (solo
+  facturas con detalles; las demás no tienen contra qué compararse).
+
+Cada empresa se revisa con consultas agrupadas, una por tabla (a Python
+solo llegan las cuentas y los registros con diferencias), y las empresas se
+reparten entre procesos. Las consultas de una empresa ven una misma
+instantánea (REPEATABLE READ en PostgreSQL) con sus cuentas bloqueadas, así
+una contabilización concurrente no aparece en unas tablas y en otras no. Con
+``reparar`` las diferencias se corrigen con bulk_update dentro de una
+transacción por empresa. Los saldos se corrigen sumando la diferencia
+(``F('saldo_debito') + delta``) para no pisar lo que otra contabilización
+sume mientras tanto.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from itertools import repeat
+from typing import NamedTuple
+
+from django.db import connection, connections, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from empresas.models import Empresa
+from facturacion.models import Factura
+from .models import Asiento, CuentaContable, MovimientoSaldo, Partida, PartidaArchivada, PeriodoContable
+
+CERO = Decimal('0.00')
+CERO_SQL = Value(CERO, output_field=DecimalField(max_digits=15, decimal_places=2))
+
+# Filas por sentencia al reparar
+TAMANO_LOTE_REPARACION = 1000
+
+# Procesos por defecto para repartir las empresas
+TRABAJADORES_VERIFICACION = os.cpu_count() or 1
+
+# Campos denormalizados que se verifican en cada modelo
+CAMPOS_CUENTA = ['saldo_debito', 'saldo_credito']
+CAMPOS_ASIENTO = ['total_debito', 'total_credito']
+CAMPOS_FACTURA = ['subtotal', 'total_impuestos', 'total']
+
+
+class Diferencia(NamedTuple):
+    """Un valor guardado que no coincide con el recalculado"""
+    modelo: str
+    id: int
+    referencia: str
+    campo: str
+    guardado: Decimal
+    calculado: Decimal
+
+    def __str__(self):
+        return f'{self.modelo} {self.referencia}: {self.campo} {self.guardado} (calculado {self.calculado})'
+
+
+@dataclass
+class ResultadoVerificacion:
+    """Diferencias encontradas (y reparadas) en una empresa"""
+    empresa_id: int
+    nit: str
+    diferencias: list = field(default_factory=list)
+    reparadas: int = 0
+    segundos: float = 0.0
+
+    def por_modelo(self):
+        """Cantidad de registros con diferencias por modelo"""
+        registros = {}
+        for diferencia in self.diferencias:
+            registros.setdefault(diferencia.modelo, set()).add(diferencia.id)
+        return {modelo: len(ids) for modelo, ids in registros.items()}
+
+
+def _revisar_cuentas(empresa_id):
+    """
+    Saldos de las cuentas contra partidas confirmadas y movimientos pendientes,
+    con una consulta agrupada por cuenta para cada tabla.
+
+    Returns:
+        tuple: ([Diferencia], {cuenta_id: {campo: corrección}})
+    """
+    partidas = {}
+    for modelo in (Partida, PartidaArchivada):
+        filas = (
+            modelo.objects.filter(empresa_id=empresa_id, confirmado=True)
+            .values('cuenta_id')
+            .annotate(debito=Sum('valor_debito'), credito=Sum('valor_credito'))
+            .order_by()
+        )
+        for fila in filas:
+            debito, credito = partidas.get(fila['cuenta_id'], (CERO, CERO))
+            partidas[fila['cuenta_id']] = (debito + fila['debito'], credito + fila['credito'])
+    pendientes = {
+        fila['cuenta_id']: (fila['debito'], fila['credito'])
+        for fila in MovimientoSaldo.objects.filter(cuenta__empresa_id=empresa_id)
+        .values('cuenta_id')
+        .annotate(debito=Sum('valor_debito'), credito=Sum('valor_credito'))
+        .order_by()
+    }
+
+    diferencias, correcciones = [], {}
+    cuentas = CuentaContable.objects.filter(empresa_id=empresa_id).values_list(
+        'pk', 'codigo', 'saldo_debito', 'saldo_credito'
+    )
+    for cuenta_id, codigo, saldo_debito, saldo_credito in cuentas.iterator():
+        suma_debito, suma_credito = partidas.get(cuenta_id, (CERO, CERO))
+        pendiente_debito, pendiente_credito = pendientes.get(cuenta_id, (CERO, CERO))
+        esperados = {
+            'saldo_debito': (saldo_debito, suma_debito - pendiente_debito),
+            'saldo_credito': (saldo_credito, suma_credito - pendiente_credito),
+        }
+        if any(guardado != esperado for guardado, esperado in esperados.values()):
+            for campo, (guardado, esperado) in esperados.items():
+                if guardado != esperado:
+                    diferencias.append(Diferencia('Cuenta', cuenta_id, codigo, campo, guardado, esperado))
+            correcciones[cuenta_id] = {
+                campo: F(campo) + (esperado - guardado) for campo, (guardado, esperado) in esperados.items()
+            }
+    return diferencias, correcciones
+
+
+def _comparar(modelo, filas, campos):
+    """
+    Diferencias y correcciones de filas ``(pk, referencia, guardado1,
+    calculado1, guardado2, calculado2, ...)`` en el orden de ``campos``.
+    """
+    diferencias, correcciones = [], {}
+    for pk, referencia, *valores in filas:
+        pares = list(zip(campos, valores[::2], valores[1::2]))
+        diferencias += [
+            Diferencia(modelo, pk, referencia, campo, guardado, calculado)
+            for campo, guardado, calculado in pares
+            if guardado != calculado
+        ]
+        correcciones[pk] = {campo: calculado for campo, _, calculado in pares}
+    return diferencias, correcciones
+
+
+def _revisar_asientos(empresa_id):
+    """
+    Asientos cuyos totales no coinciden con sus partidas (GROUP BY ...
+    HAVING): los de períodos archivados contra PartidaArchivada, los demás
+    contra Partida.
+    """
+    asientos = Asiento.objects.filter(empresa_id=empresa_id)
+    archivado_hasta = PeriodoContable.archivado_hasta(empresa_id)
+    grupos = [(asientos, 'partidas')]
+    if archivado_hasta:
+        grupos = [
+            (asientos.filter(fecha_asiento__gt=archivado_hasta), 'partidas'),
+            (asientos.filter(fecha_asiento__lte=archivado_hasta), 'partidas_archivadas'),
+        ]
+
+    diferencias, correcciones = [], {}
+    for queryset, relacion in grupos:
+        filas = (
+            queryset.annotate(
+                suma_debito=Coalesce(Sum(f'{relacion}__valor_debito'), CERO_SQL),
+                suma_credito=Coalesce(Sum(f'{relacion}__valor_credito'), CERO_SQL),
+            )
+            .filter(~Q(total_debito=F('suma_debito')) | ~Q(total_credito=F('suma_credito')))
+            .values_list('pk', 'numero_asiento', 'total_debito', 'suma_debito', 'total_credito', 'suma_credito')
+        )
+        diferencias_grupo, correcciones_grupo = _comparar('Asiento', filas, CAMPOS_ASIENTO)
+        diferencias += diferencias_grupo
+        correcciones.update(correcciones_grupo)
+    return diferencias, correcciones
+
+
+def _revisar_facturas(empresa_id):
+    """Facturas con detalles cuyos totales no coinciden con ellos (GROUP BY ... HAVING)"""
+    facturas = (
+        Factura.objects.filter(empresa_id=empresa_id)
+        .annotate(
+            cantidad_detalles=Count('detalles'),
+            suma_subtotal=Coalesce(Sum('detalles__subtotal'), CERO_SQL),
+            suma_impuestos=Coalesce(Sum('detalles__valor_impuesto'), CERO_SQL),
+        )
+        .annotate(suma_total=F('suma_subtotal') + F('suma_impuestos'))
+        .filter(cantidad_detalles__gt=0)
+        .filter(
+            ~Q(subtotal=F('suma_subtotal'))
+            | ~Q(total_impuestos=F('suma_impuestos'))
+            | ~Q(total=F('suma_total'))
+        )
+        .values_list(
+            'pk', 'numero_factura', 'subtotal', 'suma_subtotal', 'total_impuestos', 'suma_impuestos',
+            'total', 'suma_total',
+        )
+    )
+    return _comparar('Factura', facturas, CAMPOS_FACTURA)
+
+
+def _reparar(modelo, correcciones, campos):
+    """Aplica las correcciones con bulk_update; devuelve los registros actualizados"""
+    objetos = []
+    for pk, valores in correcciones.items():
+        objeto = modelo(pk=pk)
+        for campo, valor in valores.items():
+            setattr(objeto, campo, valor)
+        objetos.append(objeto)
+    return modelo.objects.bulk_update(objetos, campos, batch_size=TAMANO_LOTE_REPARACION)
+
+
+def _bloquear_cuentas(empresa_id, instantanea):
+    """
+    Primera sentencia de la transacción de verificación: con ``instantanea``
+    fija REPEATABLE READ y luego bloquea las cuentas de la empresa. Las
+    contabilizaciones que actualizan saldos y la compactación de movimientos
+    esperan a que termine la verificación; las que solo insertan partidas y
+    movimientos después de la instantánea no se ven en ninguna tabla.
+    """
+    if instantanea:
+        with connections[CuentaContable.objects.db].cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+    list(
+        CuentaContable.objects.select_for_update()
+        .filter(empresa_id=empresa_id)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+
+
+def verificar_empresa(empresa_id, reparar=False):
+    """
+    Revisa (y con ``reparar`` corrige) cuentas, asientos y facturas de una
+    empresa. Recibe el ID para poder ejecutarse en otro proceso.
+
+    Returns:
+        ResultadoVerificacion
+    """
+    inicio = time.perf_counter()
+    resultado = ResultadoVerificacion(empresa_id, Empresa.objects.values_list('nit', flat=True).get(pk=empresa_id))
+    conexion = connections[CuentaContable.objects.db]
+    # Solo una transacción propia (no anidada) puede cambiar su aislamiento
+    instantanea = conexion.vendor == 'postgresql' and not conexion.in_atomic_block
+    with transaction.atomic():
+        _bloquear_cuentas(empresa_id, instantanea)
+        revisiones = (
+            (CuentaContable, CAMPOS_CUENTA, _revisar_cuentas(empresa_id)),
+            (Asiento, CAMPOS_ASIENTO, _revisar_asientos(empresa_id)),
+            (Factura, CAMPOS_FACTURA, _revisar_facturas(empresa_id)),
+        )
+        for modelo, campos, (diferencias, correcciones) in revisiones:
+            resultado.diferencias += diferencias
+            if reparar and correcciones:
+                resultado.reparadas += _reparar(modelo, correcciones, campos)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def _verificar_en_proceso(empresa_id, reparar):
+    """verificar_empresa para el pool: abre y cierra su propia conexión"""
+    try:
+        return verificar_empresa(empresa_id, reparar)
+    finally:
+        connection.close()
+
+
+def verificar_libro(empresas=None, reparar=False, trabajadores=TRABAJADORES_VERIFICACION):
+    """
+    Verifica todas las empresas (o las indicadas), repartidas entre
+    ``trabajadores`` procesos. Con un solo trabajador o una sola empresa se
+    ejecuta en el proceso actual.
+
+    Yields:
+        ResultadoVerificacion por empresa, en orden de ID
+    """
+    queryset = Empresa.objects.all() if empresas is None else Empresa.objects.filter(pk__in=[e.pk for e in empresas])
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    if trabajadores <= 1 or len(ids) <= 1:
+        for empresa_id in ids:
+            yield verificar_empresa(empresa_id, reparar)
+        return
+
+    # Los procesos hijos no deben heredar conexiones abiertas del padre
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=min(trabajadores, len(ids))) as ejecutor:
+        yield from ejecutor.map(_verificar_en_proceso, ids, repeat(reparar))
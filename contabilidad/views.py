@@ -7,9 +7,13 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.urls import reverse_lazy
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
 from empresas.middleware import EmpresaFilterMixin
-from .models import CuentaContable, Asiento, Partida
+from core.base_views import PaginacionKeysetMixin
+from core.constants import MSG_SELECCIONAR_EMPRESA
+from .models import MSG_PERIODO_CERRADO, CuentaContable, Asiento, Partida, PeriodoContable
+from .plan_cuentas import ErrorPlanCuentas
+from .services import ServicioPlanCuentas
 
 # Constantes para evitar duplicación de literales de URL
 ASIENTOS_DETALLE_URL = 'contabilidad:asientos_detalle'
@@ -27,7 +31,7 @@ class CuentaContableListView(LoginRequiredMixin, EmpresaFilterMixin, ListView):
     paginate_by = 100
     
     def get_queryset(self):
-        return super().get_queryset().order_by('codigo')
+        return CuentaContable.anotar_saldos_pendientes(super().get_queryset().order_by('codigo'))
 
 class CuentaContableDetailView(LoginRequiredMixin, EmpresaFilterMixin, DetailView):
     model = CuentaContable
@@ -64,11 +68,12 @@ class CuentaContableDeleteView(LoginRequiredMixin, EmpresaFilterMixin, DeleteVie
         messages.success(request, f'Cuenta contable {cuenta.codigo} - {cuenta.nombre} eliminada exitosamente.')
         return super().delete(request, *args, **kwargs)
 
-class AsientoListView(LoginRequiredMixin, EmpresaFilterMixin, ListView):
+class AsientoListView(PaginacionKeysetMixin, LoginRequiredMixin, EmpresaFilterMixin, ListView):
     model = Asiento
     template_name = 'contabilidad/asientos_lista.html'
     context_object_name = 'object_list'
     paginate_by = 50
+    mostrar_total_aproximado = True
     
     def get_queryset(self):
         return super().get_queryset().select_related('empresa', 'creado_por').order_by('-fecha_asiento', '-numero_asiento')
@@ -78,7 +83,7 @@ class AsientoDetailView(LoginRequiredMixin, EmpresaFilterMixin, DetailView):
     template_name = 'contabilidad/asientos_detalle.html'
     
     def get_queryset(self):
-        return super().get_queryset().select_related('empresa', 'creado_por', 'confirmado_por').prefetch_related('partidas__cuenta')
+        return super().get_queryset().select_related('empresa', 'creado_por', 'confirmado_por').prefetch_related('partidas__cuenta', 'partidas_archivadas__cuenta')
 
 class AsientoCreateView(LoginRequiredMixin, EmpresaFilterMixin, CreateView):
     model = Asiento
@@ -276,6 +281,20 @@ class ConsultaCuentaView(LoginRequiredMixin, TemplateView):
 @login_required
 @require_http_methods(["POST"])
 def crear_plan_cuentas_basico(request):
+    """
+    Crea el PUC completo de la empresa activa desde la plantilla incluida,
+    solo si la empresa aún no tiene cuentas.
+    """
+    empresa_activa = getattr(request, 'empresa_activa', None)
+    if empresa_activa is None:
+        messages.error(request, MSG_SELECCIONAR_EMPRESA)
+    else:
+        try:
+            creadas = ServicioPlanCuentas.provisionar_plan_cuentas(empresa_activa)
+        except ErrorPlanCuentas as e:
+            messages.error(request, str(e))
+        else:
+            messages.success(request, f'Plan de cuentas creado con {creadas} cuentas.')
     return redirect('contabilidad:cuentas_lista')
 
 @login_required
@@ -309,11 +328,8 @@ def confirmar_asiento(request, pk):
     asiento.save()
     
     # Actualizar saldos de las cuentas
-    for partida in asiento.partidas.all():
-        cuenta = partida.cuenta
-        cuenta.saldo_debito += partida.valor_debito
-        cuenta.saldo_credito += partida.valor_credito
-        cuenta.save()
+    for partida in asiento.partidas.select_related('cuenta'):
+        partida.cuenta.actualizar_saldos(debito=partida.valor_debito, credito=partida.valor_credito)
     
     messages.success(request, f'Asiento {asiento.numero_asiento} confirmado exitosamente.')
     return redirect(ASIENTOS_DETALLE_URL, pk=pk)
@@ -337,16 +353,18 @@ def anular_asiento(request, pk):
         messages.error(request, 'Solo se pueden anular asientos confirmados.')
         return redirect(ASIENTOS_DETALLE_URL, pk=pk)
     
-    # Reversar saldos de las cuentas
-    for partida in asiento.partidas.all():
-        cuenta = partida.cuenta
-        cuenta.saldo_debito -= partida.valor_debito
-        cuenta.saldo_credito -= partida.valor_credito
-        cuenta.save()
+    # Los asientos de un período cerrado no se anulan (hay que reabrirlo)
+    if PeriodoContable.fecha_cerrada(asiento.empresa_id, asiento.fecha_asiento):
+        messages.error(request, MSG_PERIODO_CERRADO.format(fecha=asiento.fecha_asiento))
+        return redirect(ASIENTOS_DETALLE_URL, pk=pk)
     
-    # Anular el asiento
-    asiento.estado = 'anulado'
-    asiento.save()
+    # Reversar saldos y anular juntos: si el guardado falla no quedan saldos a medias
+    with transaction.atomic():
+        for partida in asiento.partidas.select_related('cuenta'):
+            partida.cuenta.actualizar_saldos(debito=-partida.valor_debito, credito=-partida.valor_credito)
+        
+        asiento.estado = 'anulado'
+        asiento.save()
     
     messages.success(request, f'Asiento {asiento.numero_asiento} anulado exitosamente.')
     return redirect(ASIENTOS_DETALLE_URL, pk=pk)
@@ -387,7 +405,7 @@ def duplicar_asiento(request, pk):
     )
     
     # Copiar partidas
-    for partida_original in asiento_original.partidas.all():
+    for partida_original in asiento_original.lineas:
         Partida.objects.create(
             asiento=nuevo_asiento,
             cuenta=partida_original.cuenta,
@@ -441,7 +459,7 @@ def reversar_asiento(request, pk):
     )
     
     # Copiar partidas invirtiendo débitos y créditos
-    for partida_original in asiento_original.partidas.all():
+    for partida_original in asiento_original.lineas:
         Partida.objects.create(
             asiento=asiento_reversa,
             cuenta=partida_original.cuenta,
@@ -552,11 +570,13 @@ def obtener_saldo_cuenta(request, pk):
     try:
         cuenta = CuentaContable.objects.get(pk=pk, empresa=empresa_activa)
         
-        # Calcular saldo
+        # Calcular saldo (incluye movimientos aún sin compactar)
+        saldo_debito = cuenta.saldo_debito_total
+        saldo_credito = cuenta.saldo_credito_total
         if cuenta.naturaleza == 'D':
-            saldo = cuenta.saldo_debito - cuenta.saldo_credito
+            saldo = saldo_debito - saldo_credito
         else:
-            saldo = cuenta.saldo_credito - cuenta.saldo_debito
+            saldo = saldo_credito - saldo_debito
         
         return JsonResponse({
             'id': cuenta.pk,
@@ -564,8 +584,8 @@ def obtener_saldo_cuenta(request, pk):
             'nombre': cuenta.nombre,
             'tipo': cuenta.get_tipo_cuenta_display(),
             'naturaleza': cuenta.get_naturaleza_display(),
-            'saldo_debito': str(cuenta.saldo_debito),
-            'saldo_credito': str(cuenta.saldo_credito),
+            'saldo_debito': str(saldo_debito),
+            'saldo_credito': str(saldo_credito),
             'saldo': str(saldo)
         })
     except CuentaContable.DoesNotExist:
@@ -1,9 +1,12 @@
 """
 Registro de modelos en el AdminSite personalizado
 """
+from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin, GroupAdmin
 from django.contrib.auth.models import User, Group
+from .admin_mixins import ReadOnlyAdminMixin
 from .admin_site import admin_site
+from .models import EstadisticaEndpoint
 
 
 # Registrar User con el UserAdmin por defecto de Django
@@ -11,3 +14,19 @@ admin_site.register(User, UserAdmin)
 
 # Registrar Group con el GroupAdmin por defecto de Django
 admin_site.register(Group, GroupAdmin)
+
+
+@admin.register(EstadisticaEndpoint, site=admin_site)
+class EstadisticaEndpointAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    """Endpoints con más consultas / tiempo de BD (ver InstrumentacionSQLMiddleware)"""
+    list_display = [
+        'endpoint', 'metodo', 'solicitudes', 'consultas_max', 'consultas_promedio',
+        'tiempo_db_max_ms', 'tiempo_db_promedio_ms', 'duplicadas_max', 'ultima_vez',
+    ]
+    list_filter = ['metodo']
+    search_fields = ['endpoint']
+    ordering = ['-tiempo_db_max_ms']
+    
+    def has_delete_permission(self, request, obj=None):
+        """Permite limpiar las estadísticas"""
+        return request.user.is_superuser
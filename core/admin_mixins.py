@@ -1,7 +1,22 @@
 """
 Mixins reutilizables para el admin de Django
 """
+import datetime
+import json
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.utils import get_fields_from_path
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+# Filas a partir de las cuales los listados del admin muestran conteos
+# estimados por PostgreSQL en lugar de COUNT(*)
+UMBRAL_CONTEO_ESTIMADO = 100000
 
 
 class EmpresaFilterMixin:
@@ -96,3 +111,170 @@ class ExportMixin:
     export_as_csv.short_description = "Exportar seleccionados como CSV"
     
     actions = ['export_as_csv']
+
+
+def _estimacion_postgres(queryset):
+    """
+    Filas estimadas por el planificador de PostgreSQL (None en otros
+    motores): ``pg_class.reltuples`` para la tabla completa y el plan de
+    EXPLAIN cuando hay filtros.
+    """
+    conexion = connections[queryset.db]
+    if conexion.vendor != 'postgresql':
+        return None
+
+    query = queryset.query
+    with conexion.cursor() as cursor:
+        if not query.where and not query.distinct and not query.combinator:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [conexion.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            fila = cursor.fetchone()
+            # -1: la tabla nunca se ha analizado
+            return fila[0] if fila and fila[0] >= 0 else None
+
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+def conteo_estimado(queryset, umbral=UMBRAL_CONTEO_ESTIMADO):
+    """
+    COUNT(*) exacto si el resultado es pequeño; por encima de ``umbral``
+    filas, la estimación de PostgreSQL (no recorre la tabla).
+    """
+    estimado = _estimacion_postgres(queryset)
+    if estimado is None or estimado < umbral:
+        return queryset.count()
+    return estimado
+
+
+class PaginadorEstimado(Paginator):
+    """Paginator del admin que cuenta con ``conteo_estimado``"""
+
+    @cached_property
+    def count(self):
+        return conteo_estimado(self.object_list)
+
+
+def _limite_rango(campo, fecha):
+    """Inicio del día ``fecha`` en el tipo del campo (date o datetime)"""
+    if not isinstance(campo, models.DateTimeField):
+        return fecha
+    inicio = datetime.datetime.combine(fecha, datetime.time.min)
+    return timezone.make_aware(inicio) if settings.USE_TZ else inicio
+
+
+def _periodos(primero, ultimo, nivel):
+    """(inicio, fin) de cada año, mes o día entre dos fechas"""
+    inicio = {
+        'year': primero.replace(month=1, day=1),
+        'month': primero.replace(day=1),
+        'day': primero,
+    }[nivel]
+    while inicio <= ultimo:
+        if nivel == 'year':
+            fin = inicio.replace(year=inicio.year + 1)
+        elif nivel == 'month':
+            fin = (inicio.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        else:
+            fin = inicio + datetime.timedelta(days=1)
+        yield inicio, fin
+        inicio = fin
+
+
+def fechas_por_rangos(queryset, nombre_campo, nivel):
+    """
+    Lo mismo que ``queryset.dates(nombre_campo, nivel)``, pero en lugar de
+    agrupar toda la tabla por año/mes/día toma Min/Max y hace un EXISTS por
+    cada período con un rango ``>= inicio AND < fin``, que resuelve el
+    índice del campo.
+    """
+    campo = get_fields_from_path(queryset.model, nombre_campo)[-1]
+    extremos = queryset.aggregate(primero=Min(nombre_campo), ultimo=Max(nombre_campo))
+    if extremos['primero'] is None:
+        return []
+
+    primero, ultimo = extremos['primero'], extremos['ultimo']
+    if isinstance(campo, models.DateTimeField):
+        if timezone.is_aware(primero):
+            primero, ultimo = timezone.localtime(primero), timezone.localtime(ultimo)
+        primero, ultimo = primero.date(), ultimo.date()
+
+    return [
+        inicio
+        for inicio, fin in _periodos(primero, ultimo, nivel)
+        if queryset.filter(**{
+            f'{nombre_campo}__gte': _limite_rango(campo, inicio),
+            f'{nombre_campo}__lt': _limite_rango(campo, fin),
+        }).exists()
+    ]
+
+
+class _QuerySetFechasPorRangos:
+    """Envoltorio del queryset del changelist para la navegación por fechas"""
+
+    def __init__(self, queryset):
+        self._queryset = queryset
+
+    def __getattr__(self, nombre):
+        return getattr(self._queryset, nombre)
+
+    def dates(self, nombre_campo, nivel, order='ASC'):
+        return fechas_por_rangos(self._queryset, nombre_campo, nivel)
+
+    datetimes = dates
+
+
+class ChangeListFechasPorRangos:
+    """ChangeList cuyo queryset arma la navegación por fechas con rangos"""
+
+    def __init__(self, changelist):
+        self._changelist = changelist
+        self.queryset = _QuerySetFechasPorRangos(changelist.queryset)
+
+    def __getattr__(self, nombre):
+        return getattr(self._changelist, nombre)
+
+
+class ListadoRapidoMixin:
+    """
+    Listados del admin que cargan rápido sobre tablas con millones de filas:
+    
+    - ``list_select_related`` con las FK que aparecen en ``list_display``
+      (además de las que declare el admin), sin N+1 al mostrar columnas
+    - Paginación con conteo estimado (``PaginadorEstimado``) y sin el
+      conteo adicional de la tabla completa
+    - ``date_hierarchy`` que arma sus enlaces con consultas por rango
+      (ver templates/admin/change_list.html y ``fechas_por_rangos``)
+    
+    Uso:
+        class MiModelAdmin(ListadoRapidoMixin, admin.ModelAdmin):
+            ...
+    """
+    
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    date_hierarchy_por_rangos = True
+    
+    def get_list_select_related(self, request):
+        """FK de list_display más las declaradas en list_select_related"""
+        declaradas = super().get_list_select_related(request)
+        if declaradas is True:
+            return True
+        
+        relaciones = list(declaradas or [])
+        for nombre in self.get_list_display(request):
+            if not isinstance(nombre, str) or nombre in relaciones:
+                continue
+            try:
+                campo = self.model._meta.get_field(nombre)
+            except FieldDoesNotExist:
+                continue
+            if campo.many_to_one or campo.one_to_one:
+                relaciones.append(nombre)
+        return relaciones
@@ -93,7 +93,7 @@ class ContableAdminSite(AdminSite):
             {'name': 'Ventas', 'icon': 'fa-shopping-cart', 
              'apps': ['ventas'], 'models': []},
             {'name': 'Herramientas de Desarrollo', 'icon': 'fa-wrench', 
-             'apps': ['admin', 'sessions', 'contenttypes'], 'models': []},
+             'apps': ['core', 'admin', 'sessions', 'contenttypes'], 'models': []},
         ]
     
     def _populate_sidebar_models(self, structure, app_dict):
@@ -145,6 +145,7 @@ class ContableAdminSite(AdminSite):
             'reportes',
             'api',
             'ventas',
+            'core',
             'sessions',
             'contenttypes',
         ]
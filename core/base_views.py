@@ -9,9 +9,40 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.contrib import messages
 from empresas.middleware import EmpresaFilterMixin
+from .keyset import PaginadorKeyset
 
 
-class BaseListView(LoginRequiredMixin, EmpresaFilterMixin, ListView):
+class PaginacionKeysetMixin:
+    """
+    Paginación por cursor (``?cursor=``) para ListView en lugar de
+    ``?page=`` con OFFSET y COUNT(*) (ver ``core.keyset.PaginadorKeyset``).
+    
+    La clave es el orden del queryset más la llave primaria. En el contexto
+    quedan ``page_obj`` con ``siguiente_cursor``/``anterior_cursor`` y, si
+    ``mostrar_total_aproximado``, ``total_aproximado``. La navegación se
+    incluye con ``components/paginacion_keyset.html``.
+    
+    Uso:
+        class MiListView(PaginacionKeysetMixin, LoginRequiredMixin, ListView):
+            paginate_by = 50
+    """
+    cursor_kwarg = 'cursor'
+    orden_keyset = None
+    mostrar_total_aproximado = False
+    
+    def paginate_queryset(self, queryset, page_size):
+        paginador = PaginadorKeyset(queryset, page_size, orden=self.orden_keyset)
+        pagina = paginador.pagina(self.request.GET.get(self.cursor_kwarg))
+        return paginador, pagina, pagina.object_list, pagina.has_other_pages()
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.mostrar_total_aproximado and context.get('paginator') is not None:
+            context['total_aproximado'] = context['paginator'].count
+        return context
+
+
+class BaseListView(PaginacionKeysetMixin, LoginRequiredMixin, EmpresaFilterMixin, ListView):
     """Vista base para listar objetos con autenticación y filtro por empresa"""
     paginate_by = 50
     
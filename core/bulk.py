@@ -0,0 +1,63 @@
+"""
+Inserción masiva de registros
+Usa COPY en PostgreSQL y bulk_create en los demás motores
+"""
+import csv
+import io
+
+from django.db import connection
+
+# Filas por sentencia cuando se usa bulk_create
+TAMANO_BLOQUE_INSERT = 2000
+
+
+def soporta_copy():
+    """Indica si la conexión actual permite COPY (PostgreSQL con psycopg2)"""
+    return connection.vendor == 'postgresql'
+
+
+def insertar_en_bloque(modelo, objetos, usar_copy=True, batch_size=TAMANO_BLOQUE_INSERT):
+    """
+    Inserta ``objetos`` del ``modelo`` con el mínimo de viajes a la base.
+
+    Con ``usar_copy`` y PostgreSQL los datos se envían con ``COPY FROM STDIN``;
+    no se asignan los ``pk`` a los objetos, así que solo sirve para tablas
+    cuyas filas no se referencian después en la misma operación. En otro caso
+    se usa ``bulk_create``. No se ejecuta ``save()`` ni se emiten señales.
+
+    Returns:
+        int: Número de filas insertadas
+    """
+    objetos = list(objetos)
+    if not objetos:
+        return 0
+
+    if usar_copy and soporta_copy():
+        _copiar(modelo, objetos)
+    else:
+        modelo.objects.bulk_create(objetos, batch_size=batch_size)
+    return len(objetos)
+
+
+def _copiar(modelo, objetos):
+    """Envía los objetos con COPY ... FROM STDIN en formato CSV"""
+    campos = [
+        f for f in modelo._meta.concrete_fields
+        if not (f.primary_key and getattr(f, 'db_returning', False))
+    ]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objetos:
+        fila = []
+        for campo in campos:
+            valor = campo.get_db_prep_save(campo.pre_save(obj, True), connection)
+            fila.append(r'\N' if valor is None else valor)
+        writer.writerow(fila)
+    buffer.seek(0)
+
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    columnas = ', '.join(connection.ops.quote_name(c.column) for c in campos)
+    sql = f"COPY {tabla} ({columnas}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
@@ -0,0 +1,285 @@
+"""
+Generación de datos sintéticos para pruebas de carga.
+
+Crea empresas completas (plan de cuentas, terceros, productos, facturas,
+pagos y asientos cuadrados) con inserciones masivas, para reproducir en
+local volúmenes parecidos a producción. Los asientos pasan por
+ImportadorAsientos, así que se validan y se insertan con bulk_create/COPY
+igual que una migración real. Los datos sintéticos no dejan historial de
+cambios (auditoría suprimida).
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+
+from catalogos.models import Impuesto, MetodoPago, Producto, Tercero
+from contabilidad.importacion import ImportadorAsientos
+from contabilidad.models import Asiento
+from contabilidad.services import ServicioPlanCuentas
+from empresas.auditoria import auditoria_en_bloque
+from empresas.models import Empresa, PerfilEmpresa
+from facturacion.models import Factura, FacturaDetalle
+from tesoreria.models import CuentaBancaria, Pago
+from tesoreria.services.services import ServicioTesoreria
+
+# Registros por sentencia INSERT
+TAMANO_LOTE_SINTETICO = 2000
+
+# Prefijo del NIT de las empresas generadas
+PREFIJO_NIT_SINTETICO = '999'
+
+IVA = Decimal('0.19')
+
+# Plantillas de asientos sobre el plan de cuentas básico:
+# (concepto, [(cuenta, 'D'/'C')], con_iva). Con IVA la primera línea lleva
+# base + IVA y las otras dos la base y el IVA por separado.
+PLANTILLAS_ASIENTO = [
+    ('Venta de contado', [('1105', 'D'), ('4135', 'C'), ('2408', 'C')], True),
+    ('Venta a crédito', [('1305', 'D'), ('4135', 'C'), ('2408', 'C')], True),
+    ('Recaudo de cartera', [('1110', 'D'), ('1305', 'C')], False),
+    ('Consignación de efectivo', [('1110', 'D'), ('1105', 'C')], False),
+    ('Pago de nómina', [('5105', 'D'), ('1110', 'C')], False),
+    ('Pago de IVA', [('2408', 'D'), ('1110', 'C')], False),
+]
+
+
+class GeneradorDatosSinteticos:
+    """
+    Genera datos de una o varias empresas sintéticas.
+
+    Uso:
+        generador = GeneradorDatosSinteticos(usuario, semilla=42)
+        empresa = generador.crear_empresa(1)
+        generador.crear_catalogos(empresa, terceros=200, productos=100)
+        generador.crear_asientos(empresa, total_partidas=100_000)
+    """
+
+    def __init__(self, usuario, semilla=None, anio=None, tamano_lote=TAMANO_LOTE_SINTETICO):
+        self.usuario = usuario
+        self.aleatorio = random.Random(semilla)
+        self.anio = anio or date.today().year
+        self.tamano_lote = tamano_lote
+
+    # ----- Empresa y catálogos -----
+
+    @auditoria_en_bloque(modo='suprimir')
+    @transaction.atomic
+    def crear_empresa(self, indice, nit=None):
+        """Empresa con plan de cuentas básico, perfil admin y una cuenta bancaria"""
+        nit = nit or f'{PREFIJO_NIT_SINTETICO}{indice:06d}-{indice % 10}'
+        empresa = Empresa.objects.create(
+            nit=nit,
+            razon_social=f'Empresa Sintética {indice} SAS',
+            direccion=f'Calle {indice} # 1-01',
+            ciudad='Bogotá',
+            telefono='6010000000',
+            email=f'sintetica{indice}@example.com',
+            propietario=self.usuario,
+        )
+        PerfilEmpresa.objects.create(
+            usuario=self.usuario,
+            empresa=empresa,
+            rol='admin',
+            asignado_por=self.usuario,
+        )
+        cuentas = ServicioPlanCuentas.crear_plan_cuentas_basico(empresa, self.usuario)
+        CuentaBancaria.objects.create(
+            empresa=empresa,
+            codigo='B01',
+            nombre='Cuenta Corriente Principal',
+            tipo_cuenta='corriente',
+            banco='Banco Sintético',
+            cuenta_contable=cuentas.get('1110'),
+        )
+        return empresa
+
+    @auditoria_en_bloque(modo='suprimir')
+    @transaction.atomic
+    def crear_catalogos(self, empresa, terceros=100, productos=50):
+        """Impuesto, métodos de pago, terceros y productos"""
+        iva = Impuesto.objects.create(
+            empresa=empresa, codigo='IVA19', nombre='IVA 19%', tipo_impuesto='IVA', porcentaje=Decimal('19.00')
+        )
+        MetodoPago.objects.bulk_create([
+            MetodoPago(empresa=empresa, codigo='EF', nombre='Efectivo', tipo_metodo='EFECTIVO'),
+            MetodoPago(empresa=empresa, codigo='TR', nombre='Transferencia', tipo_metodo='TRANSFERENCIA'),
+        ])
+        Tercero.objects.bulk_create([
+            Tercero(
+                empresa=empresa,
+                tipo_tercero='ambos',
+                tipo_documento='NIT',
+                numero_documento=f'{800000000 + i}',
+                razon_social=f'Tercero Sintético {i}',
+                direccion=f'Carrera {i} # 2-02',
+                ciudad='Medellín',
+                telefono='6040000000',
+                email=f'tercero{i}@example.com',
+            )
+            for i in range(1, terceros + 1)
+        ], batch_size=self.tamano_lote)
+        Producto.objects.bulk_create([
+            Producto(
+                empresa=empresa,
+                codigo=f'P{i:05d}',
+                nombre=f'Producto Sintético {i}',
+                tipo_producto='producto' if i % 3 else 'servicio',
+                precio_venta=Decimal(self.aleatorio.randint(10, 500) * 1000),
+                precio_costo=Decimal(self.aleatorio.randint(5, 300) * 1000),
+                impuesto=iva,
+            )
+            for i in range(1, productos + 1)
+        ], batch_size=self.tamano_lote)
+
+    # ----- Documentos -----
+
+    def _fecha(self):
+        return date(self.anio, 1, 1) + timedelta(days=self.aleatorio.randrange(365))
+
+    @auditoria_en_bloque(modo='suprimir')
+    @transaction.atomic
+    def crear_facturas(self, empresa, cantidad):
+        """Facturas confirmadas con 1 a 3 líneas cada una"""
+        clientes = list(Tercero.objects.filter(empresa=empresa).values_list('pk', flat=True))
+        productos = list(Producto.objects.filter(empresa=empresa).select_related('impuesto'))
+        metodo = MetodoPago.objects.filter(empresa=empresa).first()
+        if not clientes or not productos:
+            return 0
+
+        for inicio in range(0, cantidad, self.tamano_lote):
+            facturas, lineas_por_factura = [], []
+            for numero in range(inicio + 1, min(inicio + self.tamano_lote, cantidad) + 1):
+                fecha = self._fecha()
+                lineas = []
+                for orden in range(1, self.aleatorio.randint(1, 3) + 1):
+                    producto = self.aleatorio.choice(productos)
+                    cantidad_linea = Decimal(self.aleatorio.randint(1, 10))
+                    subtotal = producto.precio_venta * cantidad_linea
+                    valor_impuesto = (subtotal * IVA).quantize(Decimal('0.01'))
+                    lineas.append(FacturaDetalle(
+                        producto=producto,
+                        descripcion=producto.nombre,
+                        cantidad=cantidad_linea,
+                        precio_unitario=producto.precio_venta,
+                        impuesto=producto.impuesto,
+                        porcentaje_impuesto=Decimal('19.00'),
+                        subtotal=subtotal,
+                        valor_impuesto=valor_impuesto,
+                        total_linea=subtotal + valor_impuesto,
+                        orden=orden,
+                    ))
+                subtotal = sum(linea.subtotal for linea in lineas)
+                impuestos = sum(linea.valor_impuesto for linea in lineas)
+                facturas.append(Factura(
+                    empresa=empresa,
+                    numero_factura=f'FV-{numero:07d}',
+                    fecha_factura=fecha,
+                    fecha_vencimiento=fecha + timedelta(days=30),
+                    cliente_id=self.aleatorio.choice(clientes),
+                    tipo_venta=self.aleatorio.choice(['contado', 'credito']),
+                    metodo_pago=metodo,
+                    subtotal=subtotal,
+                    total_impuestos=impuestos,
+                    total=subtotal + impuestos,
+                    estado='confirmada',
+                    creado_por=self.usuario,
+                ))
+                lineas_por_factura.append(lineas)
+
+            Factura.objects.bulk_create(facturas)
+            detalles = []
+            for factura, lineas in zip(facturas, lineas_por_factura):
+                for linea in lineas:
+                    linea.factura = factura
+                    detalles.append(linea)
+            FacturaDetalle.objects.bulk_create(detalles, batch_size=self.tamano_lote)
+        return cantidad
+
+    @auditoria_en_bloque(modo='suprimir')
+    @transaction.atomic
+    def crear_pagos(self, empresa, cantidad):
+        """Cobros y egresos pagados sobre la cuenta bancaria de la empresa"""
+        terceros = list(Tercero.objects.filter(empresa=empresa).values_list('pk', flat=True))
+        metodo = MetodoPago.objects.filter(empresa=empresa).last()
+        cuenta = CuentaBancaria.objects.filter(empresa=empresa).first()
+        if not terceros:
+            return 0
+
+        pagos = (
+            Pago(
+                empresa=empresa,
+                numero_pago=f'PG-{numero:07d}',
+                fecha_pago=self._fecha(),
+                tipo_pago='cobro' if self.aleatorio.random() < 0.6 else 'egreso',
+                tercero_id=self.aleatorio.choice(terceros),
+                metodo_pago=metodo,
+                cuenta_bancaria=cuenta,
+                valor=Decimal(self.aleatorio.randint(10, 5000) * 1000),
+                referencia=f'REF{numero}',
+                estado='pagado',
+                creado_por=self.usuario,
+            )
+            for numero in range(1, cantidad + 1)
+        )
+        lote = []
+        for pago in pagos:
+            lote.append(pago)
+            if len(lote) >= self.tamano_lote:
+                Pago.objects.bulk_create(lote)
+                lote = []
+        if lote:
+            Pago.objects.bulk_create(lote)
+
+        # bulk_create no pasa por Pago.save(): recalcular el saldo de la cuenta
+        if cuenta:
+            ServicioTesoreria.recalcular_saldos_cuentas(empresa, corregir=True)
+        return cantidad
+
+    # ----- Asientos -----
+
+    def asientos(self, total_partidas, numero_inicial=1):
+        """
+        Generador de asientos cuadrados (formato de ImportadorAsientos)
+        hasta completar ``total_partidas`` partidas.
+        """
+        generadas = 0
+        numero = numero_inicial
+        while generadas < total_partidas:
+            concepto, lineas, con_iva = self.aleatorio.choice(PLANTILLAS_ASIENTO)
+            base = Decimal(self.aleatorio.randint(1, 2000) * 1000)
+            if con_iva:
+                iva = (base * IVA).quantize(Decimal('0.01'))
+                valores = [base + iva, base, iva]
+            else:
+                valores = [base, base]
+
+            partidas = [
+                {
+                    'cuenta': cuenta,
+                    'debito': str(valor) if lado == 'D' else '0',
+                    'credito': str(valor) if lado == 'C' else '0',
+                    'concepto': concepto,
+                }
+                for (cuenta, lado), valor in zip(lineas, valores)
+            ]
+            yield {
+                'numero_asiento': f'{numero:06d}',
+                'fecha': self._fecha().isoformat(),
+                'concepto': f'{concepto} sintético',
+                'partidas': partidas,
+            }
+            generadas += len(partidas)
+            numero += 1
+
+    def crear_asientos(self, empresa, total_partidas, confirmar=True):
+        """
+        Inserta asientos hasta completar al menos ``total_partidas`` partidas.
+
+        Returns:
+            ResultadoImportacion
+        """
+        importador = ImportadorAsientos(empresa, self.usuario, confirmar=confirmar, tamano_lote=self.tamano_lote)
+        numero_inicial = Asiento.objects.filter(empresa=empresa).count() + 1
+        return importador.importar(self.asientos(total_partidas, numero_inicial))
@@ -0,0 +1,188 @@
+"""
+Utilidades para paginación por cursor (keyset) en vistas HTML
+
+En lugar de OFFSET, cada página filtra por la clave de la última fila vista
+(p. ej. ``(fecha_pago, id)``), de modo que el costo por página no depende de
+cuántas filas haya antes. Los cursores van firmados para que no se puedan
+alterar desde la URL.
+"""
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_SALT = 'core.keyset'
+
+# Dirección guardada en los cursores de PaginadorKeyset
+SIGUIENTE = 's'
+ANTERIOR = 'a'
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no es válido o fue alterado"""
+
+
+def codificar_cursor(valores):
+    """Convierte una lista de valores en un texto opaco y firmado"""
+    return signing.dumps([str(v) if v is not None else None for v in valores], salt=CURSOR_SALT, compress=True)
+
+
+def decodificar_cursor(texto, cantidad=None):
+    """
+    Devuelve la lista de valores del cursor o None si no se envió.
+
+    Raises:
+        CursorInvalido: Si la firma no coincide o la cantidad no es la esperada
+    """
+    if not texto:
+        return None
+    try:
+        valores = signing.loads(texto, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise CursorInvalido('Cursor inválido')
+    if not isinstance(valores, list) or (cantidad is not None and len(valores) != cantidad):
+        raise CursorInvalido('Cursor inválido')
+    return valores
+
+
+def filtro_despues_de(campos, valores, descendente=False):
+    """
+    Condición para las filas posteriores a ``valores`` según el orden de
+    ``campos``: (a > x) OR (a = x AND b > y) OR ...
+
+    Un campo con prefijo ``-`` (como en ``order_by``) se compara en
+    sentido descendente.
+    """
+    filtro = Q()
+    for i, campo in enumerate(campos):
+        nombre = campo.lstrip('-')
+        operador = 'lt' if descendente != campo.startswith('-') else 'gt'
+        rama = Q(**{f'{nombre}__{operador}': valores[i]})
+        for previo, valor in zip(campos[:i], valores[:i]):
+            rama &= Q(**{previo.lstrip('-'): valor})
+        filtro |= rama
+    return filtro
+
+
+def valor_campo(obj, campo):
+    """Resuelve campos con ``__`` (p. ej. ``asiento__fecha_asiento``)"""
+    valor = obj
+    for parte in campo.split('__'):
+        valor = getattr(valor, parte)
+    return valor
+
+
+def orden_keyset(queryset):
+    """
+    Orden del queryset (el de ``order_by`` o el de ``Meta.ordering``) con
+    la llave primaria al final para que la clave sea única.
+    """
+    query = queryset.query
+    orden = list(query.order_by or (queryset.model._meta.ordering if query.default_ordering else ()))
+    if not all(isinstance(campo, str) and campo != '?' for campo in orden):
+        raise ImproperlyConfigured(
+            f'La paginación por cursor de {queryset.model.__name__} requiere ordenar por nombres de campo'
+        )
+    nombre_pk = queryset.model._meta.pk.name
+    if not any(campo.lstrip('-') in ('pk', nombre_pk) for campo in orden):
+        orden.append('-pk' if orden and orden[-1].startswith('-') else 'pk')
+    return tuple(orden)
+
+
+def invertir_orden(orden):
+    return tuple(campo[1:] if campo.startswith('-') else f'-{campo}' for campo in orden)
+
+
+class PaginaKeyset:
+    """
+    Una página de PaginadorKeyset. Expone lo que usan las plantillas de
+    ListView (``object_list``, ``has_next``, ``has_previous``,
+    ``paginator.count``) más los cursores de las páginas vecinas.
+    """
+
+    def __init__(self, object_list, paginator, siguiente_cursor=None, anterior_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.siguiente_cursor = siguiente_cursor
+        self.anterior_cursor = anterior_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+    def has_next(self):
+        return self.siguiente_cursor is not None
+
+    def has_previous(self):
+        return self.anterior_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class PaginadorKeyset:
+    """
+    Paginación por cursor para listados HTML sobre el orden del queryset
+    más la llave primaria (ver ``orden_keyset``). Cada página cuesta lo
+    mismo sin importar cuántas filas haya antes; no hay número de página
+    ni COUNT(*) salvo que se pida el total (``count``, aproximado en
+    tablas grandes).
+
+    Las columnas del orden deben ser NOT NULL.
+
+    Uso:
+        pagina = PaginadorKeyset(queryset, 50).pagina(request.GET.get('cursor'))
+    """
+
+    def __init__(self, queryset, por_pagina, orden=None):
+        self.queryset = queryset
+        self.por_pagina = por_pagina
+        self.orden = tuple(orden) if orden else orden_keyset(queryset)
+
+    @cached_property
+    def count(self):
+        """Total de filas, estimado por PostgreSQL en tablas grandes"""
+        from core.admin_mixins import conteo_estimado
+        return conteo_estimado(self.queryset.order_by())
+
+    def _cursor(self, direccion, obj):
+        return codificar_cursor([direccion, *(valor_campo(obj, campo.lstrip('-')) for campo in self.orden)])
+
+    def pagina(self, cursor=None):
+        """
+        PaginaKeyset que sigue (o precede) a ``cursor``; la primera si no
+        hay cursor o si no es válido.
+        """
+        try:
+            valores = decodificar_cursor(cursor, len(self.orden) + 1)
+        except CursorInvalido:
+            valores = None
+        if valores and valores[0] not in (SIGUIENTE, ANTERIOR):
+            valores = None
+
+        hacia_atras = bool(valores) and valores[0] == ANTERIOR
+        orden = invertir_orden(self.orden) if hacia_atras else self.orden
+        queryset = self.queryset.order_by(*orden)
+        if valores:
+            queryset = queryset.filter(filtro_despues_de(orden, valores[1:]))
+
+        # Se pide una fila extra para saber si hay más en esa dirección
+        filas = list(queryset[:self.por_pagina + 1])
+        hay_mas = len(filas) > self.por_pagina
+        filas = filas[:self.por_pagina]
+        if hacia_atras:
+            filas.reverse()
+
+        hay_siguiente = hay_mas or hacia_atras
+        hay_anterior = hay_mas if hacia_atras else bool(valores)
+        return PaginaKeyset(
+            filas,
+            self,
+            siguiente_cursor=self._cursor(SIGUIENTE, filas[-1]) if filas and hay_siguiente else None,
+            anterior_cursor=self._cursor(ANTERIOR, filas[0]) if filas and hay_anterior else None,
+        )
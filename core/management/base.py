@@ -0,0 +1,34 @@
+"""
+Utilidades compartidas por los comandos de gestión
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+
+from empresas.models import Empresa
+
+
+class EmpresaCommandMixin:
+    """Argumentos y búsquedas comunes a los comandos que operan sobre una empresa"""
+
+    def agregar_argumento_empresa(self, parser, required=True):
+        parser.add_argument('--empresa', required=required, help='NIT o ID de la empresa')
+
+    def obtener_empresa(self, valor):
+        """Busca la empresa por NIT o por ID"""
+        empresa = Empresa.objects.filter(nit=valor).first()
+        if empresa is None and str(valor).isdigit():
+            empresa = Empresa.objects.filter(pk=int(valor)).first()
+        if empresa is None:
+            raise CommandError(f'Empresa "{valor}" no encontrada')
+        return empresa
+
+    def obtener_usuario(self, username, empresa=None):
+        """Usuario indicado o, por defecto, el propietario de la empresa"""
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'Usuario "{username}" no encontrado')
+        if empresa is not None:
+            return empresa.propietario
+        raise CommandError('Debe indicar --usuario')
@@ -0,0 +1,54 @@
+"""
+Comando para generar empresas con datos sintéticos a escala de producción
+"""
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.datos_sinteticos import GeneradorDatosSinteticos, PREFIJO_NIT_SINTETICO
+from empresas.models import Empresa
+
+
+class Command(BaseCommand):
+    help = 'Genera empresas sintéticas con plan de cuentas, terceros, productos, facturas, pagos y asientos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', required=True, help='Usuario propietario de las empresas generadas')
+        parser.add_argument('--empresas', type=int, default=1, help='Cantidad de empresas')
+        parser.add_argument('--partidas', type=int, default=10000, help='Partidas contables por empresa')
+        parser.add_argument('--terceros', type=int, default=200)
+        parser.add_argument('--productos', type=int, default=100)
+        parser.add_argument('--facturas', type=int, default=1000)
+        parser.add_argument('--pagos', type=int, default=1000)
+        parser.add_argument('--anio', type=int, help='Año de las fechas generadas (por defecto el actual)')
+        parser.add_argument('--semilla', type=int, help='Semilla para obtener siempre los mismos datos')
+        parser.add_argument('--borrador', action='store_true', help='Dejar los asientos en borrador')
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        try:
+            usuario = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuario "{options["usuario"]}" no encontrado')
+
+        generador = GeneradorDatosSinteticos(usuario, semilla=options['semilla'], anio=options['anio'])
+        # Continuar la numeración si ya hay empresas sintéticas
+        primera = Empresa.objects.filter(nit__startswith=PREFIJO_NIT_SINTETICO).count() + 1
+
+        for indice in range(primera, primera + options['empresas']):
+            inicio = time.monotonic()
+            empresa = generador.crear_empresa(indice)
+            self.stdout.write(f'🏢 {empresa.nit} - {empresa.razon_social}')
+
+            generador.crear_catalogos(empresa, options['terceros'], options['productos'])
+            generador.crear_facturas(empresa, options['facturas'])
+            generador.crear_pagos(empresa, options['pagos'])
+            resultado = generador.crear_asientos(empresa, options['partidas'], confirmar=not options['borrador'])
+
+            self.stdout.write(self.style.SUCCESS(
+                f'   ✅ {options["terceros"]} terceros, {options["productos"]} productos, '
+                f'{options["facturas"]} facturas, {options["pagos"]} pagos, '
+                f'{resultado.asientos} asientos / {resultado.partidas} partidas '
+                f'({time.monotonic() - inicio:.1f}s)'
+            ))
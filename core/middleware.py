@@ -1,10 +1,21 @@
 """
 Middleware personalizado para el proyecto S_CONTABLE
 """
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.middleware.csrf import CsrfViewMiddleware
 from django.utils.deprecation import MiddlewareMixin
+from collections import Counter
+from contextlib import ExitStack
 import logging
+import re
+import time
+
+from core import request_context
 
 logger = logging.getLogger(__name__)
 
@@ -61,3 +72,176 @@ class CustomCsrfViewMiddleware(CsrfViewMiddleware):
         
         # Llamar al middleware original
         return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class ContextoPeticionMiddleware:
+    """
+    Abre el contexto de la petición (core.request_context) y lo cierra al
+    responder. Va antes de la instrumentación para que sus registros lleven
+    el ID de petición; el usuario, la empresa y el rol los completa
+    EmpresaActivaMiddleware. Funciona igual en WSGI y en ASGI.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_context.contexto_peticion(
+            request_id=request_context.request_id_de(request), request=request
+        ) as contexto:
+            response = self.get_response(request)
+        response['X-Request-ID'] = contexto.request_id
+        return response
+    
+    async def __acall__(self, request):
+        with request_context.contexto_peticion(
+            request_id=request_context.request_id_de(request), request=request
+        ) as contexto:
+            response = await self.get_response(request)
+        response['X-Request-ID'] = contexto.request_id
+        return response
+
+
+# Listas de parámetros ("IN (%s, %s, ...)", "VALUES (...), (...)") se
+# colapsan para que consultas iguales con distinto tamaño cuenten como una
+_PARAMETROS_REPETIDOS = re.compile(r'%s(?:\s*,\s*%s)+')
+_FILAS_REPETIDAS = re.compile(r'(\([^()]*\))(?:\s*,\s*\([^()]*\))+')
+
+
+def forma_consulta(sql):
+    """Normaliza el SQL para agrupar consultas de la misma forma"""
+    sql = _PARAMETROS_REPETIDOS.sub('%s...', sql)
+    return _FILAS_REPETIDAS.sub(r'\1...', sql)
+
+
+class RegistroConsultas:
+    """
+    Envoltorio para ``connection.execute_wrapper`` que cuenta las
+    consultas, mide su tiempo y agrupa las repetidas.
+    """
+    
+    def __init__(self):
+        self.total = 0
+        self.tiempo = 0.0
+        self.formas = Counter()
+    
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += time.perf_counter() - inicio
+            self.total += 1
+            self.formas[forma_consulta(sql)] += 1
+    
+    @property
+    def tiempo_ms(self):
+        return self.tiempo * 1000
+    
+    def mas_repetida(self):
+        """(sql, repeticiones) de la consulta que más se repitió"""
+        if not self.formas:
+            return '', 0
+        return self.formas.most_common(1)[0]
+
+
+class InstrumentacionSQLMiddleware:
+    """
+    Mide las consultas SQL de cada petición (opcional, SQL_INSTRUMENTACION=True).
+    
+    - Agrega el encabezado ``Server-Timing`` con el tiempo de BD y de la app
+    - Registra en el log las peticiones que superan los umbrales
+      (SQL_UMBRAL_CONSULTAS, SQL_UMBRAL_TIEMPO_MS, SQL_UMBRAL_REPETIDAS)
+    - Acumula esas peticiones en EstadisticaEndpoint para el admin
+    
+    Solo para WSGI: es síncrono y mide hasta que la vista devuelve la
+    respuesta, así que no cuenta las consultas de los cuerpos en streaming
+    (exportaciones CSV). Bajo ASGI Django además pasaría toda la cadena a un
+    hilo y las vistas async perderían el streaming; start.sh no lo activa con
+    SERVIDOR=asgi.
+    """
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTACION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.umbral_consultas = getattr(settings, 'SQL_UMBRAL_CONSULTAS', 50)
+        self.umbral_tiempo_ms = getattr(settings, 'SQL_UMBRAL_TIEMPO_MS', 500)
+        self.umbral_repetidas = getattr(settings, 'SQL_UMBRAL_REPETIDAS', 10)
+    
+    def __call__(self, request):
+        registro = RegistroConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as stack:
+            for conexion in connections.all():
+                stack.enter_context(conexion.execute_wrapper(registro))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        
+        response['Server-Timing'] = (
+            f'db;dur={registro.tiempo_ms:.1f};desc="{registro.total} consultas", '
+            f'app;dur={max(total_ms - registro.tiempo_ms, 0):.1f}'
+        )
+        
+        sql_repetida, repeticiones = registro.mas_repetida()
+        if (registro.total >= self.umbral_consultas
+                or registro.tiempo_ms >= self.umbral_tiempo_ms
+                or repeticiones >= self.umbral_repetidas):
+            endpoint = self._endpoint(request)
+            logger.warning(
+                "SQL [%s] %s %s: %d consultas, %.1f ms en BD, consulta repetida %d veces: %s",
+                request_context.request_id_actual(), request.method, endpoint, registro.total, registro.tiempo_ms,
+                repeticiones, sql_repetida[:300],
+            )
+            self._acumular(endpoint, request.method, registro, sql_repetida, repeticiones)
+        
+        return response
+    
+    def _endpoint(self, request):
+        """Patrón de la URL (agrupa /facturas/1/ y /facturas/2/)"""
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            return (match.route or match.view_name or request.path)[:255]
+        return request.path[:255]
+    
+    def _acumular(self, endpoint, metodo, registro, sql_repetida, repeticiones):
+        """Suma la petición a las estadísticas del endpoint (fuera del registro)"""
+        from core.models import EstadisticaEndpoint
+        
+        try:
+            actualizados = EstadisticaEndpoint.objects.filter(endpoint=endpoint, metodo=metodo).update(
+                solicitudes=F('solicitudes') + 1,
+                consultas_total=F('consultas_total') + registro.total,
+                consultas_max=Greatest('consultas_max', registro.total),
+                tiempo_db_total_ms=F('tiempo_db_total_ms') + registro.tiempo_ms,
+                tiempo_db_max_ms=Greatest('tiempo_db_max_ms', registro.tiempo_ms),
+                duplicadas_max=Greatest('duplicadas_max', repeticiones),
+            )
+            if not actualizados:
+                EstadisticaEndpoint.objects.get_or_create(
+                    endpoint=endpoint,
+                    metodo=metodo,
+                    defaults={
+                        'solicitudes': 1,
+                        'consultas_total': registro.total,
+                        'consultas_max': registro.total,
+                        'tiempo_db_total_ms': registro.tiempo_ms,
+                        'tiempo_db_max_ms': registro.tiempo_ms,
+                        'duplicadas_max': repeticiones,
+                        'consulta_repetida': sql_repetida,
+                    },
+                )
+            elif repeticiones >= self.umbral_repetidas:
+                EstadisticaEndpoint.objects.filter(
+                    endpoint=endpoint, metodo=metodo, duplicadas_max=repeticiones
+                ).update(consulta_repetida=sql_repetida)
+        except Exception as e:
+            # Las estadísticas nunca deben romper la respuesta
+            logger.error(f"No se pudo guardar la estadística SQL de {endpoint}: {e}")
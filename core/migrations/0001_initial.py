@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticaEndpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(help_text='Ruta de la URL (patrón) o nombre de la vista', max_length=255, verbose_name='Endpoint')),
+                ('metodo', models.CharField(max_length=10, verbose_name='Método HTTP')),
+                ('solicitudes', models.PositiveIntegerField(default=0, verbose_name='Solicitudes Lentas')),
+                ('consultas_total', models.PositiveBigIntegerField(default=0, verbose_name='Consultas (Total)')),
+                ('consultas_max', models.PositiveIntegerField(default=0, verbose_name='Consultas (Máx.)')),
+                ('tiempo_db_total_ms', models.FloatField(default=0, verbose_name='Tiempo BD Total (ms)')),
+                ('tiempo_db_max_ms', models.FloatField(default=0, verbose_name='Tiempo BD Máx. (ms)')),
+                ('duplicadas_max', models.PositiveIntegerField(default=0, help_text='Veces que se repitió la misma consulta en una petición (posible N+1)', verbose_name='Repeticiones Máx.')),
+                ('consulta_repetida', models.TextField(blank=True, verbose_name='Consulta Más Repetida')),
+                ('ultima_vez', models.DateTimeField(auto_now=True, verbose_name='Última Vez')),
+            ],
+            options={
+                'verbose_name': 'Estadística SQL por Endpoint',
+                'verbose_name_plural': 'Estadísticas SQL por Endpoint',
+                'ordering': ['-tiempo_db_max_ms'],
+                'unique_together': {('endpoint', 'metodo')},
+            },
+        ),
+    ]
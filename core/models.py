@@ -0,0 +1,63 @@
+"""
+Modelos de soporte del proyecto (no pertenecen a ningún módulo contable)
+"""
+from django.db import models
+
+
+class EstadisticaEndpoint(models.Model):
+    """
+    Acumulado de las peticiones que superaron los umbrales de SQL, por
+    endpoint. Lo alimenta InstrumentacionSQLMiddleware.
+    """
+    endpoint = models.CharField(
+        max_length=255,
+        verbose_name="Endpoint",
+        help_text="Ruta de la URL (patrón) o nombre de la vista"
+    )
+    
+    metodo = models.CharField(
+        max_length=10,
+        verbose_name="Método HTTP"
+    )
+    
+    solicitudes = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Solicitudes Lentas"
+    )
+    
+    consultas_total = models.PositiveBigIntegerField(default=0, verbose_name="Consultas (Total)")
+    consultas_max = models.PositiveIntegerField(default=0, verbose_name="Consultas (Máx.)")
+    tiempo_db_total_ms = models.FloatField(default=0, verbose_name="Tiempo BD Total (ms)")
+    tiempo_db_max_ms = models.FloatField(default=0, verbose_name="Tiempo BD Máx. (ms)")
+    duplicadas_max = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Repeticiones Máx.",
+        help_text="Veces que se repitió la misma consulta en una petición (posible N+1)"
+    )
+    
+    consulta_repetida = models.TextField(
+        blank=True,
+        verbose_name="Consulta Más Repetida"
+    )
+    
+    ultima_vez = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Última Vez"
+    )
+    
+    class Meta:
+        verbose_name = "Estadística SQL por Endpoint"
+        verbose_name_plural = "Estadísticas SQL por Endpoint"
+        unique_together = ['endpoint', 'metodo']
+        ordering = ['-tiempo_db_max_ms']
+    
+    def __str__(self):
+        return f"{self.metodo} {self.endpoint}"
+    
+    @property
+    def consultas_promedio(self):
+        return round(self.consultas_total / self.solicitudes, 1) if self.solicitudes else 0
+    
+    @property
+    def tiempo_db_promedio_ms(self):
+        return round(self.tiempo_db_total_ms / self.solicitudes, 1) if self.solicitudes else 0
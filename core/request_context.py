@@ -0,0 +1,108 @@
+"""
+Contexto de la petición en curso: usuario, empresa, rol e ID de petición.
+
+Antes el request se guardaba en ``threading.current_thread()`` para que
+las señales lo leyeran. Con vistas async (ASGI) varias peticiones
+comparten hilo, y con hilos reutilizados el atributo podía sobrevivir a la
+petición. Un ContextVar se copia por tarea de asyncio y se restablece al
+terminar, así que cada petición ve solo su propio contexto:
+
+    from core import request_context
+
+    usuario = request_context.usuario_actual()
+    empresa = request_context.empresa_actual()
+
+Lo establece ``core.middleware.ContextoPeticionMiddleware``; fuera de una
+petición (comandos, pruebas) se usa ``contexto_peticion(...)``.
+"""
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# Encabezado con el que el cliente o el proxy pueden propagar su ID
+REQUEST_ID_HEADER = 'HTTP_X_REQUEST_ID'
+
+# Longitud máxima aceptada para un ID recibido en el encabezado
+MAX_LONGITUD_REQUEST_ID = 64
+
+
+def nuevo_request_id():
+    return uuid.uuid4().hex
+
+
+@dataclass
+class ContextoPeticion:
+    """Datos de la petición que necesitan las capas sin acceso al request"""
+    request_id: str = field(default_factory=nuevo_request_id)
+    usuario: object = None
+    empresa: object = None
+    rol: str = None
+    request: object = None
+
+
+_contexto = ContextVar('contexto_peticion', default=None)
+
+
+def contexto_actual():
+    """ContextoPeticion en curso (None fuera de una petición)"""
+    return _contexto.get()
+
+
+def _valor(nombre):
+    contexto = _contexto.get()
+    return getattr(contexto, nombre) if contexto is not None else None
+
+
+def usuario_actual():
+    return _valor('usuario')
+
+
+def empresa_actual():
+    return _valor('empresa')
+
+
+def rol_actual():
+    return _valor('rol')
+
+
+def request_id_actual():
+    return _valor('request_id')
+
+
+def request_actual():
+    return _valor('request')
+
+
+def actualizar(**campos):
+    """
+    Completa el contexto en curso a medida que se resuelven sus datos
+    (usuario tras la autenticación, empresa y rol tras EmpresaActivaMiddleware).
+    Fuera de una petición no hace nada.
+    """
+    contexto = _contexto.get()
+    if contexto is None:
+        return
+    for nombre, valor in campos.items():
+        if not hasattr(contexto, nombre):
+            raise AttributeError(f'ContextoPeticion no tiene el campo {nombre}')
+        setattr(contexto, nombre, valor)
+
+
+@contextmanager
+def contexto_peticion(**campos):
+    """Establece un contexto nuevo durante el bloque y restaura el anterior"""
+    contexto = ContextoPeticion(**campos)
+    token = _contexto.set(contexto)
+    try:
+        yield contexto
+    finally:
+        _contexto.reset(token)
+
+
+def request_id_de(request):
+    """ID recibido en X-Request-ID (si es razonable) o uno nuevo"""
+    recibido = request.META.get(REQUEST_ID_HEADER, '').strip()
+    if recibido and len(recibido) <= MAX_LONGITUD_REQUEST_ID and recibido.isprintable():
+        return recibido
+    return nuevo_request_id()
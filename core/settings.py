@@ -88,6 +88,8 @@ MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # CORS debe ir temprano
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "core.middleware.ContextoPeticionMiddleware",  # Usuario/empresa/ID de petición (contextvars)
+    "core.middleware.InstrumentacionSQLMiddleware",  # Solo activo con SQL_INSTRUMENTACION=True
     "core.middleware.DevCSRFMiddleware",  # Middleware personalizado para desarrollo
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -96,7 +98,6 @@ MIDDLEWARE = [
     # Middleware personalizado para sistema multi-empresa
     "empresas.middleware.EmpresaActivaMiddleware",
     # Middleware para historial de cambios
-    "empresas.middleware_historial.ThreadLocalMiddleware",
     "empresas.middleware_historial.HistorialCambiosMiddleware",
 ]
 ROOT_URLCONF = "core.urls"
@@ -118,6 +119,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "core.wsgi.application"
+# Modo ASGI (uvicorn): vistas async y exportaciones en streaming, ver start.sh
+ASGI_APPLICATION = "core.asgi.application"
 
 
 # Database
@@ -284,6 +287,21 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 20,
 }
 
+# Instrumentación SQL por petición (Server-Timing, log y admin de endpoints lentos)
+SQL_INSTRUMENTACION = os.getenv("SQL_INSTRUMENTACION", "False").lower() == "true"
+SQL_UMBRAL_CONSULTAS = int(os.getenv("SQL_UMBRAL_CONSULTAS", "50"))
+SQL_UMBRAL_TIEMPO_MS = int(os.getenv("SQL_UMBRAL_TIEMPO_MS", "500"))
+SQL_UMBRAL_REPETIDAS = int(os.getenv("SQL_UMBRAL_REPETIDAS", "10"))
+
+# Tesorería: usar el saldo mantenido por cuenta en lugar de recalcularlo
+# en cada consulta (verificar con `manage.py verificar_saldos_bancarios`)
+TESORERIA_USAR_SALDOS_MANTENIDOS = os.getenv("TESORERIA_USAR_SALDOS_MANTENIDOS", "False").lower() == "true"
+
+# Contabilidad: registrar los saldos de las cuentas como movimientos que se
+# compactan después (`manage.py compactar_saldos`) en lugar de actualizar la
+# fila de la cuenta en cada contabilización. Antes de desactivarlo, compactar.
+CONTABILIDAD_SALDOS_DIFERIDOS = os.getenv("CONTABILIDAD_SALDOS_DIFERIDOS", "False").lower() == "true"
+
 # Simple JWT Configuration
 # Access token: 15 minutos (seguridad)
 # Refresh token: 1 día (usabilidad)
@@ -0,0 +1,45 @@
+"""
+Respuestas CSV en streaming para vistas async (ASGI).
+
+Las exportaciones grandes se escriben fila por fila a medida que llegan de
+la base con ``queryset.aiterator()``: la memoria no depende del tamaño del
+archivo y, bajo uvicorn, un cliente que descarga lento solo retiene una
+corrutina en espera, no uno de los hilos del servidor.
+
+    async def exportar(request):
+        filas = queryset.values_list(...).aiterator(chunk_size=TAMANO_LOTE_STREAMING)
+        return respuesta_csv('archivo.csv', ['Col 1', 'Col 2'], filas)
+"""
+import csv
+
+from django.http import StreamingHttpResponse
+
+# Filas que se traen de la base por viaje
+TAMANO_LOTE_STREAMING = 2000
+
+# Marca UTF-8 para que Excel abra bien tildes y eñes
+BOM_UTF8 = '\ufeff'
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+async def _lineas_csv(encabezados, filas):
+    escritor = csv.writer(_Eco())
+    yield BOM_UTF8 + escritor.writerow(encabezados)
+    async for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def respuesta_csv(nombre_archivo, encabezados, filas):
+    """
+    StreamingHttpResponse que escribe ``encabezados`` y luego cada fila del
+    iterable asíncrono ``filas``.
+    """
+    response = StreamingHttpResponse(_lineas_csv(encabezados, filas), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
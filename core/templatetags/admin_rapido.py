@@ -0,0 +1,22 @@
+"""
+Template tags para los listados del admin sobre tablas grandes
+(ver core.admin_mixins.ListadoRapidoMixin)
+"""
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+
+from core.admin_mixins import ChangeListFechasPorRangos
+
+register = template.Library()
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def date_hierarchy_rapido(cl):
+    """
+    Igual que {% date_hierarchy cl %}; si el ModelAdmin lo activa
+    (``date_hierarchy_por_rangos``) los años, meses y días con datos se
+    buscan por rangos de fecha en vez de agrupar toda la tabla.
+    """
+    if getattr(cl.model_admin, 'date_hierarchy_por_rangos', False):
+        cl = ChangeListFechasPorRangos(cl)
+    return date_hierarchy(cl)
@@ -1,14 +1,17 @@
 from django.contrib import admin
+from django.db import connections
+from django.db.models import OuterRef, Subquery
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from core.admin_mixins import UMBRAL_CONTEO_ESTIMADO, ListadoRapidoMixin, conteo_estimado
 from core.admin_site import admin_site
 from .models import Empresa, PerfilEmpresa, EmpresaActiva, HistorialCambios
 
 @admin.register(Empresa, site=admin_site)
 class EmpresaAdmin(admin.ModelAdmin):
     list_display = ('razon_social', 'nit', 'email', 'telefono', 'activa', 'fecha_creacion')
-    list_filter = ('activa', 'fecha_creacion', 'ciudad')
+    list_filter = ('activa', 'modo_contabilizacion', 'fecha_creacion', 'ciudad')
     search_fields = ('razon_social', 'nit', 'email')
     readonly_fields = ('fecha_creacion', 'fecha_actualizacion')
     
@@ -23,7 +26,7 @@ class EmpresaAdmin(admin.ModelAdmin):
             'fields': ('propietario',)
         }),
         ('Estado', {
-            'fields': ('activa',)
+            'fields': ('activa', 'modo_contabilizacion')
         }),
         ('Fechas', {
             'fields': ('fecha_creacion', 'fecha_actualizacion'),
@@ -32,7 +35,7 @@ class EmpresaAdmin(admin.ModelAdmin):
     )
 
 @admin.register(PerfilEmpresa, site=admin_site)
-class PerfilEmpresaAdmin(admin.ModelAdmin):
+class PerfilEmpresaAdmin(ListadoRapidoMixin, admin.ModelAdmin):
     list_display = ('usuario', 'empresa', 'rol', 'activo', 'fecha_asignacion')
     list_filter = ('rol', 'activo', 'fecha_asignacion')
     search_fields = ('usuario__username', 'usuario__email', 'empresa__razon_social')
@@ -60,7 +63,7 @@ class EmpresaActivaAdmin(admin.ModelAdmin):
 
 
 @admin.register(HistorialCambios, site=admin_site)
-class HistorialCambiosAdmin(admin.ModelAdmin):
+class HistorialCambiosAdmin(ListadoRapidoMixin, admin.ModelAdmin):
     list_display = (
         'icono_accion_display', 
         'usuario_display', 
@@ -75,8 +78,9 @@ class HistorialCambiosAdmin(admin.ModelAdmin):
         'tipo_accion', 
         'exitosa', 
         'fecha_hora',
-        ('empresa', admin.RelatedOnlyFieldListFilter),
-        ('usuario', admin.RelatedOnlyFieldListFilter)
+        # RelatedOnlyFieldListFilter haría un DISTINCT sobre todo el historial
+        'empresa',
+        'usuario'
     )
     search_fields = (
         'usuario__username', 
@@ -163,11 +167,17 @@ class HistorialCambiosAdmin(admin.ModelAdmin):
             '</div>',
             inicial.upper(),
             nombre,
-            obj.rol_usuario
+            self._rol_display(obj)
         )
     usuario_display.short_description = '👤 Usuario'
     usuario_display.admin_order_field = 'usuario__username'
     
+    def _rol_display(self, obj):
+        """Rol anotado en get_queryset (mismo texto que obj.rol_usuario)"""
+        if not obj.empresa_id:
+            return "Sin empresa"
+        return dict(PerfilEmpresa.ROL_CHOICES).get(obj.rol_perfil, "Sin rol")
+    
     def empresa_display(self, obj):
         """Muestra información de la empresa"""
         if obj.empresa:
@@ -281,23 +291,32 @@ class HistorialCambiosAdmin(admin.ModelAdmin):
     datos_nuevos_display.short_description = '📋 Datos Nuevos'
     
     def get_queryset(self, request):
-        """Optimiza las consultas con select_related"""
+        """Optimiza las consultas con select_related y el rol en la misma consulta"""
         queryset = super().get_queryset(request)
-        return queryset.select_related('usuario', 'empresa')
+        rol = PerfilEmpresa.objects.filter(
+            usuario=OuterRef('usuario'), empresa=OuterRef('empresa'), activo=True
+        ).values('rol')[:1]
+        return queryset.select_related('usuario', 'empresa').annotate(rol_perfil=Subquery(rol))
     
     def changelist_view(self, request, extra_context=None):
         """Personaliza la vista de lista con información adicional"""
         extra_context = extra_context or {}
         
-        # Estadísticas para el contexto
-        total_registros = HistorialCambios.objects.count()
-        registros_admins = HistorialCambios.objects.filter(usuario__is_superuser=True).count()
-        registros_usuarios = total_registros - registros_admins
+        # Estadísticas para el contexto (estimadas en tablas grandes)
+        historial = HistorialCambios.objects.all()
+        total_registros = conteo_estimado(historial)
+        registros_admins = conteo_estimado(historial.filter(usuario__is_superuser=True))
+        # Dos estimaciones independientes del planificador: la resta puede dar negativo
+        registros_usuarios = max(total_registros - registros_admins, 0)
+        conteos_aproximados = (
+            connections[historial.db].vendor == 'postgresql' and total_registros >= UMBRAL_CONTEO_ESTIMADO
+        )
         
         extra_context.update({
             'total_registros': total_registros,
             'registros_admins': registros_admins,
             'registros_usuarios': registros_usuarios,
+            'conteos_aproximados': conteos_aproximados,
             'admin_holding_url': '/empresas/admin/historial/',
         })
         
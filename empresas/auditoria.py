@@ -0,0 +1,114 @@
+"""
+Auditoría en bloque de los cambios de modelos.
+
+Las señales post_save/post_delete de catálogos, empresas y facturación
+escriben una fila de HistorialCambios por objeto. En cargas masivas eso
+multiplica las consultas, así que dentro de ``auditoria_en_bloque()`` los
+eventos se acumulan y se escriben con un solo bulk_create al salir:
+
+    with auditoria_en_bloque():
+        for fila in filas:
+            Tercero.objects.create(...)
+
+    @auditoria_en_bloque(modo='resumen')
+    def importar(...):
+        ...
+
+Modos:
+- 'detallado': una fila por evento, como sin el bloque
+- 'resumen': una fila por usuario, empresa, acción y modelo con los IDs
+- 'suprimir': no se registra nada
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .models import HistorialCambios
+
+# Filas de historial por INSERT
+TAMANO_LOTE_AUDITORIA = 1000
+
+MODOS_AUDITORIA = ('detallado', 'resumen', 'suprimir')
+
+_lote_actual = ContextVar('lote_auditoria', default=None)
+
+
+class LoteAuditoria:
+    """Eventos de auditoría pendientes de escribir"""
+
+    def __init__(self, modo='detallado'):
+        if modo not in MODOS_AUDITORIA:
+            raise ValueError(f'Modo de auditoría inválido: {modo}')
+        self.modo = modo
+        self.registros = []
+        self._empresas = {}
+
+    @property
+    def suprimido(self):
+        return self.modo == 'suprimir'
+
+    def empresa_de(self, usuario, buscar):
+        """Empresa activa del usuario, consultada una sola vez por lote"""
+        if usuario.pk not in self._empresas:
+            self._empresas[usuario.pk] = buscar()
+        return self._empresas[usuario.pk]
+
+    def agregar(self, registro):
+        """Acumula un HistorialCambios sin guardar"""
+        if not self.suprimido:
+            self.registros.append(registro)
+
+    def _resumir(self):
+        """Una fila por (usuario, empresa, acción, modelo) con los IDs afectados"""
+        grupos = defaultdict(list)
+        for registro in self.registros:
+            grupos[(registro.usuario_id, registro.empresa_id, registro.tipo_accion, registro.modelo_afectado)].append(
+                registro
+            )
+
+        resumen = []
+        for registros in grupos.values():
+            primero = registros[0]
+            if len(registros) > 1:
+                primero.descripcion = f'{len(registros)} registros de {primero.modelo_afectado}: {primero.tipo_accion}'
+                primero.objeto_id = None
+                primero.datos_nuevos = {'objetos': [registro.objeto_id for registro in registros]}
+            resumen.append(primero)
+        return resumen
+
+    def escribir(self):
+        """Guarda los eventos acumulados; retorna cuántas filas se insertaron"""
+        if self.suprimido or not self.registros:
+            return 0
+        filas = self._resumir() if self.modo == 'resumen' else self.registros
+        HistorialCambios.objects.bulk_create(filas, batch_size=TAMANO_LOTE_AUDITORIA)
+        self.registros = []
+        return len(filas)
+
+
+def lote_auditoria_actual():
+    """Lote activo en el contexto actual (None fuera de un bloque)"""
+    return _lote_actual.get()
+
+
+@contextmanager
+def auditoria_en_bloque(modo='detallado'):
+    """
+    Acumula los eventos de auditoría del bloque y los escribe al salir.
+
+    Si el bloque termina con una excepción los eventos se descartan (los
+    cambios que describían normalmente se revierten con la transacción).
+    Un bloque anidado reutiliza el lote exterior.
+    """
+    lote = _lote_actual.get()
+    if lote is not None:
+        yield lote
+        return
+
+    lote = LoteAuditoria(modo)
+    token = _lote_actual.set(lote)
+    try:
+        yield lote
+    finally:
+        _lote_actual.reset(token)
+    lote.escribir()
@@ -133,7 +133,7 @@ class Command(BaseCommand):
         
         from django.conf import settings
         middleware_historial = [
-            'empresas.middleware_historial.ThreadLocalMiddleware',
+            'core.middleware.ContextoPeticionMiddleware',
             'empresas.middleware_historial.HistorialCambiosMiddleware'
         ]
         
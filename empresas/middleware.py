@@ -5,6 +5,7 @@ Middleware para gestionar la empresa activa en el sistema multi-tenant.
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.contrib import messages
+from core import request_context
 from .models import Empresa, PerfilEmpresa, EmpresaActiva
 
 # Constante para evitar duplicación del literal 'empresas:cambiar_empresa'
@@ -54,6 +55,8 @@ class EmpresaActivaMiddleware:
         if not request.user.is_authenticated:
             return None
         
+        request_context.actualizar(usuario=request.user)
+        
         # Verificar si la URL está exenta
         if self.is_exempt_url(request.path):
             return None
@@ -86,12 +89,14 @@ class EmpresaActivaMiddleware:
         
         # Establecer empresa activa en el request
         request.empresa_activa = empresa_activa
+        request_context.actualizar(empresa=empresa_activa)
         
         # Obtener perfil del usuario en la empresa activa
         try:
             perfil_empresa = perfiles_empresa.get(empresa=empresa_activa)
             request.perfil_empresa = perfil_empresa
             request.rol_empresa = perfil_empresa.rol
+            request_context.actualizar(rol=perfil_empresa.rol)
             
             # Redirigir al dashboard específico del rol si está en la raíz
             if request.path == '/' or request.path == '/accounts/dashboard/':
@@ -208,7 +213,7 @@ class EmpresaFilterMixin:
         
         # Solo filtrar si el modelo tiene campo empresa
         if hasattr(queryset.model, 'empresa'):
-            empresa_activa = getattr(self.request, 'empresa_activa', None)
+            empresa_activa = self.get_empresa_activa()
             if empresa_activa:
                 queryset = queryset.filter(empresa=empresa_activa)
         
@@ -221,11 +226,18 @@ class EmpresaFilterMixin:
         """
         # Verificar que form tenga el atributo instance (FormMixin)
         if hasattr(form, 'instance') and hasattr(form.instance, 'empresa'):
-            empresa_activa = getattr(self.request, 'empresa_activa', None)
+            empresa_activa = self.get_empresa_activa()
             if empresa_activa:
                 form.instance.empresa = empresa_activa
         
         return super().form_valid(form)
+    
+    def get_empresa_activa(self):
+        """
+        Empresa del contexto de la petición; si la vista se invoca sin el
+        middleware (RequestFactory, comandos), la asignada al request.
+        """
+        return request_context.empresa_actual() or getattr(self.request, 'empresa_activa', None)
 
 
 def empresa_requerida(view_func):
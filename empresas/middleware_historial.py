@@ -7,6 +7,8 @@ import json
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.auth.models import User
 from django.http import JsonResponse
+from core import request_context
+from .auditoria import lote_auditoria_actual
 from .models import HistorialCambios, EmpresaActiva
 
 # Constantes para evitar duplicación de literales de descripciones
@@ -62,7 +64,7 @@ class HistorialCambiosMiddleware(MiddlewareMixin):
                 mensaje_error += f" - {response.reason_phrase}"
         
         # Obtener empresa activa del usuario
-        empresa = self._get_empresa_activa(request.user)
+        empresa = request_context.empresa_actual() or self._get_empresa_activa(request.user)
         
         # Determinar el tipo de acción y descripción
         tipo_accion, descripcion = self._determinar_accion(request, response)
@@ -270,46 +272,15 @@ class HistorialCambiosSignalHandler:
         """
         Registra cambios en modelos cuando se guardan
         """
-        # Obtener el usuario actual del contexto (si está disponible)
-        # Esto requiere que el middleware de threading esté configurado
-        from threading import current_thread
-        
-        request = getattr(current_thread(), 'request', None)
-        if not request or not hasattr(request, 'user') or not request.user.is_authenticated:
-            return
-        
-        # No registrar cambios de administradores del holding
-        if request.user.is_superuser:
-            return
-        
-        # Determinar el tipo de acción
-        modelo_nombre = sender.__name__.lower()
-        
         if created:
-            tipo_accion = f'{modelo_nombre}_crear'
+            tipo_accion = f'{sender.__name__.lower()}_crear'
             descripcion = f'{sender._meta.verbose_name} creado: {str(instance)}'
         else:
-            tipo_accion = f'{modelo_nombre}_editar'
+            tipo_accion = f'{sender.__name__.lower()}_editar'
             descripcion = f'{sender._meta.verbose_name} editado: {str(instance)}'
         
-        # Obtener empresa activa
         try:
-            empresa_activa = EmpresaActiva.objects.get(usuario=request.user)
-            empresa = empresa_activa.empresa
-        except EmpresaActiva.DoesNotExist:
-            empresa = None
-        
-        # Registrar la acción
-        try:
-            HistorialCambios.registrar_accion(
-                usuario=request.user,
-                tipo_accion=tipo_accion,
-                descripcion=descripcion,
-                empresa=empresa,
-                modelo_afectado=sender.__name__,
-                objeto_id=instance.pk,
-                request=request
-            )
+            HistorialCambiosSignalHandler._registrar(sender, instance, tipo_accion, descripcion)
         except Exception as e:
             print(f"Error registrando cambio de modelo: {e}")
     
@@ -318,56 +289,58 @@ class HistorialCambiosSignalHandler:
         """
         Registra eliminaciones de modelos
         """
-        from threading import current_thread
+        tipo_accion = f'{sender.__name__.lower()}_eliminar'
+        descripcion = f'{sender._meta.verbose_name} eliminado: {str(instance)}'
+        
+        try:
+            HistorialCambiosSignalHandler._registrar(sender, instance, tipo_accion, descripcion)
+        except Exception as e:
+            print(f"Error registrando eliminación de modelo: {e}")
+    
+    @staticmethod
+    def _registrar(sender, instance, tipo_accion, descripcion):
+        """
+        Crea el registro de historial, o lo acumula si hay un bloque de
+        auditoría activo (ver empresas.auditoria)
+        """
+        lote = lote_auditoria_actual()
+        if lote is not None and lote.suprimido:
+            return
         
-        request = getattr(current_thread(), 'request', None)
-        if not request or not hasattr(request, 'user') or not request.user.is_authenticated:
+        # Usuario y empresa de la petición en curso (core.request_context)
+        usuario = request_context.usuario_actual()
+        if usuario is None or not usuario.is_authenticated:
             return
         
         # No registrar cambios de administradores del holding
-        if request.user.is_superuser:
+        if usuario.is_superuser:
             return
         
-        modelo_nombre = sender.__name__.lower()
-        tipo_accion = f'{modelo_nombre}_eliminar'
-        descripcion = f'{sender._meta.verbose_name} eliminado: {str(instance)}'
-        
-        # Obtener empresa activa
-        try:
-            empresa_activa = EmpresaActiva.objects.get(usuario=request.user)
-            empresa = empresa_activa.empresa
-        except EmpresaActiva.DoesNotExist:
-            empresa = None
+        # Empresa activa: la que ya resolvió EmpresaActivaMiddleware o, si
+        # no pasó por él, la guardada para el usuario
+        empresa = request_context.empresa_actual()
+        if empresa is None:
+            if lote is not None:
+                empresa = lote.empresa_de(usuario, lambda: _empresa_activa_guardada(usuario))
+            else:
+                empresa = _empresa_activa_guardada(usuario)
         
-        # Registrar la acción
-        try:
-            HistorialCambios.registrar_accion(
-                usuario=request.user,
-                tipo_accion=tipo_accion,
-                descripcion=descripcion,
-                empresa=empresa,
-                modelo_afectado=sender.__name__,
-                objeto_id=instance.pk,
-                request=request
-            )
-        except Exception as e:
-            print(f"Error registrando eliminación de modelo: {e}")
+        registro = HistorialCambios.nuevo_registro(
+            usuario=usuario,
+            tipo_accion=tipo_accion,
+            descripcion=descripcion,
+            empresa=empresa,
+            modelo_afectado=sender.__name__,
+            objeto_id=instance.pk,
+            request=request_context.request_actual()
+        )
+        if lote is not None:
+            lote.agregar(registro)
+        else:
+            registro.save()
 
 
-# Middleware para agregar el request al thread local
-class ThreadLocalMiddleware(MiddlewareMixin):
-    """
-    Middleware para hacer el request disponible en el thread local
-    para que las señales puedan acceder a él
-    """
-    
-    def process_request(self, request):
-        from threading import current_thread
-        current_thread().request = request
-        return None
-    
-    def process_response(self, request, response):
-        from threading import current_thread
-        if hasattr(current_thread(), 'request'):
-            delattr(current_thread(), 'request')
-        return response
+def _empresa_activa_guardada(usuario):
+    """Empresa de la tabla EmpresaActiva del usuario (None si no tiene)"""
+    empresa_activa = EmpresaActiva.objects.filter(usuario=usuario).select_related('empresa').first()
+    return empresa_activa.empresa if empresa_activa else None
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0005_remove_null_from_charfields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empresa',
+            name='modo_contabilizacion',
+            field=models.CharField(choices=[('documento', 'Un asiento por documento'), ('resumen_diario', 'Resumen diario por método de pago')], default='documento', help_text='Con resumen diario, ventas y pagos se contabilizan en un asiento consolidado por día', max_length=15, verbose_name='Modo de Contabilización'),
+        ),
+    ]
@@ -114,6 +114,17 @@ class Empresa(models.Model):
         verbose_name="Período Contable",
     )
 
+    modo_contabilizacion = models.CharField(
+        max_length=15,
+        default="documento",
+        choices=[
+            ("documento", "Un asiento por documento"),
+            ("resumen_diario", "Resumen diario por método de pago"),
+        ],
+        verbose_name="Modo de Contabilización",
+        help_text="Con resumen diario, ventas y pagos se contabilizan en un asiento consolidado por día",
+    )
+
     # Configuración del sistema
     activa = models.BooleanField(default=True, verbose_name="Empresa Activa")
 
@@ -141,6 +152,11 @@ class Empresa(models.Model):
     def __str__(self):
         return f"{self.razon_social} ({self.nit})"
 
+    @property
+    def contabiliza_resumen_diario(self):
+        """True si los documentos se acumulan para el asiento resumen del día"""
+        return self.modo_contabilizacion == "resumen_diario"
+
     @property
     def nit_formateado(self):
         """Retorna el NIT con formato de puntos"""
@@ -526,11 +542,47 @@ class HistorialCambios(models.Model):
         Método de conveniencia para registrar una acción.
         AHORA SÍ REGISTRA ACCIONES DE ADMINISTRADORES DEL HOLDING.
         """
+        registro = cls.nuevo_registro(
+            usuario=usuario,
+            tipo_accion=tipo_accion,
+            descripcion=descripcion,
+            empresa=empresa,
+            modelo_afectado=modelo_afectado,
+            objeto_id=objeto_id,
+            datos_anteriores=datos_anteriores,
+            datos_nuevos=datos_nuevos,
+            request=request,
+            exitosa=exitosa,
+            mensaje_error=mensaje_error,
+        )
+        registro.save()
+        return registro
+
+    @classmethod
+    def nuevo_registro(
+        cls,
+        usuario,
+        tipo_accion,
+        descripcion,
+        empresa=None,
+        modelo_afectado=None,
+        objeto_id=None,
+        datos_anteriores=None,
+        datos_nuevos=None,
+        request=None,
+        exitosa=True,
+        mensaje_error=None,
+    ):
+        """
+        Construye el registro sin guardarlo (para escribirlo en bloque con
+        `empresas.auditoria.auditoria_en_bloque`).
+        """
         # Obtener información del request si está disponible
+        # (los campos de texto no admiten NULL, se dejan vacíos)
         ip_address = None
-        user_agent = None
-        url_solicitada = None
-        metodo_http = None
+        user_agent = ""
+        url_solicitada = ""
+        metodo_http = ""
 
         if request:
             ip_address = cls._get_client_ip(request)
@@ -540,12 +592,12 @@ class HistorialCambios(models.Model):
             url_solicitada = request.build_absolute_uri()[:500]  # Limitar longitud
             metodo_http = request.method
 
-        return cls.objects.create(
+        return cls(
             usuario=usuario,
             empresa=empresa,
             tipo_accion=tipo_accion,
             descripcion=descripcion,
-            modelo_afectado=modelo_afectado,
+            modelo_afectado=modelo_afectado or "",
             objeto_id=objeto_id,
             datos_anteriores=datos_anteriores,
             datos_nuevos=datos_nuevos,
@@ -554,7 +606,7 @@ class HistorialCambios(models.Model):
             url_solicitada=url_solicitada,
             metodo_http=metodo_http,
             exitosa=exitosa,
-            mensaje_error=mensaje_error,
+            mensaje_error=mensaje_error or "",
         )
 
     @staticmethod
@@ -193,3 +193,133 @@ class EmpresaActivaModelTest(TestCase):
         # Debería haber solo una empresa activa por usuario
         self.assertEqual(EmpresaActiva.objects.filter(usuario=self.user).count(), 1)
         self.assertEqual(nueva_activa.empresa, otra_empresa)
+
+
+class AuditoriaEnBloqueTest(TestCase):
+    """Tests para el registro de historial en bloque"""
+    
+    def setUp(self):
+        from django.test import RequestFactory
+        from core import request_context
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password=TEST_USER_PASSWORD
+        )
+        
+        self.empresa = Empresa.objects.create(
+            nit='123456789-0',
+            razon_social='Test Company SAS',
+            direccion='Calle 123',
+            ciudad='Bogotá',
+            telefono='3001234567',
+            email='empresa@test.com',
+            propietario=self.user
+        )
+        
+        # Simular el contexto que dejan los middleware en una petición
+        contexto = request_context.contexto_peticion(
+            usuario=self.user,
+            empresa=self.empresa,
+            request=RequestFactory().post('/catalogos/terceros/crear/'),
+        )
+        contexto.__enter__()
+        self.addCleanup(contexto.__exit__, None, None, None)
+    
+    def _crear_terceros(self, prefijo, cantidad):
+        from catalogos.models import Tercero
+        
+        for i in range(cantidad):
+            Tercero.objects.create(
+                empresa=self.empresa,
+                tipo_tercero='cliente',
+                numero_documento=f'{prefijo}{i}',
+                razon_social=f'Cliente {i}',
+                direccion='Calle 1',
+                ciudad='Bogotá',
+                telefono='3000000000',
+                email=f'cliente{prefijo}{i}@test.com'
+            )
+    
+    def test_modos(self):
+        """Detallado escribe todo junto, resumen una fila y suprimir nada"""
+        from .auditoria import auditoria_en_bloque
+        from .models import HistorialCambios
+        
+        with auditoria_en_bloque():
+            self._crear_terceros('100', 3)
+            self.assertFalse(HistorialCambios.objects.exists())
+        self.assertEqual(HistorialCambios.objects.filter(tipo_accion='tercero_crear').count(), 3)
+        
+        HistorialCambios.objects.all().delete()
+        with auditoria_en_bloque(modo='resumen'):
+            self._crear_terceros('200', 3)
+        resumen = HistorialCambios.objects.get()
+        self.assertEqual(resumen.empresa, self.empresa)
+        self.assertEqual(len(resumen.datos_nuevos['objetos']), 3)
+        
+        HistorialCambios.objects.all().delete()
+        with auditoria_en_bloque(modo='suprimir'):
+            Empresa.objects.filter(pk=self.empresa.pk).first().save()
+        self.assertFalse(HistorialCambios.objects.exists())
+
+
+class ContextoPeticionTest(TestCase):
+    """Tests para el contexto de petición basado en contextvars"""
+    
+    def test_request_id_y_limpieza(self):
+        """Propaga X-Request-ID y no deja el contexto abierto tras la respuesta"""
+        from core import request_context
+        
+        response = self.client.get('/accounts/login/', HTTP_X_REQUEST_ID='peticion-123')
+        self.assertEqual(response['X-Request-ID'], 'peticion-123')
+        self.assertIsNone(request_context.contexto_actual())
+        
+        response = self.client.get('/accounts/login/')
+        self.assertEqual(len(response['X-Request-ID']), 32)
+    
+    def test_contextos_anidados(self):
+        """Cada bloque ve su propio contexto y restaura el anterior"""
+        from core import request_context
+        
+        with request_context.contexto_peticion(rol='admin'):
+            with request_context.contexto_peticion(rol='contador'):
+                request_context.actualizar(rol='operador')
+                self.assertEqual(request_context.rol_actual(), 'operador')
+            self.assertEqual(request_context.rol_actual(), 'admin')
+        request_context.actualizar(rol='admin')
+        self.assertIsNone(request_context.rol_actual())
+
+
+class HistorialCambiosAdminTest(TestCase):
+    """Tests para las estadísticas del listado de historial en el admin"""
+    
+    def test_conteos_estimados(self):
+        """La resta de dos estimaciones no queda negativa y se marca como aproximada"""
+        from unittest import mock
+        from django.urls import reverse
+        from . import admin as empresas_admin
+        
+        admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@test.com',
+            password=TEST_ADMIN_PASSWORD
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:empresas_historialcambios_changelist')
+        
+        # Estimaciones inconsistentes: más admins que el total
+        with mock.patch.object(empresas_admin, 'conteo_estimado', side_effect=[150000, 160000]):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['registros_usuarios'], 0)
+        self.assertFalse(response.context['conteos_aproximados'])
+        
+        postgres = {'default': mock.Mock(vendor='postgresql')}
+        with mock.patch.object(empresas_admin, 'conteo_estimado', side_effect=[150000, 40000]), \
+                mock.patch.object(empresas_admin, 'connections', postgres):
+            response = self.client.get(url)
+        self.assertEqual(response.context['registros_usuarios'], 110000)
+        self.assertTrue(response.context['conteos_aproximados'])
+        self.assertContains(response, '≈ 110000')
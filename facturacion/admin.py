@@ -1,14 +1,35 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from core.admin_site import admin_site
 from .models import Factura, FacturaDetalle
+from .pdf import generar_zip_facturas
 
-@admin.register(Factura)
+# Procesos para renderizar desde el admin: la descarga ocupa un worker web y
+# no debe acaparar la máquina (el comando exportar_facturas_pdf usa todos)
+WORKERS_PDF_ADMIN = 2
+
+@admin.register(Factura, site=admin_site)
 class FacturaAdmin(admin.ModelAdmin):
     list_display = ('numero_factura', 'cliente', 'fecha_factura', 'total', 'estado', 'empresa')
     list_filter = ('estado', 'fecha_factura', 'empresa')
     search_fields = ('numero_factura', 'cliente__razon_social')
     readonly_fields = ('fecha_creacion',)
+    actions = ['descargar_pdfs_zip']
+
+    @admin.action(description='Descargar PDFs seleccionados (ZIP)')
+    def descargar_pdfs_zip(self, request, queryset):
+        """Renderiza las facturas seleccionadas en paralelo y las entrega en un ZIP"""
+        factura_ids = list(queryset.order_by('numero_factura').values_list('pk', flat=True))
+        response = StreamingHttpResponse(
+            generar_zip_facturas(factura_ids, workers=WORKERS_PDF_ADMIN),
+            content_type='application/zip',
+        )
+        nombre = f"facturas_{timezone.now():%Y%m%d_%H%M%S}.zip"
+        response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        return response
 
-@admin.register(FacturaDetalle)
+@admin.register(FacturaDetalle, site=admin_site)
 class FacturaDetalleAdmin(admin.ModelAdmin):
     list_display = ('factura', 'producto', 'cantidad', 'precio_unitario', 'subtotal')
     list_filter = ('factura__empresa',)
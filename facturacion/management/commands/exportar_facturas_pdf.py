@@ -0,0 +1,86 @@
+"""
+Comando para generar en lote los PDFs de facturas de un período
+"""
+import os
+import time
+from calendar import monthrange
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.base import EmpresaCommandMixin
+from facturacion.models import Factura
+from facturacion.pdf import TAMANO_LOTE_PDF, generar_zip_facturas
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = 'Genera un ZIP con los PDFs de las facturas de una empresa en un período, en paralelo'
+
+    def add_arguments(self, parser):
+        self.agregar_argumento_empresa(parser)
+        parser.add_argument('--mes', help='Mes a exportar en formato AAAA-MM')
+        parser.add_argument('--desde', help='Fecha inicial AAAA-MM-DD')
+        parser.add_argument('--hasta', help='Fecha final AAAA-MM-DD')
+        parser.add_argument(
+            '--estado',
+            action='append',
+            help='Filtrar por estado (se puede repetir). Por defecto excluye anuladas',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Número de procesos para renderizar (por defecto, núcleos disponibles)',
+        )
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_PDF, help='Facturas por tarea de cada proceso')
+        parser.add_argument('--salida', help='Ruta del archivo ZIP de salida')
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresa = self.obtener_empresa(options['empresa'])
+        desde, hasta = self._obtener_rango(options)
+        factura_ids = self._obtener_ids(empresa, desde, hasta, options['estado'])
+
+        if not factura_ids:
+            self.stdout.write(self.style.WARNING('⚠️  No hay facturas para el período indicado'))
+            return
+
+        salida = options['salida'] or f'facturas_{empresa.nit}_{desde:%Y%m%d}_{hasta:%Y%m%d}.zip'
+        self.stdout.write(
+            f'🧾 Generando {len(factura_ids)} facturas con {options["workers"]} procesos...'
+        )
+
+        inicio = time.monotonic()
+        with open(salida, 'wb') as archivo:
+            for bloque in generar_zip_facturas(factura_ids, workers=options['workers'], tamano_lote=options['lote']):
+                archivo.write(bloque)
+        duracion = time.monotonic() - inicio
+
+        velocidad = len(factura_ids) / duracion if duracion else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {salida} generado en {duracion:.1f}s ({velocidad:.1f} facturas/s)'
+        ))
+
+    def _obtener_rango(self, options):
+        """Calcula el rango de fechas a partir de --mes o --desde/--hasta"""
+        try:
+            if options['mes']:
+                anio, mes = (int(p) for p in options['mes'].split('-'))
+                return date(anio, mes, 1), date(anio, mes, monthrange(anio, mes)[1])
+            if options['desde'] and options['hasta']:
+                return date.fromisoformat(options['desde']), date.fromisoformat(options['hasta'])
+        except ValueError as e:
+            raise CommandError(f'Fecha inválida: {e}')
+        raise CommandError('Debe indicar --mes o --desde y --hasta')
+
+    def _obtener_ids(self, empresa, desde, hasta, estados):
+        """IDs de las facturas a exportar; los workers cargan el resto"""
+        facturas = Factura.objects.filter(
+            empresa=empresa,
+            fecha_factura__range=(desde, hasta),
+        )
+        if estados:
+            facturas = facturas.filter(estado__in=estados)
+        else:
+            facturas = facturas.exclude(estado='anulada')
+        return list(facturas.order_by('numero_factura').values_list('pk', flat=True))
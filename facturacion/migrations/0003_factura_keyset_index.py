@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturacion', '0002_alter_factura_estado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='factura',
+            index=models.Index(fields=['empresa', 'fecha_factura', 'numero_factura', 'id'], name='facturacion_empresa_0c8b02_idx'),
+        ),
+    ]
@@ -160,6 +160,10 @@ class Factura(models.Model):
         verbose_name_plural = "Facturas"
         unique_together = ['empresa', 'numero_factura']
         ordering = ['-fecha_factura', '-numero_factura']
+        indexes = [
+            # Paginación por cursor de los listados (PaginacionKeysetMixin)
+            models.Index(fields=['empresa', 'fecha_factura', 'numero_factura', 'id']),
+        ]
     
     def __str__(self):
         return f"Factura {self.numero_factura} - {self.cliente.razon_social}"
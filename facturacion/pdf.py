@@ -0,0 +1,283 @@
+"""
+Generación de PDFs de facturas de venta.
+
+Contiene el render individual (usado por la descarga de una factura) y la
+generación masiva en paralelo con ``ProcessPoolExecutor``, que empaqueta los
+PDFs en un ZIP emitido por bloques para no cargarlo completo en memoria.
+"""
+import io
+import multiprocessing
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+# Facturas que procesa cada worker por tarea
+TAMANO_LOTE_PDF = 25
+
+# Tope de procesos del pool, aunque se pidan más o haya más núcleos
+MAX_WORKERS_PDF = 8
+
+# Lotes encargados a la vez por worker (acota la memoria del ZIP en curso)
+LOTES_EN_VUELO_POR_WORKER = 2
+
+COLOR_TEXTO = colors.HexColor('#2c3e50')
+COLOR_FONDO = colors.HexColor('#ecf0f1')
+
+
+def nombre_archivo_factura(factura):
+    """Nombre del PDF con el formato CODIGO_NOMBRECLIENTE.pdf"""
+    nombre_cliente = factura.cliente.razon_social.replace(' ', '_').replace('/', '_')
+    return f"{factura.numero_factura}_{nombre_cliente}.pdf"
+
+
+def _tabla_datos(data, color_etiqueta=COLOR_FONDO, texto_etiqueta=COLOR_TEXTO):
+    """Tabla de dos columnas etiqueta/valor con el estilo de la factura"""
+    tabla = Table(data, colWidths=[2*inch, 4*inch])
+    tabla.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), color_etiqueta),
+        ('TEXTCOLOR', (0, 0), (0, -1), texto_etiqueta),
+        ('TEXTCOLOR', (1, 0), (1, -1), COLOR_TEXTO),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+    return tabla
+
+
+def renderizar_factura_pdf(factura):
+    """
+    Renderiza una factura a PDF y devuelve los bytes.
+
+    Para evitar consultas por factura, se espera que venga con
+    ``select_related('cliente', 'empresa')``.
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+
+    # Estilos
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=COLOR_TEXTO,
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+
+    # Título
+    elements.append(Paragraph("FACTURA DE VENTA", title_style))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Información de la empresa
+    elements.append(_tabla_datos([
+        ['EMPRESA:', factura.empresa.razon_social],
+        ['NIT:', factura.empresa.nit],
+        ['Dirección:', factura.empresa.direccion or 'N/A'],
+        ['Teléfono:', factura.empresa.telefono or 'N/A'],
+    ]))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Información de la factura
+    elements.append(_tabla_datos([
+        ['FACTURA N°:', factura.numero_factura],
+        ['FECHA:', factura.fecha_factura.strftime('%d/%m/%Y')],
+        ['TIPO VENTA:', factura.get_tipo_venta_display()],  # type: ignore[attr-defined]
+        ['ESTADO:', factura.get_estado_display()],  # type: ignore[attr-defined]
+    ], color_etiqueta=colors.HexColor('#3498db'), texto_etiqueta=colors.white))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Información del cliente
+    elements.append(_tabla_datos([
+        ['CLIENTE:', factura.cliente.razon_social],
+        ['DOCUMENTO:', f"{factura.cliente.get_tipo_documento_display()}: {factura.cliente.numero_documento}"],
+        ['Dirección:', factura.cliente.direccion or 'N/A'],
+        ['Teléfono:', factura.cliente.telefono or 'N/A'],
+        ['Email:', factura.cliente.email or 'N/A'],
+    ]))
+    elements.append(Spacer(1, 0.4*inch))
+
+    # Totales
+    totales_table = Table([
+        ['SUBTOTAL:', f"${factura.subtotal:,.2f}"],
+        ['IMPUESTOS:', f"${factura.total_impuestos:,.2f}"],
+        ['TOTAL:', f"${factura.total:,.2f}"],
+    ], colWidths=[4*inch, 2*inch])
+    totales_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -2), COLOR_FONDO),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#27ae60')),
+        ('TEXTCOLOR', (0, 0), (-1, -2), COLOR_TEXTO),
+        ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
+        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -2), 11),
+        ('FONTSIZE', (0, -1), (-1, -1), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ]))
+    elements.append(totales_table)
+
+    # Observaciones
+    if factura.observaciones:
+        elements.append(Spacer(1, 0.3*inch))
+        elements.append(Paragraph(f"<b>Observaciones:</b> {factura.observaciones}", styles['Normal']))
+
+    doc.build(elements)
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
+
+
+def facturas_para_pdf():
+    """Queryset base con las relaciones que usa el render precargadas"""
+    from .models import Factura
+
+    return Factura.objects.select_related('cliente', 'empresa')
+
+
+def _inicializar_worker(nombres_bd):
+    """
+    Prepara Django en cada proceso del pool. Los procesos se crean con
+    ``spawn`` (sin heredar las conexiones del proceso padre) y reciben los
+    nombres de base de datos que usa el padre (p. ej. la base de pruebas).
+    """
+    import django
+    from django.conf import settings
+
+    for alias, nombre in nombres_bd.items():
+        settings.DATABASES[alias]['NAME'] = nombre
+    django.setup()
+
+
+def _renderizar_lote(factura_ids):
+    """
+    Carga un lote de facturas con sus relaciones en una consulta y devuelve
+    una lista de (nombre_archivo, bytes_pdf).
+    """
+    facturas = facturas_para_pdf().filter(pk__in=factura_ids).order_by('numero_factura')
+    return [(nombre_archivo_factura(f), renderizar_factura_pdf(f)) for f in facturas]
+
+
+def _renderizar_lote_en_worker(factura_ids):
+    """Tarea de un worker del pool: renderiza el lote y cierra sus conexiones"""
+    from django.db import connections
+
+    try:
+        return _renderizar_lote(factura_ids)
+    finally:
+        connections.close_all()
+
+
+def _dividir_en_lotes(ids, tamano):
+    return [ids[i:i + tamano] for i in range(0, len(ids), tamano)]
+
+
+def _renderizar_en_paralelo(factura_ids, workers, tamano_lote):
+    """
+    Genera (nombre_archivo, bytes_pdf) repartiendo los lotes entre procesos.
+
+    Con ``workers <= 1`` renderiza en el mismo proceso con su conexión. Con
+    pool, solo hay ``LOTES_EN_VUELO_POR_WORKER`` lotes pendientes por worker
+    a la vez, de modo que la memoria no crece si el consumidor (una
+    descarga lenta) va más despacio que los workers.
+    """
+    from django.db import connections
+
+    lotes = _dividir_en_lotes(list(factura_ids), tamano_lote)
+    if not lotes:
+        return
+
+    workers = min(workers, MAX_WORKERS_PDF, len(lotes))
+    if workers <= 1:
+        for lote in lotes:
+            yield from _renderizar_lote(lote)
+        return
+
+    nombres_bd = {conexion.alias: conexion.settings_dict['NAME'] for conexion in connections.all()}
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_inicializar_worker,
+        initargs=(nombres_bd,),
+    )
+    try:
+        restantes = iter(lotes)
+        pendientes = deque(
+            pool.submit(_renderizar_lote_en_worker, lote)
+            for lote in islice(restantes, workers * LOTES_EN_VUELO_POR_WORKER)
+        )
+        while pendientes:
+            resultado = pendientes.popleft().result()
+            siguiente = next(restantes, None)
+            if siguiente is not None:
+                pendientes.append(pool.submit(_renderizar_lote_en_worker, siguiente))
+            yield from resultado
+    finally:
+        # Si la descarga se interrumpe no se renderizan los lotes en cola
+        pool.shutdown(cancel_futures=True)
+
+
+class _BufferZip(io.RawIOBase):
+    """Destino no buscable para ZipFile que acumula los bytes ya escritos"""
+
+    def __init__(self):
+        super().__init__()
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._partes.append(bytes(b))
+        return len(b)
+
+    def vaciar(self):
+        data = b''.join(self._partes)
+        self._partes = []
+        return data
+
+
+def generar_zip_facturas(factura_ids, workers=None, tamano_lote=TAMANO_LOTE_PDF):
+    """
+    Genera un ZIP con los PDFs de las facturas indicadas y lo emite por bloques.
+
+    Pensado para usarse con ``StreamingHttpResponse`` o para escribir a un
+    archivo: cada PDF se agrega al ZIP apenas su lote termina de renderizarse.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    destino = _BufferZip()
+    nombres_usados = set()
+    with zipfile.ZipFile(destino, mode='w', compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+        for nombre, pdf in _renderizar_en_paralelo(factura_ids, workers, tamano_lote):
+            nombre = _nombre_unico(nombre, nombres_usados)
+            archivo_zip.writestr(nombre, pdf)
+            yield destino.vaciar()
+    yield destino.vaciar()
+
+
+def _nombre_unico(nombre, nombres_usados):
+    """Evita colisiones de nombres dentro del ZIP (facturas de varias empresas)"""
+    base, extension = os.path.splitext(nombre)
+    candidato = nombre
+    contador = 1
+    while candidato in nombres_usados:
+        contador += 1
+        candidato = f"{base}_{contador}{extension}"
+    nombres_usados.add(candidato)
+    return candidato
@@ -1,3 +1,105 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import zipfile
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+
+from catalogos.models import Tercero
+from core.admin_site import admin_site
+from core.test_settings import TEST_USER_PASSWORD
+from empresas.models import Empresa
+from .models import Factura
+from .pdf import generar_zip_facturas
+
+
+class GeneracionPDFMasivaTest(TestCase):
+    """Tests para la generación de PDFs de facturas en lote"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password=TEST_USER_PASSWORD
+        )
+        self.empresa = Empresa.objects.create(
+            nit='123456789-0',
+            razon_social='Test Company SAS',
+            direccion='Calle 123',
+            ciudad='Bogotá',
+            telefono='3001234567',
+            email='empresa@test.com',
+            propietario=self.user
+        )
+        self.cliente = Tercero.objects.create(
+            empresa=self.empresa,
+            tipo_tercero='cliente',
+            numero_documento='12345678',
+            razon_social='Cliente Test',
+        )
+        self.facturas = [
+            Factura.objects.create(
+                empresa=self.empresa,
+                numero_factura=numero,
+                fecha_factura=fecha,
+                cliente=self.cliente,
+                tipo_venta='credito',
+                subtotal=Decimal('100000.00'),
+                total_impuestos=Decimal('19000.00'),
+                total=Decimal('119000.00'),
+                estado=estado,
+                creado_por=self.user
+            )
+            for numero, fecha, estado in (
+                ('F001', '2024-01-10', 'confirmada'),
+                ('F002', '2024-01-20', 'confirmada'),
+                ('F003', '2024-01-25', 'anulada'),
+                ('F004', '2024-02-05', 'confirmada'),
+            )
+        ]
+
+    def _leer_zip(self, contenido):
+        archivo = zipfile.ZipFile(io.BytesIO(contenido))
+        return {nombre: archivo.read(nombre) for nombre in archivo.namelist()}
+
+    def test_generar_zip_en_proceso(self):
+        """El ZIP trae un PDF por factura, en orden y sin repetir nombres"""
+        ids = [factura.pk for factura in self.facturas]
+        bloques = list(generar_zip_facturas(ids, workers=1, tamano_lote=3))
+
+        # Se emite un bloque por PDF más el cierre del ZIP
+        self.assertEqual(len(bloques), len(ids) + 1)
+        pdfs = self._leer_zip(b''.join(bloques))
+        self.assertEqual(
+            list(pdfs),
+            ['F001_Cliente_Test.pdf', 'F002_Cliente_Test.pdf', 'F003_Cliente_Test.pdf', 'F004_Cliente_Test.pdf']
+        )
+        self.assertTrue(all(pdf.startswith(b'%PDF') for pdf in pdfs.values()))
+
+        # Sin facturas el ZIP queda vacío pero válido
+        self.assertEqual(self._leer_zip(b''.join(generar_zip_facturas([], workers=1))), {})
+
+    def test_accion_admin_y_comando(self):
+        """La acción del admin publicado y el comando entregan los PDFs"""
+        modelo_admin = admin_site._registry[Factura]
+        request = RequestFactory().post('/admin/facturacion/factura/')
+        request.user = self.user
+        queryset = Factura.objects.filter(pk__in=[self.facturas[1].pk, self.facturas[0].pk])
+        response = modelo_admin.descargar_pdfs_zip(request, queryset)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        pdfs = self._leer_zip(b''.join(response.streaming_content))
+        self.assertEqual(list(pdfs), ['F001_Cliente_Test.pdf', 'F002_Cliente_Test.pdf'])
+
+        with tempfile.TemporaryDirectory() as directorio:
+            salida = os.path.join(directorio, 'enero.zip')
+            call_command(
+                'exportar_facturas_pdf', '--empresa', self.empresa.nit, '--mes', '2024-01',
+                '--workers', '1', '--salida', salida, stdout=io.StringIO()
+            )
+            with open(salida, 'rb') as archivo:
+                pdfs = self._leer_zip(archivo.read())
+        # Las anuladas y las de otro mes quedan fuera
+        self.assertEqual(list(pdfs), ['F001_Cliente_Test.pdf', 'F002_Cliente_Test.pdf'])
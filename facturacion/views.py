@@ -5,16 +5,18 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse, HttpResponse
 from django.db.models import Q
+from core.base_views import PaginacionKeysetMixin
 from .models import Factura, FacturaDetalle
 
 # Constante para evitar duplicación del literal de URL
 FACTURA_DETALLE_URL = 'facturacion:detalle'
 
 # Vistas temporales básicas
-class FacturaListView(LoginRequiredMixin, ListView):
+class FacturaListView(PaginacionKeysetMixin, LoginRequiredMixin, ListView):
     model = Factura
     template_name = 'facturacion/lista.html'
     context_object_name = 'object_list'
+    paginate_by = 50
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -0,0 +1,278 @@
+"""
+Consulta por páginas de los libros contables.
+
+Los libros se recorren con paginación por cursor (keyset): cada página
+filtra por la clave de la última fila mostrada, así abrir la página 1 o la
+200 de una cuenta con muchos movimientos cuesta lo mismo. Los saldos
+acumulados se calculan en la base con funciones de ventana y el cursor
+lleva el saldo con el que termina la página.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Prefetch, Q, Sum, Window, prefetch_related_objects
+from django.db.models.functions import Coalesce
+
+from contabilidad.archivo import ServicioArchivo
+from contabilidad.models import Asiento, Partida, PartidaArchivada, PeriodoContable
+from core.keyset import CursorInvalido, codificar_cursor, decodificar_cursor, filtro_despues_de
+
+# Filas por página de los libros
+TAMANO_PAGINA_LIBRO = 100
+
+# Relación de Asiento con las partidas de cada tabla
+RELACION_PARTIDAS = {Partida: 'partidas', PartidaArchivada: 'partidas_archivadas'}
+
+CERO = Decimal('0.00')
+
+
+@dataclass
+class PaginaLibro:
+    """Una página de un libro con sus saldos y totales"""
+    filas: list = field(default_factory=list)
+    saldo_inicial: Decimal = CERO
+    saldo_final: Decimal = CERO
+    total_debito: Decimal = CERO
+    total_credito: Decimal = CERO
+    siguiente_cursor: str = None
+    es_primera: bool = True
+    # Acumulados de las páginas anteriores (libro diario)
+    debito_anterior: Decimal = CERO
+    credito_anterior: Decimal = CERO
+
+    @property
+    def debito_acumulado(self):
+        return self.debito_anterior + self.total_debito
+
+    @property
+    def credito_acumulado(self):
+        return self.credito_anterior + self.total_credito
+
+
+class LibroMayorCuenta:
+    """
+    Movimientos de una cuenta en asientos confirmados, por páginas.
+
+    El saldo de apertura es el del último cierre anterior a ``fecha_inicio``
+    (o el saldo inicial de la cuenta) más los movimientos posteriores a ese
+    cierre y anteriores a ``fecha_inicio`` (una sola agregación); dentro
+    de la página el saldo corre con ``Window(Sum(...))`` según la naturaleza
+    de la cuenta.
+
+    Si el rango llega a un período archivado, las partidas se leen primero
+    de PartidaArchivada y luego de Partida (ver ``contabilidad.archivo``):
+    todas las archivadas son anteriores a las del libro, así que la página
+    sigue el mismo orden y el mismo cursor.
+
+    Uso:
+        pagina = LibroMayorCuenta(cuenta, fecha_inicio, fecha_fin).pagina(cursor)
+    """
+    orden = ('fecha', 'asiento__numero_asiento', 'orden', 'id')
+
+    def __init__(self, cuenta, fecha_inicio=None, fecha_fin=None, tamano_pagina=TAMANO_PAGINA_LIBRO):
+        self.cuenta = cuenta
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.tamano_pagina = tamano_pagina
+
+    def partidas(self, modelo=Partida):
+        """
+        Partidas confirmadas de la cuenta (sin filtro de fechas). Usa los
+        datos del asiento copiados en la partida, así los saldos salen del
+        índice (empresa, cuenta, fecha) sin JOIN.
+        """
+        return modelo.objects.filter(empresa_id=self.cuenta.empresa_id, cuenta=self.cuenta, confirmado=True)
+
+    def fuentes(self):
+        """Modelos con las partidas del período, en orden cronológico"""
+        return ServicioArchivo.modelos_partidas(self.cuenta.empresa_id, self.fecha_inicio, self.fecha_fin)
+
+    def movimientos_periodo(self, modelo=Partida):
+        queryset = self.partidas(modelo)
+        if self.fecha_inicio:
+            queryset = queryset.filter(fecha__gte=self.fecha_inicio)
+        if self.fecha_fin:
+            queryset = queryset.filter(fecha__lte=self.fecha_fin)
+        return queryset
+
+    def suma_movimientos(self):
+        """Suma del efecto de las partidas en el saldo según la naturaleza"""
+        if self.cuenta.naturaleza == 'D':
+            movimiento = F('valor_debito') - F('valor_credito')
+        else:
+            movimiento = F('valor_credito') - F('valor_debito')
+        return Sum(movimiento, output_field=DecimalField(max_digits=15, decimal_places=2))
+
+    def saldo_apertura(self):
+        """
+        Saldo congelado en el último cierre anterior al período (o el saldo
+        inicial de la cuenta) más los movimientos entre ese cierre y el
+        inicio del período
+        """
+        saldo = self.cuenta.saldo_inicial
+        if self.fecha_inicio:
+            cierre = PeriodoContable.ultimo_cierre(self.cuenta.empresa_id, antes_de=self.fecha_inicio)
+            if cierre is not None:
+                saldo = cierre.saldos.filter(cuenta=self.cuenta).values_list('saldo', flat=True).first() or CERO
+            desde = cierre.fecha_fin if cierre else None
+            for modelo in ServicioArchivo.modelos_partidas(self.cuenta.empresa_id, desde, self.fecha_inicio):
+                anteriores = self.partidas(modelo).filter(fecha__lt=self.fecha_inicio)
+                if cierre is not None:
+                    anteriores = anteriores.filter(fecha__gt=cierre.fecha_fin)
+                saldo += anteriores.aggregate(saldo=Coalesce(self.suma_movimientos(), CERO))['saldo']
+        return saldo
+
+    def totales_periodo(self):
+        """Débitos y créditos del período completo"""
+        totales = {'total_debito': CERO, 'total_credito': CERO}
+        for modelo in self.fuentes():
+            agregado = self.movimientos_periodo(modelo).aggregate(
+                total_debito=Coalesce(Sum('valor_debito'), CERO),
+                total_credito=Coalesce(Sum('valor_credito'), CERO),
+            )
+            totales['total_debito'] += agregado['total_debito']
+            totales['total_credito'] += agregado['total_credito']
+        return totales
+
+    def pagina(self, cursor=None):
+        """
+        Devuelve la PaginaLibro que sigue a ``cursor`` (la primera si no
+        hay cursor o si no es válido).
+        """
+        try:
+            valores = decodificar_cursor(cursor, len(self.orden) + 1)
+        except CursorInvalido:
+            valores = None
+
+        saldo_inicial = Decimal(valores[-1]) if valores else self.saldo_apertura()
+
+        # Archivo y libro en orden: la segunda fuente completa lo que falte de la página
+        filas = []
+        saldo = saldo_inicial
+        for modelo in self.fuentes():
+            queryset = self.movimientos_periodo(modelo)
+            if valores:
+                queryset = queryset.filter(filtro_despues_de(self.orden, valores[:-1]))
+            lote = list(
+                queryset.select_related('asiento')
+                .annotate(saldo_pagina=Window(self.suma_movimientos(), order_by=[F(c).asc() for c in self.orden]))
+                .order_by(*self.orden)[:self.tamano_pagina + 1 - len(filas)]
+            )
+            for partida in lote:
+                partida.saldo_acumulado = saldo + partida.saldo_pagina
+            if lote:
+                saldo = lote[-1].saldo_acumulado
+            filas += lote
+            if len(filas) > self.tamano_pagina:
+                break
+
+        hay_siguiente = len(filas) > self.tamano_pagina
+        filas = filas[:self.tamano_pagina]
+
+        pagina = PaginaLibro(filas=filas, saldo_inicial=saldo_inicial, saldo_final=saldo_inicial, es_primera=not valores)
+        for partida in filas:
+            pagina.total_debito += partida.valor_debito
+            pagina.total_credito += partida.valor_credito
+        if filas:
+            pagina.saldo_final = filas[-1].saldo_acumulado
+
+        if hay_siguiente:
+            ultima = filas[-1]
+            pagina.siguiente_cursor = codificar_cursor([
+                ultima.fecha,
+                ultima.asiento.numero_asiento,
+                ultima.orden,
+                ultima.id,
+                ultima.saldo_acumulado,
+            ])
+        return pagina
+
+
+class LibroDiario:
+    """
+    Asientos del libro (ver Asiento.en_libro) de una empresa en un período,
+    por páginas.
+
+    Cada página trae primero los asientos por cursor sobre
+    (fecha_asiento, numero_asiento, id) y luego sus partidas con la cuenta
+    en una sola consulta, de modo que la memoria y el tiempo de render no
+    dependen del largo del período. El cursor lleva los débitos y créditos
+    acumulados de las páginas anteriores (totales que "vienen").
+
+    Uso:
+        pagina = LibroDiario(empresa, fecha_inicio, fecha_fin).pagina(cursor)
+    """
+    orden = ('fecha_asiento', 'numero_asiento', 'id')
+
+    def __init__(self, empresa, fecha_inicio=None, fecha_fin=None, tamano_pagina=TAMANO_PAGINA_LIBRO):
+        self.empresa = empresa
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.tamano_pagina = tamano_pagina
+
+    def asientos_periodo(self):
+        # Los anulados por reversión siguen en el libro junto a su reversión
+        queryset = Asiento.objects.filter(Q(estado='confirmado') | Q(estado='anulado', asiento_reversion__isnull=False))
+        if self.empresa:
+            queryset = queryset.filter(empresa=self.empresa)
+        if self.fecha_inicio:
+            queryset = queryset.filter(fecha_asiento__gte=self.fecha_inicio)
+        if self.fecha_fin:
+            queryset = queryset.filter(fecha_asiento__lte=self.fecha_fin)
+        return queryset
+
+    def totales_periodo(self):
+        """Cantidad de asientos, débitos y créditos del período completo"""
+        return self.asientos_periodo().aggregate(
+            total_asientos=Count('id'),
+            total_debito=Coalesce(Sum('total_debito'), CERO),
+            total_credito=Coalesce(Sum('total_credito'), CERO),
+        )
+
+    def pagina(self, cursor=None):
+        """
+        Devuelve la PaginaLibro que sigue a ``cursor``; ``filas`` son los
+        asientos con sus partidas ya cargadas en ``asiento.lineas`` (del
+        libro o del archivo).
+        """
+        try:
+            valores = decodificar_cursor(cursor, len(self.orden) + 2)
+        except CursorInvalido:
+            valores = None
+
+        queryset = self.asientos_periodo()
+        pagina = PaginaLibro(es_primera=not valores)
+        if valores:
+            pagina.debito_anterior = Decimal(valores[-2])
+            pagina.credito_anterior = Decimal(valores[-1])
+            queryset = queryset.filter(filtro_despues_de(self.orden, valores[:-2]))
+
+        asientos = list(queryset.select_related('creado_por').order_by(*self.orden)[:self.tamano_pagina + 1])
+        hay_siguiente = len(asientos) > self.tamano_pagina
+        asientos = asientos[:self.tamano_pagina]
+
+        # Una sola consulta de partidas + cuenta (por tabla) para los asientos de la página
+        fuentes = ServicioArchivo.modelos_partidas(
+            self.empresa.pk if self.empresa else None, self.fecha_inicio, self.fecha_fin
+        )
+        prefetch_related_objects(asientos, *[
+            Prefetch(RELACION_PARTIDAS[modelo], queryset=modelo.objects.select_related('cuenta').order_by('orden', 'id'))
+            for modelo in fuentes
+        ])
+
+        pagina.filas = asientos
+        for asiento in asientos:
+            for partida in asiento.lineas:
+                pagina.total_debito += partida.valor_debito
+                pagina.total_credito += partida.valor_credito
+
+        if hay_siguiente:
+            ultimo = asientos[-1]
+            pagina.siguiente_cursor = codificar_cursor([
+                ultimo.fecha_asiento,
+                ultimo.numero_asiento,
+                ultimo.id,
+                pagina.debito_acumulado,
+                pagina.credito_acumulado,
+            ])
+        return pagina
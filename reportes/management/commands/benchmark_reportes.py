@@ -0,0 +1,179 @@
+"""
+Comando para medir el rendimiento de los reportes contables a distintas escalas
+"""
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from contabilidad.models import CuentaContable
+from core.datos_sinteticos import GeneradorDatosSinteticos
+from empresas.models import Empresa
+
+# Escalas por defecto (partidas contables por empresa)
+TAMANOS_DEFECTO = '10000,100000,1000000'
+
+# Regresión permitida sobre la línea base antes de fallar
+TOLERANCIA_DEFECTO = 0.25
+
+# Diferencias de tiempo menores a esto se consideran ruido
+MARGEN_SEGUNDOS = 0.05
+
+ANIO_BENCHMARK = 2024
+SEMILLA_BENCHMARK = 20240101
+
+
+def escenarios(empresa):
+    """(nombre, url, parámetros GET) de los reportes que se miden"""
+    desde, hasta = f'{ANIO_BENCHMARK}-01-01', f'{ANIO_BENCHMARK}-12-31'
+    caja = CuentaContable.objects.get(empresa=empresa, codigo='1105')
+    return [
+        ('balance_comprobacion', reverse('reportes:balance_comprobacion'), {'fecha_corte': hasta}),
+        ('estado_resultados', reverse('reportes:estado_resultados'), {'fecha_inicio': desde, 'fecha_fin': hasta}),
+        ('balance_general', reverse('reportes:balance_general'), {'fecha_corte': hasta}),
+        ('libro_mayor_caja', reverse('reportes:mayor_cuenta', args=[caja.pk]), {'fecha_inicio': desde, 'fecha_fin': hasta}),
+        ('libro_diario', reverse('reportes:diario'), {'fecha_inicio': desde, 'fecha_fin': hasta}),
+        ('flujo_caja', reverse('tesoreria:flujo_caja'), {'fecha_inicio': desde, 'fecha_fin': hasta}),
+        ('exportar_balance_excel', reverse('reportes:balance_comprobacion_exportar'),
+         {'fecha_corte': hasta, 'formato': 'excel'}),
+        ('exportar_diario_excel', reverse('reportes:diario_exportar'),
+         {'fecha_inicio': desde, 'fecha_fin': hasta, 'formato': 'excel'}),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide tiempo, consultas y memoria pico de los reportes con 10k/100k/1M partidas '
+        'y falla si empeoran respecto a la línea base guardada'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', required=True, help='Usuario dueño de las empresas de prueba')
+        parser.add_argument('--tamanos', default=TAMANOS_DEFECTO, help='Partidas por escala, separadas por coma')
+        parser.add_argument('--baseline', default='benchmark_reportes.json', help='Archivo JSON de la línea base')
+        parser.add_argument('--guardar-baseline', action='store_true', help='Guardar los resultados como línea base')
+        parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_DEFECTO, help='Regresión permitida (0.25 = 25%%)')
+        parser.add_argument('--repeticiones', type=int, default=3, help='Ejecuciones por escenario (se toma la mejor)')
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        try:
+            usuario = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuario "{options["usuario"]}" no encontrado')
+
+        try:
+            tamanos = [int(t) for t in options['tamanos'].split(',') if t.strip()]
+        except ValueError:
+            raise CommandError('--tamanos debe ser una lista de enteros separados por coma')
+
+        resultados = {}
+        for tamano in tamanos:
+            empresa = self._obtener_empresa(usuario, tamano)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'📊 {tamano:,} partidas ({empresa.nit})'))
+            resultados[str(tamano)] = {}
+            for nombre, url, parametros in escenarios(empresa):
+                medicion = self._medir(usuario, empresa, url, parametros, options['repeticiones'])
+                resultados[str(tamano)][nombre] = medicion
+                self.stdout.write(
+                    f'   {nombre:<24} {medicion["segundos"]:>8.3f}s {medicion["consultas"]:>6} consultas '
+                    f'{medicion["memoria_mb"]:>8.1f} MB'
+                )
+
+        if options['guardar_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f'💾 Línea base guardada en {options["baseline"]}'))
+            return
+
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(self.style.WARNING('⚠️ No hay línea base; use --guardar-baseline para crearla'))
+            return
+
+        with open(options['baseline'], encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        regresiones = self._comparar(base, resultados, options['tolerancia'])
+        if regresiones:
+            for regresion in regresiones:
+                self.stderr.write(self.style.ERROR(f'   ❌ {regresion}'))
+            raise CommandError(f'{len(regresiones)} regresiones respecto a la línea base')
+        self.stdout.write(self.style.SUCCESS('✅ Sin regresiones respecto a la línea base'))
+
+    def _obtener_empresa(self, usuario, tamano):
+        """Empresa de benchmark de la escala (se genera la primera vez)"""
+        nit = f'BENCH-{tamano}'
+        empresa = Empresa.objects.filter(nit=nit).first()
+        if empresa is not None:
+            return empresa
+
+        self.stdout.write(f'⚙️ Generando datos para {tamano:,} partidas...')
+        generador = GeneradorDatosSinteticos(usuario, semilla=SEMILLA_BENCHMARK + tamano, anio=ANIO_BENCHMARK)
+        empresa = generador.crear_empresa(tamano, nit=nit)
+        generador.crear_catalogos(empresa, terceros=500, productos=200)
+        generador.crear_facturas(empresa, max(tamano // 20, 10))
+        generador.crear_pagos(empresa, max(tamano // 10, 10))
+        generador.crear_asientos(empresa, tamano)
+        return empresa
+
+    def _medir(self, usuario, empresa, url, parametros, repeticiones):
+        """Mejor tiempo de ``repeticiones`` ejecuciones, con consultas y memoria pico"""
+        fabrica = RequestFactory()
+        vista = resolve(url)
+        mejor = None
+
+        for _ in range(max(repeticiones, 1)):
+            request = fabrica.get(url, parametros)
+            request.user = usuario
+            request.empresa_activa = empresa
+
+            gc.collect()
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            with CaptureQueriesContext(connection) as consultas:
+                response = vista.func(request, *vista.args, **vista.kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+            segundos = time.perf_counter() - inicio
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            if response.status_code >= 400:
+                raise CommandError(f'{url} respondió {response.status_code}')
+
+            medicion = {
+                'segundos': round(segundos, 4),
+                'consultas': len(consultas.captured_queries),
+                'memoria_mb': round(pico / (1024 * 1024), 2),
+            }
+            if mejor is None or medicion['segundos'] < mejor['segundos']:
+                mejor = medicion
+        return mejor
+
+    def _comparar(self, base, resultados, tolerancia):
+        """Lista de mensajes por cada métrica que empeoró más que la tolerancia"""
+        regresiones = []
+        for tamano, escenarios_tamano in resultados.items():
+            for nombre, actual in escenarios_tamano.items():
+                anterior = base.get(tamano, {}).get(nombre)
+                if anterior is None:
+                    continue
+                etiqueta = f'{nombre} @ {int(tamano):,}'
+                if (actual['segundos'] > anterior['segundos'] * (1 + tolerancia)
+                        and actual['segundos'] - anterior['segundos'] > MARGEN_SEGUNDOS):
+                    regresiones.append(f'{etiqueta}: {anterior["segundos"]:.3f}s → {actual["segundos"]:.3f}s')
+                if actual['consultas'] > anterior['consultas']:
+                    regresiones.append(f'{etiqueta}: {anterior["consultas"]} → {actual["consultas"]} consultas')
+                if actual['memoria_mb'] > anterior['memoria_mb'] * (1 + tolerancia):
+                    regresiones.append(f'{etiqueta}: {anterior["memoria_mb"]} → {actual["memoria_mb"]} MB')
+        return regresiones
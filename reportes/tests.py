@@ -1,3 +1,197 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from contabilidad.models import Asiento, CuentaContable, Partida
+from core.keyset import codificar_cursor
+from core.test_settings import TEST_USER_PASSWORD
+from empresas.models import Empresa
+from .libros import LibroDiario, LibroMayorCuenta
+
+
+class LibrosContablesTestBase(TestCase):
+    """Empresa con caja, ingresos y gastos para los libros contables"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password=TEST_USER_PASSWORD
+        )
+        self.empresa = Empresa.objects.create(
+            nit='123456789-0',
+            razon_social='Test Company SAS',
+            direccion='Calle 123',
+            ciudad='Bogotá',
+            telefono='3001234567',
+            email='empresa@test.com',
+            propietario=self.user
+        )
+        self.cuenta_caja = self._crear_cuenta('1105', 'Caja', 'D', 'ACTIVO')
+        self.cuenta_ingresos = self._crear_cuenta('4135', 'Ingresos', 'C', 'INGRESO')
+        self.cuenta_gastos = self._crear_cuenta('5105', 'Gastos', 'D', 'GASTO')
+
+    def _crear_cuenta(self, codigo, nombre, naturaleza, tipo):
+        return CuentaContable.objects.create(
+            empresa=self.empresa, codigo=codigo, nombre=nombre, naturaleza=naturaleza, tipo_cuenta=tipo
+        )
+
+    def _crear_asiento(self, numero, fecha, valor, debito=None, credito=None, estado='confirmado'):
+        asiento = Asiento.objects.create(
+            empresa=self.empresa,
+            numero_asiento=numero,
+            fecha_asiento=fecha,
+            concepto=f'Asiento {numero}',
+            estado=estado,
+            creado_por=self.user
+        )
+        valor = Decimal(valor)
+        Partida.objects.create(asiento=asiento, cuenta=debito or self.cuenta_caja, valor_debito=valor, orden=1)
+        Partida.objects.create(asiento=asiento, cuenta=credito or self.cuenta_ingresos, valor_credito=valor, orden=2)
+        return asiento
+
+
+class LibrosPaginadosTest(LibrosContablesTestBase):
+    """Tests para el recorrido por cursor del libro mayor y el libro diario"""
+
+    def setUp(self):
+        super().setUp()
+        CuentaContable.objects.filter(pk=self.cuenta_caja.pk).update(saldo_inicial=Decimal('50.00'))
+        self.cuenta_caja.refresh_from_db()
+        # Fechas repetidas para que el cursor desempate por número de asiento
+        self._crear_asiento('A1', '2023-12-20', '1000.00')
+        self._crear_asiento('A2', '2024-01-05', '200.00')
+        self._crear_asiento('A3', '2024-01-05', '300.00', debito=self.cuenta_gastos, credito=self.cuenta_caja)
+        self._crear_asiento('A4', '2024-01-10', '400.00')
+        self._crear_asiento('A5', '2024-01-10', '999.00', estado='borrador')
+        self._crear_asiento('A6', '2024-01-20', '150.00', debito=self.cuenta_gastos, credito=self.cuenta_caja)
+        self._crear_asiento('A7', '2024-02-01', '75.00')
+
+    def _recorrer(self, libro):
+        """Sigue los cursores y devuelve las páginas"""
+        paginas = [libro.pagina()]
+        while paginas[-1].siguiente_cursor:
+            paginas.append(libro.pagina(paginas[-1].siguiente_cursor))
+        return paginas
+
+    def test_libro_mayor_saldo_entre_paginas(self):
+        """El saldo corre según la naturaleza y continúa de una página a otra"""
+        libro = LibroMayorCuenta(self.cuenta_caja, '2024-01-01', '2024-01-31', tamano_pagina=2)
+        paginas = self._recorrer(libro)
+
+        # Apertura: saldo inicial de la cuenta más lo anterior al período
+        self.assertEqual(paginas[0].saldo_inicial, Decimal('1050.00'))
+        self.assertEqual(
+            [[(p.asiento.numero_asiento, p.saldo_acumulado) for p in pagina.filas] for pagina in paginas],
+            [[('A2', Decimal('1250.00')), ('A3', Decimal('950.00'))],
+             [('A4', Decimal('1350.00')), ('A6', Decimal('1200.00'))]]
+        )
+        self.assertEqual(
+            [(pagina.saldo_inicial, pagina.saldo_final, pagina.es_primera) for pagina in paginas],
+            [(Decimal('1050.00'), Decimal('950.00'), True), (Decimal('950.00'), Decimal('1200.00'), False)]
+        )
+        self.assertEqual(
+            [(pagina.total_debito, pagina.total_credito) for pagina in paginas],
+            [(Decimal('200.00'), Decimal('300.00')), (Decimal('400.00'), Decimal('150.00'))]
+        )
+        self.assertEqual(
+            libro.totales_periodo(), {'total_debito': Decimal('600.00'), 'total_credito': Decimal('450.00')}
+        )
+
+        # Una cuenta crédito suma los créditos
+        ingresos = LibroMayorCuenta(self.cuenta_ingresos, '2024-01-01', tamano_pagina=10).pagina()
+        self.assertEqual(ingresos.saldo_inicial, Decimal('1000.00'))
+        self.assertEqual([p.saldo_acumulado for p in ingresos.filas], [Decimal('1200.00'), Decimal('1600.00'), Decimal('1675.00')])
+        self.assertIsNone(ingresos.siguiente_cursor)
+
+    def test_libro_mayor_cursor(self):
+        """El saldo de las páginas siguientes sale del cursor; uno inválido vuelve al inicio"""
+        libro = LibroMayorCuenta(self.cuenta_caja, '2024-01-01', '2024-01-31', tamano_pagina=2)
+        a3 = Partida.objects.get(asiento__numero_asiento='A3', cuenta=self.cuenta_caja)
+        cursor = codificar_cursor([a3.fecha, 'A3', a3.orden, a3.pk, Decimal('10.00')])
+        pagina = libro.pagina(cursor)
+        self.assertEqual((pagina.saldo_inicial, pagina.saldo_final), (Decimal('10.00'), Decimal('260.00')))
+
+        for cursor in ('no-es-un-cursor', codificar_cursor([a3.fecha, a3.pk]), cursor[:-1]):
+            pagina = libro.pagina(cursor)
+            self.assertTrue(pagina.es_primera)
+            self.assertEqual([p.asiento.numero_asiento for p in pagina.filas], ['A2', 'A3'])
+
+    def test_libro_diario_acumulados(self):
+        """Las páginas traen las partidas y el cursor lleva los acumulados"""
+        libro = LibroDiario(self.empresa, '2024-01-01', '2024-01-31', tamano_pagina=2)
+        paginas = self._recorrer(libro)
+
+        self.assertEqual(
+            [[asiento.numero_asiento for asiento in pagina.filas] for pagina in paginas],
+            [['A2', 'A3'], ['A4', 'A6']]
+        )
+        self.assertEqual(
+            [[partida.cuenta.codigo for partida in asiento.lineas] for asiento in paginas[0].filas],
+            [['1105', '4135'], ['5105', '1105']]
+        )
+        self.assertEqual(
+            [(pagina.debito_anterior, pagina.total_debito, pagina.debito_acumulado) for pagina in paginas],
+            [(Decimal('0.00'), Decimal('500.00'), Decimal('500.00')),
+             (Decimal('500.00'), Decimal('550.00'), Decimal('1050.00'))]
+        )
+        self.assertEqual(paginas[-1].credito_acumulado, Decimal('1050.00'))
+        self.assertEqual(
+            libro.totales_periodo(),
+            {'total_asientos': 4, 'total_debito': Decimal('1050.00'), 'total_credito': Decimal('1050.00')}
+        )
+
+        # Los acumulados vienen del cursor; uno inválido vuelve al inicio
+        a3 = Asiento.objects.get(numero_asiento='A3')
+        pagina = libro.pagina(codificar_cursor([a3.fecha_asiento, 'A3', a3.pk, '1.00', '2.00']))
+        self.assertEqual((pagina.debito_acumulado, pagina.credito_acumulado), (Decimal('551.00'), Decimal('552.00')))
+        self.assertTrue(libro.pagina('no-es-un-cursor').es_primera)
+
+
+class ExportacionCSVAsyncTest(LibrosContablesTestBase):
+    """Tests para las exportaciones CSV async de reportes"""
+
+    def setUp(self):
+        super().setUp()
+        self._crear_asiento('1', '2024-01-10', '100.00')
+        self._crear_asiento('2', '2024-02-10', '100.00')
+
+    def _descargar(self, vista, parametros):
+        """Ejecuta la vista async y devuelve (status, filas del CSV)"""
+        import csv
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncRequestFactory
+        
+        async def auser():
+            return self.user
+        
+        request = AsyncRequestFactory().get('/', parametros)
+        request.user = self.user
+        request.auser = auser
+        request.empresa_activa = self.empresa
+        
+        async def ejecutar():
+            response = await vista(request)
+            contenido = b''.join([parte async for parte in response.streaming_content])
+            return response.status_code, contenido
+        
+        status, contenido = async_to_sync(ejecutar)()
+        return status, list(csv.reader(contenido.decode('utf-8-sig').splitlines()))
+    
+    def test_libro_mayor_y_balance(self):
+        """Saldo acumulado del mayor y totales del balance en streaming"""
+        from reportes.views_async import exportar_balance_comprobacion_csv, exportar_libro_mayor
+        
+        status, filas = self._descargar(
+            exportar_libro_mayor, {'cuenta_id': self.cuenta_caja.pk, 'fecha_inicio': '2024-02-01'}
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(filas[1][-1], '100.00')  # Saldo de apertura
+        self.assertEqual(filas[-1][-1], '200.00')
+        
+        status, filas = self._descargar(exportar_balance_comprobacion_csv, {'fecha_corte': '2024-01-31'})
+        self.assertEqual(status, 200)
+        self.assertEqual([fila[0] for fila in filas[1:]], ['1105', '4135', 'TOTALES:'])
+        self.assertEqual(Decimal(filas[-1][5]), Decimal('100.00'))
+        self.assertEqual(Decimal(filas[-1][6]), Decimal('100.00'))
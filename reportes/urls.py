@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, views_async
 
 app_name = 'reportes'
 
@@ -11,17 +11,23 @@ urlpatterns = [
     path('diario/', views.LibroDiarioView.as_view(), name='diario'),
     path('diario/generar/', views.generar_libro_diario, name='diario_generar'),
     path('diario/exportar/', views.exportar_libro_diario, name='diario_exportar'),
+    path('diario/exportar/csv/', views_async.exportar_libro_diario_csv, name='diario_exportar_csv'),
     
     # Libro Mayor
     path('mayor/', views.LibroMayorView.as_view(), name='mayor'),
     path('mayor/generar/', views.generar_libro_mayor, name='mayor_generar'),
-    path('mayor/exportar/', views.exportar_libro_mayor, name='mayor_exportar'),
+    path('mayor/exportar/', views_async.exportar_libro_mayor, name='mayor_exportar'),
     path('mayor/cuenta/<int:cuenta_pk>/', views.LibroMayorCuentaView.as_view(), name='mayor_cuenta'),
     
     # Balance de Comprobación
     path('balance-comprobacion/', views.BalanceComprobacionView.as_view(), name='balance_comprobacion'),
     path('balance-comprobacion/generar/', views.generar_balance_comprobacion, name='balance_comprobacion_generar'),
     path('balance-comprobacion/exportar/', views.exportar_balance_comprobacion, name='balance_comprobacion_exportar'),
+    path(
+        'balance-comprobacion/exportar/csv/',
+        views_async.exportar_balance_comprobacion_csv,
+        name='balance_comprobacion_exportar_csv',
+    ),
     
     # Estado de Resultados (PyG)
     path('estado-resultados/', views.EstadoResultadosView.as_view(), name='estado_resultados'),
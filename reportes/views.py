@@ -10,7 +10,9 @@ from django.db.models import Sum, Q
 from decimal import Decimal
 from empresas.middleware import EmpresaFilterMixin
 from .models import ReporteGenerado, ConfiguracionReporte
-from contabilidad.models import Asiento, CuentaContable, Partida
+from .libros import LibroDiario, LibroMayorCuenta
+from contabilidad.archivo import ServicioArchivo
+from contabilidad.models import SEPARADOR_RUTA, Asiento, CuentaContable, Partida
 import csv
 import io
 from openpyxl import Workbook
@@ -37,6 +39,10 @@ class ReportesIndexView(LoginRequiredMixin, TemplateView):
     template_name = 'reportes/index.html'
 
 class LibroDiarioView(LoginRequiredMixin, TemplateView):
+    """
+    Libro diario por páginas de asientos (ver ``reportes.libros``), con
+    totales de la página y acumulados que vienen de las anteriores.
+    """
     template_name = 'reportes/diario.html'
     
     def get_context_data(self, **kwargs):
@@ -47,17 +53,12 @@ class LibroDiarioView(LoginRequiredMixin, TemplateView):
         fecha_inicio = self.request.GET.get('fecha_inicio')
         fecha_fin = self.request.GET.get('fecha_fin')
         
-        # Consultar asientos confirmados
-        queryset = Asiento.objects.filter(estado='confirmado')
-        if empresa_activa:
-            queryset = queryset.filter(empresa=empresa_activa)
-        
-        if fecha_inicio:
-            queryset = queryset.filter(fecha_asiento__gte=fecha_inicio)
-        if fecha_fin:
-            queryset = queryset.filter(fecha_asiento__lte=fecha_fin)
+        libro = LibroDiario(empresa_activa, fecha_inicio, fecha_fin)
+        pagina = libro.pagina(self.request.GET.get('cursor'))
         
-        context['asientos'] = queryset.select_related('creado_por', 'empresa').prefetch_related('partidas__cuenta').order_by('fecha_asiento', 'numero_asiento')
+        context['asientos'] = pagina.filas
+        context['pagina'] = pagina
+        context['totales'] = libro.totales_periodo()
         context['fecha_inicio'] = fecha_inicio
         context['fecha_fin'] = fecha_fin
         
@@ -80,6 +81,11 @@ class LibroMayorView(LoginRequiredMixin, TemplateView):
         return context
 
 class LibroMayorCuentaView(LoginRequiredMixin, TemplateView):
+    """
+    Libro mayor de una cuenta por páginas (ver ``reportes.libros``): saldo
+    de apertura del período en una agregación y saldo acumulado por fila
+    calculado en la base.
+    """
     template_name = 'reportes/mayor_cuenta.html'
     
     def get_context_data(self, **kwargs):
@@ -101,21 +107,13 @@ class LibroMayorCuentaView(LoginRequiredMixin, TemplateView):
         fecha_inicio = self.request.GET.get('fecha_inicio')
         fecha_fin = self.request.GET.get('fecha_fin')
         
-        # Consultar partidas de la cuenta en asientos confirmados
-        queryset = Partida.objects.filter(
-            cuenta=cuenta,
-            asiento__estado='confirmado'
-        )
-        
-        if fecha_inicio:
-            queryset = queryset.filter(asiento__fecha_asiento__gte=fecha_inicio)
-        if fecha_fin:
-            queryset = queryset.filter(asiento__fecha_asiento__lte=fecha_fin)
-        
-        partidas = queryset.select_related('asiento', 'cuenta').order_by('asiento__fecha_asiento', 'asiento__numero_asiento', 'orden')
+        libro = LibroMayorCuenta(cuenta, fecha_inicio, fecha_fin)
+        pagina = libro.pagina(self.request.GET.get('cursor'))
         
         context['cuenta'] = cuenta
-        context['partidas'] = partidas
+        context['partidas'] = pagina.filas
+        context['pagina'] = pagina
+        context['totales'] = libro.totales_periodo()
         context['fecha_inicio'] = fecha_inicio
         context['fecha_fin'] = fecha_fin
         
@@ -124,28 +122,6 @@ class LibroMayorCuentaView(LoginRequiredMixin, TemplateView):
 class BalanceComprobacionView(LoginRequiredMixin, TemplateView):
     template_name = 'reportes/balance_comprobacion.html'
     
-    def _calcular_agregados_cuenta(self, cuenta, fecha_corte):
-        """Calcula débitos y créditos totales de una cuenta."""
-        agregado = Partida.objects.filter(
-            cuenta=cuenta,
-            asiento__estado='confirmado',
-            asiento__fecha_asiento__lte=fecha_corte
-        ).aggregate(
-            sum_debito=Sum('valor_debito'),
-            sum_credito=Sum('valor_credito')
-        )
-        
-        return (
-            agregado['sum_debito'] or Decimal('0.00'),
-            agregado['sum_credito'] or Decimal('0.00')
-        )
-    
-    def _incluir_saldo_inicial(self, cuenta, total_debito, total_credito):
-        """Agrega el saldo inicial según la naturaleza de la cuenta."""
-        if cuenta.naturaleza == 'D':
-            return total_debito + cuenta.saldo_inicial, total_credito
-        return total_debito, total_credito + cuenta.saldo_inicial
-    
     def _calcular_saldos_naturaleza(self, cuenta, total_debito, total_credito):
         """Calcula saldos deudor y acreedor según naturaleza."""
         if cuenta.naturaleza == 'D':
@@ -161,12 +137,9 @@ class BalanceComprobacionView(LoginRequiredMixin, TemplateView):
             saldo if saldo > 0 else Decimal('0.00')
         )
     
-    def _procesar_cuenta_balance(self, cuenta, fecha_corte):
-        """Procesa una cuenta para el balance de comprobación."""
-        total_debito, total_credito = self._calcular_agregados_cuenta(cuenta, fecha_corte)
-        total_debito, total_credito = self._incluir_saldo_inicial(
-            cuenta, total_debito, total_credito
-        )
+    def _procesar_cuenta_balance(self, cuenta):
+        """Procesa una cuenta (ya anotada) para el balance de comprobación."""
+        total_debito, total_credito = cuenta.acumulado_debito, cuenta.acumulado_credito
         
         # Solo incluir cuentas con movimiento
         if total_debito == 0 and total_credito == 0:
@@ -206,11 +179,17 @@ class BalanceComprobacionView(LoginRequiredMixin, TemplateView):
         if tipo_cuenta:
             cuentas_query = cuentas_query.filter(tipo_cuenta=tipo_cuenta)
         
+        # Débitos y créditos de todas las cuentas en una consulta, desde el último cierre
+        cierre, fuentes = ServicioArchivo.cierre_y_fuentes(empresa_activa.pk if empresa_activa else None, fecha_corte)
+        cuentas_query = CuentaContable.anotar_saldos_acumulados(
+            cuentas_query, fecha_corte=fecha_corte, subarbol=False, cierre=cierre, fuentes=fuentes
+        )
+        
         # Procesar cuentas
         cuentas_con_saldo = [
             cuenta_data
             for cuenta in cuentas_query.order_by('codigo')
-            if (cuenta_data := self._procesar_cuenta_balance(cuenta, fecha_corte))
+            if (cuenta_data := self._procesar_cuenta_balance(cuenta))
         ]
         
         context.update({
@@ -224,22 +203,27 @@ class BalanceComprobacionView(LoginRequiredMixin, TemplateView):
 class EstadoResultadosView(LoginRequiredMixin, TemplateView):
     template_name = 'reportes/estado_resultados.html'
     
-    def _calcular_totales_cuenta(self, cuenta, fecha_inicio, fecha_fin):
+    def _calcular_totales_cuenta(self, cuenta, fecha_inicio, fecha_fin, fuentes=(Partida,)):
         """Calcula débitos y créditos de una cuenta en un período."""
-        agregado = Partida.objects.filter(
-            cuenta=cuenta,
-            asiento__estado='confirmado',
-            asiento__fecha_asiento__gte=fecha_inicio,
-            asiento__fecha_asiento__lte=fecha_fin
-        ).aggregate(
-            sum_debito=Sum('valor_debito'),
-            sum_credito=Sum('valor_credito')
-        )
+        total_debito = total_credito = Decimal('0.00')
+        for modelo in fuentes:
+            agregado = modelo.objects.filter(
+                empresa_id=cuenta.empresa_id,
+                cuenta=cuenta,
+                confirmado=True,
+                fecha__gte=fecha_inicio,
+                fecha__lte=fecha_fin
+            ).exclude(
+                # El asiento de cierre salda las cuentas de resultado; no es un resultado del período
+                asiento__tipo_asiento='cierre'
+            ).aggregate(
+                sum_debito=Sum('valor_debito'),
+                sum_credito=Sum('valor_credito')
+            )
+            total_debito += agregado['sum_debito'] or Decimal('0.00')
+            total_credito += agregado['sum_credito'] or Decimal('0.00')
         
-        return (
-            agregado['sum_debito'] or Decimal('0.00'),
-            agregado['sum_credito'] or Decimal('0.00')
-        )
+        return total_debito, total_credito
     
     def _calcular_saldo_por_tipo(self, cuenta, total_debito, total_credito):
         """Calcula el saldo según el tipo de cuenta."""
@@ -248,10 +232,10 @@ class EstadoResultadosView(LoginRequiredMixin, TemplateView):
         # COSTO y GASTO usan la misma fórmula
         return total_debito - total_credito
     
-    def _procesar_cuenta(self, cuenta, fecha_inicio, fecha_fin):
+    def _procesar_cuenta(self, cuenta, fecha_inicio, fecha_fin, fuentes=(Partida,)):
         """Procesa una cuenta y retorna su saldo si es positivo."""
         total_debito, total_credito = self._calcular_totales_cuenta(
-            cuenta, fecha_inicio, fecha_fin
+            cuenta, fecha_inicio, fecha_fin, fuentes
         )
         
         saldo = self._calcular_saldo_por_tipo(cuenta, total_debito, total_credito)
@@ -261,12 +245,12 @@ class EstadoResultadosView(LoginRequiredMixin, TemplateView):
             return cuenta
         return None
     
-    def _clasificar_cuentas(self, cuentas_query, fecha_inicio, fecha_fin):
+    def _clasificar_cuentas(self, cuentas_query, fecha_inicio, fecha_fin, fuentes=(Partida,)):
         """Clasifica cuentas en ingresos, costos y gastos."""
         ingresos, costos, gastos = [], [], []
         
         for cuenta in cuentas_query:
-            cuenta_procesada = self._procesar_cuenta(cuenta, fecha_inicio, fecha_fin)
+            cuenta_procesada = self._procesar_cuenta(cuenta, fecha_inicio, fecha_fin, fuentes)
             if cuenta_procesada:
                 if cuenta.tipo_cuenta == 'INGRESO':
                     ingresos.append(cuenta_procesada)
@@ -299,9 +283,12 @@ class EstadoResultadosView(LoginRequiredMixin, TemplateView):
         if empresa_activa:
             cuentas_query = cuentas_query.filter(empresa=empresa_activa)
         
-        # Clasificar cuentas
+        # Clasificar cuentas (con el archivo si el período ya se archivó)
+        fuentes = ServicioArchivo.modelos_partidas(
+            empresa_activa.pk if empresa_activa else None, fecha_inicio, fecha_fin
+        )
         ingresos, costos, gastos = self._clasificar_cuentas(
-            cuentas_query, fecha_inicio, fecha_fin
+            cuentas_query, fecha_inicio, fecha_fin, fuentes
         )
         
         context.update({
@@ -315,37 +302,41 @@ class EstadoResultadosView(LoginRequiredMixin, TemplateView):
         return context
 
 class BalanceGeneralView(LoginRequiredMixin, TemplateView):
+    """
+    Balance general a la fecha de corte. Los saldos de todas las cuentas
+    salen de una sola consulta; con ``?nivel=N`` el plan se resume hasta
+    esa profundidad sumando cada subárbol (ver
+    ``CuentaContable.anotar_saldos_acumulados``).
+    """
     template_name = 'reportes/balance_general.html'
     
-    def _calcular_saldo_cuenta(self, cuenta, fecha_corte):
-        """Calcula el saldo de una cuenta hasta la fecha de corte."""
-        agregado = Partida.objects.filter(
-            cuenta=cuenta,
-            asiento__estado='confirmado',
-            asiento__fecha_asiento__lte=fecha_corte
-        ).aggregate(
-            sum_debito=Sum('valor_debito'),
-            sum_credito=Sum('valor_credito')
+    def _obtener_nivel(self):
+        """Profundidad pedida en ?nivel= (None para todas las cuentas)"""
+        try:
+            nivel = int(self.request.GET.get('nivel', ''))
+        except ValueError:
+            return None
+        return nivel if nivel > 0 else None
+    
+    def _cuentas_con_saldo(self, cuentas_query, fecha_corte, nivel, cierre=None, fuentes=None):
+        """
+        Cuentas del balance con ``saldo_acumulado`` a la fecha de corte,
+        partiendo de los saldos congelados en ``cierre`` si se indica y
+        sumando las partidas de ``fuentes`` (libro y, si hace falta, archivo).
+        """
+        cuentas_query = cuentas_query.filter(tipo_cuenta__in=['ACTIVO', 'PASIVO', 'PATRIMONIO'])
+        if nivel:
+            cuentas_query = CuentaContable.filtrar_hasta_profundidad(cuentas_query, nivel)
+        return CuentaContable.anotar_saldos_acumulados(
+            cuentas_query, fecha_corte=fecha_corte, subarbol=bool(nivel), cierre=cierre, fuentes=fuentes
         )
-        
-        total_debito = agregado['sum_debito'] or Decimal('0.00')
-        total_credito = agregado['sum_credito'] or Decimal('0.00')
-        
-        # Incluir saldo inicial
-        if cuenta.naturaleza == 'D':
-            total_debito += cuenta.saldo_inicial
-        else:
-            total_credito += cuenta.saldo_inicial
-        
-        # Calcular saldo según naturaleza
-        if cuenta.naturaleza == 'D':
-            return total_debito - total_credito
-        return total_credito - total_debito
     
     def _obtener_prefijo_codigo(self, cuenta):
-        """Obtiene los primeros 2 dígitos del código de cuenta."""
-        if len(cuenta.codigo) >= 2 and cuenta.codigo[:2].isdigit():
-            return int(cuenta.codigo[:2])
+        """Grupo PUC de la cuenta: el código de su ancestro de profundidad 2."""
+        codigos = cuenta.ruta.split(SEPARADOR_RUTA)
+        grupo = codigos[1] if cuenta.profundidad >= 2 else cuenta.codigo
+        if len(grupo) >= 2 and grupo[:2].isdigit():
+            return int(grupo[:2])
         return 0
     
     def _clasificar_activo(self, cuenta, activos_corrientes, activos_no_corrientes):
@@ -381,8 +372,8 @@ class BalanceGeneralView(LoginRequiredMixin, TemplateView):
         elif cuenta.tipo_cuenta == 'PATRIMONIO':
             clasificaciones['patrimonio'].append(cuenta)
     
-    def _procesar_cuentas_balance(self, cuentas_query, fecha_corte):
-        """Procesa y clasifica todas las cuentas para el balance."""
+    def _procesar_cuentas_balance(self, cuentas_query):
+        """Clasifica las cuentas con saldo (ya anotadas) para el balance."""
         clasificaciones = {
             'activos_corrientes': [],
             'activos_no_corrientes': [],
@@ -392,7 +383,7 @@ class BalanceGeneralView(LoginRequiredMixin, TemplateView):
         }
         
         for cuenta in cuentas_query:
-            saldo = self._calcular_saldo_cuenta(cuenta, fecha_corte)
+            saldo = cuenta.saldo_acumulado
             
             if saldo != 0:
                 cuenta.saldo = abs(saldo)
@@ -423,10 +414,15 @@ class BalanceGeneralView(LoginRequiredMixin, TemplateView):
             cuentas_query = cuentas_query.filter(empresa=empresa_activa)
         
         # Procesar y clasificar cuentas
-        clasificaciones = self._procesar_cuentas_balance(cuentas_query, fecha_corte)
+        nivel = self._obtener_nivel()
+        cierre, fuentes = ServicioArchivo.cierre_y_fuentes(empresa_activa.pk if empresa_activa else None, fecha_corte)
+        clasificaciones = self._procesar_cuentas_balance(
+            self._cuentas_con_saldo(cuentas_query, fecha_corte, nivel, cierre, fuentes)
+        )
         
         context.update({
             'fecha_corte': fecha_corte,
+            'nivel': nivel,
             'activos_corrientes': sorted(clasificaciones['activos_corrientes'], key=lambda x: x.codigo),
             'activos_no_corrientes': sorted(clasificaciones['activos_no_corrientes'], key=lambda x: x.codigo),
             'pasivos_corrientes': sorted(clasificaciones['pasivos_corrientes'], key=lambda x: x.codigo),
@@ -519,7 +515,9 @@ def exportar_libro_diario(request):
         empresa=empresa_activa,
         fecha_asiento__gte=fecha_inicio,
         fecha_asiento__lte=fecha_fin
-    ).select_related('creado_por').prefetch_related('partidas__cuenta').order_by('fecha_asiento', 'numero_asiento')
+    ).select_related('creado_por').prefetch_related(
+        'partidas__cuenta', 'partidas_archivadas__cuenta'
+    ).order_by('fecha_asiento', 'numero_asiento')
     
     if formato == 'excel':
         return _exportar_diario_excel(asientos, fecha_inicio, fecha_fin, empresa_activa)
@@ -571,7 +569,7 @@ def _exportar_diario_excel(asientos, fecha_inicio, fecha_fin, empresa):
     
     for asiento in asientos:
         # Partidas del asiento
-        for partida in asiento.partidas.all():
+        for partida in asiento.lineas:
             ws.cell(row=row, column=1, value=asiento.fecha_asiento.strftime('%Y-%m-%d')).border = border
             ws.cell(row=row, column=2, value=asiento.numero_asiento).border = border
             ws.cell(row=row, column=3, value=f"{partida.cuenta.codigo} - {partida.cuenta.nombre}").border = border
@@ -652,7 +650,7 @@ def _exportar_diario_pdf(asientos, fecha_inicio, fecha_fin, empresa):
     total_creditos = Decimal('0.00')
     
     for asiento in asientos:
-        for partida in asiento.partidas.all():
+        for partida in asiento.lineas:
             data.append([
                 asiento.fecha_asiento.strftime('%Y-%m-%d'),
                 asiento.numero_asiento,
@@ -705,11 +703,6 @@ def _exportar_diario_pdf(asientos, fecha_inicio, fecha_fin, empresa):
 def generar_libro_mayor(request):
     return redirect('reportes:mayor')
 
-@login_required
-@require_http_methods(["GET"])
-def exportar_libro_mayor(request):
-    return HttpResponse("CSV")
-
 @login_required
 @require_safe
 def generar_balance_comprobacion(request):
@@ -737,12 +730,13 @@ def exportar_balance_comprobacion(request):
 def _obtener_datos_balance_comprobacion(empresa_activa, fecha_corte, tipo_cuenta):
     """Obtener y procesar datos del balance de comprobación"""
     cuentas = _obtener_cuentas_filtradas(empresa_activa, tipo_cuenta)
+    fuentes = ServicioArchivo.modelos_partidas(empresa_activa.pk if empresa_activa else None, None, fecha_corte)
     
     cuentas_con_saldo = []
     totales_globales = _inicializar_totales_globales()
     
     for cuenta in cuentas.order_by('codigo'):
-        datos_cuenta = _procesar_cuenta_individual(cuenta, fecha_corte)
+        datos_cuenta = _procesar_cuenta_individual(cuenta, fecha_corte, fuentes)
         
         if _cuenta_tiene_movimientos(datos_cuenta):
             cuentas_con_saldo.append(datos_cuenta)
@@ -775,20 +769,22 @@ def _inicializar_totales_globales():
         'saldo_acreedor': Decimal('0.00')
     }
 
-def _procesar_cuenta_individual(cuenta, fecha_corte):
+def _procesar_cuenta_individual(cuenta, fecha_corte, fuentes=(Partida,)):
     """Procesar una cuenta individual y calcular sus saldos"""
-    # Obtener movimientos de la cuenta
-    agregado = Partida.objects.filter(
-        cuenta=cuenta,
-        asiento__estado='confirmado',
-        asiento__fecha_asiento__lte=fecha_corte
-    ).aggregate(
-        sum_debito=Sum('valor_debito'),
-        sum_credito=Sum('valor_credito')
-    )
-    
-    total_debito = agregado['sum_debito'] or Decimal('0.00')
-    total_credito = agregado['sum_credito'] or Decimal('0.00')
+    # Obtener movimientos de la cuenta (libro y archivo)
+    total_debito = total_credito = Decimal('0.00')
+    for modelo in fuentes:
+        agregado = modelo.objects.filter(
+            empresa_id=cuenta.empresa_id,
+            cuenta=cuenta,
+            confirmado=True,
+            fecha__lte=fecha_corte
+        ).aggregate(
+            sum_debito=Sum('valor_debito'),
+            sum_credito=Sum('valor_credito')
+        )
+        total_debito += agregado['sum_debito'] or Decimal('0.00')
+        total_credito += agregado['sum_credito'] or Decimal('0.00')
     
     # Incluir saldo inicial
     total_debito, total_credito = _incluir_saldo_inicial(cuenta, total_debito, total_credito)
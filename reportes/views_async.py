@@ -0,0 +1,206 @@
+"""
+Exportaciones de reportes como vistas async (ASGI).
+
+Libro diario, libro mayor de una cuenta y balance de comprobación en CSV,
+leídos con el ORM async y enviados en streaming (ver ``core.streaming``).
+Bajo uvicorn (``core.asgi``, SERVIDOR=asgi en start.sh) una descarga lenta
+deja de ocupar un hilo del servidor. Bajo WSGI también funcionan, pero
+Django arma el archivo completo antes de enviarlo.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.db.models import F, Window
+from django.http import Http404, HttpResponse
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_safe
+
+from contabilidad.archivo import ServicioArchivo
+from contabilidad.models import CuentaContable
+from core.constants import MSG_SELECCIONAR_EMPRESA
+from core.streaming import TAMANO_LOTE_STREAMING, respuesta_csv
+from .libros import CERO, LibroMayorCuenta
+
+MSG_FECHAS_REQUERIDAS = 'Fechas de inicio y fin requeridas (AAAA-MM-DD)'
+MSG_FECHA_INVALIDA = 'Formato de fecha inválido, use AAAA-MM-DD'
+
+
+def _fecha(request, nombre):
+    """Fecha AAAA-MM-DD del GET (None si no se envió)"""
+    valor = request.GET.get(nombre)
+    if not valor:
+        return None
+    fecha = parse_date(valor)
+    if fecha is None:
+        raise ValueError(valor)
+    return fecha
+
+
+@login_required
+@require_safe
+async def exportar_libro_diario_csv(request):
+    """Partidas de los asientos confirmados del período, en orden del diario"""
+    empresa = getattr(request, 'empresa_activa', None)
+    if empresa is None:
+        return HttpResponse(MSG_SELECCIONAR_EMPRESA, status=400)
+    try:
+        fecha_inicio, fecha_fin = _fecha(request, 'fecha_inicio'), _fecha(request, 'fecha_fin')
+    except ValueError:
+        fecha_inicio = fecha_fin = None
+    if not fecha_inicio or not fecha_fin:
+        return HttpResponse(MSG_FECHAS_REQUERIDAS, status=400)
+
+    # Archivo (si el rango llega a un período archivado) y libro, en orden
+    fuentes = await sync_to_async(ServicioArchivo.modelos_partidas)(empresa.pk, fecha_inicio, fecha_fin)
+    consultas = [
+        modelo.objects.filter(
+            empresa_id=empresa.pk,
+            confirmado=True,
+            fecha__gte=fecha_inicio,
+            fecha__lte=fecha_fin,
+        )
+        .order_by('fecha', 'asiento__numero_asiento', 'orden', 'id')
+        .values(
+            'fecha', 'asiento__numero_asiento', 'cuenta__codigo', 'cuenta__nombre',
+            'concepto', 'asiento__concepto', 'valor_debito', 'valor_credito',
+        )
+        for modelo in fuentes
+    ]
+
+    async def filas():
+        for partidas in consultas:
+            async for partida in partidas.aiterator(chunk_size=TAMANO_LOTE_STREAMING):
+                yield [
+                    partida['fecha'].isoformat(),
+                    partida['asiento__numero_asiento'],
+                    partida['cuenta__codigo'],
+                    partida['cuenta__nombre'],
+                    partida['concepto'] or partida['asiento__concepto'],
+                    partida['valor_debito'],
+                    partida['valor_credito'],
+                ]
+
+    return respuesta_csv(
+        f'libro_diario_{fecha_inicio}_{fecha_fin}.csv',
+        ['Fecha', 'Asiento', 'Cuenta', 'Nombre cuenta', 'Concepto', 'Débito', 'Crédito'],
+        filas(),
+    )
+
+
+@login_required
+@require_safe
+async def exportar_libro_mayor(request):
+    """
+    Movimientos de una cuenta (?cuenta_id=<id>, fechas opcionales) con el
+    saldo acumulado calculado en la base, igual que ``LibroMayorCuenta``.
+    Siempre responde CSV, también cuando la página pide Excel o PDF.
+    """
+    empresa = getattr(request, 'empresa_activa', None)
+    if empresa is None:
+        return HttpResponse(MSG_SELECCIONAR_EMPRESA, status=400)
+    try:
+        fecha_inicio, fecha_fin = _fecha(request, 'fecha_inicio'), _fecha(request, 'fecha_fin')
+    except ValueError:
+        return HttpResponse(MSG_FECHA_INVALIDA, status=400)
+
+    try:
+        cuenta = await CuentaContable.objects.aget(pk=int(request.GET.get('cuenta_id', '')), empresa=empresa)
+    except (ValueError, CuentaContable.DoesNotExist):
+        raise Http404('La cuenta no existe o no pertenece a la empresa activa.')
+
+    libro = LibroMayorCuenta(cuenta, fecha_inicio, fecha_fin)
+    saldo_apertura = await sync_to_async(libro.saldo_apertura)()
+    consultas = [
+        libro.movimientos_periodo(modelo)
+        .annotate(saldo_periodo=Window(libro.suma_movimientos(), order_by=[F(c).asc() for c in libro.orden]))
+        .order_by(*libro.orden)
+        .values(
+            'fecha', 'asiento__numero_asiento', 'concepto', 'asiento__concepto',
+            'valor_debito', 'valor_credito', 'saldo_periodo',
+        )
+        for modelo in await sync_to_async(libro.fuentes)()
+    ]
+
+    async def filas():
+        yield [fecha_inicio.isoformat() if fecha_inicio else '', '', 'Saldo inicial', '', '', saldo_apertura]
+        # El saldo de cada fuente continúa donde terminó la anterior
+        saldo = saldo_apertura
+        for movimientos in consultas:
+            saldo_fuente = saldo
+            async for partida in movimientos.aiterator(chunk_size=TAMANO_LOTE_STREAMING):
+                saldo = saldo_fuente + partida['saldo_periodo']
+                yield [
+                    partida['fecha'].isoformat(),
+                    partida['asiento__numero_asiento'],
+                    partida['concepto'] or partida['asiento__concepto'],
+                    partida['valor_debito'],
+                    partida['valor_credito'],
+                    saldo,
+                ]
+
+    return respuesta_csv(
+        f'libro_mayor_{cuenta.codigo}_{fecha_inicio or "inicio"}_{fecha_fin or "hoy"}.csv',
+        ['Fecha', 'Asiento', 'Concepto', 'Débito', 'Crédito', 'Saldo'],
+        filas(),
+    )
+
+
+@login_required
+@require_safe
+async def exportar_balance_comprobacion_csv(request):
+    """
+    Balance de comprobación a ``fecha_corte`` con una sola consulta para
+    todas las cuentas (el export Excel/PDF consulta cuenta por cuenta).
+    """
+    empresa = getattr(request, 'empresa_activa', None)
+    if empresa is None:
+        return HttpResponse(MSG_SELECCIONAR_EMPRESA, status=400)
+    try:
+        fecha_corte = _fecha(request, 'fecha_corte')
+    except ValueError:
+        fecha_corte = None
+    if fecha_corte is None:
+        return HttpResponse('Fecha de corte requerida (AAAA-MM-DD)', status=400)
+
+    cuentas = CuentaContable.objects.filter(empresa=empresa, activa=True, acepta_movimiento=True)
+    tipo_cuenta = request.GET.get('tipo_cuenta')
+    if tipo_cuenta:
+        cuentas = cuentas.filter(tipo_cuenta=tipo_cuenta)
+
+    # Parte de los saldos congelados del último cierre (o de los saldos iniciales)
+    cierre, fuentes = await sync_to_async(ServicioArchivo.cierre_y_fuentes)(empresa.pk, fecha_corte)
+    cuentas = (
+        CuentaContable.anotar_saldos_acumulados(
+            cuentas, fecha_corte=fecha_corte, subarbol=False, cierre=cierre, fuentes=fuentes
+        )
+        .order_by('codigo')
+        .values('codigo', 'nombre', 'tipo_cuenta', 'acumulado_debito', 'acumulado_credito')
+    )
+    tipos = dict(CuentaContable.TIPO_CUENTA_CHOICES)
+
+    async def filas():
+        totales = [CERO, CERO, CERO, CERO]
+        async for cuenta in cuentas.aiterator(chunk_size=TAMANO_LOTE_STREAMING):
+            debito, credito = cuenta['acumulado_debito'], cuenta['acumulado_credito']
+            if debito <= 0 and credito <= 0:
+                continue
+
+            saldo_deudor, saldo_acreedor = max(debito - credito, CERO), max(credito - debito, CERO)
+
+            for indice, valor in enumerate((debito, credito, saldo_deudor, saldo_acreedor)):
+                totales[indice] += valor
+            yield [
+                cuenta['codigo'],
+                cuenta['nombre'],
+                tipos.get(cuenta['tipo_cuenta'], cuenta['tipo_cuenta']),
+                debito,
+                credito,
+                saldo_deudor,
+                saldo_acreedor,
+            ]
+        yield ['TOTALES:', '', '', *totales]
+
+    return respuesta_csv(
+        f'balance_comprobacion_{fecha_corte}.csv',
+        ['Código', 'Cuenta', 'Tipo', 'Débito', 'Crédito', 'Saldo deudor', 'Saldo acreedor'],
+        filas(),
+    )
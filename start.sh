@@ -0,0 +1,28 @@
+#!/usr/bin/env bash
+# Script de arranque para Render - S_CONTABLE
+#
+# SERVIDOR=wsgi (por defecto): gunicorn con hilos, como hasta ahora.
+# SERVIDOR=asgi: gunicorn con workers de uvicorn sobre core.asgi. Las
+#   exportaciones async (reportes y pagos en CSV) se envían en streaming sin
+#   ocupar un hilo por descarga; las vistas síncronas siguen funcionando,
+#   pero Django las ejecuta en un hilo compartido por worker, así que
+#   conviene más workers que en modo WSGI.
+#
+# SQL_INSTRUMENTACION (InstrumentacionSQLMiddleware) es solo para WSGI: el
+# middleware es síncrono y no cuenta las consultas de las respuestas en
+# streaming, así que en modo ASGI se desactiva.
+set -o errexit
+
+if [ "${SERVIDOR:-wsgi}" = "asgi" ]; then
+    echo "🚀 Iniciando en modo ASGI (uvicorn)..."
+    if [ "${SQL_INSTRUMENTACION:-False}" != "False" ]; then
+        echo "⚠️  SQL_INSTRUMENTACION solo funciona en modo WSGI; se desactiva"
+    fi
+    export SQL_INSTRUMENTACION=False
+    exec gunicorn core.asgi:application \
+        --worker-class uvicorn.workers.UvicornWorker \
+        --bind 0.0.0.0:$PORT --workers ${WEB_CONCURRENCY:-4} --timeout 120
+fi
+
+echo "🚀 Iniciando en modo WSGI..."
+exec gunicorn core.wsgi:application --bind 0.0.0.0:$PORT --workers 2 --threads 4 --timeout 120
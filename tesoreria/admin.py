@@ -1,5 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from core.admin_mixins import ListadoRapidoMixin
+from core.admin_site import admin_site
 from .models import Pago, PagoDetalle, CuentaBancaria, ExtractoBancario
+from .services.conciliacion import ServicioConciliacion
 
 class PagoDetalleInline(admin.TabularInline):
     model = PagoDetalle
@@ -7,21 +10,40 @@ class PagoDetalleInline(admin.TabularInline):
     fields = ['producto', 'cantidad', 'precio_unitario', 'subtotal']
     readonly_fields = ['subtotal']
 
-@admin.register(Pago)
-class PagoAdmin(admin.ModelAdmin):
-    list_display = ['numero_pago', 'tipo_pago', 'tercero', 'valor', 'fecha_pago', 'estado']
+@admin.register(Pago, site=admin_site)
+class PagoAdmin(ListadoRapidoMixin, admin.ModelAdmin):
+    list_display = ['numero_pago', 'tipo_pago', 'empresa', 'tercero', 'valor', 'fecha_pago', 'estado']
     list_filter = ['tipo_pago', 'estado', 'fecha_pago']
     search_fields = ['numero_pago', 'tercero__razon_social']
+    date_hierarchy = 'fecha_pago'
+    ordering = ['-fecha_pago', '-id']
+    raw_id_fields = ['tercero', 'factura', 'asiento_contable']
     inlines = [PagoDetalleInline]
 
-@admin.register(CuentaBancaria)
+@admin.register(CuentaBancaria, site=admin_site)
 class CuentaBancariaAdmin(admin.ModelAdmin):
-    list_display = ['codigo', 'nombre', 'tipo_cuenta', 'saldo_actual']
+    list_display = ['codigo', 'nombre', 'tipo_cuenta', 'saldo_inicial', 'saldo_actual']
+    readonly_fields = ['saldo_actual']
     list_filter = ['tipo_cuenta']
     search_fields = ['codigo', 'nombre']
+    actions = ['conciliar_extractos']
 
+    @admin.action(description='Conciliar extractos pendientes')
+    def conciliar_extractos(self, request, queryset):
+        """Ejecuta la conciliación automática de las cuentas seleccionadas"""
+        for cuenta in queryset:
+            resultado = ServicioConciliacion.conciliar_cuenta(cuenta)
+            nivel = messages.WARNING if resultado.extractos_pendientes else messages.SUCCESS
+            self.message_user(
+                request,
+                f'{cuenta.codigo}: {resultado.total_conciliados} conciliados, '
+                f'{len(resultado.extractos_pendientes)} líneas y '
+                f'{len(resultado.pagos_pendientes)} pagos pendientes de revisión',
+                nivel,
+            )
 
-@admin.register(ExtractoBancario)
+
+@admin.register(ExtractoBancario, site=admin_site)
 class ExtractoBancarioAdmin(admin.ModelAdmin):
     list_display = ['fecha', 'cuenta', 'descripcion', 'valor', 'conciliado', 'pago']
     list_filter = ['cuenta', 'conciliado']
@@ -0,0 +1,79 @@
+"""
+Comando para conciliar automáticamente los extractos bancarios
+"""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.base import EmpresaCommandMixin
+from tesoreria.models import CuentaBancaria
+from tesoreria.services.conciliacion import ServicioConciliacion, TOLERANCIA_DIAS_DEFECTO
+
+# Máximo de pendientes que se listan por cuenta
+MAX_PENDIENTES_MOSTRADOS = 30
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = 'Concilia las líneas de extracto bancario pendientes contra los pagos pagados'
+
+    def add_arguments(self, parser):
+        self.agregar_argumento_empresa(parser)
+        parser.add_argument('--cuenta', help='Código de la cuenta bancaria (por defecto todas las activas)')
+        parser.add_argument(
+            '--tolerancia',
+            type=int,
+            default=TOLERANCIA_DIAS_DEFECTO,
+            help='Días de diferencia permitidos entre extracto y pago',
+        )
+        parser.add_argument('--desde', help='Fecha inicial del extracto AAAA-MM-DD')
+        parser.add_argument('--hasta', help='Fecha final del extracto AAAA-MM-DD')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo mostrar qué se conciliaría sin guardar cambios',
+        )
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresa = self.obtener_empresa(options['empresa'])
+        desde, hasta = self._obtener_fechas(options)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('🔍 MODO DRY-RUN: Solo mostrando qué se haría...'))
+
+        for cuenta in self._obtener_cuentas(empresa, options['cuenta']):
+            resultado = ServicioConciliacion.conciliar_cuenta(
+                cuenta,
+                tolerancia_dias=options['tolerancia'],
+                fecha_desde=desde,
+                fecha_hasta=hasta,
+                aplicar=not options['dry_run'],
+            )
+            self._mostrar_resultado(cuenta, resultado)
+
+    def _obtener_cuentas(self, empresa, codigo):
+        cuentas = CuentaBancaria.objects.filter(empresa=empresa, activa=True)
+        if codigo:
+            cuentas = cuentas.filter(codigo=codigo)
+            if not cuentas.exists():
+                raise CommandError(f'Cuenta bancaria "{codigo}" no encontrada')
+        return cuentas.order_by('codigo')
+
+    def _obtener_fechas(self, options):
+        try:
+            desde = date.fromisoformat(options['desde']) if options['desde'] else None
+            hasta = date.fromisoformat(options['hasta']) if options['hasta'] else None
+        except ValueError as e:
+            raise CommandError(f'Fecha inválida: {e}')
+        return desde, hasta
+
+    def _mostrar_resultado(self, cuenta, resultado):
+        """Resumen por cuenta y listado de lo que requiere revisión manual"""
+        self.stdout.write(self.style.SUCCESS(
+            f'🏦 {cuenta.codigo} - {cuenta.nombre}: {resultado.total_conciliados} conciliados, '
+            f'{len(resultado.extractos_pendientes)} líneas y {len(resultado.pagos_pendientes)} pagos sin conciliar'
+        ))
+        for extracto in resultado.extractos_pendientes[:MAX_PENDIENTES_MOSTRADOS]:
+            self.stdout.write(f'   📄 Extracto {extracto.fecha} {extracto.valor:,.2f} {extracto.descripcion}')
+        for pago in resultado.pagos_pendientes[:MAX_PENDIENTES_MOSTRADOS]:
+            self.stdout.write(f'   💳 Pago {pago.numero_pago} {pago.fecha_pago} {pago.valor:,.2f}')
@@ -0,0 +1,71 @@
+"""
+Comando para cargar extractos bancarios desde archivos CSV u OFX
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.management.base import EmpresaCommandMixin
+from tesoreria.models import CuentaBancaria
+from tesoreria.services.conciliacion import ServicioConciliacion
+from tesoreria.services.importacion_extractos import (
+    ErrorExtracto,
+    ImportadorExtractos,
+    TAMANO_BLOQUE_EXTRACTO,
+    leer_extracto,
+)
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = 'Importa un extracto bancario (CSV u OFX) sin duplicar movimientos ya cargados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv u .ofx')
+        self.agregar_argumento_empresa(parser)
+        parser.add_argument('--cuenta', required=True, help='Código de la cuenta bancaria')
+        parser.add_argument('--formato', choices=['csv', 'ofx'], help='Formato del archivo (por defecto según extensión)')
+        parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE_EXTRACTO, help='Líneas por inserción')
+        parser.add_argument(
+            '--conciliar',
+            action='store_true',
+            help='Ejecutar la conciliación automática al terminar',
+        )
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresa = self.obtener_empresa(options['empresa'])
+        try:
+            cuenta = CuentaBancaria.objects.get(empresa=empresa, codigo=options['cuenta'])
+        except CuentaBancaria.DoesNotExist:
+            raise CommandError(f'Cuenta bancaria "{options["cuenta"]}" no encontrada')
+
+        formato = options['formato'] or os.path.splitext(options['archivo'])[1].lower().lstrip('.')
+        if formato not in ('csv', 'ofx'):
+            raise CommandError('No se pudo deducir el formato, use --formato csv|ofx')
+
+        self.stdout.write(f'📥 Importando {options["archivo"]} en {cuenta.codigo} - {cuenta.nombre}...')
+        inicio = time.monotonic()
+        with open(options['archivo'], encoding='utf-8-sig', errors='replace', newline='') as archivo:
+            try:
+                # Un archivo con filas inválidas no deja bloques a medio cargar
+                with transaction.atomic():
+                    resultado = ImportadorExtractos(cuenta, options['bloque']).importar(
+                        leer_extracto(archivo, formato)
+                    )
+            except ErrorExtracto as e:
+                raise CommandError(str(e))
+        duracion = time.monotonic() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {resultado.leidas} líneas leídas: {resultado.insertadas} nuevas, '
+            f'{resultado.duplicadas} ya existían ({duracion:.1f}s)'
+        ))
+
+        if options['conciliar']:
+            conciliacion = ServicioConciliacion.conciliar_cuenta(cuenta)
+            self.stdout.write(
+                f'🔗 {conciliacion.total_conciliados} conciliados, '
+                f'{len(conciliacion.extractos_pendientes)} líneas pendientes de revisión'
+            )
@@ -0,0 +1,37 @@
+"""
+Comando para verificar el saldo actual de las cuentas bancarias
+"""
+from django.core.management.base import BaseCommand
+
+from core.management.base import EmpresaCommandMixin
+from tesoreria.services.services import ServicioTesoreria
+
+
+class Command(EmpresaCommandMixin, BaseCommand):
+    help = 'Compara el saldo actual de cada cuenta bancaria contra su saldo inicial más sus pagos'
+
+    def add_arguments(self, parser):
+        self.agregar_argumento_empresa(parser, required=False)
+        parser.add_argument(
+            '--corregir',
+            action='store_true',
+            help='Reemplazar los saldos con diferencias por el valor recalculado',
+        )
+
+    def handle(self, *args, **options):
+        """Punto de entrada principal del comando"""
+        empresa = self.obtener_empresa(options['empresa']) if options['empresa'] else None
+        diferencias = ServicioTesoreria.recalcular_saldos_cuentas(empresa, corregir=options['corregir'])
+
+        for cuenta, mantenido, esperado in diferencias:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ {cuenta.empresa} / {cuenta.codigo}: mantenido {mantenido:,.2f}, '
+                f'recalculado {esperado:,.2f} (diferencia {mantenido - esperado:,.2f})'
+            ))
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('✅ Todos los saldos bancarios coinciden'))
+        elif options['corregir']:
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(diferencias)} cuentas corregidas'))
+        else:
+            self.stdout.write(f'{len(diferencias)} cuentas con diferencias (use --corregir para repararlas)')
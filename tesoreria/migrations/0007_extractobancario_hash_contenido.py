@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:43
+
+import hashlib
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def calcular_hashes_existentes(apps, schema_editor):
+    """Asigna la huella a las líneas ya cargadas (mismo cálculo del importador)"""
+    ExtractoBancario = apps.get_model('tesoreria', 'ExtractoBancario')
+    ocurrencias = Counter()
+    pendientes = []
+    for extracto in ExtractoBancario.objects.order_by('cuenta_id', 'fecha', 'id').iterator():
+        referencia = (extracto.referencia or '').upper()
+        descripcion = (extracto.descripcion or '').upper()
+        clave = (extracto.cuenta_id, extracto.fecha, extracto.valor, referencia, descripcion)
+        ocurrencias[clave] += 1
+        contenido = '|'.join([
+            str(extracto.cuenta_id),
+            extracto.fecha.isoformat(),
+            f'{extracto.valor:.2f}',
+            referencia,
+            descripcion,
+            str(ocurrencias[clave]),
+        ])
+        extracto.hash_contenido = hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+        pendientes.append(extracto)
+        if len(pendientes) >= 1000:
+            ExtractoBancario.objects.bulk_update(pendientes, ['hash_contenido'])
+            pendientes = []
+    if pendientes:
+        ExtractoBancario.objects.bulk_update(pendientes, ['hash_contenido'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tesoreria', '0006_alter_extractobancario_options_pago_cuenta_bancaria'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractobancario',
+            name='hash_contenido',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(calcular_hashes_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:03
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def recalcular_saldo_actual(apps, schema_editor):
+    """
+    Deja saldo_actual = saldo inicial + cobros - egresos pagados.
+
+    Las vistas de egresos descontaban de saldo_actual cada egreso al crearlo
+    (y lo devolvían al eliminarlo); el saldo inicial se reconstruye como
+    saldo_actual más esos egresos.
+    """
+    Pago = apps.get_model('tesoreria', 'Pago')
+    CuentaBancaria = apps.get_model('tesoreria', 'CuentaBancaria')
+    totales = {
+        fila['cuenta_bancaria']: fila
+        for fila in Pago.objects.filter(cuenta_bancaria__isnull=False).values('cuenta_bancaria').annotate(
+            egresos_registrados=Sum('valor', filter=Q(tipo_pago='egreso')),
+            ingresos=Sum('valor', filter=Q(tipo_pago='cobro', estado='pagado')),
+            egresos=Sum('valor', filter=Q(tipo_pago='egreso', estado='pagado')),
+        ).order_by()
+    }
+    for cuenta in CuentaBancaria.objects.all():
+        fila = totales.get(cuenta.pk, {})
+        cuenta.saldo_inicial = cuenta.saldo_actual + (fila.get('egresos_registrados') or 0)
+        cuenta.saldo_actual = cuenta.saldo_inicial + (fila.get('ingresos') or 0) - (fila.get('egresos') or 0)
+        cuenta.save(update_fields=['saldo_inicial', 'saldo_actual'])
+
+
+class Migration(migrations.Migration):
+
+    replaces = [
+        ('tesoreria', '0008_cuentabancaria_saldos_mantenidos'),
+        ('tesoreria', '0009_pago_fecha_index'),
+        ('tesoreria', '0010_pago_keyset_index'),
+        ('tesoreria', '0011_cuentabancaria_saldo_actual_mantenido'),
+    ]
+
+    dependencies = [
+        ('tesoreria', '0007_extractobancario_hash_contenido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cuentabancaria',
+            name='saldo_inicial',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15, verbose_name='Saldo Inicial'),
+        ),
+        migrations.RunPython(recalcular_saldo_actual, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cuentabancaria',
+            name='saldo_actual',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, help_text='Saldo inicial más cobros menos egresos pagados', max_digits=15, verbose_name='Saldo Actual'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['fecha_pago', 'id'], name='tesoreria_p_fecha_p_9e9421_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['empresa', 'tipo_pago', 'fecha_pago', 'numero_pago', 'id'], name='tesoreria_p_empresa_9e9944_idx'),
+        ),
+    ]
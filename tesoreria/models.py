@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.contrib.auth.models import User
@@ -158,11 +159,62 @@ class Pago(models.Model):
         verbose_name_plural = "Pagos"
         unique_together = ['empresa', 'numero_pago']
         ordering = ['-fecha_pago', '-numero_pago']
+        indexes = [
+            # Listado del admin de todas las empresas (ListadoRapidoMixin)
+            models.Index(fields=['fecha_pago', 'id']),
+            # Paginación por cursor de los listados (PaginacionKeysetMixin)
+            models.Index(fields=['empresa', 'tipo_pago', 'fecha_pago', 'numero_pago', 'id']),
+        ]
     
     def __str__(self):
         tipo_display = "Cobro" if self.tipo_pago == 'cobro' else "Egreso"
         return f"{tipo_display} {self.numero_pago} - {self.tercero.razon_social}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._movimiento_original = instance._movimiento_bancario()
+        return instance
+    
+    def _movimiento_bancario(self):
+        """
+        (cuenta_bancaria_id, valor con signo) con que el pago afecta el saldo
+        actual de su cuenta. Solo los pagos pagados mueven la cuenta.
+        """
+        if self.estado != 'pagado' or not self.cuenta_bancaria_id or self.valor is None:
+            return None
+        valor = self.valor if self.tipo_pago == 'cobro' else -self.valor
+        return self.cuenta_bancaria_id, valor
+    
+    def save(self, *args, **kwargs):
+        """
+        Guarda el pago y ajusta en la misma transacción el saldo actual de la
+        cuenta bancaria cuando el pago pasa a pagado, deja de estarlo o cambia
+        su valor o cuenta. Las cargas con ``update()`` o ``bulk_create`` no
+        pasan por aquí y deben terminar con
+        ``ServicioTesoreria.recalcular_saldos_cuentas``.
+        """
+        anterior = getattr(self, '_movimiento_original', None)
+        actual = self._movimiento_bancario()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if anterior != actual:
+                if anterior:
+                    CuentaBancaria.aplicar_movimiento(anterior[0], -anterior[1])
+                if actual:
+                    CuentaBancaria.aplicar_movimiento(actual[0], actual[1])
+        self._movimiento_original = actual
+    
+    def delete(self, *args, **kwargs):
+        """Revierte el movimiento del pago en el saldo actual de la cuenta"""
+        anterior = getattr(self, '_movimiento_original', None)
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            if anterior:
+                CuentaBancaria.aplicar_movimiento(anterior[0], -anterior[1])
+        self._movimiento_original = None
+        return resultado
+    
     @property
     def puede_editarse(self):
         """Verifica si el pago puede editarse"""
@@ -290,12 +342,22 @@ class CuentaBancaria(models.Model):
         help_text="Nombre del banco (si aplica)"
     )
     
-    # Saldo actual
+    # Saldo inicial que registra el usuario al crear la cuenta
+    saldo_inicial = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        verbose_name="Saldo Inicial"
+    )
+    
+    # Saldo actual: lo mantienen los pagos (ver Pago.save y aplicar_movimiento)
     saldo_actual = models.DecimalField(
         max_digits=15,
         decimal_places=2,
         default=Decimal('0.00'),
-        verbose_name="Saldo Actual"
+        editable=False,
+        verbose_name="Saldo Actual",
+        help_text="Saldo inicial más cobros menos egresos pagados"
     )
     
     # Estado
@@ -329,20 +391,40 @@ class CuentaBancaria(models.Model):
             return f"{self.nombre} - {self.banco} ({self.numero_cuenta})"
         return f"{self.nombre} ({self.codigo})"
     
-    def actualizar_saldo(self, valor, es_debito=True):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saldo_inicial_original = instance.__dict__.get('saldo_inicial')
+        return instance
+    
+    def save(self, *args, **kwargs):
         """
-        Actualiza el saldo de la cuenta.
-        
-        Args:
-            valor: Valor a sumar o restar
-            es_debito: True para débito (suma), False para crédito (resta)
+        Al crear la cuenta el saldo actual arranca en el saldo inicial. Después
+        el saldo actual nunca se escribe desde la instancia (podría estar
+        desactualizada): un cambio del saldo inicial se suma con
+        ``aplicar_movimiento``.
         """
-        if es_debito:
-            self.saldo_actual += valor
-        else:
-            self.saldo_actual -= valor
+        if self._state.adding:
+            self.saldo_actual = self.saldo_inicial
+            super().save(*args, **kwargs)
+            self._saldo_inicial_original = self.saldo_inicial
+            return
         
-        self.save(update_fields=['saldo_actual'])
+        campos = kwargs.pop('update_fields', None)
+        if campos is None:
+            campos = [f.attname for f in self._meta.concrete_fields if not f.primary_key]
+        campos = [campo for campo in campos if campo != 'saldo_actual']
+        anterior = getattr(self, '_saldo_inicial_original', self.saldo_inicial)
+        with transaction.atomic():
+            super().save(*args, update_fields=campos, **kwargs)
+            if 'saldo_inicial' in campos and self.saldo_inicial != anterior:
+                CuentaBancaria.aplicar_movimiento(self.pk, self.saldo_inicial - anterior)
+        self._saldo_inicial_original = self.saldo_inicial
+    
+    @staticmethod
+    def aplicar_movimiento(cuenta_id, valor):
+        """Suma ``valor`` al saldo actual con un UPDATE atómico (sin leer la fila)"""
+        CuentaBancaria.objects.filter(pk=cuenta_id).update(saldo_actual=F('saldo_actual') + valor)
     
     @property
     def saldo_formateado(self):
@@ -433,6 +515,8 @@ class ExtractoBancario(models.Model):
     valor = models.DecimalField(max_digits=15, decimal_places=2)
     conciliado = models.BooleanField(default=False)
     pago = models.ForeignKey('tesoreria.Pago', null=True, blank=True, on_delete=models.SET_NULL, related_name='conciliaciones')
+    # Huella del contenido de la línea; evita duplicados al reimportar extractos
+    hash_contenido = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         verbose_name = 'Extracto Bancario'
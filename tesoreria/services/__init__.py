@@ -1,3 +1,5 @@
 from .services import ServicioTesoreria
+from .conciliacion import ServicioConciliacion
+from .importacion_extractos import ImportadorExtractos, leer_extracto
 
-__all__ = ['ServicioTesoreria']
\ No newline at end of file
+__all__ = ['ServicioTesoreria', 'ServicioConciliacion', 'ImportadorExtractos', 'leer_extracto']
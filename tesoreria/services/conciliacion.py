@@ -0,0 +1,181 @@
+"""
+Conciliación bancaria automática.
+
+Cruza las líneas de ExtractoBancario sin conciliar con los pagos pagados de
+la misma cuenta bancaria. Los pagos se indexan por valor en un diccionario,
+así cada línea del extracto solo se compara con los pagos de su mismo valor
+y el costo total es aproximadamente lineal.
+"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import transaction
+
+from tesoreria.models import Pago, ExtractoBancario
+
+# Días de diferencia permitidos entre la fecha del extracto y la del pago
+TOLERANCIA_DIAS_DEFECTO = 3
+
+_NO_ALFANUMERICO = re.compile(r'[^0-9A-Z]')
+
+
+def normalizar_referencia(texto):
+    """Mayúsculas y sin espacios ni signos, para comparar referencias"""
+    return _NO_ALFANUMERICO.sub('', (texto or '').upper())
+
+
+def valor_con_signo(pago):
+    """Los cobros entran a la cuenta (+) y los egresos salen (-)"""
+    return pago.valor if pago.tipo_pago == 'cobro' else -pago.valor
+
+
+@dataclass
+class ResultadoConciliacion:
+    """Resultado de conciliar una cuenta bancaria"""
+    conciliados: list = field(default_factory=list)
+    extractos_pendientes: list = field(default_factory=list)
+    pagos_pendientes: list = field(default_factory=list)
+
+    @property
+    def total_conciliados(self):
+        return len(self.conciliados)
+
+
+class ServicioConciliacion:
+    """
+    Servicio para conciliar extractos bancarios contra pagos.
+    """
+
+    @staticmethod
+    def conciliar_cuenta(cuenta, tolerancia_dias=TOLERANCIA_DIAS_DEFECTO,
+                         fecha_desde=None, fecha_hasta=None, aplicar=True):
+        """
+        Concilia los movimientos pendientes de una cuenta bancaria.
+
+        Criterios, en orden de confianza:
+        1. Mismo valor, fecha dentro de la tolerancia y referencia coincidente
+           (referencia del pago o número de pago dentro del extracto).
+        2. Mismo valor y la fecha más cercana dentro de la tolerancia.
+
+        Args:
+            cuenta: Instancia de CuentaBancaria
+            tolerancia_dias: Diferencia máxima de días entre extracto y pago
+            fecha_desde, fecha_hasta: Rango opcional de fechas del extracto
+            aplicar: Si es False solo calcula las parejas sin guardarlas
+
+        Returns:
+            ResultadoConciliacion
+        """
+        extractos = ExtractoBancario.objects.filter(cuenta=cuenta, conciliado=False)
+        if fecha_desde:
+            extractos = extractos.filter(fecha__gte=fecha_desde)
+        if fecha_hasta:
+            extractos = extractos.filter(fecha__lte=fecha_hasta)
+        extractos = list(extractos.order_by('fecha', 'id'))
+
+        pagos = Pago.objects.filter(
+            cuenta_bancaria=cuenta,
+            estado='pagado',
+            conciliaciones__isnull=True,
+        ).select_related('tercero')
+        if extractos:
+            margen = timedelta(days=tolerancia_dias)
+            pagos = pagos.filter(
+                fecha_pago__gte=extractos[0].fecha - margen,
+                fecha_pago__lte=extractos[-1].fecha + margen,
+            )
+        pagos = list(pagos.order_by('fecha_pago', 'id'))
+
+        resultado = ServicioConciliacion.emparejar(extractos, pagos, tolerancia_dias)
+        if aplicar and resultado.conciliados:
+            ServicioConciliacion.guardar_conciliaciones(resultado.conciliados)
+        return resultado
+
+    @staticmethod
+    def emparejar(extractos, pagos, tolerancia_dias=TOLERANCIA_DIAS_DEFECTO):
+        """
+        Empareja en memoria listas de extractos y pagos.
+
+        Returns:
+            ResultadoConciliacion con las parejas (extracto, pago) y lo que
+            quedó sin conciliar.
+        """
+        tolerancia = timedelta(days=tolerancia_dias)
+
+        # Índices: valor -> pagos y (valor, referencia) -> pagos
+        por_valor = defaultdict(list)
+        por_referencia = defaultdict(list)
+        for pago in pagos:
+            valor = valor_con_signo(pago)
+            por_valor[valor].append(pago)
+            for referencia in {normalizar_referencia(pago.referencia), normalizar_referencia(pago.numero_pago)}:
+                if referencia:
+                    por_referencia[(valor, referencia)].append(pago)
+
+        usados = set()
+        resultado = ResultadoConciliacion()
+        sin_referencia = []
+
+        # 1. Coincidencia por referencia
+        for extracto in extractos:
+            pago = ServicioConciliacion._buscar_por_referencia(extracto, por_referencia, usados, tolerancia)
+            if pago is None:
+                sin_referencia.append(extracto)
+            else:
+                usados.add(pago.pk)
+                resultado.conciliados.append((extracto, pago))
+
+        # 2. Coincidencia por valor y fecha más cercana
+        for extracto in sin_referencia:
+            pago = ServicioConciliacion._mas_cercano(
+                extracto.fecha, por_valor.get(extracto.valor, ()), usados, tolerancia
+            )
+            if pago is None:
+                resultado.extractos_pendientes.append(extracto)
+            else:
+                usados.add(pago.pk)
+                resultado.conciliados.append((extracto, pago))
+
+        resultado.pagos_pendientes = [p for p in pagos if p.pk not in usados]
+        return resultado
+
+    @staticmethod
+    def _buscar_por_referencia(extracto, por_referencia, usados, tolerancia):
+        """Busca la referencia del extracto y, si no, tokens de la descripción"""
+        candidatos_ref = [normalizar_referencia(extracto.referencia)]
+        candidatos_ref += [normalizar_referencia(t) for t in (extracto.descripcion or '').split()]
+        for referencia in candidatos_ref:
+            if not referencia:
+                continue
+            pago = ServicioConciliacion._mas_cercano(
+                extracto.fecha, por_referencia.get((extracto.valor, referencia), ()), usados, tolerancia
+            )
+            if pago is not None:
+                return pago
+        return None
+
+    @staticmethod
+    def _mas_cercano(fecha, candidatos, usados, tolerancia):
+        """Pago no usado con la fecha más cercana dentro de la tolerancia"""
+        mejor = None
+        mejor_diferencia = None
+        for pago in candidatos:
+            if pago.pk in usados:
+                continue
+            diferencia = abs(pago.fecha_pago - fecha)
+            if diferencia <= tolerancia and (mejor is None or diferencia < mejor_diferencia):
+                mejor, mejor_diferencia = pago, diferencia
+        return mejor
+
+    @staticmethod
+    @transaction.atomic
+    def guardar_conciliaciones(parejas):
+        """Marca las líneas conciliadas con un único bulk_update"""
+        extractos = []
+        for extracto, pago in parejas:
+            extracto.pago = pago
+            extracto.conciliado = True
+            extractos.append(extracto)
+        ExtractoBancario.objects.bulk_update(extractos, ['pago', 'conciliado'], batch_size=500)
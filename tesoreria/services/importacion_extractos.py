@@ -0,0 +1,230 @@
+"""
+Importación de extractos bancarios (CSV y OFX).
+
+Los archivos se leen como generadores, cada línea se normaliza (fecha,
+valor, textos) y se le calcula una huella ``hash_contenido``. La inserción
+se hace por bloques con ``bulk_create(ignore_conflicts=True)`` sobre el
+índice único de la huella, de modo que reimportar un archivo o uno que se
+solape con otro ya cargado no duplica movimientos.
+"""
+import csv
+import hashlib
+import io
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from tesoreria.models import ExtractoBancario
+
+# Líneas por sentencia INSERT
+TAMANO_BLOQUE_EXTRACTO = 2000
+
+FORMATOS_FECHA = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%Y%m%d')
+
+_ESPACIOS = re.compile(r'\s+')
+_OFX_ETIQUETA = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)', re.IGNORECASE)
+
+
+class ErrorExtracto(ValueError):
+    """Línea del extracto que no se puede interpretar"""
+
+
+@dataclass
+class LineaExtracto:
+    """Movimiento normalizado leído del archivo del banco"""
+    fecha: date
+    descripcion: str
+    referencia: str
+    valor: Decimal
+
+
+@dataclass
+class ResultadoImportacionExtracto:
+    leidas: int = 0
+    insertadas: int = 0
+    duplicadas: int = 0
+
+
+# ===== NORMALIZACIÓN =====
+
+def normalizar_texto(texto):
+    return _ESPACIOS.sub(' ', (texto or '').strip())
+
+
+def normalizar_fecha(valor):
+    """Acepta los formatos usuales de los bancos (y fechas OFX con hora)"""
+    valor = (valor or '').strip()
+    if len(valor) > 8 and valor[:8].isdigit():
+        valor = valor[:8]
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    raise ErrorExtracto(f'Fecha inválida: "{valor}"')
+
+
+def normalizar_valor(valor):
+    """
+    Convierte montos como "1.234.567,89", "1,234,567.89", "$ -1.500" o
+    "(250,00)" a Decimal con dos decimales.
+    """
+    texto = (valor or '').strip().replace('$', '').replace(' ', '')
+    negativo = texto.startswith('(') and texto.endswith(')')
+    texto = texto.strip('()')
+    if not texto:
+        raise ErrorExtracto('Valor vacío')
+
+    if ',' in texto and '.' in texto:
+        # El último separador es el decimal
+        decimal_sep = ',' if texto.rfind(',') > texto.rfind('.') else '.'
+        miles_sep = '.' if decimal_sep == ',' else ','
+        texto = texto.replace(miles_sep, '').replace(decimal_sep, '.')
+    elif ',' in texto:
+        entero, _, decimales = texto.rpartition(',')
+        texto = f'{entero.replace(",", "")}.{decimales}' if len(decimales) <= 2 else texto.replace(',', '')
+    elif texto.count('.') > 1 or (texto.count('.') == 1 and len(texto.rpartition('.')[2]) == 3):
+        texto = texto.replace('.', '')
+
+    try:
+        numero = Decimal(texto).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        numero = None
+    if numero is None or not numero.is_finite():
+        raise ErrorExtracto(f'Valor inválido: "{valor}"')
+    return -numero if negativo else numero
+
+
+def calcular_hash(cuenta_id, linea, ocurrencia):
+    """
+    Huella de la línea. ``ocurrencia`` distingue movimientos idénticos del
+    mismo archivo (dos transferencias iguales el mismo día).
+    """
+    contenido = '|'.join([
+        str(cuenta_id),
+        linea.fecha.isoformat(),
+        f'{linea.valor:.2f}',
+        linea.referencia.upper(),
+        linea.descripcion.upper(),
+        str(ocurrencia),
+    ])
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+# ===== LECTORES =====
+
+def leer_csv(archivo, delimitador=None):
+    """
+    Lee un CSV con columnas ``fecha, descripcion, referencia`` y ``valor``
+    o ``debito``/``credito`` (los débitos se registran como salidas).
+    """
+    if delimitador is None:
+        muestra = archivo.read(4096)
+        archivo.seek(0)
+        delimitador = ';' if muestra.count(';') > muestra.count(',') else ','
+
+    for numero, fila in enumerate(csv.DictReader(archivo, delimiter=delimitador), start=2):
+        fila = {(k or '').strip().lower(): (v or '').strip() for k, v in fila.items()}
+        try:
+            if fila.get('valor'):
+                valor = normalizar_valor(fila['valor'])
+            else:
+                credito = normalizar_valor(fila['credito']) if fila.get('credito') else Decimal('0.00')
+                debito = normalizar_valor(fila['debito']) if fila.get('debito') else Decimal('0.00')
+                valor = credito - debito
+            yield LineaExtracto(
+                fecha=normalizar_fecha(fila.get('fecha')),
+                descripcion=normalizar_texto(fila.get('descripcion'))[:255],
+                referencia=normalizar_texto(fila.get('referencia'))[:128],
+                valor=valor,
+            )
+        except ErrorExtracto as e:
+            raise ErrorExtracto(f'Fila {numero}: {e}')
+
+
+def leer_ofx(archivo):
+    """Lee los bloques <STMTTRN> de un OFX (SGML o XML) línea por línea"""
+    actual = None
+    for linea in archivo:
+        for cierre, etiqueta, valor in _OFX_ETIQUETA.findall(linea):
+            etiqueta = etiqueta.upper()
+            if etiqueta == 'STMTTRN':
+                if cierre and actual is not None:
+                    yield _linea_ofx(actual)
+                    actual = None
+                elif not cierre:
+                    actual = {}
+            elif actual is not None and not cierre:
+                actual[etiqueta] = valor.strip()
+
+
+def _linea_ofx(datos):
+    descripcion = ' '.join(filter(None, [datos.get('NAME'), datos.get('MEMO')]))
+    return LineaExtracto(
+        fecha=normalizar_fecha(datos.get('DTPOSTED')),
+        descripcion=normalizar_texto(descripcion)[:255],
+        referencia=normalizar_texto(datos.get('CHECKNUM') or datos.get('FITID'))[:128],
+        valor=normalizar_valor(datos.get('TRNAMT')),
+    )
+
+
+def leer_extracto(archivo, formato):
+    """Generador de LineaExtracto para el formato indicado"""
+    if isinstance(archivo, (bytes, bytearray)):
+        archivo = io.StringIO(archivo.decode('utf-8-sig', errors='replace'))
+    if formato == 'csv':
+        return leer_csv(archivo)
+    if formato == 'ofx':
+        return leer_ofx(archivo)
+    raise ValueError(f'Formato no soportado: {formato}')
+
+
+# ===== IMPORTADOR =====
+
+class ImportadorExtractos:
+    """
+    Carga las líneas de un extracto en una cuenta bancaria.
+
+    Uso:
+        resultado = ImportadorExtractos(cuenta).importar(leer_extracto(archivo, 'ofx'))
+    """
+
+    def __init__(self, cuenta, tamano_bloque=TAMANO_BLOQUE_EXTRACTO):
+        self.cuenta = cuenta
+        self.tamano_bloque = tamano_bloque
+
+    def importar(self, lineas):
+        resultado = ResultadoImportacionExtracto()
+        ocurrencias = Counter()
+        bloque = []
+
+        for linea in lineas:
+            clave = (linea.fecha, linea.valor, linea.referencia.upper(), linea.descripcion.upper())
+            ocurrencias[clave] += 1
+            bloque.append(ExtractoBancario(
+                cuenta=self.cuenta,
+                fecha=linea.fecha,
+                descripcion=linea.descripcion,
+                referencia=linea.referencia,
+                valor=linea.valor,
+                hash_contenido=calcular_hash(self.cuenta.pk, linea, ocurrencias[clave]),
+            ))
+            if len(bloque) >= self.tamano_bloque:
+                self._insertar(bloque, resultado)
+                bloque = []
+
+        if bloque:
+            self._insertar(bloque, resultado)
+        return resultado
+
+    def _insertar(self, bloque, resultado):
+        """Inserta el bloque ignorando las huellas que ya existen"""
+        hashes = [e.hash_contenido for e in bloque]
+        existentes = ExtractoBancario.objects.filter(hash_contenido__in=hashes).count()
+        ExtractoBancario.objects.bulk_create(bloque, batch_size=self.tamano_bloque, ignore_conflicts=True)
+
+        resultado.leidas += len(bloque)
+        resultado.duplicadas += existentes
+        resultado.insertadas += len(bloque) - existentes
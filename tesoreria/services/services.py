@@ -3,6 +3,7 @@ Servicios de lógica de negocio para el módulo de tesorería.
 Maneja las operaciones complejas de pagos, cobros y cuentas bancarias.
 """
 from django.db import transaction
+from django.db.models import Q, Sum
 from django.utils import timezone
 from decimal import Decimal
 from tesoreria.models import Pago, CuentaBancaria, PagoDetalle
@@ -81,6 +82,31 @@ class ServicioTesoreria:
         
         return True, f"Pago anulado exitosamente. Estado anterior: {estado_anterior}"
     
+    @staticmethod
+    def siguiente_numero_cobro(empresa):
+        """
+        Obtiene el siguiente número de cobro (COB-000001) de una empresa.
+        
+        Args:
+            empresa: Instancia de Empresa
+            
+        Returns:
+            str: Siguiente número de cobro
+        """
+        ultimo_cobro = Pago.objects.filter(
+            empresa=empresa,
+            tipo_pago='cobro'
+        ).order_by('-numero_pago').first()
+        
+        if ultimo_cobro:
+            try:
+                ultimo_numero = int(ultimo_cobro.numero_pago.replace('COB-', ''))
+                return f'COB-{(ultimo_numero + 1):06d}'
+            except (ValueError, AttributeError):
+                pass
+        
+        return 'COB-000001'
+    
     @staticmethod
     @transaction.atomic
     def cobrar_factura(factura, metodo_pago, usuario, fecha_pago=None):
@@ -155,4 +181,66 @@ class ServicioTesoreria:
         pago.estado = 'pagado'
         pago.save()
         
-        return True, "Pago marcado como pagado exitosamente"
\ No newline at end of file
+        return True, "Pago marcado como pagado exitosamente"
+    
+    @staticmethod
+    def calcular_movimientos_cuentas(empresa=None):
+        """
+        Ingresos y egresos pagados por cuenta bancaria en una sola consulta.
+        
+        Args:
+            empresa: Empresa a consultar (None para todas)
+            
+        Returns:
+            dict: {cuenta_bancaria_id: (ingresos, egresos)}
+        """
+        pagos = Pago.objects.filter(estado='pagado', cuenta_bancaria__isnull=False)
+        if empresa is not None:
+            pagos = pagos.filter(empresa=empresa)
+        
+        totales = pagos.values('cuenta_bancaria').annotate(
+            ingresos=Sum('valor', filter=Q(tipo_pago='cobro')),
+            egresos=Sum('valor', filter=Q(tipo_pago='egreso')),
+        ).order_by()
+        
+        return {
+            fila['cuenta_bancaria']: (fila['ingresos'] or Decimal('0.00'), fila['egresos'] or Decimal('0.00'))
+            for fila in totales
+        }
+    
+    @staticmethod
+    @transaction.atomic
+    def recalcular_saldos_cuentas(empresa=None, corregir=False):
+        """
+        Compara el saldo actual de cada cuenta bancaria con su saldo inicial
+        más los cobros y menos los egresos pagados.
+        
+        Las cuentas se bloquean antes de sumar los pagos: un pago que se
+        guarda al mismo tiempo espera al bloqueo (su UPDATE toca la misma
+        fila) y no aparece como una diferencia falsa.
+        
+        Args:
+            empresa: Empresa a revisar (None para todas)
+            corregir: Reemplazar los saldos con diferencias por el recalculado
+            
+        Returns:
+            list: (cuenta, saldo_mantenido, saldo_esperado) de las cuentas con diferencias
+        """
+        cuentas = CuentaBancaria.objects.select_for_update(of=('self',)).select_related('empresa')
+        if empresa is not None:
+            cuentas = cuentas.filter(empresa=empresa)
+        cuentas = list(cuentas.order_by('empresa_id', 'codigo'))
+        
+        movimientos = ServicioTesoreria.calcular_movimientos_cuentas(empresa)
+        diferencias = []
+        for cuenta in cuentas:
+            ingresos, egresos = movimientos.get(cuenta.pk, (Decimal('0.00'), Decimal('0.00')))
+            esperado = cuenta.saldo_inicial + ingresos - egresos
+            if cuenta.saldo_actual != esperado:
+                diferencias.append((cuenta, cuenta.saldo_actual, esperado))
+        
+        if corregir and diferencias:
+            for cuenta, _, esperado in diferencias:
+                cuenta.saldo_actual = esperado
+            CuentaBancaria.objects.bulk_update([d[0] for d in diferencias], ['saldo_actual'], batch_size=500)
+        return diferencias
@@ -1,3 +1,413 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from catalogos.models import MetodoPago, Tercero
+from core.admin_site import admin_site
+from core.keyset import codificar_cursor
+from core.test_settings import TEST_USER_PASSWORD
+from empresas.models import Empresa, PerfilEmpresa
+from .models import CuentaBancaria, ExtractoBancario, Pago
+from .services import ServicioTesoreria
+from .services.conciliacion import ServicioConciliacion
+from .services.importacion_extractos import (
+    ErrorExtracto,
+    ImportadorExtractos,
+    leer_extracto,
+    normalizar_valor,
+)
+from .views import FlujoCajaView, IngresoListView
+
+
+class TesoreriaTestBase(TestCase):
+    """Empresa con un tercero, un método de pago y una cuenta bancaria"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password=TEST_USER_PASSWORD
+        )
+        self.empresa = Empresa.objects.create(
+            nit='123456789-0',
+            razon_social='Test Company SAS',
+            direccion='Calle 123',
+            ciudad='Bogotá',
+            telefono='3001234567',
+            email='empresa@test.com',
+            propietario=self.user
+        )
+        PerfilEmpresa.objects.create(usuario=self.user, empresa=self.empresa, rol='admin', asignado_por=self.user)
+        self.tercero = Tercero.objects.create(
+            empresa=self.empresa,
+            tipo_tercero='ambos',
+            numero_documento='900123456',
+            razon_social='Tercero Test',
+        )
+        self.metodo_pago = MetodoPago.objects.create(
+            empresa=self.empresa,
+            codigo='TRF',
+            nombre='Transferencia',
+            tipo_metodo='TRANSFERENCIA'
+        )
+        self.cuenta = CuentaBancaria.objects.create(
+            empresa=self.empresa,
+            codigo='B01',
+            nombre='Cuenta Corriente',
+            tipo_cuenta='corriente',
+            saldo_inicial=Decimal('1000.00'),
+        )
+
+    def _pago(self, numero, tipo, fecha, valor, estado='pagado', guardar=True, **extra):
+        pago = Pago(
+            empresa=self.empresa,
+            numero_pago=numero,
+            fecha_pago=fecha,
+            tipo_pago=tipo,
+            tercero=self.tercero,
+            metodo_pago=self.metodo_pago,
+            cuenta_bancaria=extra.pop('cuenta_bancaria', self.cuenta),
+            valor=Decimal(valor),
+            estado=estado,
+            creado_por=self.user,
+            **extra
+        )
+        if guardar:
+            pago.save()
+        return pago
+
+    def _saldo(self, cuenta=None):
+        return CuentaBancaria.objects.get(pk=(cuenta or self.cuenta).pk).saldo_actual
+
+
+class SaldosCuentasTest(TesoreriaTestBase):
+    """Tests para el saldo mantenido de las cuentas bancarias"""
+
+    def test_saldo_actual_sigue_a_los_pagos(self):
+        """Solo los pagos pagados mueven el saldo, y se revierten al cambiar"""
+        self.assertEqual(self._saldo(), Decimal('1000.00'))
+        # Instancia leída antes de los pagos: guardarla no pisa el saldo
+        desactualizada = CuentaBancaria.objects.get(pk=self.cuenta.pk)
+
+        cobro = self._pago('COB-1', 'cobro', '2024-01-05', '500.00')
+        egreso = self._pago('EGR-1', 'egreso', '2024-01-06', '200.00', estado='pendiente')
+        self.assertEqual(self._saldo(), Decimal('1500.00'))
+
+        egreso.estado = 'pagado'
+        egreso.save()
+        self.assertEqual(self._saldo(), Decimal('1300.00'))
+        egreso.valor = Decimal('300.00')
+        egreso.save()
+        self.assertEqual(self._saldo(), Decimal('1200.00'))
+
+        otra = CuentaBancaria.objects.create(
+            empresa=self.empresa, codigo='B02', nombre='Ahorros', tipo_cuenta='ahorros'
+        )
+        egreso.cuenta_bancaria = otra
+        egreso.save()
+        self.assertEqual((self._saldo(), self._saldo(otra)), (Decimal('1500.00'), Decimal('-300.00')))
+        egreso.delete()
+        self.assertEqual(self._saldo(otra), Decimal('0.00'))
+
+        ServicioTesoreria.anular_pago(Pago.objects.get(pk=cobro.pk))
+        self.assertEqual(self._saldo(), Decimal('1000.00'))
+
+        desactualizada.saldo_inicial = Decimal('1200.00')
+        desactualizada.nombre = 'Cuenta Principal'
+        desactualizada.save()
+        self._pago('COB-2', 'cobro', '2024-01-07', '50.00')
+        self.assertEqual(self._saldo(), Decimal('1250.00'))
+
+    def test_vista_y_verificacion(self):
+        """La vista da el mismo saldo agrupado o mantenido y el comando repara cargas masivas"""
+        self._pago('COB-1', 'cobro', '2024-01-05', '500.00')
+        # bulk_create no pasa por Pago.save
+        Pago.objects.bulk_create([self._pago('EGR-1', 'egreso', '2024-01-06', '300.00', guardar=False)])
+
+        salida = io.StringIO()
+        call_command('verificar_saldos_bancarios', '--empresa', self.empresa.nit, stdout=salida)
+        self.assertIn('mantenido 1,500.00, recalculado 1,200.00', salida.getvalue())
+        self.assertEqual(self._saldo(), Decimal('1500.00'))
+
+        call_command('verificar_saldos_bancarios', '--corregir', stdout=io.StringIO())
+        self.assertEqual(self._saldo(), Decimal('1200.00'))
+        self.assertEqual(ServicioTesoreria.recalcular_saldos_cuentas(self.empresa), [])
+
+        self.client.force_login(self.user)
+        for mantenidos in (False, True):
+            with override_settings(TESORERIA_USAR_SALDOS_MANTENIDOS=mantenidos):
+                response = self.client.get(reverse('tesoreria:saldos_cuentas'))
+            self.assertEqual(response.status_code, 200)
+            (item,) = response.context['cuentas_con_saldo']
+            self.assertEqual((item['saldo'], item['movimiento_neto']), (Decimal('1200.00'), Decimal('200.00')))
+            self.assertEqual(response.context['saldo_total'], Decimal('1200.00'))
+            if not mantenidos:
+                self.assertEqual((item['ingresos'], item['egresos']), (Decimal('500.00'), Decimal('300.00')))
+
+
+class ConciliacionBancariaTest(TesoreriaTestBase):
+    """Tests para la conciliación automática de extractos"""
+
+    def _extracto(self, fecha, valor, referencia='', descripcion='Movimiento'):
+        return ExtractoBancario.objects.create(
+            cuenta=self.cuenta, fecha=fecha, valor=Decimal(valor),
+            referencia=referencia, descripcion=descripcion
+        )
+
+    def test_conciliar_cuenta(self):
+        """Empareja por referencia, luego por valor y fecha, y reporta lo pendiente"""
+        egreso_1 = self._pago('EGR-1', 'egreso', '2024-01-10', '300.00', referencia='TRF-001')
+        egreso_2 = self._pago('EGR-2', 'egreso', '2024-01-11', '300.00', referencia='TRF-002')
+        cobro = self._pago('COB-1', 'cobro', '2024-01-15', '500.00')
+        sin_extracto = self._pago('COB-2', 'cobro', '2024-01-20', '80.00')
+        self._pago('COB-3', 'cobro', '2024-01-16', '700.00', estado='pendiente')
+
+        # La referencia gana aunque el otro egreso tenga la fecha más cercana
+        por_referencia = self._extracto('2024-01-11', '-300.00', referencia='trf 001')
+        por_fecha = self._extracto('2024-01-12', '-300.00')
+        cobro_extracto = self._extracto('2024-01-17', '500.00', descripcion='Consignación COB-1')
+        fuera_de_tolerancia = self._extracto('2024-01-25', '500.00')
+        sin_pago = self._extracto('2024-01-15', '999.00')
+        pendiente = self._extracto('2024-01-16', '700.00')
+
+        simulado = ServicioConciliacion.conciliar_cuenta(self.cuenta, aplicar=False)
+        self.assertEqual(simulado.total_conciliados, 3)
+        self.assertFalse(ExtractoBancario.objects.filter(conciliado=True).exists())
+
+        resultado = ServicioConciliacion.conciliar_cuenta(self.cuenta)
+        self.assertEqual(
+            {(extracto.pk, pago.pk) for extracto, pago in resultado.conciliados},
+            {(por_referencia.pk, egreso_1.pk), (por_fecha.pk, egreso_2.pk), (cobro_extracto.pk, cobro.pk)}
+        )
+        self.assertEqual(
+            [extracto.pk for extracto in resultado.extractos_pendientes],
+            [sin_pago.pk, pendiente.pk, fuera_de_tolerancia.pk]
+        )
+        self.assertEqual([pago.pk for pago in resultado.pagos_pendientes], [sin_extracto.pk])
+        self.assertEqual(
+            dict(ExtractoBancario.objects.filter(conciliado=True).values_list('pk', 'pago_id')),
+            {por_referencia.pk: egreso_1.pk, por_fecha.pk: egreso_2.pk, cobro_extracto.pk: cobro.pk}
+        )
+
+        # Con más tolerancia entra un cobro a cuatro días; lo ya conciliado no se repite
+        cobro_tardio = self._pago('COB-4', 'cobro', '2024-01-21', '500.00')
+        resultado = ServicioConciliacion.conciliar_cuenta(self.cuenta, tolerancia_dias=5)
+        self.assertEqual(
+            [(extracto.pk, pago.pk) for extracto, pago in resultado.conciliados],
+            [(fuera_de_tolerancia.pk, cobro_tardio.pk)]
+        )
+        self.assertEqual([extracto.pk for extracto in resultado.extractos_pendientes], [sin_pago.pk, pendiente.pk])
+
+    def test_admin_publicado(self):
+        """Cuentas y extractos se administran desde el sitio publicado"""
+        for modelo in (CuentaBancaria, ExtractoBancario, Pago):
+            self.assertIn(modelo, admin_site._registry)
+            self.assertNotIn(modelo, admin.site._registry)
+        self.assertIn('conciliar_extractos', admin_site._registry[CuentaBancaria].actions)
+
+
+class ImportacionExtractosTest(TesoreriaTestBase):
+    """Tests para la carga de extractos CSV y OFX"""
+
+    CSV = (
+        'fecha;descripcion;referencia;debito;credito\n'
+        '05/01/2024;Consignación  cliente;C-1;;1.500.000,00\n'
+        '06/01/2024;Pago proveedor;TRF-9;250,00;\n'
+        '06/01/2024;Pago proveedor;TRF-9;250,00;\n'
+    )
+    OFX = (
+        '<OFX><BANKTRANLIST>\n'
+        '<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240107120000<TRNAMT>-80.50<FITID>F1<NAME>Comisión</STMTTRN>\n'
+        '<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240108<TRNAMT>1,234,567.89<FITID>F2<MEMO>Abono</STMTTRN>\n'
+        '</BANKTRANLIST></OFX>\n'
+    )
+
+    def test_normalizar_valor(self):
+        """Separadores locales, signos y paréntesis; rechaza valores no numéricos"""
+        for texto, esperado in (
+            ('1.234.567,89', '1234567.89'),
+            ('1,234,567.89', '1234567.89'),
+            ('$ -1.500', '-1500.00'),
+            ('(250,00)', '-250.00'),
+            ('1,5', '1.50'),
+            ('12.50', '12.50'),
+        ):
+            self.assertEqual(normalizar_valor(texto), Decimal(esperado), texto)
+        for texto in ('', '()', 'abc', 'NaN', 'Infinity'):
+            with self.assertRaises(ErrorExtracto, msg=texto):
+                normalizar_valor(texto)
+
+    def test_reimportar_no_duplica(self):
+        """Las líneas repetidas del archivo se cargan, y reimportar no duplica nada"""
+        importador = ImportadorExtractos(self.cuenta, tamano_bloque=2)
+        resultado = importador.importar(leer_extracto(self.CSV.encode(), 'csv'))
+        self.assertEqual((resultado.leidas, resultado.insertadas, resultado.duplicadas), (3, 3, 0))
+        self.assertEqual(
+            sorted(ExtractoBancario.objects.values_list('descripcion', 'valor')),
+            [('Consignación cliente', Decimal('1500000.00')),
+             ('Pago proveedor', Decimal('-250.00')),
+             ('Pago proveedor', Decimal('-250.00'))]
+        )
+
+        resultado = importador.importar(leer_extracto(self.CSV.encode(), 'csv'))
+        self.assertEqual((resultado.insertadas, resultado.duplicadas), (0, 3))
+
+        # Un archivo que se solapa solo agrega lo nuevo
+        solapado = self.CSV + '07/01/2024;Pago proveedor;TRF-9;250,00;\n'
+        resultado = importador.importar(leer_extracto(solapado.encode(), 'csv'))
+        self.assertEqual((resultado.insertadas, resultado.duplicadas), (1, 3))
+
+        resultado = importador.importar(leer_extracto(self.OFX.encode(), 'ofx'))
+        self.assertEqual(resultado.insertadas, 2)
+        comision = ExtractoBancario.objects.get(referencia='F1')
+        self.assertEqual((comision.fecha, comision.valor), (date(2024, 1, 7), Decimal('-80.50')))
+        self.assertEqual(ExtractoBancario.objects.count(), 6)
+
+    def test_comando_importar_extracto(self):
+        """El comando carga y concilia, y rechaza archivos con filas inválidas sin cargar nada"""
+        self._pago('COB-1', 'cobro', '2024-01-05', '1500000.00', referencia='C-1')
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'enero.csv')
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(self.CSV)
+            salida = io.StringIO()
+            call_command(
+                'importar_extracto', ruta, '--empresa', self.empresa.nit, '--cuenta', 'B01',
+                '--conciliar', stdout=salida
+            )
+            self.assertIn('3 nuevas, 0 ya existían', salida.getvalue())
+            self.assertIn('1 conciliados, 2 líneas pendientes', salida.getvalue())
+
+            ruta = os.path.join(directorio, 'febrero.txt')
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                archivo.write(
+                    'fecha,descripcion,valor\n'
+                    '2024-02-01,Abono,100\n'
+                    '2024-02-30,Abono,200\n'
+                )
+            with self.assertRaisesMessage(CommandError, 'use --formato'):
+                call_command('importar_extracto', ruta, '--empresa', self.empresa.nit, '--cuenta', 'B01')
+            with self.assertRaisesMessage(CommandError, 'Fila 3: Fecha inválida'):
+                call_command(
+                    'importar_extracto', ruta, '--empresa', self.empresa.nit, '--cuenta', 'B01',
+                    '--formato', 'csv', '--bloque', '1', stdout=io.StringIO()
+                )
+            with self.assertRaisesMessage(CommandError, 'no encontrada'):
+                call_command('importar_extracto', ruta, '--empresa', self.empresa.nit, '--cuenta', 'X')
+        self.assertFalse(ExtractoBancario.objects.filter(fecha__month=2).exists())
+
+
+class IngresoListTest(TesoreriaTestBase):
+    """Tests para el listado de ingresos paginado por cursor"""
+
+    def test_recorrer_por_cursor(self):
+        """Las páginas siguen el orden (fecha, número) sin repetir ni saltar ingresos"""
+        for numero, fecha in (('ING-1', '2024-01-05'), ('ING-2', '2024-01-05'), ('ING-3', '2024-01-06'),
+                              ('ING-4', '2024-01-07'), ('ING-5', '2024-01-04')):
+            self._pago(numero, 'cobro', fecha, '10.00', estado='pendiente')
+        self._pago('EGR-1', 'egreso', '2024-01-06', '10.00', estado='pendiente')
+        self.client.force_login(self.user)
+
+        vistos = []
+        params = {}
+        with mock.patch.object(IngresoListView, 'paginate_by', 2):
+            while True:
+                response = self.client.get(reverse('tesoreria:ingresos_lista'), params)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, '?page=')
+                vistos.append([ingreso.numero_pago for ingreso in response.context['ingresos']])
+                cursor = response.context['page_obj'].siguiente_cursor
+                if not cursor:
+                    break
+                params = {'cursor': cursor}
+        self.assertEqual(vistos, [['ING-4', 'ING-3'], ['ING-2', 'ING-1'], ['ING-5']])
+
+
+class FlujoCajaTest(TesoreriaTestBase):
+    """Tests para el flujo de caja paginado por cursor"""
+
+    def setUp(self):
+        super().setUp()
+        # Fechas repetidas para que el cursor desempate por id
+        for numero, tipo, fecha, valor in (
+            ('COB-0', 'cobro', '2023-12-28', '1000.00'),
+            ('COB-1', 'cobro', '2024-01-05', '500.00'),
+            ('EGR-1', 'egreso', '2024-01-05', '200.00'),
+            ('COB-2', 'cobro', '2024-01-10', '300.00'),
+            ('EGR-2', 'egreso', '2024-01-12', '150.00'),
+            ('COB-3', 'cobro', '2024-01-20', '50.00'),
+        ):
+            self._pago(numero, tipo, fecha, valor)
+        self._pago('EGR-3', 'egreso', '2024-01-15', '999.00', estado='pendiente')
+        self.client.force_login(self.user)
+
+    def _pagina(self, **params):
+        with mock.patch.object(FlujoCajaView, 'paginate_by', 2):
+            response = self.client.get(reverse('tesoreria:flujo_caja'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    def test_saldo_acumulado_entre_paginas(self):
+        """Totales del período y saldo acumulado continuo a través del cursor"""
+        paginas = []
+        params = {'fecha_inicio': '2024-01-01', 'fecha_fin': '2024-01-31'}
+        context = self._pagina(**params)
+        self.assertEqual(
+            (context['total_ingresos'], context['total_egresos'], context['count_ingresos'], context['count_egresos']),
+            (Decimal('850.00'), Decimal('350.00'), 3, 2)
+        )
+        self.assertEqual(context['flujo_neto'], Decimal('500.00'))
+        # Lo anterior a la fecha de inicio es el saldo inicial
+        self.assertEqual(context['saldo_inicial'], Decimal('1000.00'))
+        while True:
+            paginas.append([(m.numero_pago, m.saldo_acumulado) for m in context['movimientos']])
+            if not context['siguiente_cursor']:
+                break
+            context = self._pagina(cursor=context['siguiente_cursor'], **params)
+            self.assertFalse(context['es_primera_pagina'])
+
+        self.assertEqual(paginas, [
+            [('COB-1', Decimal('1500.00')), ('EGR-1', Decimal('1300.00'))],
+            [('COB-2', Decimal('1600.00')), ('EGR-2', Decimal('1450.00'))],
+            [('COB-3', Decimal('1500.00'))],
+        ])
+
+    def test_cursor_lleva_el_saldo(self):
+        """El saldo de las páginas siguientes sale del cursor, y un cursor inválido vuelve al inicio"""
+        cobro_1 = Pago.objects.get(numero_pago='COB-1')
+        huella = FlujoCajaView.huella_filtros(self.empresa.pk, None, None)
+        cursor = codificar_cursor([cobro_1.fecha_pago, cobro_1.pk, Decimal('10.00'), huella])
+        context = self._pagina(cursor=cursor)
+        self.assertEqual(context['saldo_inicial'], Decimal('10.00'))
+        self.assertEqual(
+            [(m.numero_pago, m.saldo_acumulado) for m in context['movimientos']],
+            [('EGR-1', Decimal('-190.00')), ('COB-2', Decimal('110.00'))]
+        )
+
+        # Un cursor de otra fecha de inicio (o de otra cuenta) tampoco sirve
+        con_fecha = self._pagina(fecha_inicio='2024-01-01')['siguiente_cursor']
+        for cursor in (
+            'no-es-un-cursor',
+            codificar_cursor([cobro_1.fecha_pago, cobro_1.pk, Decimal('10.00')]),
+            cursor + 'x',
+            con_fecha,
+        ):
+            context = self._pagina(cursor=cursor)
+            self.assertTrue(context['es_primera_pagina'])
+            self.assertEqual(context['saldo_inicial'], Decimal('0.00'))
+            self.assertEqual(
+                [(m.numero_pago, m.saldo_acumulado) for m in context['movimientos']],
+                [('COB-0', Decimal('1000.00')), ('COB-1', Decimal('1500.00'))]
+            )
+        context = self._pagina(cursor=con_fecha, cuenta=self.cuenta.pk, fecha_inicio='2024-01-01')
+        self.assertEqual(context['saldo_inicial'], Decimal('1000.00'))
+        self.assertTrue(context['es_primera_pagina'])
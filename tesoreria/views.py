@@ -7,8 +7,12 @@ from django.http import JsonResponse, HttpResponse
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.utils import timezone
+from django.conf import settings
 from django.db import models  # Para usar models.Sum
+from django.db.models import Case, F, Q, When, Window
+from django.db.models.functions import Coalesce
 from decimal import Decimal
+import hashlib
 import json
 from .models import Pago, CuentaBancaria, PagoDetalle
 from .forms import CobroForm
@@ -24,20 +28,24 @@ from contabilidad.asiento_helpers import (
 
 # Constantes para evitar strings mágicos duplicados
 EGRESOS_LISTA_URL = 'tesoreria:egresos_lista'
-import io
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-from core.constants import MSG_SELECCIONAR_EMPRESA, URL_CAMBIAR_EMPRESA
+from facturacion.pdf import facturas_para_pdf, nombre_archivo_factura, renderizar_factura_pdf
+from core.constants import MSG_SELECCIONAR_EMPRESA, URL_CAMBIAR_EMPRESA, DEFAULT_PAGINATE_BY
+from core.base_views import PaginacionKeysetMixin
+from core.keyset import CursorInvalido, codificar_cursor, decodificar_cursor, filtro_despues_de
+from core.streaming import TAMANO_LOTE_STREAMING, respuesta_csv
 
 # Constantes específicas del módulo
 URL_COBROS_LISTA = 'tesoreria:cobros_lista'
 URL_CUENTAS_LISTA = 'tesoreria:cuentas_lista'
 PAGOS_DETALLE_URL = 'tesoreria:pagos_detalle'
 
+
+def _mensaje_asiento(asiento):
+    """Texto sobre el asiento generado (o pendiente del resumen diario)"""
+    if asiento is None:
+        return 'Se contabilizará en el asiento resumen del día.'
+    return f'Asiento contable {asiento.numero_asiento} generado automáticamente.'
+
 # Vistas temporales básicas
 class TesoreriaIndexView(LoginRequiredMixin, TemplateView):
     template_name = 'tesoreria/index.html'
@@ -64,7 +72,7 @@ class PagoDeleteView(LoginRequiredMixin, DeleteView):
     model = Pago
     template_name = 'tesoreria/pagos_eliminar.html'
 
-class CobroListView(LoginRequiredMixin, EmpresaFilterMixin, ListView):
+class CobroListView(PaginacionKeysetMixin, LoginRequiredMixin, EmpresaFilterMixin, ListView):
     model = Pago
     template_name = 'tesoreria/cobros_lista.html'
     context_object_name = 'object_list'
@@ -178,25 +186,10 @@ class CobroCreateView(LoginRequiredMixin, EmpresaFilterMixin, CreateView):
             messages.error(self.request, MSG_SELECCIONAR_EMPRESA)
             return redirect(URL_CAMBIAR_EMPRESA)
         
-        # Generar número de cobro automático
-        ultimo_cobro = Pago.objects.filter(
-            empresa=empresa_activa,
-            tipo_pago='cobro'
-        ).order_by('-numero_pago').first()
-        
-        if ultimo_cobro:
-            try:
-                ultimo_numero = int(ultimo_cobro.numero_pago.replace('COB-', ''))
-                nuevo_numero = f'COB-{(ultimo_numero + 1):06d}'
-            except (ValueError, AttributeError):
-                nuevo_numero = 'COB-000001'
-        else:
-            nuevo_numero = 'COB-000001'
-        
         # Configurar el cobro
         form.instance.empresa = empresa_activa
         form.instance.tipo_pago = 'cobro'
-        form.instance.numero_pago = nuevo_numero
+        form.instance.numero_pago = ServicioTesoreria.siguiente_numero_cobro(empresa_activa)
         form.instance.creado_por = self.request.user
         form.instance.estado = 'pendiente'
         
@@ -273,7 +266,7 @@ class CobroDeleteView(LoginRequiredMixin, EmpresaFilterMixin, DeleteView):
         )
         return super().delete(request, *args, **kwargs)
 
-class IngresoListView(LoginRequiredMixin, EmpresaFilterMixin, ListView):
+class IngresoListView(PaginacionKeysetMixin, LoginRequiredMixin, EmpresaFilterMixin, ListView):
     model = Pago
     template_name = 'tesoreria/ingresos_lista.html'
     context_object_name = 'ingresos'
@@ -281,7 +274,9 @@ class IngresoListView(LoginRequiredMixin, EmpresaFilterMixin, ListView):
     
     def get_queryset(self):
         queryset = super().get_queryset().filter(tipo_pago='cobro')
-        return queryset.select_related('tercero', 'empresa', 'metodo_pago', 'cuenta_bancaria').order_by('-fecha_pago')
+        return queryset.select_related(
+            'tercero', 'empresa', 'metodo_pago', 'cuenta_bancaria'
+        ).order_by('-fecha_pago', '-numero_pago')
 
 class IngresoCreateView(LoginRequiredMixin, EmpresaFilterMixin, CreateView):
     model = Pago
@@ -322,8 +317,7 @@ class IngresoCreateView(LoginRequiredMixin, EmpresaFilterMixin, CreateView):
             asiento = crear_asiento_ingreso(form.instance, self.request.user)
             messages.success(
                 self.request,
-                f'Ingreso {nuevo_numero} registrado exitosamente. '
-                f'Asiento contable {asiento.numero_asiento} generado automáticamente.'
+                f'Ingreso {nuevo_numero} registrado exitosamente. {_mensaje_asiento(asiento)}'
             )
         except ValueError as e:
             messages.warning(
@@ -383,21 +377,16 @@ class EgresoCreateView(LoginRequiredMixin, EmpresaFilterMixin, CreateView):
         
         form.instance.numero_pago = nuevo_numero
         
-        # Descontar del saldo de la cuenta bancaria si hay cuenta seleccionada
+        # El saldo de la cuenta se descuenta cuando el egreso quede pagado (Pago.save)
         if form.instance.cuenta_bancaria:
             cuenta = form.instance.cuenta_bancaria
-            if cuenta.saldo_actual >= form.instance.valor:
-                cuenta.saldo_actual -= form.instance.valor
-                cuenta.save()
-            else:
+            saldo_suficiente, _ = ServicioTesoreria.validar_saldo_cuenta(cuenta, form.instance.valor)
+            if not saldo_suficiente:
                 messages.warning(
                     self.request,
                     f'Advertencia: La cuenta {cuenta.nombre} tiene saldo insuficiente. '
-                    f'Saldo: ${cuenta.saldo_actual:,.2f}, Egreso: ${form.instance.valor:,.2f}. '
-                    f'El descuento se realizó de todas formas.'
+                    f'Saldo: ${cuenta.saldo_actual:,.2f}, Egreso: ${form.instance.valor:,.2f}.'
                 )
-                cuenta.saldo_actual -= form.instance.valor
-                cuenta.save()
         
         # Guardar primero el egreso
         response = super().form_valid(form)
@@ -409,14 +398,13 @@ class EgresoCreateView(LoginRequiredMixin, EmpresaFilterMixin, CreateView):
                 messages.success(
                     self.request,
                     f'Egreso {nuevo_numero} registrado exitosamente. '
-                    f'Se descontaron ${form.instance.valor:,.2f} de {form.instance.cuenta_bancaria.nombre}. '
-                    f'Asiento contable {asiento.numero_asiento} generado automáticamente.'
+                    f'Se descontarán ${form.instance.valor:,.2f} de {form.instance.cuenta_bancaria.nombre} '
+                    f'al marcarlo como pagado. {_mensaje_asiento(asiento)}'
                 )
             else:
                 messages.success(
                     self.request,
-                    f'Egreso {nuevo_numero} registrado exitosamente. '
-                    f'Asiento contable {asiento.numero_asiento} generado automáticamente.'
+                    f'Egreso {nuevo_numero} registrado exitosamente. {_mensaje_asiento(asiento)}'
                 )
         except ValueError as e:
             messages.warning(
@@ -441,45 +429,9 @@ class EgresoUpdateView(LoginRequiredMixin, EmpresaFilterMixin, UpdateView):
         return super().get_queryset().filter(tipo_pago='egreso')
     
     def form_valid(self, form):
-        egreso_original = self.get_object()
-        
-        # Si cambió la cuenta o el valor, ajustar saldos
-        if egreso_original.cuenta_bancaria:
-            # Devolver el monto a la cuenta original
-            cuenta_original = egreso_original.cuenta_bancaria
-            cuenta_original.saldo_actual += egreso_original.valor
-            cuenta_original.save()
-            
-            # Descontar de la nueva cuenta si hay
-            if form.instance.cuenta_bancaria:
-                cuenta_nueva = form.instance.cuenta_bancaria
-                cuenta_nueva.saldo_actual -= form.instance.valor
-                cuenta_nueva.save()
-                messages.success(
-                    self.request,
-                    f'Egreso {egreso_original.numero_pago} actualizado. '
-                    f'Saldo ajustado: devuelto a {cuenta_original.nombre}, descontado de {cuenta_nueva.nombre}'
-                )
-            else:
-                messages.success(
-                    self.request,
-                    f'Egreso {egreso_original.numero_pago} actualizado. '
-                    f'Saldo de ${egreso_original.valor:,.2f} devuelto a {cuenta_original.nombre}'
-                )
-        else:
-            # No tenía cuenta antes, pero ahora sí
-            if form.instance.cuenta_bancaria:
-                cuenta_nueva = form.instance.cuenta_bancaria
-                cuenta_nueva.saldo_actual -= form.instance.valor
-                cuenta_nueva.save()
-                messages.success(
-                    self.request,
-                    f'Egreso {egreso_original.numero_pago} actualizado. '
-                    f'Descontados ${form.instance.valor:,.2f} de {cuenta_nueva.nombre}'
-                )
-            else:
-                messages.success(self.request, f'Egreso {egreso_original.numero_pago} actualizado exitosamente.')
-        
+        # Si el egreso está pagado, Pago.save ajusta el saldo de la cuenta
+        # anterior y de la nueva cuando cambian la cuenta o el valor
+        messages.success(self.request, f'Egreso {form.instance.numero_pago} actualizado exitosamente.')
         return super().form_valid(form)
 
 class EgresoDeleteView(LoginRequiredMixin, EmpresaFilterMixin, DeleteView):
@@ -493,17 +445,12 @@ class EgresoDeleteView(LoginRequiredMixin, EmpresaFilterMixin, DeleteView):
     def delete(self, request, *args, **kwargs):
         egreso = self.get_object()
         
-        # Devolver el monto a la cuenta bancaria si existe
-        if egreso.cuenta_bancaria:
-            cuenta = egreso.cuenta_bancaria
-            cuenta.saldo_actual += egreso.valor
-            cuenta.save()
-        
         # Anular asiento contable si existe
         asiento_anulado = anular_asiento_pago(egreso)
         
         # Mensaje de confirmación
-        if egreso.cuenta_bancaria:
+        # Pago.delete devuelve el valor a la cuenta si el egreso estaba pagado
+        if egreso.cuenta_bancaria and egreso.estado == 'pagado':
             msg = f'Egreso {egreso.numero_pago} eliminado exitosamente. Saldo de ${egreso.valor:,.2f} devuelto a {egreso.cuenta_bancaria.nombre}'
         else:
             msg = f'Egreso {egreso.numero_pago} eliminado exitosamente.'
@@ -531,7 +478,7 @@ class CuentaBancariaDetailView(LoginRequiredMixin, EmpresaFilterMixin, DetailVie
 class CuentaBancariaCreateView(LoginRequiredMixin, EmpresaFilterMixin, CreateView):
     model = CuentaBancaria
     template_name = 'tesoreria/cuentas_crear.html'
-    fields = ['codigo', 'nombre', 'tipo_cuenta', 'numero_cuenta', 'banco', 'saldo_actual', 'cuenta_contable', 'activa']
+    fields = ['codigo', 'nombre', 'tipo_cuenta', 'numero_cuenta', 'banco', 'saldo_inicial', 'cuenta_contable', 'activa']
     success_url = reverse_lazy(URL_CUENTAS_LISTA)
     
     def form_valid(self, form):
@@ -542,7 +489,7 @@ class CuentaBancariaCreateView(LoginRequiredMixin, EmpresaFilterMixin, CreateVie
 class CuentaBancariaUpdateView(LoginRequiredMixin, EmpresaFilterMixin, UpdateView):
     model = CuentaBancaria
     template_name = 'tesoreria/cuentas_editar.html'
-    fields = ['codigo', 'nombre', 'tipo_cuenta', 'numero_cuenta', 'banco', 'saldo_actual', 'cuenta_contable', 'activa']
+    fields = ['codigo', 'nombre', 'tipo_cuenta', 'numero_cuenta', 'banco', 'saldo_inicial', 'cuenta_contable', 'activa']
     success_url = reverse_lazy(URL_CUENTAS_LISTA)
     
     def form_valid(self, form):
@@ -560,7 +507,20 @@ class CuentaBancariaDeleteView(LoginRequiredMixin, EmpresaFilterMixin, DeleteVie
         return super().delete(request, *args, **kwargs)
 
 class FlujoCajaView(LoginRequiredMixin, TemplateView):
+    """
+    Flujo de caja con saldo acumulado.
+    
+    - Totales en una sola consulta con agregación condicional
+    - Saldo acumulado calculado en la base con una función de ventana
+    - Paginación por cursor sobre (fecha_pago, id); el cursor lleva el saldo
+      con el que termina la página, así cada página cuesta lo mismo
+    - El saldo depende de la empresa, la cuenta y la fecha de inicio: el
+      cursor guarda una huella de esos filtros y si no coincide con los de
+      la petición se vuelve a la primera página
+    """
     template_name = 'tesoreria/flujo_caja.html'
+    paginate_by = DEFAULT_PAGINATE_BY
+    orden_flujo = ('fecha_pago', 'id')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -575,71 +535,113 @@ class FlujoCajaView(LoginRequiredMixin, TemplateView):
         cuenta_id = self.request.GET.get('cuenta')
         
         # Base queryset: solo pagos pagados de la empresa activa
-        movimientos = Pago.objects.filter(
-            empresa=empresa_activa,
-            estado='pagado'
-        ).select_related('tercero', 'cuenta_bancaria', 'metodo_pago')
+        pagos = Pago.objects.filter(empresa=empresa_activa, estado='pagado')
+        if cuenta_id:
+            pagos = pagos.filter(cuenta_bancaria_id=cuenta_id)
+            context['cuenta_id'] = cuenta_id
         
-        # Aplicar filtros
+        periodo = pagos
         if fecha_inicio:
-            movimientos = movimientos.filter(fecha_pago__gte=fecha_inicio)
+            periodo = periodo.filter(fecha_pago__gte=fecha_inicio)
             context['fecha_inicio'] = fecha_inicio
-        
         if fecha_fin:
-            movimientos = movimientos.filter(fecha_pago__lte=fecha_fin)
+            periodo = periodo.filter(fecha_pago__lte=fecha_fin)
             context['fecha_fin'] = fecha_fin
         
-        if cuenta_id:
-            movimientos = movimientos.filter(cuenta_bancaria_id=cuenta_id)
-            context['cuenta_id'] = cuenta_id
-        
-        # Ordenar por fecha
-        movimientos = movimientos.order_by('fecha_pago', 'id')
-        
-        # Calcular totales
-        total_ingresos = movimientos.filter(tipo_pago='cobro').aggregate(
-            total=models.Sum('valor')
-        )['total'] or 0
-        
-        total_egresos = movimientos.filter(tipo_pago='egreso').aggregate(
-            total=models.Sum('valor')
-        )['total'] or 0
-        
-        count_ingresos = movimientos.filter(tipo_pago='cobro').count()
-        count_egresos = movimientos.filter(tipo_pago='egreso').count()
-        
-        flujo_neto = total_ingresos - total_egresos
+        # Totales del período en una sola consulta
+        totales = periodo.aggregate(
+            total_ingresos=Coalesce(models.Sum('valor', filter=Q(tipo_pago='cobro')), Decimal('0.00')),
+            total_egresos=Coalesce(models.Sum('valor', filter=Q(tipo_pago='egreso')), Decimal('0.00')),
+            count_ingresos=models.Count('id', filter=Q(tipo_pago='cobro')),
+            count_egresos=models.Count('id', filter=Q(tipo_pago='egreso')),
+        )
         
-        # Calcular saldo acumulado para cada movimiento
-        saldo_acumulado = 0
-        movimientos_con_saldo = []
-        for mov in movimientos:
-            if mov.tipo_pago == 'cobro':
-                saldo_acumulado += mov.valor
-            else:
-                saldo_acumulado -= mov.valor
-            mov.saldo_acumulado = saldo_acumulado
-            movimientos_con_saldo.append(mov)
+        huella = self.huella_filtros(empresa_activa.pk, fecha_inicio, cuenta_id)
+        movimientos, saldo_inicial, siguiente, es_primera = self._obtener_pagina(pagos, periodo, fecha_inicio, huella)
         
         # Obtener todas las cuentas bancarias para el filtro
         cuentas = CuentaBancaria.objects.filter(
             empresa=empresa_activa,
-            activo=True
-        ).order_by('nombre_banco')
+            activa=True
+        ).order_by('nombre')
         
         context.update({
-            'movimientos': movimientos_con_saldo,
-            'total_ingresos': total_ingresos,
-            'total_egresos': total_egresos,
-            'count_ingresos': count_ingresos,
-            'count_egresos': count_egresos,
-            'flujo_neto': flujo_neto,
+            'movimientos': movimientos,
+            'saldo_inicial': saldo_inicial,
+            'siguiente_cursor': siguiente,
+            'es_primera_pagina': es_primera,
+            'flujo_neto': totales['total_ingresos'] - totales['total_egresos'],
             'cuentas': cuentas,
+            **totales,
         })
         
         return context
+    
+    @staticmethod
+    def huella_filtros(empresa_id, fecha_inicio, cuenta_id):
+        """Resumen de los filtros de los que depende el saldo del cursor"""
+        filtros = json.dumps([empresa_id, fecha_inicio or '', cuenta_id or ''])
+        return hashlib.sha256(filtros.encode()).hexdigest()[:16]
+    
+    def _obtener_pagina(self, pagos, periodo, fecha_inicio, huella):
+        """
+        Devuelve (movimientos, saldo_inicial, siguiente_cursor, es_primera).
+        
+        En la primera página el saldo inicial es la suma de los movimientos
+        anteriores a ``fecha_inicio``; en las siguientes viene en el cursor.
+        """
+        movimiento = Case(
+            When(tipo_pago='cobro', then=F('valor')),
+            default=-F('valor'),
+            output_field=models.DecimalField(max_digits=15, decimal_places=2),
+        )
+        
+        try:
+            cursor = decodificar_cursor(self.request.GET.get('cursor'), len(self.orden_flujo) + 2)
+        except CursorInvalido:
+            cursor = None
+        # Un cursor de otros filtros trae un saldo que no corresponde
+        if cursor and cursor[-1] != huella:
+            cursor = None
+        
+        if cursor:
+            saldo_inicial = Decimal(cursor[-2])
+            periodo = periodo.filter(filtro_despues_de(self.orden_flujo, cursor[:-2]))
+        elif fecha_inicio:
+            saldo_inicial = pagos.filter(fecha_pago__lt=fecha_inicio).aggregate(
+                saldo=Coalesce(models.Sum(movimiento), Decimal('0.00'))
+            )['saldo']
+        else:
+            saldo_inicial = Decimal('0.00')
+        
+        orden = [F(campo).asc() for campo in self.orden_flujo]
+        filas = list(
+            periodo.select_related('tercero', 'cuenta_bancaria', 'metodo_pago')
+            .annotate(saldo_pagina=Window(models.Sum(movimiento), order_by=orden))
+            .order_by(*self.orden_flujo)[:self.paginate_by + 1]
+        )
+        
+        hay_siguiente = len(filas) > self.paginate_by
+        movimientos = filas[:self.paginate_by]
+        for mov in movimientos:
+            mov.saldo_acumulado = saldo_inicial + mov.saldo_pagina
+        
+        siguiente = None
+        if hay_siguiente:
+            ultimo = movimientos[-1]
+            siguiente = codificar_cursor([ultimo.fecha_pago, ultimo.id, ultimo.saldo_acumulado, huella])
+        
+        return movimientos, saldo_inicial, siguiente, not cursor
 
 class SaldosCuentasView(LoginRequiredMixin, TemplateView):
+    """
+    Saldos por cuenta bancaria.
+    
+    Por defecto los ingresos y egresos se calculan con una única consulta
+    agrupada por cuenta. Con TESORERIA_USAR_SALDOS_MANTENIDOS se usa el
+    saldo actual que se mantiene en cada cuenta al pagar o anular pagos
+    (verificable con el comando verificar_saldos_bancarios).
+    """
     template_name = 'tesoreria/saldos_cuentas.html'
     
     def get_context_data(self, **kwargs):
@@ -652,43 +654,36 @@ class SaldosCuentasView(LoginRequiredMixin, TemplateView):
         # Obtener todas las cuentas bancarias activas
         cuentas = CuentaBancaria.objects.filter(
             empresa=empresa_activa,
-            activo=True
-        ).order_by('nombre_banco')
+            activa=True
+        ).order_by('nombre')
+        
+        usar_mantenidos = getattr(settings, 'TESORERIA_USAR_SALDOS_MANTENIDOS', False)
+        movimientos = {} if usar_mantenidos else ServicioTesoreria.calcular_movimientos_cuentas(empresa_activa)
         
         cuentas_con_saldo = []
-        saldo_total = 0
+        saldo_total = Decimal('0.00')
         
         for cuenta in cuentas:
-            # Calcular ingresos (cobros)
-            ingresos = Pago.objects.filter(
-                empresa=empresa_activa,
-                cuenta_bancaria=cuenta,
-                tipo_pago='cobro',
-                estado='pagado'
-            ).aggregate(total=models.Sum('valor'))['total'] or 0
-            
-            # Calcular egresos
-            egresos = Pago.objects.filter(
-                empresa=empresa_activa,
-                cuenta_bancaria=cuenta,
-                tipo_pago='egreso',
-                estado='pagado'
-            ).aggregate(total=models.Sum('valor'))['total'] or 0
-            
-            # Saldo de la cuenta
-            saldo_cuenta = cuenta.saldo_inicial + ingresos - egresos
+            if usar_mantenidos:
+                ingresos = egresos = None
+                saldo_cuenta = cuenta.saldo_actual
+            else:
+                ingresos, egresos = movimientos.get(cuenta.pk, (Decimal('0.00'), Decimal('0.00')))
+                saldo_cuenta = cuenta.saldo_inicial + ingresos - egresos
             saldo_total += saldo_cuenta
             
             cuentas_con_saldo.append({
                 'cuenta': cuenta,
                 'ingresos': ingresos,
                 'egresos': egresos,
+                'movimiento_neto': saldo_cuenta - cuenta.saldo_inicial,
                 'saldo': saldo_cuenta,
             })
         
         context.update({
             'cuentas_con_saldo': cuentas_con_saldo,
             'saldo_total': saldo_total,
+            'usar_saldos_mantenidos': usar_mantenidos,
         })
         
         return context
@@ -930,7 +925,7 @@ def generar_factura_pdf(request, factura_pk):
     """
     Genera un PDF de la factura con el formato: CODIGO_NOMBRECLIENTE.pdf
     """
-    factura = get_object_or_404(Factura, pk=factura_pk)
+    factura = get_object_or_404(facturas_para_pdf(), pk=factura_pk)
     empresa_activa = getattr(request, 'empresa_activa', None)
     
     # Verificar que la factura pertenezca a la empresa activa
@@ -938,130 +933,8 @@ def generar_factura_pdf(request, factura_pk):
         messages.error(request, 'No tienes permiso para ver esta factura.')
         return redirect('facturacion:facturas_lista')
     
-    # Crear el nombre del archivo
-    nombre_cliente = factura.cliente.razon_social.replace(' ', '_').replace('/', '_')
-    nombre_archivo = f"{factura.numero_factura}_{nombre_cliente}.pdf"
-    
-    # Crear el PDF en memoria
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    
-    # Estilos
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    
-    # Título
-    elements.append(Paragraph("FACTURA DE VENTA", title_style))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Información de la empresa
-    empresa_data = [
-        ['EMPRESA:', factura.empresa.razon_social],
-        ['NIT:', factura.empresa.nit],
-        ['Dirección:', factura.empresa.direccion or 'N/A'],
-        ['Teléfono:', factura.empresa.telefono or 'N/A'],
-    ]
-    
-    empresa_table = Table(empresa_data, colWidths=[2*inch, 4*inch])
-    empresa_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#ecf0f1')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2c3e50')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    elements.append(empresa_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Información de la factura
-    factura_data = [
-        ['FACTURA N°:', factura.numero_factura],
-        ['FECHA:', factura.fecha_factura.strftime('%d/%m/%Y')],
-        ['TIPO VENTA:', factura.get_tipo_venta_display()],  # type: ignore[attr-defined]
-        ['ESTADO:', factura.get_estado_display()],  # type: ignore[attr-defined]
-    ]
-    
-    factura_table = Table(factura_data, colWidths=[2*inch, 4*inch])
-    factura_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#3498db')),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.white),
-        ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#2c3e50')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    elements.append(factura_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Información del cliente
-    cliente_data = [
-        ['CLIENTE:', factura.cliente.razon_social],
-        ['DOCUMENTO:', f"{factura.cliente.get_tipo_documento_display()}: {factura.cliente.numero_documento}"],
-        ['Dirección:', factura.cliente.direccion or 'N/A'],
-        ['Teléfono:', factura.cliente.telefono or 'N/A'],
-        ['Email:', factura.cliente.email or 'N/A'],
-    ]
-    
-    cliente_table = Table(cliente_data, colWidths=[2*inch, 4*inch])
-    cliente_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#ecf0f1')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2c3e50')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    elements.append(cliente_table)
-    elements.append(Spacer(1, 0.4*inch))
-    
-    # Totales
-    totales_data = [
-        ['SUBTOTAL:', f"${factura.subtotal:,.2f}"],
-        ['IMPUESTOS:', f"${factura.total_impuestos:,.2f}"],
-        ['TOTAL:', f"${factura.total:,.2f}"],
-    ]
-    
-    totales_table = Table(totales_data, colWidths=[4*inch, 2*inch])
-    totales_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -2), colors.HexColor('#ecf0f1')),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#27ae60')),
-        ('TEXTCOLOR', (0, 0), (-1, -2), colors.HexColor('#2c3e50')),
-        ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -2), 11),
-        ('FONTSIZE', (0, -1), (-1, -1), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    elements.append(totales_table)
-    
-    # Observaciones
-    if factura.observaciones:
-        elements.append(Spacer(1, 0.3*inch))
-        elements.append(Paragraph(f"<b>Observaciones:</b> {factura.observaciones}", styles['Normal']))
-    
-    # Construir el PDF
-    doc.build(elements)
-    
-    # Obtener el valor del buffer
-    pdf = buffer.getvalue()
-    buffer.close()
+    nombre_archivo = nombre_archivo_factura(factura)
+    pdf = renderizar_factura_pdf(factura)
     
     # Crear la respuesta HTTP
     response = HttpResponse(content_type='application/pdf')
@@ -1154,7 +1027,6 @@ from django.views.generic import TemplateView
 from django.db.models import Sum, Count, Q
 from django.utils.dateparse import parse_date
 from django.http import HttpResponse
-import csv
 
 class PagosReporteView(LoginRequiredMixin, TemplateView):
     template_name = 'tesoreria/pagos_reporte.html'
@@ -1193,10 +1065,13 @@ class PagosReporteView(LoginRequiredMixin, TemplateView):
 
 @login_required
 @require_http_methods(["GET"])
-def pagos_reporte_csv(request):
+async def pagos_reporte_csv(request):
     """
     Genera reporte CSV de pagos con filtros opcionales.
     
+    Vista async: las filas se leen con el ORM async y se envían en
+    streaming, así bajo ASGI una descarga grande no ocupa un hilo.
+    
     Security Note: Esta vista usa método GET para operación de solo lectura (exportación).
     No requiere protección CSRF adicional ya que no modifica estado del servidor.
     Cumple con RFC 7231 (métodos seguros HTTP) y mejores prácticas de Django.
@@ -1207,27 +1082,32 @@ def pagos_reporte_csv(request):
     if empresa:
         qs = qs.filter(empresa=empresa)
 
-    fecha_desde = request.GET.get('desde')
-    fecha_hasta = request.GET.get('hasta')
+    fecha_desde = parse_date(request.GET.get('desde') or '')
+    fecha_hasta = parse_date(request.GET.get('hasta') or '')
     tipo = request.GET.get('tipo')
     estado = request.GET.get('estado')
 
     if fecha_desde:
-        qs = qs.filter(fecha__date__gte=parse_date(fecha_desde))
+        qs = qs.filter(fecha_pago__gte=fecha_desde)
     if fecha_hasta:
-        qs = qs.filter(fecha__date__lte=parse_date(fecha_hasta))
+        qs = qs.filter(fecha_pago__lte=fecha_hasta)
     if tipo in dict(Pago.TIPO_PAGO_CHOICES):
-        qs = qs.filter(tipo=tipo)
+        qs = qs.filter(tipo_pago=tipo)
     if estado in dict(Pago.ESTADO_CHOICES):
         qs = qs.filter(estado=estado)
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="reporte_pagos.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'Fecha', 'Tipo', 'Estado', 'Cliente', 'Valor'])
-    for p in qs.select_related('cliente'):
-        writer.writerow([p.id, getattr(p, 'fecha', ''), p.tipo, p.estado, getattr(p.cliente, 'razon_social', ''), p.valor])
-    return response
+    campos = ('id', 'numero_pago', 'fecha_pago', 'tipo_pago', 'estado', 'tercero__razon_social', 'valor')
+    pagos = qs.order_by('fecha_pago', 'id').values(*campos)
+
+    async def filas():
+        async for pago in pagos.aiterator(chunk_size=TAMANO_LOTE_STREAMING):
+            yield [pago[campo] for campo in campos]
+
+    return respuesta_csv(
+        'reporte_pagos.csv',
+        ['ID', 'Número', 'Fecha', 'Tipo', 'Estado', 'Tercero', 'Valor'],
+        filas(),
+    )
 
 
 @login_required